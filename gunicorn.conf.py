@@ -193,6 +193,16 @@ def pre_exec(server):
     """Called before exec() in worker."""
     pass
 
+def worker_exit(server, worker):
+    """Called in the worker just before it exits: drain write-behind buffers."""
+    import logging
+    try:
+        from netcup_api_filter.lifecycle import run_shutdown_hooks
+    except ImportError:
+        return
+    run_shutdown_hooks()
+    logging.getLogger("gunicorn").info(f"Worker {worker.pid} flushed pending writes")
+
 def child_exit(server, worker):
     """Called when worker exits."""
     import logging
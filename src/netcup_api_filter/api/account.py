@@ -36,6 +36,7 @@ from ..account_auth import (
     verify_2fa,
     verify_registration,
 )
+from ..backends.registry import evict_backend
 from ..models import (
     Account, AccountRealm, ActivityLog, APIToken, RegistrationRequest, db,
     # Multi-backend models
@@ -1312,11 +1313,12 @@ def ddns_update(realm_id):
             api_key=config.get('api_key'),
             api_password=config.get('api_password'),
             api_url=config.get('api_url', 'https://ccp.netcup.net/run/webservice/servers/endpoint.php?JSON'),
-            timeout=config.get('timeout', 30)
+            timeout=config.get('timeout', 30),
+            pooled=True
         )
         
-        # Get existing records
-        existing_records = netcup.info_dns_records(domain)
+        # Get existing records (uncached: the full set is sent back)
+        existing_records = netcup.info_dns_records(domain, use_cache=False)
         
         # Find and update the record, or create new
         record_found = False
@@ -1407,7 +1409,8 @@ def dns_records(realm_id):
                 api_key=config.get('api_key'),
                 api_password=config.get('api_password'),
                 api_url=config.get('api_url', 'https://ccp.netcup.net/run/webservice/servers/endpoint.php?JSON'),
-                timeout=config.get('timeout', 30)
+                timeout=config.get('timeout', 30),
+                pooled=True
             )
             
             # Get DNS records for the domain
@@ -1517,11 +1520,12 @@ def dns_record_create(realm_id):
                 api_key=config.get('api_key'),
                 api_password=config.get('api_password'),
                 api_url=config.get('api_url'),
-                timeout=config.get('timeout', 30)
+                timeout=config.get('timeout', 30),
+                pooled=True
             )
             
-            # Get existing records
-            existing_records = netcup.info_dns_records(realm.domain)
+            # Get existing records (uncached: the full set is sent back)
+            existing_records = netcup.info_dns_records(realm.domain, use_cache=False)
             
             # Add new record
             new_record = {
@@ -1591,11 +1595,12 @@ def dns_record_edit(realm_id, record_id):
             api_key=config.get('api_key'),
             api_password=config.get('api_password'),
             api_url=config.get('api_url'),
-            timeout=config.get('timeout', 30)
+            timeout=config.get('timeout', 30),
+            pooled=True
         )
         
-        # Get existing records
-        existing_records = netcup.info_dns_records(realm.domain)
+        # Get existing records (uncached: the full set is sent back)
+        existing_records = netcup.info_dns_records(realm.domain, use_cache=False)
         
         # Find the record to edit
         record = None
@@ -1675,11 +1680,12 @@ def dns_record_delete(realm_id, record_id):
             api_key=config.get('api_key'),
             api_password=config.get('api_password'),
             api_url=config.get('api_url'),
-            timeout=config.get('timeout', 30)
+            timeout=config.get('timeout', 30),
+            pooled=True
         )
         
-        # Get existing records
-        existing_records = netcup.info_dns_records(realm.domain)
+        # Get existing records (uncached: the full set is sent back)
+        existing_records = netcup.info_dns_records(realm.domain, use_cache=False)
         
         # Find and mark the record for deletion
         record_to_delete = None
@@ -2376,6 +2382,7 @@ def backend_edit(backend_id):
         backend.display_name = display_name
         backend.config = json.dumps(config)
         db.session.commit()
+        evict_backend(backend.id)
         
         flash('Backend updated successfully', 'success')
         return redirect(url_for('account.backend_detail', backend_id=backend.id))
@@ -2507,6 +2514,7 @@ def backend_delete(backend_id):
     display_name = backend.display_name
     db.session.delete(backend)
     db.session.commit()
+    evict_backend(backend_id)
     
     flash(f'Backend "{display_name}" deleted', 'success')
     return redirect(url_for('account.backends_list'))
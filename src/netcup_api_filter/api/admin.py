@@ -31,6 +31,7 @@ from ..account_auth import (
     generate_secure_password,
     reject_account,
 )
+from ..backends.registry import evict_backend
 from ..geoip_service import geoip_location, get_geoip_status
 from ..models import (
     Account, AccountRealm, ActivityLog, APIToken, db, Settings,
@@ -47,6 +48,7 @@ from ..realm_token_service import (
     reject_realm,
 )
 from ..database import get_setting, set_setting
+from ..token_cache import invalidate_token
 from ..config_defaults import get_default
 
 import ipaddress
@@ -1532,13 +1534,16 @@ def realm_revoke(realm_id):
             token.revoked_reason = 'Realm revoked'
             revoked_count += 1
     
+    db.session.add(ActivityLog(
+        account_id=realm.account_id,
+        action='realm_revoked',
+        source_ip=request.remote_addr or 'unknown',
+        status='success',
+        status_reason=f'Admin {g.admin.username} revoked realm {realm.realm_value}.{realm.domain}, '
+                      f'deactivated {revoked_count} tokens',
+    ))
     db.session.commit()
     
-    # Log the action
-    log_activity('realm_revoked', 'success', 
-                details=f'Revoked realm {realm.realm_value}.{realm.domain}, deactivated {revoked_count} tokens',
-                actor=g.admin.username)
-    
     flash(f'Realm revoked. {revoked_count} tokens deactivated.', 'success')
     return redirect(url_for('admin.realm_detail', realm_id=realm_id))
 
@@ -1585,17 +1590,22 @@ def token_revoke(token_id):
     token.revoked_at = datetime.utcnow()
     token.revoked_reason = revoke_reason
     
+    db.session.add(ActivityLog(
+        token_id=token.id,
+        account_id=account.id,
+        action='token_revoked',
+        source_ip=request.remote_addr or 'unknown',
+        status='success',
+        status_reason=f'Admin {g.admin.username} revoked token {token.token_prefix} '
+                      f'for realm {token.realm.realm_value}.{token.realm.domain}',
+    ))
     db.session.commit()
+    invalidate_token(token.id)
     
     # Send notification to token owner
     from ..notification_service import notify_token_revoked
     notify_token_revoked(account, token, g.admin.username, revoke_reason)
     
-    # Log the action
-    log_activity('token_revoked', 'success', 
-                details=f'Revoked token {token.token_prefix} for realm {token.realm.realm_value}.{token.realm.domain}',
-                actor=g.admin.username)
-    
     flash('Token has been revoked', 'success')
     return redirect(url_for('admin.token_detail', token_id=token_id))
 
@@ -2096,6 +2106,45 @@ def app_logs():
     return render_template('admin/app_logs.html')
 
 
+def _runtime_stats() -> dict:
+    """Counters of the in-process caches, pools and write-behind queues.
+    
+    All of them are per worker process, so the numbers describe the worker
+    that served the request.
+    """
+    from ..async_runtime import get_async_stats
+    from ..audit_writer import get_writer_stats
+    from ..backends.registry import get_backend_cache_stats
+    from ..change_journal import get_change_journal_stats
+    from ..http_transport import get_transport_stats
+    from ..mutation_batcher import get_batcher_stats
+    from ..permission_snapshot import get_cache_stats as get_permission_cache_stats
+    from ..probe_guard import get_guard_stats
+    from ..record_index import get_record_index_stats
+    from ..settings_cache import get_settings_cache_stats
+    from ..single_flight import get_single_flight_stats
+    from ..token_cache import get_cache_stats as get_token_cache_stats
+    from ..usage_buffer import get_buffer_stats
+    from ..zone_cache import get_zone_cache_stats
+    
+    return {
+        'token_cache': get_token_cache_stats(),
+        'permission_cache': get_permission_cache_stats(),
+        'settings_cache': get_settings_cache_stats(),
+        'backend_cache': get_backend_cache_stats(),
+        'zone_cache': get_zone_cache_stats(),
+        'single_flight': get_single_flight_stats(),
+        'mutation_batcher': get_batcher_stats(),
+        'record_index': get_record_index_stats(),
+        'change_journal': get_change_journal_stats(),
+        'http_transport': get_transport_stats(),
+        'async_runtime': get_async_stats(),
+        'usage_buffer': get_buffer_stats(),
+        'audit_writer': get_writer_stats(),
+        'probe_guard': get_guard_stats(),
+    }
+
+
 @admin_bp.route('/system')
 @require_admin
 def system_info():
@@ -2240,6 +2289,11 @@ def system_info():
         'geoip': geoip_status,
     }
     
+    # Upstream circuit breakers (this worker process)
+    from ..circuit_breaker import get_breaker_stats
+    circuit_breakers = get_breaker_stats()
+    runtime_stats = _runtime_stats()
+    
     # Get installed Python packages (system-wide)
     python_packages = []
     try:
@@ -2350,6 +2404,8 @@ def system_info():
                           server=server_info,
                           services=services,
                           geoip_info=geoip_info,
+                          circuit_breakers=circuit_breakers,
+                          runtime_stats=runtime_stats,
                           python_packages=python_packages,
                           vendored_packages=vendored_packages,
                           security_settings=security_settings,
@@ -2640,6 +2696,15 @@ def api_stats():
     })
 
 
+@admin_bp.route('/api/runtime-stats')
+@require_admin
+def api_runtime_stats():
+    """Get this worker's cache, pool, queue and circuit breaker counters as JSON."""
+    from ..circuit_breaker import get_breaker_stats
+    
+    return jsonify(dict(_runtime_stats(), circuit_breakers=get_breaker_stats()))
+
+
 # ============================================================================
 # Bulk Actions (P7.6)
 # ============================================================================
@@ -3216,6 +3281,7 @@ def backend_edit(backend_id):
             backend.config = json.dumps(config)
             
             db.session.commit()
+            evict_backend(backend.id)
             flash('Backend service updated successfully', 'success')
             return redirect(url_for('admin.backend_detail', backend_id=backend_id))
             
@@ -3282,6 +3348,7 @@ def backend_enable(backend_id):
     backend = BackendService.query.get_or_404(backend_id)
     backend.is_active = True
     db.session.commit()
+    evict_backend(backend.id)
     flash(f'Backend "{backend.display_name}" enabled', 'success')
     return redirect(url_for('admin.backend_detail', backend_id=backend_id))
 
@@ -3293,6 +3360,7 @@ def backend_disable(backend_id):
     backend = BackendService.query.get_or_404(backend_id)
     backend.is_active = False
     db.session.commit()
+    evict_backend(backend.id)
     flash(f'Backend "{backend.display_name}" disabled', 'warning')
     return redirect(url_for('admin.backend_detail', backend_id=backend_id))
 
@@ -3311,6 +3379,7 @@ def backend_delete(backend_id):
     service_name = backend.service_name
     db.session.delete(backend)
     db.session.commit()
+    evict_backend(backend_id)
     flash(f'Backend "{service_name}" deleted', 'success')
     return redirect(url_for('admin.backends'))
 
@@ -19,14 +19,19 @@ Response Format:
 - Protocol-compliant text responses (not JSON)
 - DynDNS2: good/nochg/badauth/!yours/notfqdn/dnserr/911
 - No-IP: good/nochg/nohost/abuse/dnserr/911
+- 911 with HTTP 503 and Retry-After while the backend's circuit breaker is
+  open (see circuit_breaker)
 """
 import ipaddress
 import logging
 import os
 from flask import Blueprint, g, request
 
+from ..async_runtime import run_upstream, upstream_io_enabled
+from ..circuit_breaker import BackendUnavailable
 from ..database import get_setting
-from ..netcup_client import extract_dns_records, mutation_failed, mutation_message
+from ..netcup_client import mutation_failed, mutation_message
+from ..record_index import get_record_index
 from ..token_auth import (
     check_permission,
     extract_bearer_token,
@@ -197,19 +202,25 @@ def validate_hostname_format(hostname):
 # =============================================================================
 
 def get_netcup_client():
-    """Get configured Netcup client."""
-    from ..netcup_client import NetcupClient
+    """Get configured Netcup client (sharing the process-wide CCP session pool).
+    
+    The asyncio client when ASYNC_UPSTREAM_IO is set; wait for its calls
+    with run_upstream().
+    """
+    from ..netcup_client import AsyncNetcupClient, NetcupClient
     
     config = get_setting('netcup_config')
     if not config:
         return None
     
-    return NetcupClient(
+    client_class = AsyncNetcupClient if upstream_io_enabled() else NetcupClient
+    return client_class(
         customer_id=config.get('customer_id'),
         api_key=config.get('api_key'),
         api_password=config.get('api_password'),
         api_url=config.get('api_url', 'https://ccp.netcup.net/run/webservice/servers/endpoint.php?JSON'),
-        timeout=config.get('timeout', 30)
+        timeout=config.get('timeout', 30),
+        pooled=True
     )
 
 
@@ -217,6 +228,9 @@ def update_dns_record(domain, hostname, ip_address, record_type):
     """
     Update or create DNS record via Netcup API.
     
+    Unchanged addresses recently confirmed by a read or write through the
+    filter are answered from the record index without contacting Netcup.
+    
     Args:
         domain: Domain name (e.g., example.com)
         hostname: Record hostname (e.g., device or @ for apex)
@@ -230,22 +244,13 @@ def update_dns_record(domain, hostname, ip_address, record_type):
     if not netcup:
         return False, 'Netcup API not configured', False
     
+    if get_record_index().is_current(netcup.cache_namespace, domain, hostname, record_type, ip_address):
+        logger.info(f"DNS record already up to date (indexed): {hostname}.{domain} {record_type} {ip_address}")
+        return True, None, False
+    
     try:
-        # Fetch current records (list or Netcup-style envelope)
-        info_result = netcup.info_dns_records(domain)
-
-        if mutation_failed(info_result):
-            error_msg = mutation_message(info_result, 'Failed to fetch records')
-            logger.error(f"Netcup API error fetching records: {error_msg}")
-            return False, error_msg, False
-        records = extract_dns_records(info_result)
-
-        # Find existing record
-        existing = None
-        for rec in records:
-            if rec.get('hostname') == hostname and rec.get('type') == record_type:
-                existing = rec
-                break
+        # Indexed record set (shared with the zone cache; not modified here)
+        existing = run_upstream(netcup.dns_snapshot(domain)).first(hostname, record_type)
         
         # Check if update needed
         if existing and existing.get('destination') == ip_address:
@@ -270,7 +275,7 @@ def update_dns_record(domain, hostname, ip_address, record_type):
             logger.info(f"Creating DNS record: {hostname}.{domain} {record_type} {ip_address}")
         
         # Execute update
-        result = netcup.update_dns_records(domain, [record])
+        result = run_upstream(netcup.submit_dns_records(domain, [record]))
 
         if mutation_failed(result):
             error_msg = mutation_message(result, 'Failed to update record')
@@ -279,6 +284,9 @@ def update_dns_record(domain, hostname, ip_address, record_type):
 
         return True, None, True  # Success with change
     
+    except BackendUnavailable:
+        # Answered with 911 and Retry-After by process_ddns_update
+        raise
     except Exception as e:
         logger.exception(f"Error updating DNS record for {domain}")
         return False, str(e), False
@@ -486,7 +494,30 @@ def process_ddns_update(protocol='dyndns2'):
         return response_func(permission_error)
     
     # Update DNS record
-    success, error_msg, changed = update_dns_record(domain, record_name, ip_address, record_type)
+    try:
+        success, error_msg, changed = update_dns_record(domain, record_name, ip_address, record_type)
+    except BackendUnavailable as e:
+        # Backend failing: fail fast; clients back off on 911
+        logger.warning(f"DDNS {protocol}: backend unavailable for {hostname}: {e}")
+        log_activity(
+            auth=g.auth,
+            action='ddns_update',
+            operation='update',
+            domain=domain,
+            record_type=record_type,
+            record_name=record_name,
+            source_ip=client_ip,
+            status='error',
+            status_reason=str(e),
+            request_data={
+                'protocol': protocol,
+                'hostname': hostname,
+                'ip': ip_address,
+                'detected_ip': client_ip
+            }
+        )
+        text, _, headers = response_func('911')
+        return text, 503, {**headers, 'Retry-After': str(e.retry_after)}
     
     if not success:
         logger.error(f"DDNS {protocol}: DNS update failed for {hostname}: {error_msg}")
@@ -8,18 +8,51 @@ Routes:
 - POST /api/dns/<domain>/records - Create record
 - PUT  /api/dns/<domain>/records/<id> - Update record
 - DELETE /api/dns/<domain>/records/<id> - Delete record
+- POST /api/dns/<domain>/records:batch - Create/update/delete several records
+- GET  /api/dns/<domain>/changes?since=<cursor> - Records changed since a cursor
 - GET  /api/myip - Get caller's public IP
+
+The record listing carries an ETag computed from the records the token may
+see; a request with a matching If-None-Match gets 304 without a body. With a
+warm zone cache (see zone_cache) that answer needs no upstream call.
+
+The batch endpoint checks every operation against the token in one pass and
+sends all of them in a single updateDnsRecords call, so the batch is applied
+or rejected as a whole. It writes one audit entry for the batch.
+
+The change feed is served from the change journal (see change_journal).
+
+Configuration:
+- DNS_BATCH_MAX_OPERATIONS: Operations per batch request (default 100)
 """
+import hashlib
 import logging
-from flask import Blueprint, g, jsonify, request
+import os
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+from flask import Blueprint, current_app, g, jsonify, request
 
+from ..async_runtime import run_upstream, upstream_io_enabled
+from ..backends.base import BATCH_OPS, BATCH_STATUS, batch_op_error
+from ..change_journal import get_change_journal
+from ..dns_record import record_dicts
+from ..circuit_breaker import BackendUnavailable
 from ..models import db
-from ..netcup_client import extract_dns_records, mutation_failed, mutation_message
+from ..record_index import get_record_index
+from ..netcup_client import (
+    NetcupAPIError,
+    created_record_id,
+    mutation_failed,
+    mutation_message,
+)
 from ..token_auth import (
+    PermissionResult,
     authenticate_token,
+    check_dns_operations,
     check_permission,
     extract_bearer_token,
     filter_dns_records,
+    filter_dns_records_in_scope,
     log_activity,
     require_auth,
     validate_dns_records_update,
@@ -28,26 +61,57 @@ from ..database import get_setting
 
 logger = logging.getLogger(__name__)
 
+# Batch endpoint configuration
+BATCH_MAX_OPERATIONS = int(os.environ.get('DNS_BATCH_MAX_OPERATIONS', '100'))
+
 dns_api_bp = Blueprint('dns_api', __name__, url_prefix='/api')
 
 
 def get_netcup_client():
-    """Get configured Netcup client."""
-    from ..netcup_client import NetcupClient
+    """Get configured Netcup client (sharing the process-wide CCP session pool).
+    
+    The asyncio client when ASYNC_UPSTREAM_IO is set; wait for its calls
+    with run_upstream().
+    """
+    from ..netcup_client import AsyncNetcupClient, NetcupClient
     
     config = get_setting('netcup_config')
     if not config:
         return None
     
-    return NetcupClient(
+    client_class = AsyncNetcupClient if upstream_io_enabled() else NetcupClient
+    return client_class(
         customer_id=config.get('customer_id'),
         api_key=config.get('api_key'),
         api_password=config.get('api_password'),
         api_url=config.get('api_url', 'https://ccp.netcup.net/run/webservice/servers/endpoint.php?JSON'),
-        timeout=config.get('timeout', 30)
+        timeout=config.get('timeout', 30),
+        pooled=True
     )
 
 
+def backend_unavailable_response(e: BackendUnavailable):
+    """503 with Retry-After while the backend's circuit breaker is open."""
+    response = jsonify({
+        'error': 'backend_unavailable',
+        'message': 'DNS backend temporarily unavailable',
+        'retry_after': e.retry_after
+    })
+    response.headers['Retry-After'] = str(e.retry_after)
+    return response, 503
+
+
+def listing_etag(body: bytes) -> str:
+    """Strong ETag for a record listing, derived from its serialized content.
+
+    Based on the filtered records rather than the zone serial: two tokens
+    with different record-type permissions see different listings of the
+    same zone, and the serial would cost an extra infoDnsZone call. Hashing
+    the response body (sorted keys) encodes the listing only once.
+    """
+    return hashlib.sha256(body).hexdigest()[:32]
+
+
 # ============================================================================
 # Public Endpoints
 # ============================================================================
@@ -130,29 +194,18 @@ def list_records(domain):
         return jsonify({'error': 'configuration', 'message': 'Netcup API not configured'}), 500
 
     try:
-        # Fetch records from Netcup (list or Netcup-style envelope)
-        result = netcup.info_dns_records(domain)
+        # Shared cached records (DNSRecords), filtered without copies
+        snapshot = run_upstream(netcup.dns_snapshot(domain))
 
-        if mutation_failed(result):
-            log_activity(
-                auth=auth,
-                action='api_call',
-                operation='read',
-                domain=domain,
-                source_ip=client_ip,
-                status='error',
-                status_reason=mutation_message(result, 'API error'),
-                response_summary={'status': result.get('status')}
-            )
-            return jsonify({
-                'error': 'api_error',
-                'message': mutation_message(result, 'Failed to fetch records')
-            }), 502
-
-        records = extract_dns_records(result)
-
-        # Filter records by allowed types
-        filtered = filter_dns_records(auth, domain, records)
+        # Filter records by allowed types; plain dicts encode at full speed
+        filtered = record_dicts(filter_dns_records(auth, domain, snapshot))
+        response = jsonify({
+            'domain': domain,
+            'records': filtered,
+            'total': len(filtered)
+        })
+        etag = listing_etag(response.get_data())
+        not_modified = request.if_none_match.contains_weak(etag)
         
         log_activity(
             auth=auth,
@@ -161,14 +214,26 @@ def list_records(domain):
             domain=domain,
             source_ip=client_ip,
             status='success',
-            response_summary={'record_count': len(filtered)}
+            response_summary={'record_count': len(filtered), 'not_modified': not_modified}
         )
         
-        return jsonify({
-            'domain': domain,
-            'records': filtered,
-            'total': len(filtered)
-        })
+        if not_modified:
+            response = current_app.response_class(status=304)
+        response.set_etag(etag)
+        return response
+    
+    except BackendUnavailable as e:
+        logger.warning(f"Error fetching DNS records for {domain}: {e}")
+        log_activity(
+            auth=auth,
+            action='api_call',
+            operation='read',
+            domain=domain,
+            source_ip=client_ip,
+            status='error',
+            status_reason=str(e)
+        )
+        return backend_unavailable_response(e)
     
     except Exception as e:
         logger.exception(f"Error fetching DNS records for {domain}")
@@ -243,7 +308,7 @@ def create_record(domain):
             record['priority'] = priority
         
         # Update DNS records (creates new record)
-        result = netcup.update_dns_records(domain, [record])
+        result = run_upstream(netcup.submit_dns_records(domain, [record]))
 
         if mutation_failed(result):
             log_activity(
@@ -281,6 +346,22 @@ def create_record(domain):
             'record': record
         }), 201
     
+    except BackendUnavailable as e:
+        logger.warning(f"Error creating DNS record for {domain}: {e}")
+        log_activity(
+            auth=auth,
+            action='api_call',
+            operation='create',
+            domain=domain,
+            record_type=record_type,
+            record_name=hostname,
+            source_ip=client_ip,
+            status='error',
+            status_reason=str(e),
+            request_data=data
+        )
+        return backend_unavailable_response(e)
+    
     except Exception as e:
         logger.exception(f"Error creating DNS record for {domain}")
         log_activity(
@@ -356,7 +437,7 @@ def update_record(domain, record_id):
         if 'priority' in data:
             record['priority'] = data['priority']
         
-        result = netcup.update_dns_records(domain, [record])
+        result = run_upstream(netcup.submit_dns_records(domain, [record]))
 
         if mutation_failed(result):
             log_activity(
@@ -394,6 +475,22 @@ def update_record(domain, record_id):
             'record': record
         })
     
+    except BackendUnavailable as e:
+        logger.warning(f"Error updating DNS record for {domain}: {e}")
+        log_activity(
+            auth=auth,
+            action='api_call',
+            operation='update',
+            domain=domain,
+            record_type=record_type,
+            record_name=hostname,
+            source_ip=client_ip,
+            status='error',
+            status_reason=str(e),
+            request_data=data
+        )
+        return backend_unavailable_response(e)
+    
     except Exception as e:
         logger.exception(f"Error updating DNS record for {domain}")
         log_activity(
@@ -447,7 +544,7 @@ def delete_record(domain, record_id):
             'deleterecord': True
         }
         
-        result = netcup.update_dns_records(domain, [record])
+        result = run_upstream(netcup.submit_dns_records(domain, [record]))
 
         if mutation_failed(result):
             log_activity(
@@ -479,6 +576,19 @@ def delete_record(domain, record_id):
             'record_id': record_id
         })
     
+    except BackendUnavailable as e:
+        logger.warning(f"Error deleting DNS record for {domain}: {e}")
+        log_activity(
+            auth=auth,
+            action='api_call',
+            operation='delete',
+            domain=domain,
+            source_ip=client_ip,
+            status='error',
+            status_reason=str(e)
+        )
+        return backend_unavailable_response(e)
+    
     except Exception as e:
         logger.exception(f"Error deleting DNS record for {domain}")
         log_activity(
@@ -493,6 +603,372 @@ def delete_record(domain, record_id):
         return jsonify({'error': 'internal', 'message': 'Internal server error'}), 500
 
 
+# ============================================================================
+# Batch Endpoint
+# ============================================================================
+
+def _parse_batch_operation(op: Any) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """Return (updateDnsRecords entry, None) for one batch operation, or (None, error).
+
+    Delete entries carry only the id; batch_records fills in the zone's record.
+    """
+    error = batch_op_error(op)
+    if error:
+        return None, error
+    kind = op['op']
+
+    record: Dict[str, Any] = {}
+    if kind != 'create':
+        # CCP record ids are numeric
+        if isinstance(op['id'], bool) or not str(op['id']).isdigit():
+            return None, f"Field 'id' must be numeric to {kind} a record"
+        record['id'] = int(op['id'])
+
+    if kind == 'delete':
+        record['deleterecord'] = True
+        return record, None
+
+    record.update({'hostname': op['hostname'], 'type': str(op['type']).upper(),
+                   'destination': op['destination']})
+    if op.get('priority') is not None:
+        record['priority'] = op['priority']
+    return record, None
+
+
+def _batch_permissions(auth, domain: str, client_ip: str, kinds: List[str],
+                       records: List[Dict[str, Any]],
+                       targets: List[Optional[Mapping[str, Any]]]) -> List[PermissionResult]:
+    """One PermissionResult per batch operation (the first denial, if any).
+
+    Updates and deletes are checked against the record as it is in the zone;
+    updates also against the hostname/type they write.
+    """
+    checks: List[Tuple[int, Tuple[str, Optional[str], Optional[str]]]] = []
+    for index, (kind, record, target) in enumerate(zip(kinds, records, targets)):
+        if target is not None:
+            checks.append((index, (kind, target.get('type'), target.get('hostname'))))
+        if kind != 'delete':
+            checks.append((index, (kind, record['type'], record['hostname'])))
+
+    # One permission pass for the whole batch (snapshot compiled once)
+    results = check_dns_operations(auth, domain, [check for _, check in checks], client_ip)
+    perms: List[Optional[PermissionResult]] = [None] * len(records)
+    for (index, _), perm in zip(checks, results):
+        current = perms[index]
+        if current is None or (current.granted and not perm.granted):
+            perms[index] = perm
+    return [perm for perm in perms if perm is not None]
+
+
+def _batch_rejected(auth, domain: str, client_ip: str, data: Dict[str, Any], kinds: List[str],
+                    message: str, outcome: str = 'failed'):
+    """Log a batch the upstream API did not apply and answer 502 with per-item results."""
+    log_activity(
+        auth=auth,
+        action='api_call',
+        operation='batch',
+        domain=domain,
+        source_ip=client_ip,
+        status='error',
+        status_reason=message,
+        request_data=data
+    )
+    return jsonify({
+        'error': 'api_error',
+        'message': message,
+        'results': [
+            {'index': index, 'op': kind, 'status': outcome}
+            for index, kind in enumerate(kinds)
+        ]
+    }), 502
+
+
+@dns_api_bp.route('/dns/<domain>/records:batch', methods=['POST'])
+@require_auth
+def batch_records(domain):
+    """Apply several record changes in one upstream call.
+
+    Body: ``{"operations": [{"op": "create"|"update"|"delete", "id": ...,
+    "hostname": ..., "type": ..., "destination": ..., "priority": ...}]}``.
+    ``id`` is required for update and delete; hostname, type and destination
+    for create and update. Updates and deletes are checked against the
+    zone's record with that id. The response lists a result per operation.
+    """
+    auth = g.auth
+    client_ip = request.remote_addr
+    data = request.get_json(silent=True) or {}
+    operations = data.get('operations') if isinstance(data, dict) else None
+
+    if not isinstance(operations, list) or not operations:
+        return jsonify({
+            'error': 'validation',
+            'message': "Body must contain a non-empty 'operations' list"
+        }), 400
+    if len(operations) > BATCH_MAX_OPERATIONS:
+        return jsonify({
+            'error': 'validation',
+            'message': f'At most {BATCH_MAX_OPERATIONS} operations per batch'
+        }), 400
+
+    records: List[Dict[str, Any]] = []
+    errors = []
+    seen_ids = set()
+    for index, op in enumerate(operations):
+        record, error = _parse_batch_operation(op)
+        if record is not None and 'id' in record:
+            if record['id'] in seen_ids:
+                record, error = None, f"Record {record['id']} appears in more than one operation"
+            else:
+                seen_ids.add(record['id'])
+        if error:
+            errors.append({'index': index, 'message': error})
+        else:
+            records.append(record)
+    if errors:
+        return jsonify({
+            'error': 'validation',
+            'message': f'{len(errors)} of {len(operations)} operations are invalid',
+            'errors': errors
+        }), 400
+
+    kinds = [op['op'] for op in operations]
+    summary = {kind: kinds.count(kind) for kind in BATCH_OPS if kind in kinds}
+
+    # Get Netcup client
+    netcup = get_netcup_client()
+    if not netcup:
+        return jsonify({'error': 'configuration', 'message': 'Netcup API not configured'}), 500
+
+    # Records that updates and deletes target, looked up by id in the zone
+    targets: List[Optional[Mapping[str, Any]]] = [None] * len(records)
+    if any('id' in record for record in records):
+        try:
+            snapshot = run_upstream(netcup.dns_snapshot(domain))
+        except BackendUnavailable as e:
+            logger.warning(f"Error reading {domain} for DNS batch: {e}")
+            return backend_unavailable_response(e)
+        except NetcupAPIError as e:
+            logger.warning(f"Error reading {domain} for DNS batch: {e}")
+            return jsonify({'error': 'api_error', 'message': str(e)}), 502
+
+        missing = []
+        for index, record in enumerate(records):
+            if 'id' not in record:
+                continue
+            targets[index] = target = snapshot.get(record['id'])
+            if target is None:
+                missing.append({'index': index, 'message': f"Record {record['id']} not found"})
+            elif record.get('deleterecord'):
+                record.update({field: target[field] for field in ('hostname', 'type', 'destination', 'priority')
+                               if field in target})
+        if missing:
+            return jsonify({
+                'error': 'not_found',
+                'message': f'{len(missing)} of {len(operations)} records not found in {domain}',
+                'errors': missing
+            }), 404
+
+    perms = _batch_permissions(auth, domain, client_ip, kinds, records, targets)
+    denied = [(index, perm) for index, perm in enumerate(perms) if not perm.granted]
+    if denied:
+        first = denied[0][1]
+        log_activity(
+            auth=auth,
+            action='api_call',
+            operation='batch',
+            domain=domain,
+            source_ip=client_ip,
+            status='denied',
+            error_code=first.error_code,
+            status_reason=f'{len(denied)} of {len(records)} operations denied: {first.reason}',
+            request_data=data
+        )
+        return jsonify({
+            'error': 'forbidden',
+            'message': f'{len(denied)} of {len(records)} operations denied; nothing was applied',
+            'results': [
+                {'index': index, 'op': kind, 'status': 'not_applied'} if perm.granted else
+                {'index': index, 'op': kind, 'status': 'denied', 'message': perm.reason,
+                 'error_code': perm.error_code}
+                for index, (kind, perm) in enumerate(zip(kinds, perms))
+            ]
+        }), 403
+
+    try:
+        # All operations go out as one updateDnsRecords call
+        result = run_upstream(netcup.submit_dns_records(domain, records))
+
+        if mutation_failed(result):
+            return _batch_rejected(auth, domain, client_ip, data, kinds,
+                                   mutation_message(result, 'Failed to apply batch'))
+
+        zone_records = result.get('dnsrecords') if isinstance(result, dict) else None
+        taken = {str(record['id']) for record in records if 'id' in record}
+        results = []
+        for index, (kind, record) in enumerate(zip(kinds, records)):
+            item: Dict[str, Any] = {'index': index, 'op': kind, 'status': BATCH_STATUS[kind]}
+            if kind == 'delete':
+                item['record_id'] = record['id']
+            else:
+                item['record'] = dict(record)
+                if kind == 'create':
+                    item['record']['id'] = created_record_id(zone_records, record, taken)
+            results.append(item)
+
+        log_activity(
+            auth=auth,
+            action='api_call',
+            operation='batch',
+            domain=domain,
+            source_ip=client_ip,
+            status='success',
+            request_data=data,
+            response_summary={'status': 'applied', **summary}
+        )
+
+        return jsonify({
+            'status': 'applied',
+            'domain': domain,
+            'summary': summary,
+            'results': results
+        })
+
+    except NetcupAPIError as e:
+        # A CCP error envelope rejects the whole record set. Without a status
+        # code the request itself failed and the write may or may not have applied.
+        logger.warning(f"DNS batch for {domain} failed: {e}")
+        return _batch_rejected(auth, domain, client_ip, data, kinds, str(e),
+                               outcome='failed' if e.statuscode is not None else 'unknown')
+
+    except BackendUnavailable as e:
+        logger.warning(f"Error applying DNS batch for {domain}: {e}")
+        log_activity(
+            auth=auth,
+            action='api_call',
+            operation='batch',
+            domain=domain,
+            source_ip=client_ip,
+            status='error',
+            status_reason=str(e),
+            request_data=data
+        )
+        return backend_unavailable_response(e)
+
+    except Exception as e:
+        logger.exception(f"Error applying DNS batch for {domain}")
+        log_activity(
+            auth=auth,
+            action='api_call',
+            operation='batch',
+            domain=domain,
+            source_ip=client_ip,
+            status='error',
+            status_reason=str(e),
+            request_data=data
+        )
+        return jsonify({'error': 'internal', 'message': 'Internal server error'}), 500
+
+
+# ============================================================================
+# Change Feed
+# ============================================================================
+
+@dns_api_bp.route('/dns/<domain>/changes', methods=['GET'])
+@require_auth
+def list_changes(domain):
+    """Records created, updated or deleted since a cursor.
+
+    ``since`` is the ``cursor`` of the previous response (0 or absent for a
+    full sync). With ``reset: true`` the changes are the complete current
+    state, and the client replaces its copy.
+    """
+    auth = g.auth
+    client_ip = request.remote_addr
+
+    since = request.args.get('since', '0')
+    if not since.isdigit():
+        return jsonify({'error': 'validation', 'message': "'since' must be a cursor from a previous response"}), 400
+
+    perm = check_permission(auth, 'read', domain, client_ip=client_ip)
+    if not perm.granted:
+        log_activity(
+            auth=auth,
+            action='api_call',
+            operation='read',
+            domain=domain,
+            source_ip=client_ip,
+            status='denied',
+            error_code=perm.error_code,
+            status_reason=perm.reason
+        )
+        return jsonify({'error': 'forbidden', 'message': perm.reason}), 403
+
+    journal = get_change_journal()
+    if not journal.enabled:
+        return jsonify({'error': 'not_found', 'message': 'Change journal is disabled'}), 404
+
+    # Get Netcup client
+    netcup = get_netcup_client()
+    if not netcup:
+        return jsonify({'error': 'configuration', 'message': 'Netcup API not configured'}), 500
+
+    try:
+        # Reconcile with the backend before reading the journal. Only actual
+        # upstream reads are journaled (by the client); a cached snapshot may
+        # predate writes the journal has already seen.
+        run_upstream(netcup.dns_snapshot(domain))
+
+        changeset = journal.changes_since(netcup.cache_namespace, domain, int(since))
+        visible = {
+            id(record) for record in
+            filter_dns_records_in_scope(auth, domain, [change['record'] for change in changeset.changes])
+        }
+        changes = [change for change in changeset.changes if id(change['record']) in visible]
+
+        log_activity(
+            auth=auth,
+            action='api_call',
+            operation='read',
+            domain=domain,
+            source_ip=client_ip,
+            status='success',
+            response_summary={'changes': len(changes), 'reset': changeset.reset}
+        )
+
+        return jsonify({
+            'domain': domain,
+            'cursor': changeset.cursor,
+            'reset': changeset.reset,
+            'changes': changes
+        })
+
+    except BackendUnavailable as e:
+        logger.warning(f"Error fetching DNS changes for {domain}: {e}")
+        log_activity(
+            auth=auth,
+            action='api_call',
+            operation='read',
+            domain=domain,
+            source_ip=client_ip,
+            status='error',
+            status_reason=str(e)
+        )
+        return backend_unavailable_response(e)
+
+    except Exception as e:
+        logger.exception(f"Error fetching DNS changes for {domain}")
+        log_activity(
+            auth=auth,
+            action='api_call',
+            operation='read',
+            domain=domain,
+            source_ip=client_ip,
+            status='error',
+            status_reason=str(e)
+        )
+        return jsonify({'error': 'internal', 'message': 'Internal server error'}), 500
+
+
 # ============================================================================
 # DDNS Convenience Endpoint
 # ============================================================================
@@ -551,64 +1027,40 @@ def ddns_update(domain, hostname):
         return jsonify({'error': 'configuration', 'message': 'Netcup API not configured'}), 500
 
     try:
-        # First, try to find existing record
-        info_result = netcup.info_dns_records(domain)
-
-        if isinstance(info_result, list):
-            records = info_result
-        elif isinstance(info_result, dict):
-            status = info_result.get('status')
-            if status and status != 'success':
-                return jsonify({
-                    'error': 'api_error',
-                    'message': 'Failed to fetch current records'
-                }), 502
-            records = info_result.get('responsedata', {}).get('dnsrecords', [])
-        else:
-            raise TypeError(f"Unexpected Netcup response type: {type(info_result)}")
-        
-        # Find matching record
-        existing = None
-        for rec in records:
-            if rec.get('hostname') == hostname and rec.get('type') == record_type:
-                existing = rec
-                break
-        
-        # Build update record
-        if existing:
-            record = {
-                'id': existing['id'],
-                'hostname': hostname,
-                'type': record_type,
-                'destination': ip
-            }
+        # Unchanged addresses recently confirmed upstream skip the zone read
+        if get_record_index().is_current(netcup.cache_namespace, domain, hostname, record_type, ip):
+            status = 'unchanged'
         else:
-            # Create new record
-            record = {
-                'hostname': hostname,
-                'type': record_type,
-                'destination': ip
-            }
-        
-        result = netcup.update_dns_records(domain, [record])
-
-        status = result.get('status') if isinstance(result, dict) else None
-        if status and status != 'success':
-            log_activity(
-                auth=auth,
-                action='api_call',
-                operation='update',
-                domain=domain,
-                record_type=record_type,
-                record_name=hostname,
-                source_ip=client_ip,
-                status='error',
-                status_reason=result.get('message', 'API error')
-            )
-            return jsonify({
-                'error': 'api_error',
-                'message': result.get('message', 'Failed to update record')
-            }), 502
+            # Find the existing record in the indexed record set
+            existing = run_upstream(netcup.dns_snapshot(domain)).first(hostname, record_type)
+            if existing and existing.get('destination') == ip:
+                status = 'unchanged'
+            else:
+                record = {
+                    'hostname': hostname,
+                    'type': record_type,
+                    'destination': ip
+                }
+                if existing:
+                    record['id'] = existing['id']
+                
+                result = run_upstream(netcup.submit_dns_records(domain, [record]))
+                
+                if mutation_failed(result):
+                    message = mutation_message(result, 'Failed to update record')
+                    log_activity(
+                        auth=auth,
+                        action='api_call',
+                        operation='update',
+                        domain=domain,
+                        record_type=record_type,
+                        record_name=hostname,
+                        source_ip=client_ip,
+                        status='error',
+                        status_reason=message
+                    )
+                    return jsonify({'error': 'api_error', 'message': message}), 502
+                status = 'updated' if existing else 'created'
         
         log_activity(
             auth=auth,
@@ -620,7 +1072,7 @@ def ddns_update(domain, hostname):
             source_ip=client_ip,
             status='success',
             response_summary={
-                'status': 'updated' if existing else 'created',
+                'status': status,
                 'hostname': hostname,
                 'type': record_type,
                 'destination': ip
@@ -628,13 +1080,28 @@ def ddns_update(domain, hostname):
         )
         
         return jsonify({
-            'status': 'updated' if existing else 'created',
+            'status': status,
             'hostname': hostname,
             'type': record_type,
             'destination': ip,
             'fqdn': f'{hostname}.{domain}' if hostname != '@' else domain
         })
     
+    except BackendUnavailable as e:
+        logger.warning(f"Error in DDNS update for {domain}: {e}")
+        log_activity(
+            auth=auth,
+            action='api_call',
+            operation='update',
+            domain=domain,
+            record_type=record_type,
+            record_name=hostname,
+            source_ip=client_ip,
+            status='error',
+            status_reason=str(e)
+        )
+        return backend_unavailable_response(e)
+    
     except Exception as e:
         logger.exception(f"Error in DDNS update for {domain}")
         log_activity(
@@ -203,6 +203,16 @@ def create_app(config_path: str = "config.yaml") -> Flask:
     
     init_db(app)
 
+    # Write-behind buffers, the DDNS record index and the change journal use this app's engine
+    from .audit_writer import init_audit_writer
+    from .change_journal import init_change_journal
+    from .record_index import init_record_index
+    from .usage_buffer import init_usage_buffer
+    init_usage_buffer(app)
+    init_audit_writer(app)
+    init_record_index(app)
+    init_change_journal(app)
+
     # =========================================================================
     # Feature Flags (config-driven)
     # =========================================================================
@@ -442,9 +452,19 @@ def create_app(config_path: str = "config.yaml") -> Flask:
     
     @app.route('/health')
     def health():
-        """Health check endpoint."""
+        """Health check endpoint.
+        
+        Reports how many backend circuit breakers are open; the status is
+        'degraded' while any is not closed. Always 200: the app itself is
+        healthy and must not be restarted because a DNS backend is failing.
+        """
         from flask import jsonify
-        return jsonify({'status': 'ok'})
+        from .circuit_breaker import get_breaker_stats
+        circuits = {'closed': 0, 'open': 0, 'half_open': 0}
+        for stats in get_breaker_stats().values():
+            circuits[stats['state']] += 1
+        status = 'degraded' if circuits['open'] or circuits['half_open'] else 'ok'
+        return jsonify({'status': status, 'circuits': circuits})
     
     # =========================================================================
     # Cache Control (for local development)
@@ -0,0 +1,243 @@
+"""Shared asyncio event loop for upstream I/O.
+
+The blocking clients hold a worker thread for the full duration of every
+upstream call (up to the 30 s request timeout). The asyncio variants
+(netcup_client.AsyncNetcupClient, backends.powerdns.AsyncPowerDNSBackend) run
+on one event loop thread per worker process instead, so a worker can keep
+hundreds of upstream calls pending without a thread for each:
+
+- ``run_async(coro)`` runs a coroutine on the loop and blocks the calling
+  (Flask) thread until it completes. ``submit_async(coro)`` returns a
+  ``concurrent.futures.Future`` instead, so one handler can fan out many
+  upstream calls and wait for them together.
+- Upstream calls hold a per-service ``asyncio.Semaphore`` (one per backend
+  account, see DNSBackend.cache_namespace) limiting in-flight requests to
+  ASYNC_BACKEND_CONCURRENCY.
+- One ``httpx.AsyncClient`` per origin, with the same connection limits as
+  the blocking pools in http_transport.
+- Concurrent identical reads on the loop are coalesced (``coalesce_async``),
+  the asyncio counterpart of single_flight.
+- With ASYNC_UPSTREAM_IO enabled, the DNS API and DDNS handlers use
+  AsyncNetcupClient. They stay synchronous and wait for each call with
+  ``run_upstream``, which accepts the result of either client, so every
+  upstream call of a worker shares the loop and the per-account limit.
+- The loop thread starts on first use, again in a forked worker, and is
+  stopped with its clients closed on worker shutdown (see lifecycle.py).
+
+Coroutines run on the loop thread, so blocking calls inside them (database
+access, the blocking clients) must go through ``loop.run_in_executor``.
+
+Configuration:
+- ASYNC_BACKEND_CONCURRENCY: In-flight upstream calls per backend service (default 10)
+- ASYNC_UPSTREAM_IO: Use the asyncio Netcup client in the API handlers (default 0)
+"""
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import inspect
+import logging
+import os
+import threading
+from typing import Any, Awaitable, Callable, Coroutine, Dict, Hashable, Optional, TypeVar, Union, cast
+
+import httpx
+
+from .http_transport import create_async_transport, origin_key
+from .lifecycle import register_shutdown_hook
+
+logger = logging.getLogger(__name__)
+
+# Runtime configuration
+BACKEND_CONCURRENCY = int(os.environ.get("ASYNC_BACKEND_CONCURRENCY", "10"))
+UPSTREAM_IO = os.environ.get("ASYNC_UPSTREAM_IO", "0").lower() in ("1", "true", "yes")
+
+T = TypeVar("T")
+
+
+class AsyncRuntime:
+    """Event loop thread plus the loop-owned semaphores and HTTP clients."""
+
+    def __init__(self, concurrency: int = BACKEND_CONCURRENCY):
+        self.concurrency = concurrency
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+        # Loop-side state; only touched from coroutines on the loop thread
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._locks: Dict[Hashable, asyncio.Lock] = {}
+        self._clients: Dict[tuple, httpx.AsyncClient] = {}
+        self._flights: Dict[Hashable, asyncio.Future] = {}
+        self.issued = 0
+        self.coalesced = 0
+
+    # -- thread side ---------------------------------------------------------
+
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """The running loop, started lazily (and again after fork)."""
+        pid = os.getpid()
+        if self._loop is not None and self._pid == pid and self._thread is not None and self._thread.is_alive():
+            return self._loop
+        with self._lock:
+            if self._loop is not None and self._pid == pid and self._thread is not None and self._thread.is_alive():
+                return self._loop
+            # A loop inherited from the parent has no thread here; start over
+            self._semaphores = {}
+            self._locks = {}
+            self._clients = {}
+            self._flights = {}
+            loop = asyncio.new_event_loop()
+            started = threading.Event()
+
+            def _run():
+                asyncio.set_event_loop(loop)
+                loop.call_soon(started.set)
+                loop.run_forever()
+
+            self._thread = threading.Thread(target=_run, name="async-upstream", daemon=True)
+            self._thread.start()
+            started.wait()
+            self._loop = loop
+            self._pid = pid
+            return loop
+
+    def submit(self, coro: Coroutine[Any, Any, T]) -> concurrent.futures.Future[T]:
+        """Schedule ``coro`` on the loop; returns a thread-safe future."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop())
+
+    def run(self, coro: Coroutine[Any, Any, T], timeout: Optional[float] = None) -> T:
+        """Run ``coro`` on the loop and wait for its result."""
+        if self._loop is not None and threading.current_thread() is self._thread:
+            coro.close()
+            raise RuntimeError("run_async() called from the event loop thread; await instead")
+        return self.submit(coro).result(timeout)
+
+    def shutdown(self):
+        """Close loop-owned clients and stop the loop thread."""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            if loop is None or thread is None or self._pid != os.getpid() or not thread.is_alive():
+                self._loop = None
+                return
+            self._loop = None
+        try:
+            asyncio.run_coroutine_threadsafe(self._aclose_clients(), loop).result(10)
+        except Exception as e:
+            logger.warning(f"Closing async HTTP clients failed: {e}")
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(10)
+        loop.close()
+
+    async def _aclose_clients(self):
+        clients, self._clients = list(self._clients.values()), {}
+        for client in clients:
+            await client.aclose()
+
+    # -- loop side -----------------------------------------------------------
+
+    def semaphore(self, service: str) -> asyncio.Semaphore:
+        """Concurrency limit for one backend service (call on the loop)."""
+        sem = self._semaphores.get(service)
+        if sem is None:
+            sem = self._semaphores[service] = asyncio.Semaphore(self.concurrency)
+        return sem
+
+    def lock(self, key: Hashable) -> asyncio.Lock:
+        """Named lock, e.g. one login per credential set (call on the loop)."""
+        lock = self._locks.get(key)
+        if lock is None:
+            lock = self._locks[key] = asyncio.Lock()
+        return lock
+
+    def http_client(self, url: str) -> httpx.AsyncClient:
+        """Pooled async client for ``url``'s origin (call on the loop)."""
+        key = origin_key(url)
+        client = self._clients.get(key)
+        if client is None:
+            client = self._clients[key] = httpx.AsyncClient(transport=create_async_transport())
+        return client
+
+    async def coalesce(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """Await ``fn()`` once for all concurrent callers with the same ``key``."""
+        pending = self._flights.get(key)
+        if pending is not None:
+            self.coalesced += 1
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._flights[key] = future
+        self.issued += 1
+        try:
+            result = await fn()
+        except BaseException as e:
+            future.set_exception(e)
+            # Retrieved here so an error nobody else awaited is not logged
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            self._flights.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self._loop is not None and self._pid == os.getpid(),
+            "concurrency": self.concurrency,
+            "services": len(self._semaphores),
+            "origins": len(self._clients),
+            "issued": self.issued,
+            "coalesced": self.coalesced,
+        }
+
+
+# Global runtime instance
+_runtime = AsyncRuntime()
+register_shutdown_hook("async_runtime", _runtime.shutdown)
+
+
+def get_async_runtime() -> AsyncRuntime:
+    """Return the process-wide async runtime."""
+    return _runtime
+
+
+def run_async(coro: Coroutine[Any, Any, T], timeout: Optional[float] = None) -> T:
+    """Run ``coro`` on the shared loop from a (Flask) thread and return its result."""
+    return _runtime.run(coro, timeout)
+
+
+def run_upstream(result: Union[Coroutine[Any, Any, T], T], timeout: Optional[float] = None) -> T:
+    """Wait for a client call from a (Flask) thread.
+    
+    Coroutines of the asyncio clients run on the shared loop; results of the
+    blocking clients are returned as they are.
+    """
+    if inspect.iscoroutine(result):
+        return run_async(cast(Coroutine[Any, Any, T], result), timeout)
+    return cast(T, result)
+
+
+def upstream_io_enabled() -> bool:
+    """True if the API handlers use the asyncio clients (ASYNC_UPSTREAM_IO)."""
+    return UPSTREAM_IO
+
+
+def submit_async(coro: Coroutine[Any, Any, T]) -> concurrent.futures.Future[T]:
+    """Schedule ``coro`` on the shared loop without waiting."""
+    return _runtime.submit(coro)
+
+
+def coalesce_async(key: Hashable, fn: Callable[[], Awaitable[T]]) -> Awaitable[T]:
+    """Single-flight for coroutines on the shared loop."""
+    return _runtime.coalesce(key, fn)
+
+
+async def run_blocking(fn: Callable[..., T], *args: Any) -> T:
+    """Await a blocking call (database access) in the default thread pool."""
+    return await asyncio.get_running_loop().run_in_executor(None, fn, *args)
+
+
+def get_async_stats() -> Dict[str, Any]:
+    """Get async runtime statistics."""
+    return _runtime.stats()
@@ -0,0 +1,266 @@
+"""Batched, asynchronous ActivityLog writer.
+
+Every API call used to add one ActivityLog row and commit inside the request,
+costing an fsync per call and serialising traffic on the SQLite write lock.
+Audit rows now go through a bounded in-memory queue that a background thread
+drains with multi-row INSERTs, one transaction per batch.
+
+Durability modes (AUDIT_LOG_MODE):
+- ``batched`` (default): security-critical rows (``is_attack``) are still
+  written synchronously in the request; everything else is queued.
+- ``sync``: every row is written synchronously (previous behaviour).
+
+Backpressure (AUDIT_LOG_OVERFLOW) when the queue is full:
+- ``sync`` (default): the caller writes its row synchronously — requests
+  slow down instead of losing audit data.
+- ``drop``: the row is discarded and counted in ``get_writer_stats()``.
+
+Producers that hold rows back (the probe guard's aggregated summaries) can
+register a flush hook; the background thread calls it before every flush, so
+their rows are written even when no other request arrives.
+
+The queue is drained on worker shutdown (gunicorn ``worker_exit``, Passenger
+and plain processes via atexit, see lifecycle.py). Queued rows are lost only
+if the process is killed hard.
+
+Configuration:
+- AUDIT_LOG_MODE: batched | sync (default batched)
+- AUDIT_LOG_OVERFLOW: sync | drop (default sync)
+- AUDIT_LOG_QUEUE_SIZE: Maximum queued rows (default 10000)
+- AUDIT_LOG_BATCH_SIZE: Rows per INSERT / early-flush trigger (default 200)
+- AUDIT_LOG_FLUSH_SECONDS: Background flush interval (default 2)
+"""
+from __future__ import annotations
+
+import logging
+import os
+import queue
+import threading
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+from sqlalchemy import event, insert
+
+from .lifecycle import register_shutdown_hook
+from .models import ActivityLog, db
+
+logger = logging.getLogger(__name__)
+
+# Writer configuration
+AUDIT_LOG_MODE = os.environ.get("AUDIT_LOG_MODE", "batched").lower()
+AUDIT_LOG_OVERFLOW = os.environ.get("AUDIT_LOG_OVERFLOW", "sync").lower()
+AUDIT_LOG_QUEUE_SIZE = int(os.environ.get("AUDIT_LOG_QUEUE_SIZE", "10000"))
+AUDIT_LOG_BATCH_SIZE = int(os.environ.get("AUDIT_LOG_BATCH_SIZE", "200"))
+AUDIT_LOG_FLUSH_SECONDS = float(os.environ.get("AUDIT_LOG_FLUSH_SECONDS", "2"))
+
+_COLUMNS = [c for c in ActivityLog.__table__.columns if not c.primary_key]
+
+
+def activity_row(entry: ActivityLog) -> dict[str, Any]:
+    """Column values of a transient ActivityLog, ready for a Core INSERT."""
+    row = {c.name: getattr(entry, c.key) for c in _COLUMNS}
+    if row.get('created_at') is None:
+        row['created_at'] = datetime.utcnow()
+    if row.get('is_attack') is None:
+        row['is_attack'] = 0
+    return row
+
+
+class AuditLogWriter:
+    """Bounded queue of ActivityLog rows with a background multi-row flusher."""
+
+    def __init__(
+        self,
+        mode: str = AUDIT_LOG_MODE,
+        overflow: str = AUDIT_LOG_OVERFLOW,
+        max_queue: int = AUDIT_LOG_QUEUE_SIZE,
+        batch_size: int = AUDIT_LOG_BATCH_SIZE,
+        interval: float = AUDIT_LOG_FLUSH_SECONDS,
+    ):
+        self.mode = mode
+        self.overflow = overflow
+        self.batch_size = max(1, batch_size)
+        self.interval = interval
+        self._queue: queue.Queue[dict[str, Any]] = queue.Queue(maxsize=max_queue)
+        self._flush_lock = threading.Lock()
+        self._thread_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._app = None
+        self._thread: Optional[threading.Thread] = None
+        self._thread_pid: Optional[int] = None
+        self._hooks: list[Callable[[], Any]] = []
+        self.written = 0
+        self.written_sync = 0
+        self.dropped = 0
+        self.overflowed = 0
+
+    def bind(self, app):
+        """Use ``app``'s database engine for background flushes (until it is disposed)."""
+        self._app = app
+        with app.app_context():
+            engine = db.engine
+        event.listen(engine, 'engine_disposed', lambda _engine: self.unbind(app))
+
+    def unbind(self, app=None):
+        """Stop flushing to ``app`` (any app if None)."""
+        if app is None or self._app is app:
+            self._app = None
+
+    def add_flush_hook(self, hook: Callable[[], Any]):
+        """Call ``hook`` before every background flush."""
+        self._hooks.append(hook)
+
+    def clear(self):
+        """Discard queued rows without writing them."""
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                return
+
+    def write(self, entry: ActivityLog, defer: bool = False):
+        """Persist an ActivityLog entry according to the durability mode.
+
+        ``defer`` queues the row even if it is flagged as an attack (used for
+        aggregated summaries, which are not tied to a live request).
+        """
+        if self.mode == 'sync' or (entry.is_attack and not defer) or self._app is None:
+            self._write_sync(entry)
+            return
+
+        try:
+            self._queue.put_nowait(activity_row(entry))
+        except queue.Full:
+            self.overflowed += 1
+            if self.overflow == 'drop':
+                self.dropped += 1
+                if self.dropped % 100 == 1:
+                    logger.warning(f"Audit queue full, dropped {self.dropped} rows so far")
+                return
+            self._write_sync(entry)
+            return
+
+        self._ensure_thread()
+        if self._queue.qsize() >= self.batch_size:
+            self._wakeup.set()
+
+    def _write_sync(self, entry: ActivityLog):
+        db.session.add(entry)
+        db.session.commit()
+        self.written_sync += 1
+
+    def pending(self) -> int:
+        """Number of queued, unwritten rows."""
+        return self._queue.qsize()
+
+    def flush(self) -> int:
+        """Write all queued rows now. Returns the number of rows written."""
+        if self._app is None:
+            return 0
+
+        total = 0
+        with self._flush_lock:
+            while True:
+                batch: list[dict[str, Any]] = []
+                while len(batch) < self.batch_size:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                if not batch:
+                    break
+                try:
+                    with self._app.app_context():
+                        with db.engine.begin() as conn:
+                            conn.execute(insert(ActivityLog.__table__), batch)
+                except Exception as e:
+                    # Put the batch back (best effort) and retry on the next tick
+                    logger.error(f"Audit log flush failed ({len(batch)} rows): {e}")
+                    for row in batch:
+                        try:
+                            self._queue.put_nowait(row)
+                        except queue.Full:
+                            self.dropped += 1
+                    break
+                total += len(batch)
+
+        if total:
+            self.written += total
+            logger.debug(f"Flushed {total} audit log rows")
+        return total
+
+    def _run_hooks(self):
+        for hook in self._hooks:
+            try:
+                hook()
+            except Exception as e:
+                logger.error(f"Audit flush hook failed: {e}")
+
+    def _ensure_thread(self):
+        """Start the flusher lazily, and again after a fork (preload_app)."""
+        pid = os.getpid()
+        if self._thread is not None and self._thread_pid == pid and self._thread.is_alive():
+            return
+        with self._thread_lock:
+            if self._thread is not None and self._thread_pid == pid and self._thread.is_alive():
+                return
+            self._thread_pid = pid
+            self._thread = threading.Thread(target=self._run, name="audit-log-flusher", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            if self._app is not None:
+                self._run_hooks()
+            self.flush()
+
+
+# Global writer instance
+_writer = AuditLogWriter()
+register_shutdown_hook("audit_log", _writer.flush)
+
+
+def init_audit_writer(app):
+    """Bind the audit writer to the application's database."""
+    _writer.bind(app)
+
+
+def write_activity(entry: ActivityLog, defer: bool = False):
+    """Persist an ActivityLog entry (synchronously or batched)."""
+    _writer.write(entry, defer=defer)
+
+
+def register_flush_hook(hook: Callable[[], Any]):
+    """Run ``hook`` before every background flush (see AuditLogWriter.add_flush_hook)."""
+    _writer.add_flush_hook(hook)
+
+
+def start_flusher():
+    """Make sure the background flusher runs in this process."""
+    if _writer.mode != 'sync':
+        _writer._ensure_thread()
+
+
+def clear_audit_log():
+    """Discard queued audit rows (tests)."""
+    _writer.clear()
+
+
+def flush_audit_log() -> int:
+    """Flush queued audit rows now (tests, admin views, shutdown)."""
+    return _writer.flush()
+
+
+def get_writer_stats() -> Dict[str, Any]:
+    """Get writer statistics."""
+    return {
+        "mode": _writer.mode,
+        "overflow": _writer.overflow,
+        "pending": _writer.pending(),
+        "written_batched": _writer.written,
+        "written_sync": _writer.written_sync,
+        "overflowed": _writer.overflowed,
+        "dropped": _writer.dropped,
+    }
@@ -18,17 +18,20 @@ Usage:
     backend = get_backend_for_realm(realm)
 """
 
-from .base import DNSBackend, BackendError
-from .registry import get_backend, get_backend_for_realm, BACKEND_REGISTRY
+from .base import DNSBackend, BackendError, ZoneSnapshot
+from .registry import get_backend, get_backend_for_realm, evict_backend, BACKEND_REGISTRY
 from .netcup import NetcupBackend
-from .powerdns import PowerDNSBackend
+from .powerdns import AsyncPowerDNSBackend, PowerDNSBackend
 
 __all__ = [
     'DNSBackend',
     'BackendError',
+    'ZoneSnapshot',
     'get_backend',
     'get_backend_for_realm',
+    'evict_backend',
     'BACKEND_REGISTRY',
     'NetcupBackend',
     'PowerDNSBackend',
+    'AsyncPowerDNSBackend',
 ]
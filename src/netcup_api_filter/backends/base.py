@@ -6,7 +6,10 @@ All DNS providers must implement this interface.
 
 import logging
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Union
+
+from ..dns_record import DNSRecord
+from ..zone_snapshot import ZoneSnapshot
 
 logger = logging.getLogger(__name__)
 
@@ -16,6 +19,62 @@ class BackendError(Exception):
     pass
 
 
+# apply_batch() operation kinds, and the status of each applied one
+BATCH_OPS = ('create', 'update', 'delete')
+BATCH_STATUS = {'create': 'created', 'update': 'updated', 'delete': 'deleted'}
+
+
+def batch_op_error(op: Any) -> Optional[str]:
+    """Why an apply_batch() operation is invalid, or None if it is valid."""
+    if not isinstance(op, dict):
+        return 'Operation must be an object'
+    if op.get('op') not in BATCH_OPS:
+        return "Field 'op' must be one of: create, update, delete"
+    if op['op'] != 'create' and not op.get('id'):
+        return f"Field 'id' is required to {op['op']} a record"
+    if op['op'] != 'delete':
+        if not all(op.get(f) for f in ('hostname', 'type', 'destination')):
+            return 'Required fields: type, hostname, destination'
+        if not isinstance(op['type'], str):
+            return "Field 'type' must be a string"
+    return None
+
+
+def rrset_change_error(change: Any) -> Optional[str]:
+    """Why an apply_changes() change is invalid, or None if it is valid."""
+    if not isinstance(change, dict):
+        return 'Change must be an object'
+    if str(change.get('changetype', '')).upper() not in ('REPLACE', 'DELETE'):
+        return f"Invalid changetype: {change.get('changetype')}"
+    if not change.get('hostname') or not change.get('type'):
+        return 'Required fields: hostname, type'
+    if not isinstance(change['type'], str):
+        return "Field 'type' must be a string"
+    return None
+
+
+def batch_result(index: int, op: Dict[str, Any], record: Optional[Mapping[str, Any]] = None,
+                 error: Optional[str] = None) -> Dict[str, Any]:
+    """apply_batch() result of operation ``index``."""
+    kind = op.get('op') if isinstance(op, dict) else None
+    if error is not None:
+        return {'index': index, 'op': kind, 'status': 'failed', 'error': error}
+    result = {'index': index, 'op': kind, 'status': BATCH_STATUS[op['op']]}
+    if kind == 'delete':
+        result['record_id'] = str(op['id'])
+    else:
+        result['record'] = record
+    return result
+
+
+def batch_results(results: Sequence[Optional[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """apply_batch() return value from per-op slots filled while planning and writing."""
+    missing = [index for index, result in enumerate(results) if result is None]
+    if missing:
+        raise BackendError(f"No result for batch operations {missing}")
+    return [result for result in results if result is not None]
+
+
 class DNSBackend(ABC):
     """Abstract base class for DNS backends.
     
@@ -31,6 +90,15 @@ class DNSBackend(ABC):
         """
         self.config = config
     
+    @property
+    def cache_namespace(self) -> str:
+        """Identity of the backend account for zone caching and single-flight.
+        
+        Backends with equal namespaces must see the same zones. The default
+        is unique per instance; subclasses return their endpoint and account.
+        """
+        return f"{self.__class__.__name__}:{id(self)}"
+    
     @abstractmethod
     def test_connection(self) -> tuple[bool, str]:
         """Test backend connectivity.
@@ -69,14 +137,14 @@ class DNSBackend(ABC):
         pass
     
     @abstractmethod
-    def list_records(self, zone: str) -> List[Dict[str, Any]]:
+    def list_records(self, zone: str) -> Sequence[Mapping[str, Any]]:
         """List all DNS records for a zone.
         
         Args:
             zone: Zone name (e.g., 'example.com')
         
         Returns:
-            List of normalized record dicts with keys:
+            Normalized records (read-only mappings) with keys:
             - id: Record identifier (provider-specific)
             - hostname: Record name (relative to zone or absolute)
             - type: Record type (A, AAAA, CNAME, TXT, etc.)
@@ -87,7 +155,7 @@ class DNSBackend(ABC):
         pass
     
     @abstractmethod
-    def create_record(self, zone: str, record: Dict[str, Any]) -> Dict[str, Any]:
+    def create_record(self, zone: str, record: Dict[str, Any]) -> Mapping[str, Any]:
         """Create a DNS record.
         
         Args:
@@ -95,7 +163,7 @@ class DNSBackend(ABC):
             record: Dict with hostname, type, destination, priority (optional)
         
         Returns:
-            Normalized record dict of created record
+            Normalized record (read-only mapping) of created record
         
         Raises:
             BackendError: If creation fails
@@ -103,7 +171,7 @@ class DNSBackend(ABC):
         pass
     
     @abstractmethod
-    def update_record(self, zone: str, record_id: str, record: Dict[str, Any]) -> Dict[str, Any]:
+    def update_record(self, zone: str, record_id: str, record: Dict[str, Any]) -> Mapping[str, Any]:
         """Update a DNS record.
         
         Args:
@@ -112,7 +180,7 @@ class DNSBackend(ABC):
             record: Dict with hostname, type, destination, priority (optional)
         
         Returns:
-            Normalized record dict of updated record
+            Normalized record (read-only mapping) of updated record
         
         Raises:
             BackendError: If update fails
@@ -147,7 +215,125 @@ class DNSBackend(ABC):
         """
         pass
     
-    def normalize_record(self, record: Dict[str, Any]) -> Dict[str, Any]:
+    def snapshot(self, zone: str) -> ZoneSnapshot:
+        """Normalized records of a zone, indexed by hostname/type and ID.
+        
+        Build one per listing and use it for all lookups in that zone; its
+        records are shared, so copy them before changing them.
+        
+        Args:
+            zone: Zone name
+        
+        Returns:
+            ZoneSnapshot of list_records(zone)
+        """
+        return ZoneSnapshot(self.list_records(zone), zone)
+    
+    def get_rrset(self, zone: str, hostname: str, record_type: str) -> Sequence[Mapping[str, Any]]:
+        """List the records of one hostname and type (an rrset).
+        
+        The default looks the rrset up in a snapshot of the zone. Backends
+        whose API can select a single rrset override this.
+        
+        Args:
+            zone: Zone name
+            hostname: Record name, as returned by list_records
+            record_type: Record type (A, AAAA, TXT, etc.)
+        
+        Returns:
+            Normalized records (empty if the rrset does not exist)
+        """
+        return self.snapshot(zone).lookup(hostname, record_type)
+    
+    def apply_changes(self, zone: str, changes: List[Dict[str, Any]]) -> None:
+        """Replace or delete several rrsets.
+        
+        Each change is a dict with:
+        - hostname, type: The rrset (hostname as accepted by get_rrset)
+        - changetype: 'REPLACE' (the rrset afterwards holds exactly
+          ``destinations``) or 'DELETE' (the rrset is removed)
+        - destinations: List of values (REPLACE only)
+        - ttl: Optional TTL in seconds (REPLACE only)
+        
+        The default applies the changes one record at a time with
+        get_rrset/create_record/update_record/delete_record and is not
+        atomic; every change is validated before the first is applied. Backends that can write many rrsets in one request
+        override this.
+        
+        Raises:
+            BackendError: If a change is invalid or fails
+        """
+        for change in changes:
+            error = rrset_change_error(change)
+            if error is not None:
+                raise BackendError(error)
+        for change in changes:
+            changetype = str(change['changetype']).upper()
+            hostname, record_type = change['hostname'], change['type']
+            wanted = list(change.get('destinations') or []) if changetype == 'REPLACE' else []
+            
+            current = self.get_rrset(zone, hostname, record_type)
+            present = {rec.get('destination') for rec in current}
+            missing = [d for d in wanted if d not in present]
+            stale = [rec for rec in current if rec.get('destination') not in wanted]
+            
+            def _record(destination):
+                record = {'hostname': hostname, 'type': record_type, 'destination': destination}
+                if change.get('ttl') is not None:
+                    record['ttl'] = change['ttl']
+                return record
+            
+            # Reuse stale records for missing values, then delete or create the rest
+            for rec, destination in zip(stale, missing):
+                self.update_record(zone, rec['id'], _record(destination))
+            for rec in stale[len(missing):]:
+                self.delete_record(zone, rec['id'])
+            for destination in missing[len(stale):]:
+                self.create_record(zone, _record(destination))
+    
+    def apply_batch(self, zone: str, ops: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Apply several record operations and report each one's outcome.
+        
+        Each op is a dict with:
+        - op: 'create', 'update' or 'delete'
+        - id: Record ID (update and delete)
+        - hostname, type, destination: The record (create and update;
+          priority and ttl are optional)
+        
+        The default applies the ops in order with create_record,
+        update_record and delete_record; a failing op does not stop the
+        ones after it. Backends that can write several records in one
+        request override this and must end in the same state (see
+        tests/test_backend_conformance_unit.py). A failed request fails
+        every op it carried.
+        
+        Returns:
+            One dict per op, in order: index, op and status ('created',
+            'updated', 'deleted' or 'failed'), plus 'record' (the normalized
+            record) for creates and updates, 'record_id' for deletes and
+            'error' for failures. Invalid ops fail without being sent.
+        """
+        results = []
+        for index, op in enumerate(ops):
+            error = batch_op_error(op)
+            if error is not None:
+                results.append(batch_result(index, op, error=error))
+                continue
+            record = {k: op[k] for k in ('hostname', 'type', 'destination', 'priority', 'ttl')
+                      if op.get(k) is not None}
+            try:
+                if op['op'] == 'create':
+                    results.append(batch_result(index, op, self.create_record(zone, record)))
+                elif op['op'] == 'update':
+                    results.append(batch_result(index, op, self.update_record(zone, str(op['id']), record)))
+                else:
+                    self.delete_record(zone, str(op['id']))
+                    results.append(batch_result(index, op))
+            except BackendError as e:
+                results.append(batch_result(index, op, error=str(e)))
+        return results
+    
+    def normalize_record(self, record: Mapping[str, Any]) -> DNSRecord:
         """Normalize record format to common schema.
         
         Subclasses can override to handle provider-specific formats.
@@ -156,33 +342,38 @@ class DNSBackend(ABC):
             record: Provider-specific record dict
         
         Returns:
-            Normalized record dict with standard keys
+            Normalized read-only record (DNSRecord) with standard keys
         """
-        return {
-            'id': record.get('id'),
-            'hostname': record.get('hostname', '@'),
-            'type': record.get('type'),
-            'destination': record.get('destination') or record.get('content'),
-            'priority': record.get('priority'),
-            'ttl': record.get('ttl', 300)
-        }
+        return DNSRecord(
+            id=record.get('id'),
+            hostname=record.get('hostname', '@'),
+            type=record.get('type', ''),
+            destination=record.get('destination') or record.get('content'),
+            priority=record.get('priority'),
+            ttl=record.get('ttl', 300),
+        )
     
     def filter_records_by_hostname(
         self, 
-        records: List[Dict[str, Any]], 
+        records: Union[Sequence[Mapping[str, Any]], ZoneSnapshot], 
         hostname: str,
         record_type: Optional[str] = None
-    ) -> List[Dict[str, Any]]:
+    ) -> List[Mapping[str, Any]]:
         """Filter records by hostname and optionally type.
         
+        A ZoneSnapshot answers from its index; a plain list is scanned, so
+        pass a snapshot when looking up several hostnames in one zone.
+        
         Args:
-            records: List of normalized records
+            records: List of normalized records, or a ZoneSnapshot
             hostname: Hostname to match
             record_type: Optional record type to match
         
         Returns:
             Filtered list of records
         """
+        if isinstance(records, ZoneSnapshot):
+            return records.lookup(hostname, record_type)
         result = []
         for rec in records:
             if rec.get('hostname', '').lower() == hostname.lower():
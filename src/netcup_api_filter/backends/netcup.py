@@ -5,9 +5,10 @@ Implements DNSBackend interface for Netcup's Customer Control Panel API.
 """
 
 import logging
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Mapping, Optional
 
-from .base import BackendError, DNSBackend
+from ..dns_record import DNSRecord
+from .base import BackendError, DNSBackend, batch_op_error, batch_result, batch_results
 
 logger = logging.getLogger(__name__)
 
@@ -37,11 +38,12 @@ class NetcupBackend(DNSBackend):
             api_key=config['api_key'],
             api_password=config['api_password'],
             api_url=config.get('api_url', 'https://ccp.netcup.net/run/webservice/servers/endpoint.php?JSON'),
-            timeout=config.get('timeout', 30)
+            timeout=config.get('timeout', 30),
+            pooled=True
         )
     
     def test_connection(self) -> tuple[bool, str]:
-        """Test connection by logging in and out."""
+        """Test connection by logging in and out (a fresh, unpooled session)."""
         try:
             self.client.login()
             self.client.logout()
@@ -62,96 +64,72 @@ class NetcupBackend(DNSBackend):
     def validate_zone_access(self, zone: str) -> tuple[bool, str]:
         """Validate zone access by attempting to fetch zone info."""
         try:
-            self.client.login()
-            try:
-                self.client.info_dns_zone(zone)
-                return True, ""
-            finally:
-                self.client.logout()
+            self.client.info_dns_zone(zone)
+            return True, ""
         except Exception as e:
             return False, f"Cannot access zone {zone}: {e}"
     
-    def list_records(self, zone: str) -> List[Dict[str, Any]]:
-        """List all DNS records for a zone."""
+    @property
+    def cache_namespace(self) -> str:
+        return self.client.cache_namespace
+    
+    def list_records(self, zone: str) -> List[DNSRecord]:
+        """List all DNS records for a zone.
+        
+        Served by the pooled client's zone cache (read without copying);
+        concurrent misses share one infoDnsRecords call.
+        """
         try:
-            self.client.login()
-            try:
-                records = self.client.info_dns_records(zone)
-                return [self.normalize_record(r) for r in records]
-            finally:
-                self.client.logout()
+            return [self.normalize_record(r) for r in self.client.dns_snapshot(zone)]
         except Exception as e:
             logger.error(f"Failed to list records for {zone}: {e}")
             raise BackendError(f"Failed to list records: {e}")
     
-    def create_record(self, zone: str, record: Dict[str, Any]) -> Dict[str, Any]:
+    def create_record(self, zone: str, record: Dict[str, Any]) -> DNSRecord:
         """Create a DNS record.
         
         Netcup API works by submitting the full record set,
         so we fetch existing records, add the new one, and update.
         """
         try:
-            self.client.login()
-            try:
-                # Get existing records
-                existing = self.client.info_dns_records(zone)
-                
-                # Add new record
-                new_record = {
-                    'hostname': record['hostname'],
-                    'type': record['type'],
-                    'destination': record['destination'],
-                }
-                if record.get('priority'):
-                    new_record['priority'] = record['priority']
-                
-                existing.append(new_record)
-                
-                # Update zone
-                self.client.update_dns_records(zone, existing)
-                
-                return self.normalize_record(record)
-            finally:
-                self.client.logout()
+            # Get existing records (uncached: the full set is sent back)
+            existing = self.client.info_dns_records(zone, use_cache=False)
+            
+            # Add new record
+            new_record = {
+                'hostname': record['hostname'],
+                'type': record['type'],
+                'destination': record['destination'],
+            }
+            if record.get('priority'):
+                new_record['priority'] = record['priority']
+            
+            existing.append(new_record)
+            
+            # Update zone
+            self.client.update_dns_records(zone, existing)
+            
+            return self.normalize_record(record)
         except Exception as e:
             logger.error(f"Failed to create record in {zone}: {e}")
             raise BackendError(f"Failed to create record: {e}")
     
-    def update_record(self, zone: str, record_id: str, record: Dict[str, Any]) -> Dict[str, Any]:
+    def update_record(self, zone: str, record_id: str, record: Dict[str, Any]) -> DNSRecord:
         """Update a DNS record.
         
         Netcup uses record IDs in response but also matches by hostname+type.
         """
         try:
-            self.client.login()
-            try:
-                existing = self.client.info_dns_records(zone)
-                
-                # Find and update the record
-                found = False
-                for idx, rec in enumerate(existing):
-                    # Match by ID or by hostname+type
-                    if (str(rec.get('id')) == str(record_id) or 
-                        (rec.get('hostname') == record['hostname'] and 
-                         rec.get('type') == record['type'])):
-                        existing[idx] = {
-                            'id': rec.get('id'),  # Preserve ID
-                            'hostname': record['hostname'],
-                            'type': record['type'],
-                            'destination': record['destination'],
-                        }
-                        if record.get('priority'):
-                            existing[idx]['priority'] = record['priority']
-                        found = True
-                        break
-                
-                if not found:
-                    raise BackendError(f"Record {record_id} not found")
-                
-                self.client.update_dns_records(zone, existing)
-                return self.normalize_record(record)
-            finally:
-                self.client.logout()
+            existing = self.client.info_dns_records(zone, use_cache=False)
+            
+            # Find and update the record
+            idx = self._find_record(existing, record_id, record)
+            if idx is None:
+                raise BackendError(f"Record {record_id} not found")
+            existing[idx] = self._updated_record(existing[idx], record)
+            
+            self.client.update_dns_records(zone, existing)
+            return self.normalize_record(record)
         except BackendError:
             raise
         except Exception as e:
@@ -161,46 +139,132 @@ class NetcupBackend(DNSBackend):
     def delete_record(self, zone: str, record_id: str) -> bool:
         """Delete a DNS record by marking it for deletion."""
         try:
-            self.client.login()
-            try:
-                existing = self.client.info_dns_records(zone)
-                
-                # Filter out the record to delete
-                filtered = [r for r in existing if str(r.get('id')) != str(record_id)]
-                
-                if len(filtered) == len(existing):
-                    raise BackendError(f"Record {record_id} not found")
-                
-                self.client.update_dns_records(zone, filtered)
-                return True
-            finally:
-                self.client.logout()
+            existing = self.client.info_dns_records(zone, use_cache=False)
+            
+            # The CCP only deletes records flagged deleterecord
+            idx = self._find_record(existing, record_id)
+            if idx is None:
+                raise BackendError(f"Record {record_id} not found")
+            
+            self.client.update_dns_records(zone, [dict(existing[idx], deleterecord=True)])
+            return True
         except BackendError:
             raise
         except Exception as e:
             logger.error(f"Failed to delete record in {zone}: {e}")
             raise BackendError(f"Failed to delete record: {e}")
     
+    def apply_batch(self, zone: str, ops: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Apply several record operations with one updateDnsRecords call.
+        
+        The zone is read once (uncached) to resolve record IDs; the CCP then
+        receives only the changed records. Later ops on a record already
+        changed in the batch replace its entry, so the result matches applying
+        the ops in order.
+        """
+        if not ops:
+            return []
+        results: List[Optional[Dict[str, Any]]] = [None] * len(ops)
+        try:
+            existing = self.client.info_dns_records(zone, use_cache=False)
+        except Exception as e:
+            logger.error(f"Failed to read records of {zone} for batch: {e}")
+            return [batch_result(index, op, error=f"Failed to read records: {e}")
+                    for index, op in enumerate(ops)]
+        
+        # record id -> (entry, indexes of the ops it carries); creates kept apart
+        changed: Dict[str, tuple] = {}
+        created: List[tuple] = []
+        for index, op in enumerate(ops):
+            error = batch_op_error(op)
+            if error is not None:
+                results[index] = batch_result(index, op, error=error)
+                continue
+            if op['op'] == 'create':
+                created.append((self._updated_record({}, op), index))
+                continue
+            idx = self._find_record(existing, op['id'], op if op['op'] == 'update' else None)
+            current = existing[idx] if idx is not None else None
+            record_id = str(current.get('id')) if current is not None else ''
+            if current is None or (record_id in changed and changed[record_id][0].get('deleterecord')):
+                results[index] = batch_result(index, op, error=f"Record {op['id']} not found")
+                continue
+            entry = (dict(current, deleterecord=True) if op['op'] == 'delete'
+                     else self._updated_record(current, op))
+            carried = changed[record_id][1] if record_id in changed else []
+            changed[record_id] = (entry, carried + [index])
+        
+        entries = [entry for entry, _ in changed.values()] + [entry for entry, _ in created]
+        if entries:
+            try:
+                response = self.client.update_dns_records(zone, entries)
+            except Exception as e:
+                logger.error(f"Failed to apply batch of {len(entries)} records in {zone}: {e}")
+                for _, indexes in changed.values():
+                    for index in indexes:
+                        results[index] = batch_result(index, ops[index], error=str(e))
+                for _, index in created:
+                    results[index] = batch_result(index, ops[index], error=str(e))
+                return batch_results(results)
+            
+            for entry, indexes in changed.values():
+                for index in indexes:
+                    results[index] = batch_result(index, ops[index], self.normalize_record(entry))
+            from ..netcup_client import created_record_id
+            zone_records = response.get('dnsrecords') if isinstance(response, dict) else None
+            taken = {str(rec.get('id')) for rec in existing}
+            for entry, index in created:
+                new_id = created_record_id(zone_records, entry, taken)
+                results[index] = batch_result(index, ops[index], self.normalize_record(dict(entry, id=new_id or '')))
+        return batch_results(results)
+    
+    @staticmethod
+    def _find_record(existing: List[Dict[str, Any]], record_id: Any,
+                     record: Optional[Dict[str, Any]] = None) -> Optional[int]:
+        """Index of the record with ``record_id``.
+        
+        Updates (``record`` given) fall back to the first record with the
+        same hostname and type, for callers holding stale IDs.
+        """
+        for idx, rec in enumerate(existing):
+            if str(rec.get('id')) == str(record_id):
+                return idx
+        if record is not None:
+            for idx, rec in enumerate(existing):
+                if rec.get('hostname') == record['hostname'] and rec.get('type') == record['type']:
+                    return idx
+        return None
+    
+    @staticmethod
+    def _updated_record(current: Dict[str, Any], record: Dict[str, Any]) -> Dict[str, Any]:
+        """updateDnsRecords entry writing ``record`` over ``current`` (keeps its ID)."""
+        entry = {
+            'hostname': record['hostname'],
+            'type': str(record['type']).upper(),
+            'destination': record['destination'],
+        }
+        if current.get('id'):
+            entry = {'id': current['id'], **entry}
+        if record.get('priority'):
+            entry['priority'] = record['priority']
+        return entry
+    
     def get_zone_info(self, zone: str) -> Dict[str, Any]:
         """Get zone information."""
         try:
-            self.client.login()
-            try:
-                return self.client.info_dns_zone(zone)
-            finally:
-                self.client.logout()
+            return self.client.info_dns_zone(zone)
         except Exception as e:
             logger.error(f"Failed to get zone info for {zone}: {e}")
             raise BackendError(f"Failed to get zone info: {e}")
     
-    def normalize_record(self, record: Dict[str, Any]) -> Dict[str, Any]:
+    def normalize_record(self, record: Mapping[str, Any]) -> DNSRecord:
         """Normalize Netcup record format."""
-        return {
-            'id': str(record.get('id', '')),
-            'hostname': record.get('hostname', '@'),
-            'type': record.get('type', ''),
-            'destination': record.get('destination', ''),
-            'priority': record.get('priority'),
-            'ttl': record.get('ttl', 300),
-            'state': record.get('state'),  # Netcup-specific
-        }
+        return DNSRecord(
+            id=str(record.get('id', '')),
+            hostname=record.get('hostname', '@'),
+            type=record.get('type', ''),
+            destination=record.get('destination', ''),
+            priority=record.get('priority'),
+            ttl=record.get('ttl', 300),
+            state=record.get('state'),  # Netcup-specific
+        )
@@ -2,20 +2,217 @@
 PowerDNS Authoritative Server Backend Implementation.
 
 Implements DNSBackend interface for PowerDNS HTTP API.
+AsyncPowerDNSBackend offers the same operations as coroutines for the shared
+event loop in async_runtime.
 """
 from __future__ import annotations
 
 import logging
-from typing import Any, Dict, List
+import os
+from typing import Any, Dict, List, Mapping, Optional, Tuple
 
 import httpx
 
-from .base import BackendError, DNSBackend
+from ..async_runtime import coalesce_async, get_async_runtime
+from ..circuit_breaker import get_breaker
+from ..dns_record import DNSRecord
+from ..http_transport import create_http_client
+from ..single_flight import coalesce
+from ..zone_cache import credential_digest, zone_key
+from ..zone_snapshot import ZoneSnapshot
+from .base import BackendError, DNSBackend, batch_op_error, batch_result, batch_results, rrset_change_error
 
 logger = logging.getLogger(__name__)
 
 
-class PowerDNSBackend(DNSBackend):
+class _PowerDNSRequests:
+    """Request building and response parsing shared by both PowerDNS clients."""
+    
+    api_url: str
+    api_key: str
+    timeout: float
+    server_id: str
+    
+    def _read_config(self, config: Dict[str, Any]):
+        self.api_url = config['api_url'].rstrip('/')
+        self.api_key = config['api_key']
+        self.timeout = config.get('timeout', 30)
+        self.server_id = config.get('server_id', 'localhost')
+    
+    @property
+    def cache_namespace(self) -> str:
+        # Results are only shared between backends holding the same API key
+        return f"powerdns:{self.api_url}:{self.server_id}:{credential_digest(self.api_key)}"
+    
+    def _ensure_trailing_dot(self, name: str) -> str:
+        """Ensure zone/record name has trailing dot for PowerDNS."""
+        return name if name.endswith('.') else f"{name}."
+    
+    def _strip_trailing_dot(self, name: str) -> str:
+        """Remove trailing dot from zone/record name."""
+        return name.rstrip('.')
+    
+    def _zone_path(self, zone: str) -> str:
+        return f'/api/v1/servers/{self.server_id}/zones/{self._ensure_trailing_dot(zone)}'
+    
+    def _parse_records(self, zone_data: Dict[str, Any]) -> List[DNSRecord]:
+        """Normalized enabled records of a zone document."""
+        records = []
+        for rrset in zone_data.get('rrsets', []):
+            rr_name = self._strip_trailing_dot(rrset.get('name', ''))
+            rr_type = rrset.get('type', '')
+            ttl = rrset.get('ttl', 60)
+            
+            for record in rrset.get('records', []):
+                if record.get('disabled', False):
+                    continue
+                records.append(self.normalize_record({
+                    'id': f"{rrset['name']}:{rrset['type']}",
+                    'hostname': rr_name,
+                    'type': rr_type,
+                    'content': record.get('content', ''),
+                    'ttl': ttl,
+                }))
+        return records
+    
+    def _rrset_name(self, zone: str, hostname: str) -> str:
+        """Absolute rrset name (trailing dot) of a relative or absolute hostname."""
+        zone_name = self._ensure_trailing_dot(zone)
+        if hostname == '@' or hostname == '':
+            return zone_name
+        if hostname.endswith('.'):
+            return hostname
+        if hostname.lower() == zone_name[:-1].lower() or hostname.lower().endswith('.' + zone_name[:-1].lower()):
+            # Absolute without the dot, as list_records returns it
+            return f"{hostname}."
+        return f"{hostname}.{zone_name}"
+    
+    def _rrset_query(self, zone: str, hostname: str, record_type: str) -> Dict[str, str]:
+        """Query parameters selecting one rrset of the zone document."""
+        return {'rrset_name': self._rrset_name(zone, hostname), 'rrset_type': record_type.upper()}
+    
+    def _select_rrset(self, zone: str, hostname: str, record_type: str,
+                      zone_data: Dict[str, Any]) -> List[DNSRecord]:
+        """Normalized records of one rrset (servers before 4.6 ignore the filter)."""
+        name = self._rrset_name(zone, hostname).lower()
+        return self._parse_records({'rrsets': [
+            rrset for rrset in zone_data.get('rrsets', [])
+            if rrset.get('name', '').lower() == name and rrset.get('type') == record_type.upper()
+        ]})
+    
+    def _change_rrset(self, zone: str, change: Dict[str, Any]) -> Dict[str, Any]:
+        """PATCH rrset entry for one apply_changes() change."""
+        error = rrset_change_error(change)
+        if error is not None:
+            raise BackendError(error)
+        changetype = str(change['changetype']).upper()
+        rrset = {
+            "name": self._rrset_name(zone, change['hostname']),
+            "type": change['type'].upper(),
+            "changetype": changetype,
+        }
+        if changetype == 'REPLACE':
+            rrset["ttl"] = change.get('ttl', 60)
+            rrset["records"] = [
+                {"content": destination, "disabled": False}
+                for destination in change.get('destinations') or []
+            ]
+        return rrset
+    
+    def _replace_rrset(self, zone: str, record: Dict[str, Any]) -> Dict[str, Any]:
+        """REPLACE rrset writing ``record``."""
+        return {
+            "name": self._rrset_name(zone, record['hostname']),
+            "type": record['type'],
+            "changetype": "REPLACE",
+            "ttl": record.get('ttl', 60),
+            "records": [
+                {"content": record['destination'], "disabled": False}
+            ]
+        }
+    
+    def _created_record(self, rrset: Dict[str, Any], record: Dict[str, Any]) -> DNSRecord:
+        return self.normalize_record({
+            'id': f"{rrset['name']}:{record['type']}",
+            'hostname': record['hostname'],
+            'type': record['type'],
+            'content': record['destination'],
+            'ttl': record.get('ttl', 60),
+        })
+    
+    def _batch_rrsets(self, zone: str, ops: List[Dict[str, Any]]
+                      ) -> Tuple[List[Optional[Dict[str, Any]]], Dict[tuple, tuple]]:
+        """Plan apply_batch(): (results of invalid ops, rrset key -> (rrset, op indexes)).
+        
+        Creates and updates REPLACE the record's rrset, deletes DELETE the
+        rrset of the record ID, as in the single-record methods. PowerDNS
+        rejects a PATCH naming an rrset twice, so a later op on an rrset
+        replaces the earlier entry, which is also what applying them in
+        order leaves behind.
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(ops)
+        rrsets: Dict[tuple, tuple] = {}
+        for index, op in enumerate(ops):
+            error = batch_op_error(op)
+            if error is None:
+                try:
+                    rrset = (self._delete_rrset(str(op['id'])) if op['op'] == 'delete'
+                             else self._replace_rrset(zone, dict(op, type=str(op['type']).upper())))
+                except BackendError as e:
+                    error = str(e)
+                else:
+                    key = (rrset['name'].lower(), rrset['type'].upper())
+                    carried = rrsets.pop(key)[1] if key in rrsets else []
+                    rrsets[key] = (rrset, carried + [index])
+                    continue
+            results[index] = batch_result(index, op, error=error)
+        return results, rrsets
+    
+    def _batch_results(self, zone: str, ops: List[Dict[str, Any]], results: List[Optional[Dict[str, Any]]],
+                       rrsets: Dict[tuple, tuple], error: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Fill in the results of the ops sent in the PATCH."""
+        for _, indexes in rrsets.values():
+            for index in indexes:
+                op = ops[index]
+                if error is not None:
+                    results[index] = batch_result(index, op, error=error)
+                elif op['op'] == 'delete':
+                    results[index] = batch_result(index, op)
+                else:
+                    rrset = {'name': self._rrset_name(zone, op['hostname'])}
+                    record = dict(op, type=str(op['type']).upper())
+                    results[index] = batch_result(index, op, self._created_record(rrset, record))
+        return batch_results(results)
+    
+    def _delete_rrset(self, record_id: str) -> Dict[str, Any]:
+        """DELETE rrset for a record_id of the form "name:type"."""
+        parts = record_id.rsplit(':', 1)
+        if len(parts) != 2:
+            raise BackendError(f"Invalid record_id format: {record_id}")
+        
+        name, rtype = parts
+        return {
+            "name": self._ensure_trailing_dot(name),
+            "type": rtype,
+            "changetype": "DELETE"
+        }
+    
+    def normalize_record(self, record: Mapping[str, Any]) -> DNSRecord:
+        """Normalize PowerDNS record format."""
+        hostname = record.get('hostname', record.get('name', '@'))
+        hostname = self._strip_trailing_dot(hostname)
+        
+        return DNSRecord(
+            id=record.get('id', ''),
+            hostname=hostname,
+            type=record.get('type', ''),
+            destination=record.get('content', record.get('destination', '')),
+            priority=record.get('priority'),
+            ttl=record.get('ttl', 60),
+        )
+
+
+class PowerDNSBackend(_PowerDNSRequests, DNSBackend):
     """PowerDNS Authoritative Server backend implementation."""
     
     def __init__(self, config: Dict[str, Any]):
@@ -30,38 +227,37 @@ class PowerDNSBackend(DNSBackend):
             server_id: Server ID (default: localhost)
         """
         super().__init__(config)
-        
-        self.api_url = config['api_url'].rstrip('/')
-        self.api_key = config['api_key']
-        self.timeout = config.get('timeout', 30)
-        self.server_id = config.get('server_id', 'localhost')
+        self._read_config(config)
         
         self._client: httpx.Client | None = None
+        self._client_pid: int | None = None
     
     @property
     def client(self) -> httpx.Client:
-        """Lazy-initialize HTTP client."""
-        if self._client is None:
-            self._client = httpx.Client(
-                base_url=self.api_url,
+        """Lazy-initialize HTTP client on the shared keep-alive pool.
+        
+        Re-created after fork so a worker never uses its parent's pool.
+        """
+        if self._client is None or self._client_pid != os.getpid():
+            self._client = create_http_client(
+                self.api_url,
                 headers={'X-API-Key': self.api_key},
                 timeout=self.timeout
             )
+            self._client_pid = os.getpid()
         return self._client
     
-    def _ensure_trailing_dot(self, name: str) -> str:
-        """Ensure zone/record name has trailing dot for PowerDNS."""
-        return name if name.endswith('.') else f"{name}."
-    
-    def _strip_trailing_dot(self, name: str) -> str:
-        """Remove trailing dot from zone/record name."""
-        return name.rstrip('.')
+    def _request(self, method: str, path: str, **kwargs) -> httpx.Response:
+        """API request through the server's circuit breaker (see circuit_breaker)."""
+        with get_breaker(self.cache_namespace).guard(self.timeout) as timeout:
+            response = self.client.request(method, path, timeout=timeout, **kwargs)
+            response.raise_for_status()
+            return response
     
     def test_connection(self) -> tuple[bool, str]:
         """Test connection to PowerDNS API."""
         try:
-            response = self.client.get(f'/api/v1/servers/{self.server_id}')
-            response.raise_for_status()
+            response = self._request('GET', f'/api/v1/servers/{self.server_id}')
             data = response.json()
             version = data.get('version', 'unknown')
             return True, f"Connected to PowerDNS {version}"
@@ -72,8 +268,7 @@ class PowerDNSBackend(DNSBackend):
     def list_zones(self) -> List[str]:
         """List all zones manageable by this backend."""
         try:
-            response = self.client.get(f'/api/v1/servers/{self.server_id}/zones')
-            response.raise_for_status()
+            response = self._request('GET', f'/api/v1/servers/{self.server_id}/zones')
             zones = response.json()
             return [self._strip_trailing_dot(z.get('name', '')) for z in zones]
         except Exception as e:
@@ -83,9 +278,7 @@ class PowerDNSBackend(DNSBackend):
     def validate_zone_access(self, zone: str) -> tuple[bool, str]:
         """Validate zone access by fetching zone info."""
         try:
-            zone_name = self._ensure_trailing_dot(zone)
-            response = self.client.get(f'/api/v1/servers/{self.server_id}/zones/{zone_name}')
-            response.raise_for_status()
+            self._request('GET', self._zone_path(zone))
             return True, ""
         except httpx.HTTPStatusError as e:
             if e.response.status_code == 404:
@@ -94,78 +287,33 @@ class PowerDNSBackend(DNSBackend):
         except Exception as e:
             return False, f"Cannot access zone {zone}: {e}"
     
-    def list_records(self, zone: str) -> List[Dict[str, Any]]:
-        """List all DNS records for a zone."""
+    def list_records(self, zone: str) -> List[DNSRecord]:
+        """List all DNS records for a zone.
+        
+        Concurrent listings of the same zone share one API request.
+        """
+        records = coalesce(zone_key(self.cache_namespace, zone), lambda: self._fetch_records(zone))
+        return list(records)
+    
+    def _fetch_records(self, zone: str) -> List[DNSRecord]:
         try:
-            zone_name = self._ensure_trailing_dot(zone)
-            response = self.client.get(f'/api/v1/servers/{self.server_id}/zones/{zone_name}')
-            response.raise_for_status()
-            zone_data = response.json()
-            
-            records = []
-            for rrset in zone_data.get('rrsets', []):
-                rr_name = self._strip_trailing_dot(rrset.get('name', ''))
-                rr_type = rrset.get('type', '')
-                ttl = rrset.get('ttl', 60)
-                
-                for record in rrset.get('records', []):
-                    if record.get('disabled', False):
-                        continue
-                    records.append(self.normalize_record({
-                        'id': f"{rrset['name']}:{rrset['type']}",
-                        'hostname': rr_name,
-                        'type': rr_type,
-                        'content': record.get('content', ''),
-                        'ttl': ttl,
-                    }))
-            
-            return records
+            response = self._request('GET', self._zone_path(zone))
+            return self._parse_records(response.json())
         except Exception as e:
             logger.error(f"Failed to list records for {zone}: {e}")
             raise BackendError(f"Failed to list records: {e}")
     
-    def create_record(self, zone: str, record: Dict[str, Any]) -> Dict[str, Any]:
+    def create_record(self, zone: str, record: Dict[str, Any]) -> DNSRecord:
         """Create a DNS record."""
         try:
-            zone_name = self._ensure_trailing_dot(zone)
-            hostname = record['hostname']
-            
-            # Build full name
-            if hostname == '@' or hostname == '':
-                name = zone_name
-            elif hostname.endswith('.'):
-                name = hostname
-            else:
-                name = f"{hostname}.{zone_name}"
-            
-            rrset = {
-                "name": name,
-                "type": record['type'],
-                "changetype": "REPLACE",
-                "ttl": record.get('ttl', 60),
-                "records": [
-                    {"content": record['destination'], "disabled": False}
-                ]
-            }
-            
-            response = self.client.patch(
-                f'/api/v1/servers/{self.server_id}/zones/{zone_name}',
-                json={"rrsets": [rrset]}
-            )
-            response.raise_for_status()
-            
-            return self.normalize_record({
-                'id': f"{name}:{record['type']}",
-                'hostname': hostname,
-                'type': record['type'],
-                'content': record['destination'],
-                'ttl': record.get('ttl', 60),
-            })
+            rrset = self._replace_rrset(zone, record)
+            self._request('PATCH', self._zone_path(zone), json={"rrsets": [rrset]})
+            return self._created_record(rrset, record)
         except Exception as e:
             logger.error(f"Failed to create record in {zone}: {e}")
             raise BackendError(f"Failed to create record: {e}")
     
-    def update_record(self, zone: str, record_id: str, record: Dict[str, Any]) -> Dict[str, Any]:
+    def update_record(self, zone: str, record_id: str, record: Dict[str, Any]) -> DNSRecord:
         """Update a DNS record.
         
         PowerDNS uses REPLACE changetype, so update is same as create.
@@ -178,57 +326,57 @@ class PowerDNSBackend(DNSBackend):
         record_id format: "name:type" (e.g., "host.example.com.:A")
         """
         try:
-            zone_name = self._ensure_trailing_dot(zone)
-            
-            # Parse record_id
-            parts = record_id.rsplit(':', 1)
-            if len(parts) != 2:
-                raise BackendError(f"Invalid record_id format: {record_id}")
-            
-            name, rtype = parts
-            name = self._ensure_trailing_dot(name) if not name.endswith('.') else name
-            
-            rrset = {
-                "name": name,
-                "type": rtype,
-                "changetype": "DELETE"
-            }
-            
-            response = self.client.patch(
-                f'/api/v1/servers/{self.server_id}/zones/{zone_name}',
-                json={"rrsets": [rrset]}
-            )
-            response.raise_for_status()
+            rrset = self._delete_rrset(record_id)
+            self._request('PATCH', self._zone_path(zone), json={"rrsets": [rrset]})
             return True
         except Exception as e:
             logger.error(f"Failed to delete record in {zone}: {e}")
             raise BackendError(f"Failed to delete record: {e}")
     
+    def get_rrset(self, zone: str, hostname: str, record_type: str) -> List[DNSRecord]:
+        """List one rrset, fetching only it (rrset_name/rrset_type filter)."""
+        try:
+            response = self._request('GET', self._zone_path(zone),
+                                     params=self._rrset_query(zone, hostname, record_type))
+            return self._select_rrset(zone, hostname, record_type, response.json())
+        except Exception as e:
+            logger.error(f"Failed to get rrset {hostname}/{record_type} in {zone}: {e}")
+            raise BackendError(f"Failed to get rrset: {e}")
+    
+    def apply_changes(self, zone: str, changes: List[Dict[str, Any]]) -> None:
+        """Replace or delete several rrsets in one PATCH (applied atomically)."""
+        rrsets = [self._change_rrset(zone, change) for change in changes]
+        if not rrsets:
+            return
+        try:
+            self._request('PATCH', self._zone_path(zone), json={"rrsets": rrsets})
+        except Exception as e:
+            logger.error(f"Failed to apply {len(rrsets)} rrset changes in {zone}: {e}")
+            raise BackendError(f"Failed to apply changes: {e}")
+    
+    def apply_batch(self, zone: str, ops: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Apply several record operations in one PATCH (applied atomically)."""
+        results, rrsets = self._batch_rrsets(zone, ops)
+        if not rrsets:
+            return batch_results(results)
+        try:
+            self._request('PATCH', self._zone_path(zone),
+                          json={"rrsets": [rrset for rrset, _ in rrsets.values()]})
+        except Exception as e:
+            logger.error(f"Failed to apply batch of {len(rrsets)} rrsets in {zone}: {e}")
+            return self._batch_results(zone, ops, results, rrsets, error=str(e))
+        return self._batch_results(zone, ops, results, rrsets)
+    
     def get_zone_info(self, zone: str) -> Dict[str, Any]:
         """Get zone information."""
         try:
-            zone_name = self._ensure_trailing_dot(zone)
-            response = self.client.get(f'/api/v1/servers/{self.server_id}/zones/{zone_name}')
-            response.raise_for_status()
-            return response.json()
+            response = self._request('GET', self._zone_path(zone))
+            info: Dict[str, Any] = response.json()
+            return info
         except Exception as e:
             logger.error(f"Failed to get zone info for {zone}: {e}")
             raise BackendError(f"Failed to get zone info: {e}")
     
-    def normalize_record(self, record: Dict[str, Any]) -> Dict[str, Any]:
-        """Normalize PowerDNS record format."""
-        hostname = record.get('hostname', record.get('name', '@'))
-        hostname = self._strip_trailing_dot(hostname)
-        
-        return {
-            'id': record.get('id', ''),
-            'hostname': hostname,
-            'type': record.get('type', ''),
-            'destination': record.get('content', record.get('destination', '')),
-            'priority': record.get('priority'),
-            'ttl': record.get('ttl', 60),
-        }
-    
     def __del__(self):
         """Cleanup HTTP client on destruction."""
         if self._client is not None:
@@ -236,3 +384,151 @@ class PowerDNSBackend(DNSBackend):
                 self._client.close()
             except Exception:
                 pass
+
+
+class AsyncPowerDNSBackend(_PowerDNSRequests):
+    """asyncio variant of PowerDNSBackend for the shared loop in async_runtime.
+    
+    Every operation, including snapshot() and get_rrset(), is a coroutine
+    (``run_async(backend.list_records(zone))`` from a Flask thread). It is not
+    a DNSBackend: the blocking helpers of that interface would call these
+    coroutines without awaiting them. Requests hold the per-server semaphore
+    and use the loop's per-origin connection pool; concurrent listings of one
+    zone share a request.
+    """
+    
+    def __init__(self, config: Dict[str, Any]):
+        """Initialize from the same config keys as PowerDNSBackend."""
+        self.config = config
+        self._read_config(config)
+    
+    async def _request(self, method: str, path: str, **kwargs) -> httpx.Response:
+        """API request through the server's semaphore and circuit breaker."""
+        runtime = get_async_runtime()
+        async with runtime.semaphore(self.cache_namespace):
+            with get_breaker(self.cache_namespace).guard(self.timeout) as timeout:
+                response = await runtime.http_client(self.api_url).request(
+                    method, f'{self.api_url}{path}',
+                    headers={'X-API-Key': self.api_key}, timeout=timeout, **kwargs
+                )
+                response.raise_for_status()
+                return response
+    
+    async def test_connection(self) -> tuple[bool, str]:
+        """Test connection to PowerDNS API."""
+        try:
+            response = await self._request('GET', f'/api/v1/servers/{self.server_id}')
+            version = response.json().get('version', 'unknown')
+            return True, f"Connected to PowerDNS {version}"
+        except Exception as e:
+            logger.error(f"PowerDNS connection test failed: {e}")
+            return False, str(e)
+    
+    async def list_zones(self) -> List[str]:
+        """List all zones manageable by this backend."""
+        try:
+            response = await self._request('GET', f'/api/v1/servers/{self.server_id}/zones')
+            return [self._strip_trailing_dot(z.get('name', '')) for z in response.json()]
+        except Exception as e:
+            logger.error(f"Failed to list zones: {e}")
+            raise BackendError(f"Failed to list zones: {e}")
+    
+    async def validate_zone_access(self, zone: str) -> tuple[bool, str]:
+        """Validate zone access by fetching zone info."""
+        try:
+            await self._request('GET', self._zone_path(zone))
+            return True, ""
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code == 404:
+                return False, f"Zone {zone} not found"
+            return False, f"Cannot access zone {zone}: {e}"
+        except Exception as e:
+            return False, f"Cannot access zone {zone}: {e}"
+    
+    async def list_records(self, zone: str) -> List[DNSRecord]:
+        """List all DNS records for a zone.
+        
+        Concurrent listings of the same zone share one API request.
+        """
+        records = await coalesce_async(zone_key(self.cache_namespace, zone), lambda: self._fetch_records(zone))
+        return list(records)
+    
+    async def _fetch_records(self, zone: str) -> List[DNSRecord]:
+        try:
+            response = await self._request('GET', self._zone_path(zone))
+            return self._parse_records(response.json())
+        except Exception as e:
+            logger.error(f"Failed to list records for {zone}: {e}")
+            raise BackendError(f"Failed to list records: {e}")
+    
+    async def snapshot(self, zone: str) -> ZoneSnapshot:
+        """Normalized records of a zone, indexed by hostname/type and ID."""
+        return ZoneSnapshot(await self.list_records(zone), zone)
+    
+    async def create_record(self, zone: str, record: Dict[str, Any]) -> DNSRecord:
+        """Create a DNS record."""
+        try:
+            rrset = self._replace_rrset(zone, record)
+            await self._request('PATCH', self._zone_path(zone), json={"rrsets": [rrset]})
+            return self._created_record(rrset, record)
+        except Exception as e:
+            logger.error(f"Failed to create record in {zone}: {e}")
+            raise BackendError(f"Failed to create record: {e}")
+    
+    async def update_record(self, zone: str, record_id: str, record: Dict[str, Any]) -> DNSRecord:
+        """Update a DNS record (REPLACE, same as create)."""
+        return await self.create_record(zone, record)
+    
+    async def delete_record(self, zone: str, record_id: str) -> bool:
+        """Delete a DNS record ("name:type" record_id)."""
+        try:
+            rrset = self._delete_rrset(record_id)
+            await self._request('PATCH', self._zone_path(zone), json={"rrsets": [rrset]})
+            return True
+        except Exception as e:
+            logger.error(f"Failed to delete record in {zone}: {e}")
+            raise BackendError(f"Failed to delete record: {e}")
+    
+    async def get_rrset(self, zone: str, hostname: str, record_type: str) -> List[DNSRecord]:
+        """List one rrset, fetching only it (rrset_name/rrset_type filter)."""
+        try:
+            response = await self._request('GET', self._zone_path(zone),
+                                           params=self._rrset_query(zone, hostname, record_type))
+            return self._select_rrset(zone, hostname, record_type, response.json())
+        except Exception as e:
+            logger.error(f"Failed to get rrset {hostname}/{record_type} in {zone}: {e}")
+            raise BackendError(f"Failed to get rrset: {e}")
+    
+    async def apply_changes(self, zone: str, changes: List[Dict[str, Any]]) -> None:
+        """Replace or delete several rrsets in one PATCH (applied atomically)."""
+        rrsets = [self._change_rrset(zone, change) for change in changes]
+        if not rrsets:
+            return
+        try:
+            await self._request('PATCH', self._zone_path(zone), json={"rrsets": rrsets})
+        except Exception as e:
+            logger.error(f"Failed to apply {len(rrsets)} rrset changes in {zone}: {e}")
+            raise BackendError(f"Failed to apply changes: {e}")
+    
+    async def apply_batch(self, zone: str, ops: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Apply several record operations in one PATCH (applied atomically)."""
+        results, rrsets = self._batch_rrsets(zone, ops)
+        if not rrsets:
+            return batch_results(results)
+        try:
+            await self._request('PATCH', self._zone_path(zone),
+                                json={"rrsets": [rrset for rrset, _ in rrsets.values()]})
+        except Exception as e:
+            logger.error(f"Failed to apply batch of {len(rrsets)} rrsets in {zone}: {e}")
+            return self._batch_results(zone, ops, results, rrsets, error=str(e))
+        return self._batch_results(zone, ops, results, rrsets)
+    
+    async def get_zone_info(self, zone: str) -> Dict[str, Any]:
+        """Get zone information."""
+        try:
+            response = await self._request('GET', self._zone_path(zone))
+            info: Dict[str, Any] = response.json()
+            return info
+        except Exception as e:
+            logger.error(f"Failed to get zone info for {zone}: {e}")
+            raise BackendError(f"Failed to get zone info: {e}")
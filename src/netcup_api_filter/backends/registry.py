@@ -3,19 +3,41 @@ Backend Registry and Resolution.
 
 Provides factory functions to instantiate backends by provider code
 and resolve backends for realms.
+
+Backends resolved for realms are cached per process: one constructed
+DNSBackend per BackendService, reused while the service row (updated_at,
+config) and its provider row (updated_at) are unchanged. Reuse keeps
+PowerDNS's HTTP client and its connections alive across requests, and the
+config is validated against the provider's JSON Schema only when a backend
+is built. Validators are compiled once per schema. Edits in another worker
+change updated_at and cause a rebuild on the next request; the admin and
+account views also evict a service when they change or delete it.
+
+Configuration:
+- BACKEND_CACHE_SIZE: Cached backend instances per process (default 128, 0 disables)
 """
 
 import json
 import logging
-from typing import Any, Dict, Type
+import os
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple, Type, cast
 
 logger = logging.getLogger(__name__)
 
+# Cache configuration
+BACKEND_CACHE_SIZE = int(os.environ.get("BACKEND_CACHE_SIZE", "128"))
+
 # Import backend implementations
 from .base import BackendError, DNSBackend
 from .netcup import NetcupBackend
 from .powerdns import PowerDNSBackend
 
+if TYPE_CHECKING:
+    from ..models import AccountRealm, BackendService
+
 
 # Registry of available backend implementations
 BACKEND_REGISTRY: Dict[str, Type[DNSBackend]] = {
@@ -44,11 +66,81 @@ def get_backend(provider_code: str, config: Dict[str, Any]) -> DNSBackend:
     return backend_class(config)
 
 
+class BackendCache:
+    """Thread-safe LRU of DNSBackend instances keyed by BackendService id."""
+    
+    def __init__(self, max_entries: int = BACKEND_CACHE_SIZE):
+        self.max_entries = max_entries
+        # service id -> (version, backend)
+        self._entries: "OrderedDict[int, Tuple[tuple, DNSBackend]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, service_id: int, version: tuple) -> Optional[DNSBackend]:
+        with self._lock:
+            entry = self._entries.get(service_id)
+            if entry is None or entry[0] != version:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(service_id)
+            self.hits += 1
+            return entry[1]
+    
+    def put(self, service_id: int, version: tuple, backend: DNSBackend):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[service_id] = (version, backend)
+            self._entries.move_to_end(service_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def evict(self, service_id: int):
+        with self._lock:
+            self._entries.pop(service_id, None)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'misses': self.misses,
+        }
+
+
+# Global cache instance
+_cache = BackendCache()
+if hasattr(os, 'register_at_fork'):
+    # HTTP clients must not be shared with a forked child
+    os.register_at_fork(after_in_child=_cache.clear)
+
+
+def evict_backend(service_id: int) -> None:
+    """Drop the cached backend of a service (after it was edited or deleted)."""
+    _cache.evict(service_id)
+
+
+def clear_backend_cache() -> None:
+    """Drop all cached backends."""
+    _cache.clear()
+
+
+def get_backend_cache_stats() -> Dict[str, Any]:
+    """Get backend cache statistics."""
+    return _cache.stats()
+
+
 def get_backend_for_realm(realm: 'AccountRealm') -> DNSBackend:
     """Resolve the correct backend for a realm.
     
     Exactly one of domain_root_id or user_backend_id must be set
-    (enforced by database trigger).
+    (enforced by database trigger). The rows are reached through the
+    realm's relationships, which token authentication loads eagerly.
     
     Args:
         realm: AccountRealm model instance
@@ -59,12 +151,9 @@ def get_backend_for_realm(realm: 'AccountRealm') -> DNSBackend:
     Raises:
         BackendError: If backend resolution fails or ownership mismatch
     """
-    # Lazy import to avoid circular dependencies
-    from ..models import BackendProvider, BackendService, ManagedDomainRoot
-    
     # Case B: User-provided backend (BYOD)
     if realm.user_backend_id:
-        service = BackendService.query.get(realm.user_backend_id)
+        service = cast(Optional['BackendService'], realm.user_backend)
         if not service or not service.is_active:
             raise BackendError("User backend is disabled or deleted")
         
@@ -76,11 +165,11 @@ def get_backend_for_realm(realm: 'AccountRealm') -> DNSBackend:
     
     # Case A: Platform-managed via domain root
     if realm.domain_root_id:
-        root = ManagedDomainRoot.query.get(realm.domain_root_id)
+        root = realm.domain_root
         if not root or not root.is_active:
             raise BackendError("Domain root is disabled")
         
-        service = BackendService.query.get(root.backend_service_id)
+        service = root.backend_service
         if not service or not service.is_active:
             raise BackendError("Backend service is disabled")
         
@@ -91,9 +180,11 @@ def get_backend_for_realm(realm: 'AccountRealm') -> DNSBackend:
 
 
 def instantiate_backend(service: 'BackendService') -> DNSBackend:
-    """Create backend instance from service configuration.
+    """Return the backend instance for a service configuration.
     
-    Validates config against provider's JSON Schema before instantiation.
+    Reuses the cached instance while the service and provider rows are
+    unchanged. Otherwise validates the config against the provider's JSON
+    Schema and builds a new instance.
     
     Args:
         service: BackendService model instance
@@ -104,12 +195,15 @@ def instantiate_backend(service: 'BackendService') -> DNSBackend:
     Raises:
         BackendError: If provider is unavailable or config is invalid
     """
-    from ..models import BackendProvider
-    
-    provider = BackendProvider.query.get(service.provider_id)
+    provider = service.provider
     if not provider or not provider.is_enabled:
         raise BackendError(f"Provider {service.provider_id} is not available")
     
+    version = (service.updated_at, service.config, provider.id, provider.updated_at)
+    backend = _cache.get(service.id, version)
+    if backend is not None:
+        return backend
+    
     backend_class = BACKEND_REGISTRY.get(provider.provider_code)
     if not backend_class:
         raise BackendError(f"No implementation for provider: {provider.provider_code}")
@@ -123,17 +217,34 @@ def instantiate_backend(service: 'BackendService') -> DNSBackend:
     # Optional: Validate against provider's JSON Schema
     if provider.config_schema:
         try:
-            import jsonschema
-            schema = json.loads(provider.config_schema)
-            jsonschema.validate(instance=config, schema=schema)
-        except ImportError:
-            logger.warning("jsonschema not available, skipping config validation")
-        except json.JSONDecodeError:
-            logger.warning(f"Invalid config_schema JSON for provider {provider.provider_code}")
+            validator = _schema_validator(provider.config_schema)
+            if validator is not None:
+                validator.validate(config)
         except Exception as e:
             raise BackendError(f"Config validation failed: {e}")
     
-    return backend_class(config)
+    backend = backend_class(config)
+    _cache.put(service.id, version, backend)
+    return backend
+
+
+@lru_cache(maxsize=32)
+def _schema_validator(schema_json: str) -> Any:
+    """Compiled validator for a provider's config_schema, or None if unavailable."""
+    try:
+        import jsonschema
+    except ImportError:
+        logger.warning("jsonschema not available, skipping config validation")
+        return None
+    try:
+        schema = json.loads(schema_json)
+    except json.JSONDecodeError:
+        logger.warning("Invalid provider config_schema JSON, skipping config validation")
+        return None
+    validator_class = jsonschema.validators.validator_for(schema)
+    # Raises SchemaError (not cached) like jsonschema.validate() did
+    validator_class.check_schema(schema)
+    return validator_class(schema)
 
 
 def get_available_providers() -> Dict[str, Type[DNSBackend]]:
@@ -0,0 +1,258 @@
+"""Record change journal behind GET /api/dns/<domain>/changes.
+
+Config-management agents used to diff the full zone on every run. The filter
+now journals every record change it sees (models.DnsChange). The journal's
+auto-increment id is the cursor clients pass back to fetch only what changed
+since their last sync:
+
+- Every complete record set the filter reads from the backend, or receives
+  back from an updateDnsRecords call, is compared with the zone's last known
+  state (models.DnsRecordState, one row per record id). Each difference is
+  journaled as created, updated or deleted, and the state is updated. The
+  first read of a zone journals each of its records as created.
+- Writes through the filter are journaled as soon as the backend returns the
+  resulting record set. Changes made elsewhere (CCP web UI, other API
+  clients) are picked up by the next zone read; the changes endpoint reads
+  the zone through the zone cache, so they appear after at most
+  ZONE_CACHE_SECONDS.
+- ``changes_since`` collapses the entries after a cursor to one per record,
+  with its latest values. A record created and deleted in between is left
+  out.
+- Cursor 0, or a cursor older than the retained journal, gets the zone's
+  full current state flagged ``reset``: the client replaces its copy instead
+  of applying deltas.
+- Entries older than CHANGE_JOURNAL_RETENTION_DAYS are pruned.
+
+Journal maintenance is best effort, like the record index: failures are
+logged and never fail the DNS operation that triggered them.
+
+Configuration:
+- CHANGE_JOURNAL_RETENTION_DAYS: Days of journal kept (default 30, 0 disables the journal)
+"""
+from __future__ import annotations
+
+import logging
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional
+
+from flask import Flask
+from sqlalchemy import and_, delete, func, insert, select, update
+
+from .models import DnsChange, DnsRecordState, db
+
+logger = logging.getLogger(__name__)
+
+# Journal configuration
+RETENTION_DAYS = float(os.environ.get("CHANGE_JOURNAL_RETENTION_DAYS", "30"))
+
+# Seconds between prune runs per process
+PRUNE_INTERVAL = 3600
+
+# Compared to detect an update
+_FIELDS = ('hostname', 'record_type', 'destination', 'priority')
+
+
+class ChangeSet(NamedTuple):
+    cursor: int
+    reset: bool
+    changes: List[Dict[str, Any]]
+
+
+def _zone(zone: str) -> str:
+    return zone.rstrip('.').lower()
+
+
+def _row(rec: Dict[str, Any]) -> Dict[str, Any]:
+    """State columns of a backend record."""
+    priority = rec.get('priority')
+    return {
+        'hostname': str(rec.get('hostname') or '@'),
+        'record_type': str(rec.get('type', '')).upper(),
+        'destination': str(rec.get('destination', '')),
+        'priority': str(priority) if priority not in (None, '') else None,
+    }
+
+
+def _state(records: Iterable[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """record id -> state columns, for records that carry an id."""
+    return {
+        str(rec['id']): _row(rec)
+        for rec in records
+        if rec.get('id') and not rec.get('deleterecord')
+    }
+
+
+def to_record(record_id: str, row: Any) -> Dict[str, Any]:
+    """API record dict of a state or journal row."""
+    return {
+        'id': record_id,
+        'hostname': row.hostname,
+        'type': row.record_type,
+        'destination': row.destination,
+        'priority': row.priority,
+    }
+
+
+class ChangeJournal:
+    """Maintains and queries the dns_record_state and dns_changes tables."""
+
+    def __init__(self, retention_days: float = RETENTION_DAYS):
+        self.retention_days = retention_days
+        self._app: Optional[Flask] = None
+        self._pruned_at = 0.0
+        self.journaled = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._app is not None and self.retention_days > 0
+
+    def bind(self, app: Flask):
+        """Use ``app``'s database engine (also from threads without a request)."""
+        self._app = app
+
+    def _app_context(self):
+        if self._app is None:
+            raise RuntimeError("change journal is not bound; call init_change_journal(app) first")
+        return self._app.app_context()
+
+    def observe_zone(self, namespace: str, zone: str, records: List[Dict[str, Any]]):
+        """Journal differences between a complete record set and the known state."""
+        if not self.enabled:
+            return
+        try:
+            self._apply(namespace, _zone(zone), _state(records), authoritative=True)
+        except Exception as e:
+            logger.warning(f"Change journal update for {zone} failed: {e}")
+
+    def observe_changes(self, namespace: str, zone: str, records: List[Dict[str, Any]]):
+        """Journal records written successfully (a partial record set).
+
+        Updates and deletes are matched by record id. Creates carry no id
+        yet, and partial updates lack fields; the next zone read journals them.
+        """
+        if not self.enabled:
+            return
+        deleted = {str(r['id']) for r in records if r.get('id') and r.get('deleterecord')}
+        complete = [r for r in records if all(r.get(k) for k in ('hostname', 'type', 'destination'))]
+        try:
+            self._apply(namespace, _zone(zone), _state(complete), authoritative=False, deleted=deleted)
+        except Exception as e:
+            logger.warning(f"Change journal update for {zone} failed: {e}")
+
+    def _apply(self, namespace: str, zone: str, current: Dict[str, Dict[str, Any]],
+               authoritative: bool, deleted: Optional[set] = None):
+        s, c = DnsRecordState.__table__, DnsChange.__table__
+        now = datetime.utcnow()
+        in_zone = and_(s.c.namespace == namespace, s.c.zone == zone)
+        changes = []
+        with self._app_context():
+            with db.engine.begin() as conn:
+                known = {
+                    r.record_id: r
+                    for r in conn.execute(
+                        select(s.c.id, s.c.record_id, *(s.c[f] for f in _FIELDS)).where(in_zone)
+                    )
+                }
+
+                gone = []
+                for record_id, row in known.items():
+                    if record_id in current:
+                        values = current[record_id]
+                        if any(getattr(row, f) != values[f] for f in _FIELDS):
+                            conn.execute(update(s).where(s.c.id == row.id).values(**values))
+                            changes.append(dict(values, record_id=record_id, change='updated'))
+                    elif authoritative or (deleted and record_id in deleted):
+                        gone.append(row.id)
+                        changes.append(dict(
+                            {f: getattr(row, f) for f in _FIELDS}, record_id=record_id, change='deleted'
+                        ))
+                if gone:
+                    conn.execute(delete(s).where(s.c.id.in_(gone)))
+
+                new = [record_id for record_id in current if record_id not in known]
+                if new:
+                    conn.execute(insert(s), [
+                        dict(current[record_id], namespace=namespace, zone=zone, record_id=record_id)
+                        for record_id in new
+                    ])
+                    changes.extend(dict(current[record_id], record_id=record_id, change='created')
+                                   for record_id in new)
+
+                if changes:
+                    conn.execute(insert(c), [
+                        dict(change, namespace=namespace, zone=zone, changed_at=now) for change in changes
+                    ])
+                    self.journaled += len(changes)
+
+                if time.monotonic() - self._pruned_at >= PRUNE_INTERVAL:
+                    self._pruned_at = time.monotonic()
+                    cutoff = now - timedelta(days=self.retention_days)
+                    conn.execute(delete(c).where(c.c.changed_at < cutoff))
+
+    def changes_since(self, namespace: str, zone: str, since: int) -> ChangeSet:
+        """Records changed in ``zone`` after cursor ``since``, one entry per record."""
+        s, c = DnsRecordState.__table__, DnsChange.__table__
+        zone = _zone(zone)
+        with self._app_context():
+            with db.engine.connect() as conn:
+                cursor, oldest = conn.execute(select(func.max(c.c.id), func.min(c.c.id))).one()
+                cursor = cursor or 0
+                if since <= 0 or oldest is None or since < oldest - 1 or since > cursor:
+                    state = conn.execute(
+                        select(s.c.record_id, *(s.c[f] for f in _FIELDS))
+                        .where(and_(s.c.namespace == namespace, s.c.zone == zone))
+                        .order_by(s.c.id)
+                    )
+                    changes = [{'change': 'created', 'record': to_record(r.record_id, r)} for r in state]
+                    return ChangeSet(cursor, True, changes)
+
+                journal = conn.execute(
+                    select(c.c.record_id, c.c.change, *(c.c[f] for f in _FIELDS))
+                    .where(and_(c.c.namespace == namespace, c.c.zone == zone,
+                                c.c.id > since, c.c.id <= cursor))
+                    .order_by(c.c.id)
+                ).all()
+
+        # record id -> (first change, latest row), in order of first change
+        collapsed: Dict[str, tuple] = {}
+        for row in journal:
+            first = collapsed[row.record_id][0] if row.record_id in collapsed else row.change
+            collapsed[row.record_id] = (first, row)
+        changes = []
+        for record_id, (first, last) in collapsed.items():
+            if first == 'created':
+                if last.change == 'deleted':
+                    continue
+                change = 'created'
+            else:
+                change = last.change
+            changes.append({'change': change, 'record': to_record(record_id, last)})
+        return ChangeSet(cursor, False, changes)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "retention_days": self.retention_days,
+            "journaled": self.journaled,
+        }
+
+
+# Global journal instance
+_journal = ChangeJournal()
+
+
+def init_change_journal(app):
+    """Bind the change journal to the app's database."""
+    _journal.bind(app)
+
+
+def get_change_journal() -> ChangeJournal:
+    """Return the process-wide change journal."""
+    return _journal
+
+
+def get_change_journal_stats() -> Dict[str, Any]:
+    """Get change journal statistics."""
+    return _journal.stats()
@@ -0,0 +1,284 @@
+"""Per-backend circuit breakers with adaptive request timeouts.
+
+When ccp.netcup.net (or a PowerDNS server) slows down, every request used to
+wait out the full 30 s client timeout, and the worker threads ran out. Each
+upstream call now goes through the breaker of its backend service (keyed by
+DNSBackend.cache_namespace / NetcupClient.cache_namespace):
+
+- closed: calls pass. Outcomes within CIRCUIT_WINDOW_SECONDS are tracked;
+  a call counts as failed on a transport error, an HTTP 5xx, or when it took
+  longer than CIRCUIT_SLOW_CALL_SECONDS. Once at least CIRCUIT_MIN_CALLS
+  calls are in the window and CIRCUIT_FAILURE_RATE of them failed, the
+  breaker opens.
+- open: calls fail immediately with BackendUnavailable, which carries the
+  seconds until the next probe (``retry_after``). The DDNS endpoints answer
+  ``911`` and the JSON API answers 503 with a Retry-After header.
+- half-open: after CIRCUIT_OPEN_SECONDS one probe call is let through. Its
+  success closes the breaker; its failure opens it again.
+
+API-level rejections (a CCP error envelope, a PowerDNS 404) mean the service
+answered and count as successes.
+
+Adaptive timeouts: once enough successful latencies are known, a call's
+timeout is CIRCUIT_TIMEOUT_P99_FACTOR times the observed p99 latency, at
+least CIRCUIT_TIMEOUT_MIN_SECONDS and at most the client's configured
+timeout. A slow backend then costs a few seconds per call, not 30.
+
+Breaker state is per worker process.
+
+Configuration:
+- CIRCUIT_FAILURE_RATE: Failed share of calls that opens the breaker (default 0.5, 0 disables)
+- CIRCUIT_MIN_CALLS: Calls in the window before the rate is evaluated (default 10)
+- CIRCUIT_WINDOW_SECONDS: Outcome window (default 60)
+- CIRCUIT_OPEN_SECONDS: Time before a half-open probe (default 30)
+- CIRCUIT_SLOW_CALL_SECONDS: Calls slower than this count as failed (default 10, 0 disables)
+- CIRCUIT_TIMEOUT_P99_FACTOR: Timeout as a multiple of p99 latency (default 3, 0 disables)
+- CIRCUIT_TIMEOUT_MIN_SECONDS: Lower bound of the adaptive timeout (default 5)
+"""
+from __future__ import annotations
+
+import logging
+import math
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# Breaker configuration
+FAILURE_RATE = float(os.environ.get("CIRCUIT_FAILURE_RATE", "0.5"))
+MIN_CALLS = int(os.environ.get("CIRCUIT_MIN_CALLS", "10"))
+WINDOW_SECONDS = float(os.environ.get("CIRCUIT_WINDOW_SECONDS", "60"))
+OPEN_SECONDS = float(os.environ.get("CIRCUIT_OPEN_SECONDS", "30"))
+SLOW_CALL_SECONDS = float(os.environ.get("CIRCUIT_SLOW_CALL_SECONDS", "10"))
+TIMEOUT_P99_FACTOR = float(os.environ.get("CIRCUIT_TIMEOUT_P99_FACTOR", "3"))
+TIMEOUT_MIN_SECONDS = float(os.environ.get("CIRCUIT_TIMEOUT_MIN_SECONDS", "5"))
+
+# Successful call latencies kept for the percentile
+LATENCY_SAMPLES = 200
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class BackendUnavailable(Exception):
+    """Raised instead of calling a backend whose circuit breaker is open."""
+
+    def __init__(self, service: str, retry_after: int):
+        super().__init__(f"Backend {service} unavailable (circuit open), retry in {retry_after}s")
+        self.service = service
+        self.retry_after = retry_after
+
+
+def is_upstream_failure(error: BaseException) -> bool:
+    """True if ``error`` means the backend is unhealthy (not merely a rejection)."""
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code >= 500
+    return isinstance(error, httpx.TransportError)
+
+
+class CircuitBreaker:
+    """Thread-safe breaker and latency tracker for one backend service."""
+
+    def __init__(
+        self,
+        service: str,
+        failure_rate: float = FAILURE_RATE,
+        min_calls: int = MIN_CALLS,
+        window_seconds: float = WINDOW_SECONDS,
+        open_seconds: float = OPEN_SECONDS,
+        slow_call_seconds: float = SLOW_CALL_SECONDS,
+        timeout_factor: float = TIMEOUT_P99_FACTOR,
+        min_timeout: float = TIMEOUT_MIN_SECONDS,
+    ):
+        self.service = service
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.window_seconds = window_seconds
+        self.open_seconds = open_seconds
+        self.slow_call_seconds = slow_call_seconds
+        self.timeout_factor = timeout_factor
+        self.min_timeout = min_timeout
+        self.state = CLOSED
+        self._opened_at = 0.0
+        self._probing = False
+        # (finished_at, failed) of calls in the window
+        self._outcomes: deque = deque()
+        self._failures = 0
+        self._latencies: deque[float] = deque(maxlen=LATENCY_SAMPLES)
+        self._lock = threading.Lock()
+        self.rejected = 0
+        self.trips = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.failure_rate > 0
+
+    def timeout(self, max_timeout: float) -> float:
+        """Request timeout for the next call, adapted to observed latency."""
+        p99 = self.p99()
+        if self.timeout_factor <= 0 or p99 is None:
+            return max_timeout
+        return min(max_timeout, max(self.min_timeout, p99 * self.timeout_factor))
+
+    def p99(self) -> Optional[float]:
+        """99th percentile of recent successful latencies (None until MIN_CALLS are known)."""
+        samples = sorted(self._latencies)
+        if not samples or len(samples) < self.min_calls:
+            return None
+        return samples[min(len(samples) - 1, math.ceil(0.99 * len(samples)) - 1)]
+
+    @contextmanager
+    def guard(self, max_timeout: float) -> Iterator[float]:
+        """Wrap one upstream call; yields its timeout.
+
+        Raises BackendUnavailable without running the block while open.
+        """
+        probe = self._admit()
+        started = time.monotonic()
+        try:
+            yield self.timeout(max_timeout)
+        except Exception as e:
+            self._record(time.monotonic() - started, is_upstream_failure(e), probe)
+            raise
+        except BaseException:
+            # Cancelled or interrupted: no verdict on the backend
+            if probe:
+                with self._lock:
+                    self._probing = False
+            raise
+        else:
+            self._record(time.monotonic() - started, False, probe)
+
+    def _admit(self) -> bool:
+        """Check the state before a call; True if the call is the half-open probe."""
+        if not self.enabled:
+            return False
+        with self._lock:
+            if self.state == OPEN:
+                remaining = self.open_seconds - (time.monotonic() - self._opened_at)
+                if remaining > 0:
+                    self.rejected += 1
+                    raise BackendUnavailable(self.service, max(1, math.ceil(remaining)))
+                self.state = HALF_OPEN
+                logger.info(f"Circuit for {self.service} half-open, probing")
+            if self.state == HALF_OPEN:
+                if self._probing:
+                    self.rejected += 1
+                    raise BackendUnavailable(self.service, max(1, math.ceil(self.open_seconds)))
+                self._probing = True
+                return True
+            return False
+
+    def _record(self, elapsed: float, failed: bool, probe: bool):
+        if self.slow_call_seconds > 0 and elapsed >= self.slow_call_seconds:
+            failed = True
+        now = time.monotonic()
+        with self._lock:
+            if not failed:
+                self._latencies.append(elapsed)
+            if not self.enabled:
+                return
+            if probe:
+                self._probing = False
+                if failed:
+                    self._open(now)
+                else:
+                    logger.info(f"Circuit for {self.service} closed")
+                    self.state = CLOSED
+                    self._outcomes.clear()
+                    self._failures = 0
+                return
+            if self.state != CLOSED:
+                # Call started before the breaker opened
+                return
+
+            self._outcomes.append((now, failed))
+            self._failures += failed
+            while self._outcomes and now - self._outcomes[0][0] > self.window_seconds:
+                _, old_failed = self._outcomes.popleft()
+                self._failures -= old_failed
+            if (len(self._outcomes) >= self.min_calls
+                    and self._failures / len(self._outcomes) >= self.failure_rate):
+                self._open(now)
+
+    def _open(self, now: float):
+        logger.warning(
+            f"Circuit for {self.service} opened "
+            f"({self._failures}/{len(self._outcomes)} calls failed); failing fast for {self.open_seconds:.0f}s"
+        )
+        self.state = OPEN
+        self._opened_at = now
+        self.trips += 1
+        self._outcomes.clear()
+        self._failures = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            state = self.state
+            retry_after = None
+            if state == OPEN:
+                retry_after = max(0, math.ceil(self.open_seconds - (time.monotonic() - self._opened_at)))
+            calls, failures = len(self._outcomes), self._failures
+        p99 = self.p99()
+        return {
+            "state": state,
+            "retry_after": retry_after,
+            "window_calls": calls,
+            "window_failures": failures,
+            "p99_ms": round(p99 * 1000) if p99 is not None else None,
+            "trips": self.trips,
+            "rejected": self.rejected,
+        }
+
+
+class BreakerRegistry:
+    """One CircuitBreaker per backend service."""
+
+    def __init__(self):
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def get(self, service: str) -> CircuitBreaker:
+        breaker = self._breakers.get(service)
+        if breaker is None:
+            with self._lock:
+                breaker = self._breakers.get(service)
+                if breaker is None:
+                    breaker = self._breakers[service] = CircuitBreaker(service)
+        return breaker
+
+    def reset(self):
+        """Forget all breakers (forked child, tests)."""
+        with self._lock:
+            self._breakers = {}
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {service: breaker.stats() for service, breaker in list(self._breakers.items())}
+
+
+# Global registry instance
+_registry = BreakerRegistry()
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_registry.reset)
+
+
+def get_breaker(service: str) -> CircuitBreaker:
+    """Return the circuit breaker for a backend service."""
+    return _registry.get(service)
+
+
+def reset_breakers():
+    """Close and forget every breaker."""
+    _registry.reset()
+
+
+def get_breaker_stats() -> Dict[str, Dict[str, Any]]:
+    """Get breaker state per backend service."""
+    return _registry.stats()
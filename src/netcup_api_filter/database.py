@@ -24,6 +24,7 @@ from typing import Any
 from sqlalchemy.exc import IntegrityError
 
 from .config_defaults import get_default, require_default
+from .settings_cache import get_settings_cache
 
 # Import all models to ensure they're registered with SQLAlchemy
 from .models import (
@@ -150,6 +151,7 @@ def init_db(app):
         }
     
     db.init_app(app)
+    install_query_counter(app)
 
     with app.app_context():
         # Create all tables from models
@@ -175,6 +177,54 @@ def init_db(app):
             logger.info("Demo accounts seeded")
 
 
+def install_query_counter(app):
+    """Count SQL round-trips per request.
+
+    Every statement executed on the app's engine increments
+    ``g.sql_query_count``; the counter is reset at the start of each request.
+    Use ``get_query_count()`` to read it. In debug/testing mode the count is
+    also returned to the client as an ``X-Query-Count`` response header, which
+    lets tests pin the hot path to a fixed number of queries.
+    """
+    from flask import g, has_app_context
+    from sqlalchemy import event
+
+    with app.app_context():
+        engine = db.engine
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def _count_query(conn, cursor, statement, parameters, context, executemany):
+        if has_app_context():
+            g.sql_query_count = g.get('sql_query_count', 0) + 1
+
+    @app.before_request
+    def _reset_query_count():
+        g.sql_query_count = 0
+
+    @app.after_request
+    def _report_query_count(response):
+        if app.debug or app.testing:
+            response.headers['X-Query-Count'] = str(get_query_count())
+        return response
+
+
+def get_query_count() -> int:
+    """SQL statements executed so far in the current request/app context."""
+    from flask import g, has_app_context
+
+    if not has_app_context():
+        return 0
+    return int(g.get('sql_query_count', 0))
+
+
+def reset_query_count():
+    """Reset the per-request SQL statement counter."""
+    from flask import g, has_app_context
+
+    if has_app_context():
+        g.sql_query_count = 0
+
+
 def _column_default_sql(column) -> str | None:
     """Render a scalar column default as a SQL literal, or None if not scalar.
 
@@ -438,11 +488,8 @@ def seed_demo_accounts():
 
 
 def get_setting(key: str) -> Any | None:
-    """Get setting value by key."""
-    setting = Settings.query.filter_by(key=key).first()
-    if setting:
-        return setting.get_value()
-    return None
+    """Get setting value by key (served from the in-process settings cache)."""
+    return get_settings_cache().get(key)
 
 
 def set_setting(key: str, value: Any):
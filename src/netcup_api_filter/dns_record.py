@@ -0,0 +1,193 @@
+"""Compact, read-only DNS record.
+
+Record sets used to be lists of dicts, copied at every stage between the
+upstream response and the JSON response (zone cache, normalization,
+filtering). A cached 10k-record zone held 10k dicts, and every listing copied
+all of them. DNSRecord stores the same fields in ``__slots__`` and is never
+modified in place, so one instance is shared by the zone cache, snapshots,
+backends and responses:
+
+- It is a read-only Mapping: ``rec['hostname']``, ``rec.get('priority')``,
+  ``dict(rec)`` and comparison with dicts work as before.
+- Keys absent from the source dict stay absent (``to_dict`` round-trips);
+  keys outside FIELDS are kept in a small extra dict.
+- ``replace(**changes)`` returns a changed copy; ``to_dict()`` a plain dict
+  for callers that modify or send records back upstream.
+- Convert records for JSON with ``record_dicts``: the encoder then sees
+  plain dicts and runs at full speed, without a per-record ``default`` hook.
+
+See tooling/profiling/bench_dns_record.py for memory and serialization cost.
+"""
+from __future__ import annotations
+
+from collections.abc import Mapping
+from operator import attrgetter
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Netcup CCP record fields (in CCP order) plus the normalized backend fields
+FIELDS = ('id', 'hostname', 'type', 'priority', 'destination', 'deleterecord', 'state', 'ttl')
+
+_FIELD_SET = frozenset(FIELDS)
+_field_values = attrgetter(*FIELDS)
+
+
+class _Absent:
+    """Slot value of a field the source dict did not have."""
+
+    __slots__ = ()
+
+    def __repr__(self) -> str:
+        return '<absent>'
+
+
+_ABSENT = _Absent()
+_ABSENT_FIELDS = dict.fromkeys(FIELDS, _ABSENT)
+
+
+class _Shape:
+    """Key layout shared by all records built from dicts with the same keys."""
+
+    __slots__ = ('keys', 'key_set', 'missing', 'extra')
+
+    def __init__(self, source_keys: Tuple[str, ...]):
+        self.key_set = frozenset(k for k in source_keys if k in _FIELD_SET)
+        # Fields are kept in FIELDS order, the order to_dict builds them in
+        self.keys = tuple(k for k in FIELDS if k in self.key_set)
+        self.missing = tuple(k for k in FIELDS if k not in self.key_set)
+        self.extra = tuple(k for k in source_keys if k not in _FIELD_SET)
+
+
+_shapes: Dict[Tuple[str, ...], _Shape] = {}
+_MAX_SHAPES = 256
+
+
+def _shape(source_keys: Tuple[str, ...]) -> _Shape:
+    shape = _shapes.get(source_keys)
+    if shape is None:
+        shape = _Shape(source_keys)
+        # Layouts come from a handful of code paths; the cap only guards odd input
+        if len(_shapes) < _MAX_SHAPES:
+            _shapes[source_keys] = shape
+    return shape
+
+
+class DNSRecord(Mapping):
+    """One DNS record; a read-only Mapping over ``__slots__``.
+
+    Slots of absent keys hold a marker; ``_shape`` lists the keys a record has.
+    """
+
+    __slots__ = FIELDS + ('_shape', '_extra')
+
+    id: Any
+    hostname: Any
+    type: Any
+    priority: Any
+    destination: Any
+    deleterecord: Any
+    state: Any
+    ttl: Any
+    _shape: _Shape
+    _extra: Optional[Dict[str, Any]]
+
+    def __init__(self, **fields: Any):
+        self._fill(fields)
+
+    @classmethod
+    def from_dict(cls, data: Mapping) -> 'DNSRecord':
+        """Record with the keys of ``data`` (returned as is if already a DNSRecord)."""
+        if data.__class__ is cls:
+            return data
+        rec = cls.__new__(cls)
+        rec._fill(data)
+        return rec
+
+    def _fill(self, data: Mapping) -> None:
+        shape = self._shape = _shape(tuple(data))
+        if shape.missing:
+            data = {**_ABSENT_FIELDS, **data}
+        self.id = data['id']
+        self.hostname = data['hostname']
+        self.type = data['type']
+        self.priority = data['priority']
+        self.destination = data['destination']
+        self.deleterecord = data['deleterecord']
+        self.state = data['state']
+        self.ttl = data['ttl']
+        self._extra = {k: data[k] for k in shape.extra} if shape.extra else None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain dict with the record's keys (safe to modify)."""
+        # One dict display over FIELDS, then drop the fields the record lacks
+        result = {
+            'id': self.id, 'hostname': self.hostname, 'type': self.type,
+            'priority': self.priority, 'destination': self.destination,
+            'deleterecord': self.deleterecord, 'state': self.state, 'ttl': self.ttl,
+        }
+        shape = self._shape
+        if shape.missing:
+            for key in shape.missing:
+                del result[key]
+        if self._extra:
+            result.update(self._extra)
+        return result
+
+    def replace(self, **changes: Any) -> 'DNSRecord':
+        """Copy of the record with ``changes`` applied."""
+        return DNSRecord.from_dict({**self.to_dict(), **changes})
+
+    # Mapping interface
+
+    def __getitem__(self, key: str) -> Any:
+        if key in _FIELD_SET:
+            value = getattr(self, key)
+            if value is not _ABSENT:
+                return value
+        elif self._extra and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key in _FIELD_SET:
+            value = getattr(self, key)
+            return default if value is _ABSENT else value
+        if self._extra:
+            return self._extra.get(key, default)
+        return default
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._shape.key_set or bool(self._extra) and key in self._extra  # type: ignore[operator]
+
+    def __iter__(self) -> Iterator[str]:
+        yield from self._shape.keys
+        if self._extra:
+            yield from self._extra
+
+    def __len__(self) -> int:
+        return len(self._shape.keys) + len(self._extra or ())
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, DNSRecord):
+            return _field_values(self) == _field_values(other) and self._extra == other._extra
+        return super().__eq__(other)
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        return f"DNSRecord({self.to_dict()!r})"
+
+
+def to_records(records: Iterable[Mapping]) -> List[DNSRecord]:
+    """DNSRecords of a record list (records already converted are shared)."""
+    return [DNSRecord.from_dict(r) for r in records]
+
+
+def record_dict(record: Mapping) -> Dict[str, Any]:
+    """Modifiable dict copy of a DNSRecord or record dict."""
+    return record.to_dict() if isinstance(record, DNSRecord) else dict(record)
+
+
+def record_dicts(records: Iterable[Mapping]) -> List[Dict[str, Any]]:
+    """Dict copies of a record list, e.g. to serialize it as JSON."""
+    to_dict = DNSRecord.to_dict
+    return [to_dict(r) if r.__class__ is DNSRecord else dict(r) for r in records]
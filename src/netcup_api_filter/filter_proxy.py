@@ -26,6 +26,9 @@ from .token_auth import (
     log_activity,
 )
 from .database import db
+from .circuit_breaker import BackendUnavailable, get_breaker
+from .http_transport import get_http_client
+from .netcup_client import netcup_namespace
 
 logger = logging.getLogger(__name__)
 
@@ -73,11 +76,15 @@ def call_netcup_api(action: str, params: dict[str, Any]) -> dict[str, Any]:
         }
     }
     
+    breaker = get_breaker(netcup_namespace(NETCUP_API_URL, NETCUP_CUSTOMER_ID, NETCUP_API_KEY, NETCUP_API_PASSWORD))
     try:
-        with httpx.Client(timeout=REQUEST_TIMEOUT) as client:
-            response = client.post(NETCUP_API_URL, json=payload)
+        with breaker.guard(REQUEST_TIMEOUT) as timeout:
+            response = get_http_client(NETCUP_API_URL).post(NETCUP_API_URL, json=payload, timeout=timeout)
             response.raise_for_status()
-            data = response.json()
+        data = response.json()
+    except BackendUnavailable as e:
+        logger.warning(str(e))
+        raise NetcupAPIError(str(e), 503)
     except httpx.TimeoutException:
         logger.error("Netcup API timeout")
         raise NetcupAPIError("API request timed out", 504)
@@ -249,12 +249,11 @@ def lookup(ip: str, use_cache: bool = True) -> GeoIPResult:
     try:
         # Use geoip2 library if available
         try:
-            import geoip2.webservice
-            
-            client = geoip2.webservice.Client(
+            client = _get_geoip2_client(
+                os.getpid(),
                 int(account_id),
                 license_key,
-                host=api_url.replace("https://", "").replace("http://", "")
+                api_url.replace("https://", "").replace("http://", "")
             )
             
             response = client.city(ip)
@@ -291,6 +290,18 @@ def lookup(ip: str, use_cache: bool = True) -> GeoIPResult:
         )
 
 
+@lru_cache(maxsize=4)
+def _get_geoip2_client(pid: int, account_id: int, license_key: str, host: str):
+    """geoip2 web service client, reused so its keep-alive session is too.
+    
+    Keyed by pid so a forked worker never reuses its parent's connections.
+    Raises ImportError if geoip2 is not installed.
+    """
+    import geoip2.webservice
+    
+    return geoip2.webservice.Client(account_id, license_key, host=host)
+
+
 def _lookup_http(
     ip: str,
     account_id: str,
@@ -302,7 +313,8 @@ def _lookup_http(
     import base64
     
     try:
-        import httpx
+        # Needs httpx; the shared keep-alive pool (see http_transport)
+        from .http_transport import get_http_client
     except ImportError:
         import urllib.request
         import json
@@ -320,26 +332,25 @@ def _lookup_http(
         
         return _parse_response(ip, data, use_cache)
     
-    # Use httpx if available
     url = f"{api_url}/geoip/v2.1/city/{ip}"
     credentials = base64.b64encode(f"{account_id}:{license_key}".encode()).decode()
     
-    with httpx.Client(timeout=10.0) as client:
-        response = client.get(
-            url,
-            headers={
-                "Authorization": f"Basic {credentials}",
-                "Accept": "application/json"
-            }
+    response = get_http_client(url).get(
+        url,
+        headers={
+            "Authorization": f"Basic {credentials}",
+            "Accept": "application/json"
+        },
+        timeout=10.0
+    )
+    
+    if response.status_code != 200:
+        return GeoIPResult(
+            ip=ip,
+            error=f"API error: {response.status_code}"
         )
-        
-        if response.status_code != 200:
-            return GeoIPResult(
-                ip=ip,
-                error=f"API error: {response.status_code}"
-            )
-        
-        data = response.json()
+    
+    data = response.json()
     
     return _parse_response(ip, data, use_cache)
 
@@ -0,0 +1,192 @@
+"""Shared, pooled HTTP transport for upstream APIs.
+
+Netcup CCP, PowerDNS, GeoIP (MaxMind web service) and Telegram calls all go
+through one connection pool per upstream origin (scheme, host, port) instead of
+opening a client, and paying a TCP/TLS handshake, per call:
+
+- keep-alive connections, reused across requests and threads of a worker
+- per-origin connection limits (one slow upstream cannot starve the others)
+- HTTP/2 over TLS when enabled and the optional ``h2`` package is installed
+  (``pip install httpx[http2]``); HTTP/1.1 otherwise
+- fork-safe: pools are owned by the process that created them. A gunicorn
+  worker forked from a preloaded master builds its own pools on first use and
+  never shares sockets with its parent.
+- pools are closed on worker shutdown (see lifecycle.py)
+
+Callers pass their own timeout per request; the pools only own connections.
+The asyncio clients (async_runtime.py) keep their own per-origin async pools
+with the same limits.
+
+Usage:
+    resp = get_http_client(url).post(url, json=payload, timeout=10)
+
+    # Clients needing base_url/default headers share the origin's pool:
+    client = create_http_client(base_url, headers={...}, timeout=30)
+
+Configuration:
+- HTTP_POOL_MAX_CONNECTIONS: Connections per origin (default 10)
+- HTTP_POOL_MAX_KEEPALIVE: Idle keep-alive connections per origin (default 5)
+- HTTP_POOL_KEEPALIVE_SECONDS: Idle connection expiry (default 30)
+- HTTP_POOL_HTTP2: Negotiate HTTP/2 when h2 is installed (default true)
+"""
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from typing import Any, Dict, Optional
+
+import httpx
+
+from .lifecycle import register_shutdown_hook
+from .utils import parse_bool
+
+logger = logging.getLogger(__name__)
+
+# Pool configuration
+MAX_CONNECTIONS = int(os.environ.get("HTTP_POOL_MAX_CONNECTIONS", "10"))
+MAX_KEEPALIVE = int(os.environ.get("HTTP_POOL_MAX_KEEPALIVE", "5"))
+KEEPALIVE_SECONDS = float(os.environ.get("HTTP_POOL_KEEPALIVE_SECONDS", "30"))
+HTTP2_ENABLED = parse_bool(os.environ.get("HTTP_POOL_HTTP2"), default=True)
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+class _SharedTransport(httpx.HTTPTransport):
+    """Pooled transport that survives ``close()`` of the clients using it."""
+
+    def close(self) -> None:
+        # Owned by TransportRegistry; clients sharing it must not tear it down
+        pass
+
+    def shutdown(self) -> None:
+        super().close()
+
+
+def origin_key(url: str | httpx.URL) -> tuple[str, str, Optional[int]]:
+    parsed = httpx.URL(url)
+    return parsed.scheme, parsed.host, parsed.port
+
+
+class TransportRegistry:
+    """Per-process registry of pooled transports and clients, one per origin."""
+
+    def __init__(
+        self,
+        max_connections: int = MAX_CONNECTIONS,
+        max_keepalive: int = MAX_KEEPALIVE,
+        keepalive_seconds: float = KEEPALIVE_SECONDS,
+        http2: bool = HTTP2_ENABLED and HTTP2_AVAILABLE,
+    ):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive,
+            keepalive_expiry=keepalive_seconds,
+        )
+        self.http2 = http2
+        self._transports: Dict[tuple, _SharedTransport] = {}
+        self._clients: Dict[tuple, httpx.Client] = {}
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+
+    def _check_pid(self):
+        # Called with the lock held. Pools inherited across fork() belong to
+        # the parent; drop them without closing the parent's sockets.
+        pid = os.getpid()
+        if pid != self._pid:
+            self._transports = {}
+            self._clients = {}
+            self._pid = pid
+
+    def transport(self, url: str | httpx.URL) -> httpx.HTTPTransport:
+        """Pooled transport for ``url``'s origin."""
+        key = origin_key(url)
+        with self._lock:
+            self._check_pid()
+            transport = self._transports.get(key)
+            if transport is None:
+                transport = _SharedTransport(limits=self.limits, http2=self.http2)
+                self._transports[key] = transport
+                logger.debug(f"Created HTTP pool for {key[0]}://{key[1]}:{key[2] or ''}")
+            return transport
+
+    def client(self, url: str | httpx.URL) -> httpx.Client:
+        """Shared client (no base_url, no default headers) for ``url``'s origin."""
+        key = origin_key(url)
+        with self._lock:
+            self._check_pid()
+            client = self._clients.get(key)
+        if client is not None:
+            return client
+
+        transport = self.transport(url)
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                client = httpx.Client(transport=transport)
+                self._clients[key] = client
+            return client
+
+    def close_all(self):
+        """Close every pool owned by this process."""
+        with self._lock:
+            if self._pid != os.getpid():
+                return
+            transports = list(self._transports.values())
+            self._transports = {}
+            self._clients = {}
+        for transport in transports:
+            try:
+                transport.shutdown()
+            except Exception as e:
+                logger.warning(f"Closing HTTP pool failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            origins = [f"{s}://{h}" + (f":{p}" if p else "") for s, h, p in self._transports]
+        return {
+            "origins": origins,
+            "http2": self.http2,
+            "max_connections": self.limits.max_connections,
+            "max_keepalive": self.limits.max_keepalive_connections,
+        }
+
+
+# Global registry instance
+_registry = TransportRegistry()
+register_shutdown_hook("http_pools", _registry.close_all)
+
+
+def get_http_client(url: str | httpx.URL) -> httpx.Client:
+    """Shared pooled client for the origin of ``url``.
+
+    Pass absolute URLs and a per-request ``timeout``.
+    """
+    return _registry.client(url)
+
+
+def create_http_client(base_url: str, **kwargs: Any) -> httpx.Client:
+    """New ``httpx.Client`` (own base_url/headers/timeout) on the origin's shared pool.
+
+    Closing the returned client does not close the shared pool.
+    """
+    return httpx.Client(base_url=base_url, transport=_registry.transport(base_url), **kwargs)
+
+
+def create_async_transport() -> httpx.AsyncHTTPTransport:
+    """New async transport with the same per-origin limits (see async_runtime)."""
+    return httpx.AsyncHTTPTransport(limits=_registry.limits, http2=_registry.http2)
+
+
+def close_http_pools():
+    """Close all pools of this process (shutdown, tests)."""
+    _registry.close_all()
+
+
+def get_transport_stats() -> Dict[str, Any]:
+    """Get transport statistics."""
+    return _registry.stats()
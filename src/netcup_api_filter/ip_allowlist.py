@@ -0,0 +1,79 @@
+"""Compiled IP allowlist matcher for token IP restrictions.
+
+Tokens may carry hundreds of CIDRs (e.g. cloud-provider egress ranges).
+Testing a client address against each ``ipaddress`` network in turn is
+O(number of ranges) per request. ``IPAllowlist`` compiles the ranges once into
+merged, sorted integer intervals per address family, so a lookup is one
+``bisect`` over at most 2**bits disjoint intervals — O(log n) ≤ O(prefix
+length) comparisons regardless of how many ranges were configured.
+
+Semantics match the historical linear check:
+- Single addresses are /32 (IPv4) or /128 (IPv6) ranges.
+- Host bits in CIDRs are ignored (``strict=False``).
+- IPv4 and IPv6 are separate families; an IPv4-mapped IPv6 address does NOT
+  match an IPv4 range.
+"""
+from __future__ import annotations
+
+import ipaddress
+from bisect import bisect_right
+from typing import Iterable, Union
+
+IPNetwork = Union[ipaddress.IPv4Network, ipaddress.IPv6Network]
+IPAddress = Union[ipaddress.IPv4Address, ipaddress.IPv6Address]
+
+
+def _merge_intervals(intervals: list[tuple[int, int]]) -> tuple[list[int], list[int]]:
+    """Sort and merge overlapping/adjacent [start, end] intervals."""
+    starts: list[int] = []
+    ends: list[int] = []
+    for start, end in sorted(intervals):
+        if ends and start <= ends[-1] + 1:
+            if end > ends[-1]:
+                ends[-1] = end
+        else:
+            starts.append(start)
+            ends.append(end)
+    return starts, ends
+
+
+class IPAllowlist:
+    """Immutable longest-prefix-match set of IPv4/IPv6 networks."""
+
+    __slots__ = ('networks', '_v4_starts', '_v4_ends', '_v6_starts', '_v6_ends')
+
+    def __init__(self, networks: Iterable[IPNetwork] = ()):
+        self.networks: tuple[IPNetwork, ...] = tuple(networks)
+        v4 = [(int(n.network_address), int(n.broadcast_address)) for n in self.networks if n.version == 4]
+        v6 = [(int(n.network_address), int(n.broadcast_address)) for n in self.networks if n.version == 6]
+        self._v4_starts, self._v4_ends = _merge_intervals(v4)
+        self._v6_starts, self._v6_ends = _merge_intervals(v6)
+
+    def __len__(self) -> int:
+        return len(self.networks)
+
+    def __bool__(self) -> bool:
+        return bool(self.networks)
+
+    def __repr__(self) -> str:
+        return f'<IPAllowlist {len(self.networks)} ranges>'
+
+    def contains_address(self, ip_obj: IPAddress) -> bool:
+        """Return True if a parsed address falls inside any configured range."""
+        if ip_obj.version == 4:
+            starts, ends = self._v4_starts, self._v4_ends
+        else:
+            starts, ends = self._v6_starts, self._v6_ends
+        value = int(ip_obj)
+        i = bisect_right(starts, value) - 1
+        return i >= 0 and value <= ends[i]
+
+    def __contains__(self, client_ip: object) -> bool:
+        """``"203.0.113.5" in allowlist`` — invalid addresses never match."""
+        if isinstance(client_ip, (ipaddress.IPv4Address, ipaddress.IPv6Address)):
+            return self.contains_address(client_ip)
+        try:
+            ip_obj = ipaddress.ip_address(client_ip)  # type: ignore[arg-type]
+        except ValueError:
+            return False
+        return self.contains_address(ip_obj)
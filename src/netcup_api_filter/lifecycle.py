@@ -0,0 +1,65 @@
+"""Worker lifecycle hooks (flush-on-shutdown).
+
+Write-behind buffers (token usage counters, audit log batches, pooled
+upstream sessions) must be drained before a worker process exits. Components
+register a callable here; the callables run once per process, in reverse
+registration order, from whichever of these fires first:
+
+- gunicorn ``worker_exit`` hook (see gunicorn.conf.py)
+- ``atexit`` (plain ``flask run``, Passenger, tests)
+
+Hooks must be idempotent and must not raise; failures are logged and the
+remaining hooks still run.
+"""
+from __future__ import annotations
+
+import atexit
+import logging
+import os
+import threading
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+_hooks: list[tuple[str, Callable[[], object]]] = []
+_lock = threading.Lock()
+_ran_in_pid: int | None = None
+
+
+def register_shutdown_hook(name: str, hook: Callable[[], object]):
+    """Register ``hook`` to run when the worker process shuts down.
+
+    Registering the same name again replaces the previous hook. The hook's
+    return value (e.g. a flush count) is ignored.
+    """
+    with _lock:
+        _hooks[:] = [(n, h) for n, h in _hooks if n != name]
+        _hooks.append((name, hook))
+
+
+def run_shutdown_hooks():
+    """Run all registered hooks once for the current process."""
+    global _ran_in_pid
+    with _lock:
+        if _ran_in_pid == os.getpid():
+            return
+        _ran_in_pid = os.getpid()
+        hooks = list(reversed(_hooks))
+
+    for name, hook in hooks:
+        try:
+            hook()
+        except Exception as e:
+            logger.error(f"Shutdown hook {name} failed: {e}")
+
+
+def reset_after_fork():
+    """Allow hooks to run again in a freshly forked worker."""
+    global _ran_in_pid
+    with _lock:
+        _ran_in_pid = None
+
+
+atexit.register(run_shutdown_hooks)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=reset_after_fork)
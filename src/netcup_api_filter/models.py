@@ -13,16 +13,19 @@ Token Format: naf_<user_alias>_<random64>
   - Entropy: ~381 bits
 
 Security: user_alias protects username from exposure in API tokens.
-Authentication: Bearer token only for API, bcrypt hashed storage
+Authentication: Bearer token only for API, keyed-hash storage (see hash_token)
 """
 from __future__ import annotations
 
+import hashlib
+import hmac
 import json
 import logging
 import os
 import re
 import secrets
 from datetime import datetime
+from functools import lru_cache
 from typing import Any, Optional
 
 import bcrypt
@@ -241,29 +244,88 @@ def parse_token(token: str) -> tuple[str, str] | None:
     return match.group(1), match.group(2)
 
 
+# Token hash scheme
+# Tokens carry ~381 bits of entropy, so a slow KDF adds latency without adding
+# resistance to offline guessing. New hashes are a keyed HMAC-SHA256 of the
+# full token: "hmac-sha256$<key_id>$<hexdigest>". The key is the server-side
+# pepper TOKEN_HASH_PEPPER (empty if unset, key_id "0"); key_id identifies the
+# pepper so a rotated-out pepper (TOKEN_HASH_PEPPER_PREVIOUS) still verifies.
+# Legacy bcrypt hashes ("$2b$...") keep verifying; token_hash_needs_rehash()
+# flags them (and hashes under an old pepper) for upgrade on next use.
+TOKEN_HASH_SCHEME = "hmac-sha256"
+
+
+@lru_cache(maxsize=8)
+def _token_hash_key(pepper: str) -> tuple[str, bytes]:
+    """Return (key_id, key) for a pepper value."""
+    if not pepper:
+        return "0", b""
+    key = pepper.encode('utf-8')
+    return hashlib.sha256(b"naf-token-pepper:" + key).hexdigest()[:8], key
+
+
+def _token_hash_keys() -> tuple[tuple[str, bytes], dict[str, bytes]]:
+    """Current (key_id, key) and all keys accepted for verification."""
+    current = _token_hash_key(os.environ.get('TOKEN_HASH_PEPPER', ''))
+    accepted = {current[0]: current[1]}
+    # Unkeyed ("0") hashes only verify without a pepper, or while the operator
+    # migrates from them by setting TOKEN_HASH_PEPPER_PREVIOUS to an empty value
+    previous = os.environ.get('TOKEN_HASH_PEPPER_PREVIOUS')
+    if previous is not None:
+        key_id, key = _token_hash_key(previous)
+        accepted.setdefault(key_id, key)
+    return current, accepted
+
+
+def _hmac_token(key: bytes, token: str) -> str:
+    return hmac.new(key, token.encode('utf-8'), hashlib.sha256).hexdigest()
+
+
 def hash_token(token: str) -> str:
-    """Hash a token with bcrypt for storage.
+    """Hash a token for storage (keyed HMAC-SHA256, see TOKEN_HASH_SCHEME)."""
+    (key_id, key), _ = _token_hash_keys()
+    return f"{TOKEN_HASH_SCHEME}${key_id}${_hmac_token(key, token)}"
+
+
+def hash_token_bcrypt(token: str) -> str:
+    """Hash a token with the legacy bcrypt scheme.
     
     Since tokens can be > 72 bytes (bcrypt limit), we pre-hash with SHA256.
-    This is a standard pattern for long passwords/tokens.
+    Only kept to produce legacy hashes (migration tests, benchmarks).
     """
-    import hashlib
     # Pre-hash with SHA256 to handle long tokens (tokens are 77-101 chars)
     token_sha = hashlib.sha256(token.encode('utf-8')).hexdigest()
     return bcrypt.hashpw(token_sha.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
 
 
 def verify_token_hash(token: str, token_hash: str) -> bool:
-    """Verify a token against its bcrypt hash."""
-    import hashlib
+    """Verify a token against its stored hash (HMAC or legacy bcrypt)."""
     try:
-        # Pre-hash with SHA256 (same as hash_token)
+        if token_hash.startswith(TOKEN_HASH_SCHEME + '$'):
+            _, key_id, digest = token_hash.split('$')
+            key = _token_hash_keys()[1].get(key_id)
+            if key is None:
+                logger.error(f"Token hash uses unknown pepper id {key_id} (TOKEN_HASH_PEPPER changed?)")
+                return False
+            return hmac.compare_digest(_hmac_token(key, token), digest)
+        
+        # Legacy bcrypt: pre-hash with SHA256 (same as hash_token_bcrypt)
         token_sha = hashlib.sha256(token.encode('utf-8')).hexdigest()
         return bcrypt.checkpw(token_sha.encode('utf-8'), token_hash.encode('utf-8'))
-    except (ValueError, TypeError):
+    except (ValueError, TypeError, AttributeError):
         return False
 
 
+def token_hash_needs_rehash(token_hash: str) -> bool:
+    """True if ``token_hash`` is not in the current scheme/pepper.
+
+    Covers legacy bcrypt hashes, hashes under TOKEN_HASH_PEPPER_PREVIOUS and
+    unkeyed ("0") hashes once a pepper is set.
+    """
+    (key_id, _), _ = _token_hash_keys()
+    return not (token_hash or '').startswith(f"{TOKEN_HASH_SCHEME}${key_id}$")
+
+
 class Account(db.Model):
     """
     User account (human who logs into UI).
@@ -587,7 +649,7 @@ class APIToken(db.Model):
     token_name = db.Column(db.String(64), nullable=False)  # Human label: "aws-lambda-updater"
     token_description = db.Column(db.Text)  # "Updates host1 A record from AWS"
     token_prefix = db.Column(db.String(8), nullable=False, index=True)  # First 8 chars for lookup
-    token_hash = db.Column(db.String(255), nullable=False)  # bcrypt(full_token)
+    token_hash = db.Column(db.String(255), nullable=False)  # hash_token(full_token)
     
     # Scope restrictions (subset of realm permissions, NULL = inherit)
     allowed_record_types = db.Column(db.Text)  # JSON array, NULL = use realm's
@@ -674,7 +736,11 @@ class APIToken(db.Model):
         return self.expires_at < datetime.utcnow()
     
     def record_usage(self, ip_address: str):
-        """Record token usage (call after successful auth)."""
+        """Record token usage on this instance.
+
+        The API request path uses usage_buffer.record_token_usage() instead,
+        which batches these updates off the request thread.
+        """
         self.last_used_at = datetime.utcnow()
         self.last_used_ip = ip_address
         self.use_count = (self.use_count or 0) + 1
@@ -900,6 +966,105 @@ class Settings(db.Model):
         return f'<Settings {self.key}>'
 
 
+class SettingsVersion(db.Model):
+    """
+    Change counter of the settings table (single row, id=1).
+    
+    Bumped in the same transaction as every ORM write to Settings (see
+    settings_cache.py) so workers can detect changes with one cheap query.
+    """
+    __tablename__ = 'settings_version'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<SettingsVersion {self.version}>'
+
+
+class DnsRecordIndex(db.Model):
+    """
+    Last known destination of A/AAAA records (DDNS "nochg" fast path).
+    
+    One row per (backend namespace, zone, hostname, type), maintained by
+    record_index.py from every upstream read and write through the filter.
+    """
+    __tablename__ = 'dns_record_index'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    namespace = db.Column(db.String(255), nullable=False)  # Backend account (see DNSBackend.cache_namespace)
+    zone = db.Column(db.String(255), nullable=False)
+    hostname = db.Column(db.String(255), nullable=False)  # Relative to zone, lower-case ('@' = apex)
+    record_type = db.Column(db.String(10), nullable=False)
+    destination = db.Column(db.Text, nullable=False)
+    record_id = db.Column(db.String(64))
+    observed_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    
+    __table_args__ = (
+        db.UniqueConstraint('namespace', 'zone', 'hostname', 'record_type', name='uq_dns_record_index_key'),
+    )
+    
+    def __repr__(self):
+        return f'<DnsRecordIndex {self.hostname}.{self.zone} {self.record_type}>'
+
+
+class DnsRecordState(db.Model):
+    """
+    Last known state of every record in the zones the filter has read.
+    
+    One row per (backend namespace, zone, record id), maintained by
+    change_journal.py. Diffing a fresh record set against these rows
+    yields the DnsChange entries.
+    """
+    __tablename__ = 'dns_record_state'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    namespace = db.Column(db.String(255), nullable=False)  # Backend account (see DNSBackend.cache_namespace)
+    zone = db.Column(db.String(255), nullable=False)
+    record_id = db.Column(db.String(64), nullable=False)
+    hostname = db.Column(db.String(255), nullable=False)
+    record_type = db.Column(db.String(10), nullable=False)
+    destination = db.Column(db.Text, nullable=False)
+    priority = db.Column(db.String(10))
+    
+    __table_args__ = (
+        db.UniqueConstraint('namespace', 'zone', 'record_id', name='uq_dns_record_state_key'),
+    )
+    
+    def __repr__(self):
+        return f'<DnsRecordState {self.record_id} {self.hostname}.{self.zone} {self.record_type}>'
+
+
+class DnsChange(db.Model):
+    """
+    Change journal entry: one record created, updated or deleted.
+    
+    The auto-increment id is the cursor of GET /api/dns/<domain>/changes.
+    Columns hold the record after the change (before it, for deletes).
+    """
+    __tablename__ = 'dns_changes'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    namespace = db.Column(db.String(255), nullable=False)
+    zone = db.Column(db.String(255), nullable=False)
+    record_id = db.Column(db.String(64), nullable=False)
+    change = db.Column(db.String(10), nullable=False)  # 'created', 'updated', 'deleted'
+    hostname = db.Column(db.String(255), nullable=False)
+    record_type = db.Column(db.String(10), nullable=False)
+    destination = db.Column(db.Text, nullable=False)
+    priority = db.Column(db.String(10))
+    changed_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+    
+    __table_args__ = (
+        db.Index('ix_dns_changes_zone', 'namespace', 'zone', 'id'),
+        # Never reuse ids of pruned rows: they are client cursors
+        {'sqlite_autoincrement': True},
+    )
+    
+    def __repr__(self):
+        return f'<DnsChange {self.id} {self.change} {self.record_id}>'
+
+
 # Compatibility aliases for migration
 SystemConfig = Settings
 
@@ -0,0 +1,236 @@
+"""Per-zone batching of Netcup record mutations.
+
+Netcup's ``updateDnsRecords`` takes a whole record set, yet the DNS API and
+DDNS handlers each send a one-record update. When DDNS clients for many hosts
+in one zone report at the same time, each of those becomes its own upstream
+write. This module gathers mutations for the same zone that arrive within
+MUTATION_BATCH_WINDOW_MS into one ``update_dns_records`` call:
+
+- The first submission for a zone opens a batch and, after the window (or
+  once MUTATION_BATCH_MAX_RECORDS records are queued), sends it. Later
+  submissions join the open batch and wait for its outcome.
+- Every caller receives the result of the combined call, or its exception.
+- Combined calls for one zone go out one at a time, in the order their
+  batches closed. A submission touching a record already queued in the open
+  batch (same id, or same hostname/type for a new record) is not merged; it
+  goes into a later batch, so writes to one record keep their order.
+- If the API rejects a combined batch, each submission is retried on its own
+  so every caller sees the error for its own records only. Transport errors
+  (the write may or may not have been applied) are not retried; every caller
+  receives them.
+
+Batching is per worker process. Only pooled clients batch (see
+NetcupClient.submit_dns_records); everything else writes directly.
+
+Configuration:
+- MUTATION_BATCH_WINDOW_MS: Gathering window per zone (default 25, 0 disables)
+- MUTATION_BATCH_MAX_RECORDS: Records per combined call (default 50)
+"""
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from typing import Any, Dict, List, Optional, Set
+
+from .async_runtime import run_upstream
+from .zone_cache import ZoneKey, zone_key
+
+logger = logging.getLogger(__name__)
+
+# Batcher configuration
+BATCH_WINDOW_MS = float(os.environ.get("MUTATION_BATCH_WINDOW_MS", "25"))
+BATCH_MAX_RECORDS = int(os.environ.get("MUTATION_BATCH_MAX_RECORDS", "50"))
+
+
+def _record_keys(records: List[Dict[str, Any]]) -> Set[tuple]:
+    keys: Set[tuple] = set()
+    for rec in records:
+        if rec.get('id'):
+            keys.add(('id', str(rec['id'])))
+        else:
+            keys.add(('new', str(rec.get('hostname', '')).lower(), str(rec.get('type', '')).upper()))
+    return keys
+
+
+class _Submission:
+    __slots__ = ('records', 'result', 'error')
+
+    def __init__(self, records: List[Dict[str, Any]]):
+        self.records = records
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class _Batch:
+    __slots__ = ('submissions', 'keys', 'size', 'full', 'done', 'previous')
+
+    def __init__(self):
+        self.submissions: List[_Submission] = []
+        self.keys: set = set()
+        self.size = 0
+        self.full = threading.Event()
+        self.done = threading.Event()
+        # Batch closed before this one for the same zone; sent first
+        self.previous: Optional[_Batch] = None
+
+    def add(self, submission: _Submission, keys: set):
+        self.submissions.append(submission)
+        self.keys |= keys
+        self.size += len(submission.records)
+
+
+class MutationBatcher:
+    """Thread-safe per-zone write queue in front of ``update_dns_records``."""
+
+    def __init__(self, window_ms: float = BATCH_WINDOW_MS, max_records: int = BATCH_MAX_RECORDS):
+        self.window_ms = window_ms
+        self.max_records = max_records
+        self._open: Dict[ZoneKey, _Batch] = {}
+        # Most recently closed batch per zone (writes go out in close order)
+        self._tail: Dict[ZoneKey, _Batch] = {}
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.upstream_calls = 0
+        self.split_batches = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.window_ms > 0 and self.max_records > 1
+
+    def submit(self, client: Any, domain: str, records: List[Dict[str, Any]]) -> Any:
+        """Queue ``records`` for ``domain`` and return the update result.
+
+        ``client`` must provide ``cache_namespace`` and ``update_dns_records``
+        (blocking, or a coroutine run on the async_runtime loop; so never call
+        this on the loop thread). Raises whatever the (combined or individual)
+        update raised.
+        """
+        if not self.enabled:
+            with self._lock:
+                self.submitted += 1
+                self.upstream_calls += 1
+            return run_upstream(client.update_dns_records(domain, records))
+
+        key = zone_key(client.cache_namespace, domain)
+        keys = _record_keys(records)
+        submission = _Submission(records)
+
+        while True:
+            with self._lock:
+                batch = self._open.get(key)
+                if batch is None:
+                    batch = self._open[key] = _Batch()
+                    batch.add(submission, keys)
+                    self.submitted += 1
+                    leader = True
+                    break
+                if not (batch.keys & keys) and batch.size + len(records) <= self.max_records:
+                    batch.add(submission, keys)
+                    self.submitted += 1
+                    if batch.size >= self.max_records:
+                        batch.full.set()
+                    leader = False
+                    break
+                # Conflicts with a queued record, or would overflow: next batch
+                batch.full.set()
+            batch.done.wait()
+
+        if leader:
+            batch.full.wait(self.window_ms / 1000.0)
+            with self._lock:
+                if self._open.get(key) is batch:
+                    del self._open[key]
+                batch.previous = self._tail.get(key)
+                self._tail[key] = batch
+            try:
+                if batch.previous is not None:
+                    batch.previous.done.wait()
+                    batch.previous = None
+                self._send(client, domain, batch)
+            finally:
+                with self._lock:
+                    if self._tail.get(key) is batch:
+                        del self._tail[key]
+                batch.done.set()
+        else:
+            batch.done.wait()
+
+        if submission.error is not None:
+            raise submission.error
+        return submission.result
+
+    def _send(self, client: Any, domain: str, batch: _Batch):
+        submissions = batch.submissions
+        merged = [rec for sub in submissions for rec in sub.records]
+        with self._lock:
+            self.upstream_calls += 1
+        try:
+            result = run_upstream(client.update_dns_records(domain, merged))
+        except Exception as e:
+            if len(submissions) > 1 and getattr(e, 'statuscode', None) is not None:
+                # Rejected by the API: nothing applied, find the offending records
+                self._send_individually(client, domain, submissions)
+                return
+            for sub in submissions:
+                sub.error = e
+            return
+
+        if len(submissions) > 1 and _failed(result):
+            self._send_individually(client, domain, submissions)
+            return
+        for sub in submissions:
+            sub.result = result
+        if len(submissions) > 1:
+            logger.debug(f"Batched {len(submissions)} mutations for {domain} into one update")
+
+    def _send_individually(self, client: Any, domain: str, submissions: List[_Submission]):
+        logger.info(f"Batched update for {domain} rejected; retrying {len(submissions)} mutations individually")
+        with self._lock:
+            self.split_batches += 1
+            self.upstream_calls += len(submissions)
+        for sub in submissions:
+            try:
+                sub.result = run_upstream(client.update_dns_records(domain, sub.records))
+            except Exception as e:
+                sub.error = e
+
+    def reset(self):
+        """Forget open batches and statistics (forked child, tests)."""
+        with self._lock:
+            self._open = {}
+            self._tail = {}
+            self.submitted = 0
+            self.upstream_calls = 0
+            self.split_batches = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "open_batches": len(self._open),
+                "submitted": self.submitted,
+                "upstream_calls": self.upstream_calls,
+                "split_batches": self.split_batches,
+                "window_ms": self.window_ms,
+            }
+
+
+def _failed(result: Any) -> bool:
+    # Same rule as netcup_client.mutation_failed (not imported: circular)
+    return isinstance(result, dict) and bool(result.get('status')) and result.get('status') != 'success'
+
+
+# Global batcher instance
+_batcher = MutationBatcher()
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_batcher.reset)
+
+
+def get_mutation_batcher() -> MutationBatcher:
+    """Return the process-wide mutation batcher."""
+    return _batcher
+
+
+def get_batcher_stats() -> Dict[str, Any]:
+    """Get submitted mutations vs. upstream update calls."""
+    return _batcher.stats()
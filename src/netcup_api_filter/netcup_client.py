@@ -1,13 +1,47 @@
 """
 Netcup API Client
 Handles communication with the Netcup CCP API
+
+Pooled clients (``NetcupClient(..., pooled=True)``) share one CCP session per
+set of credentials (api_url, customer_id, api_key, api_password) across requests and threads of a worker via
+the process-wide NetcupSessionPool below, instead of logging in before every
+operation and never logging out. HTTP goes through the shared keep-alive pool
+in http_transport. Pooled clients also read zones through the process-wide
+record cache in zone_cache, keep it current on updates, and batch small
+concurrent updates per zone (mutation_batcher). Every CCP call goes through
+the account's circuit breaker (circuit_breaker), which fails fast with
+BackendUnavailable while ccp.netcup.net is failing or slow.
+
+AsyncNetcupClient is the asyncio variant for the shared event loop in
+async_runtime; it shares the session pool, zone cache, record index and
+mutation batcher. The API handlers use it when ASYNC_UPSTREAM_IO is set.
 """
-import requests
+import httpx
 import logging
-from typing import Dict, List, Optional, Any
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Any, Tuple
+
+from .async_runtime import get_async_runtime, run_blocking
+from .circuit_breaker import get_breaker
+from .dns_record import to_records
+from .http_transport import get_http_client
+from .lifecycle import register_shutdown_hook
+from .mutation_batcher import get_mutation_batcher
+from .zone_cache import credential_digest, get_zone_cache, zone_key
+from .zone_snapshot import ZoneSnapshot
 
 logger = logging.getLogger(__name__)
 
+# Session pool configuration. CCP sessions expire after 15 minutes without use;
+# refresh well before that, and rotate long-lived sessions regardless.
+SESSION_IDLE_SECONDS = float(os.environ.get("NETCUP_SESSION_IDLE_SECONDS", "600"))
+SESSION_MAX_AGE_SECONDS = float(os.environ.get("NETCUP_SESSION_MAX_AGE_SECONDS", "3600"))
+
+# CCP statuscode for a missing, malformed or expired apisessionid
+SESSION_ERROR_CODES = frozenset({4001})
+
 
 # ---------------------------------------------------------------------------
 # Response normalization helpers
@@ -48,14 +82,260 @@ def mutation_failed(result: Any) -> bool:
 
 def mutation_message(result: Any, default: str) -> str:
     """Return the error message from a mutation envelope, or ``default``."""
-    if isinstance(result, dict):
-        return result.get('message', default)
-    return default
+    message = result.get('message') if isinstance(result, dict) else None
+    return message if isinstance(message, str) else default
+
+
+def created_record_id(zone_records: Any, record: Dict[str, Any], taken: set) -> Optional[str]:
+    """Find the id the CCP assigned to a created record in the returned record set."""
+    if not isinstance(zone_records, list):
+        return None
+    for existing in zone_records:
+        record_id = str(existing.get('id', ''))
+        if (record_id and record_id not in taken
+                and str(existing.get('hostname', '')).lower() == record['hostname'].lower()
+                and str(existing.get('type', '')).upper() == record['type']
+                and existing.get('destination') == record['destination']):
+            taken.add(record_id)
+            return record_id
+    return None
+
+
+def observe_zone(namespace: str, domain: str, records: List[Dict[str, Any]]):
+    """Feed a complete record set to the DDNS record index and the change journal."""
+    from .change_journal import get_change_journal
+    from .record_index import get_record_index
+    get_record_index().observe_zone(namespace, domain, records)
+    get_change_journal().observe_zone(namespace, domain, records)
+
+
+def observe_changes(namespace: str, domain: str, records: List[Dict[str, Any]]):
+    """Feed records written without a returned record set to both."""
+    from .change_journal import get_change_journal
+    from .record_index import get_record_index
+    get_record_index().observe_changes(namespace, domain, records)
+    get_change_journal().observe_changes(namespace, domain, records)
 
 
 class NetcupAPIError(Exception):
     """Exception raised for Netcup API errors"""
-    pass
+    
+    def __init__(self, message: str = "", statuscode: Optional[int] = None):
+        super().__init__(message)
+        self.statuscode = statuscode
+
+
+def is_session_error(error: Exception) -> bool:
+    """True if a Netcup API error means the apisessionid is no longer valid."""
+    if not isinstance(error, NetcupAPIError) or error.statuscode is None:
+        return False
+    try:
+        return int(error.statuscode) in SESSION_ERROR_CODES
+    except (TypeError, ValueError):
+        return False
+
+
+def netcup_namespace(api_url: str, customer_id: Any, api_key: str, api_password: str) -> str:
+    """Namespace of the zone cache, single-flight, record index, change journal
+    and circuit breaker for one set of CCP credentials.
+    
+    Includes a digest of the key and password: a client that only knows the
+    customer number must not be served another tenant's cached zones.
+    """
+    return f"netcup:{api_url}:{customer_id}:{credential_digest(api_key, api_password)}"
+
+
+def parse_ccp_response(response: httpx.Response) -> Dict[str, Any]:
+    """Return the success envelope of a CCP response or raise NetcupAPIError.
+    
+    Raises httpx.HTTPStatusError for HTTP errors without an error envelope.
+    """
+    if response.status_code >= 400:
+        # Some endpoints (and the mock API) pair an error envelope with
+        # an HTTP error status; keep the envelope's message
+        try:
+            data = response.json()
+        except ValueError:
+            data = None
+        if isinstance(data, dict) and data.get("status") not in (None, "success"):
+            error_msg = data.get("longmessage", data.get("statuscode", "Unknown error"))
+            raise NetcupAPIError(f"API error: {error_msg}", data.get("statuscode"))
+    response.raise_for_status()
+    try:
+        data = response.json()
+    except ValueError as e:
+        raise NetcupAPIError(f"Invalid JSON from API: {e}")
+    if not isinstance(data, dict):
+        raise NetcupAPIError(f"Unexpected response shape: {type(data).__name__}")
+    if data.get("status") != "success":
+        error_msg = data.get("longmessage", data.get("statuscode", "Unknown error"))
+        raise NetcupAPIError(f"API error: {error_msg}", data.get("statuscode"))
+    return data
+
+
+# ---------------------------------------------------------------------------
+# Session pool
+# ---------------------------------------------------------------------------
+
+SessionKey = Tuple[str, str, str, str]
+
+
+class _PooledSession:
+    __slots__ = ('session_id', 'created_at', 'last_used', 'client')
+
+    def __init__(self, session_id: str, client: 'NetcupClient'):
+        now = time.monotonic()
+        self.session_id = session_id
+        self.created_at = now
+        self.last_used = now
+        # Credentials to log out with on shutdown
+        self.client = client
+
+
+class NetcupSessionPool:
+    """Process-wide cache of CCP sessions keyed by the client's credentials.
+    
+    - One login per key; concurrent callers wait for it instead of each
+      opening their own session.
+    - Sessions idle for SESSION_IDLE_SECONDS or older than
+      SESSION_MAX_AGE_SECONDS are replaced before use (proactive refresh)
+      and the replaced session is logged out.
+    - ``invalidate`` drops a session the API rejected; the caller re-logs in.
+    - ``logout_all`` runs on worker shutdown (see lifecycle.py).
+    """
+    
+    def __init__(self, idle_seconds: float = SESSION_IDLE_SECONDS,
+                 max_age_seconds: float = SESSION_MAX_AGE_SECONDS):
+        self.idle_seconds = idle_seconds
+        self.max_age_seconds = max_age_seconds
+        self._sessions: Dict[SessionKey, _PooledSession] = {}
+        self._key_locks: Dict[SessionKey, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self.logins = 0
+        self.reuses = 0
+        self.refreshes = 0
+        self.invalidations = 0
+    
+    def _key_lock(self, key: SessionKey) -> threading.Lock:
+        with self._lock:
+            lock = self._key_locks.get(key)
+            if lock is None:
+                lock = self._key_locks[key] = threading.Lock()
+            return lock
+    
+    def _fresh(self, entry: _PooledSession, now: float) -> bool:
+        return (now - entry.last_used < self.idle_seconds
+                and now - entry.created_at < self.max_age_seconds)
+    
+    def acquire(self, client: 'NetcupClient') -> str:
+        """Return a usable session id for the client's credentials."""
+        key = client.session_key
+        now = time.monotonic()
+        entry = self._sessions.get(key)
+        if entry is not None and self._fresh(entry, now):
+            entry.last_used = now
+            self.reuses += 1
+            return entry.session_id
+        
+        with self._key_lock(key):
+            # Another thread may have logged in while we waited
+            now = time.monotonic()
+            entry = self._sessions.get(key)
+            if entry is not None and self._fresh(entry, now):
+                entry.last_used = now
+                self.reuses += 1
+                return entry.session_id
+            if entry is not None:
+                self.refreshes += 1
+            
+            session_id = client._login_request()
+            self._sessions[key] = _PooledSession(session_id, client)
+            self.logins += 1
+        
+        if entry is not None:
+            self._logout(entry)
+        return session_id
+    
+    @staticmethod
+    def _logout(entry: _PooledSession):
+        """Log out a session that is no longer pooled (best effort)."""
+        try:
+            entry.client._logout_request(entry.session_id)
+        except Exception as e:
+            # Idle sessions may already have expired upstream
+            logger.debug(f"Netcup logout of replaced session failed: {e}")
+    
+    def peek(self, key: SessionKey) -> Optional[str]:
+        """Fresh pooled session id for ``key`` without logging in, or None."""
+        now = time.monotonic()
+        entry = self._sessions.get(key)
+        if entry is not None and self._fresh(entry, now):
+            entry.last_used = now
+            self.reuses += 1
+            return entry.session_id
+        return None
+    
+    def store(self, key: SessionKey, session_id: str, client: 'NetcupClient'):
+        """Pool a session opened elsewhere (AsyncNetcupClient logins).
+        
+        A session it replaces is logged out, as in ``acquire``.
+        """
+        with self._lock:
+            replaced = self._sessions.get(key)
+            if replaced is not None:
+                self.refreshes += 1
+            self._sessions[key] = _PooledSession(session_id, client)
+            self.logins += 1
+        if replaced is not None and replaced.session_id != session_id:
+            self._logout(replaced)
+    
+    def invalidate(self, key: SessionKey, session_id: Optional[str]):
+        """Forget ``session_id`` if it is still the pooled session for ``key``."""
+        with self._lock:
+            entry = self._sessions.get(key)
+            if entry is not None and entry.session_id == session_id:
+                del self._sessions[key]
+                self.invalidations += 1
+    
+    def logout_all(self):
+        """Log out every pooled session (best effort)."""
+        with self._lock:
+            entries = list(self._sessions.values())
+            self._sessions.clear()
+        for entry in entries:
+            try:
+                entry.client._logout_request(entry.session_id)
+            except Exception as e:
+                logger.warning(f"Netcup logout on shutdown failed: {e}")
+    
+    def reset(self):
+        """Drop all state without logging out (forked child, tests)."""
+        with self._lock:
+            self._sessions.clear()
+            self._key_locks.clear()
+            self.logins = self.reuses = self.refreshes = self.invalidations = 0
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "sessions": len(self._sessions),
+            "logins": self.logins,
+            "reuses": self.reuses,
+            "refreshes": self.refreshes,
+            "invalidations": self.invalidations,
+        }
+
+
+# Global pool instance
+_session_pool = NetcupSessionPool()
+register_shutdown_hook("netcup_sessions", _session_pool.logout_all)
+if hasattr(os, "register_at_fork"):
+    # Locks and session ownership are per process
+    os.register_at_fork(after_in_child=_session_pool.reset)
+
+
+def get_session_pool() -> NetcupSessionPool:
+    """Return the process-wide Netcup session pool."""
+    return _session_pool
 
 
 class NetcupClient:
@@ -63,13 +343,18 @@ class NetcupClient:
     
     def __init__(self, customer_id: str, api_key: str, api_password: str, 
                  api_url: str = "https://ccp.netcup.net/run/webservice/servers/endpoint.php?JSON",
-                 timeout: int = 30):
+                 timeout: int = 30, pooled: bool = False):
         self.customer_id = customer_id
         self.api_key = api_key
         self.api_password = api_password
         self.api_url = api_url
         self.timeout = timeout
+        self.pooled = pooled
         self.session_id: Optional[str] = None
+    
+    @property
+    def session_key(self) -> SessionKey:
+        return (self.api_url, str(self.customer_id), str(self.api_key), credential_digest(self.api_password))
         
     def _make_request(self, action: str, param: Dict[str, Any]) -> Dict[str, Any]:
         """Make a request to the Netcup API"""
@@ -79,24 +364,15 @@ class NetcupClient:
         }
         
         try:
-            response = requests.post(self.api_url, json=payload, timeout=self.timeout)
-            response.raise_for_status()
-            try:
-                data = response.json()
-            except ValueError as e:
-                raise NetcupAPIError(f"Invalid JSON from API: {e}")
-            if not isinstance(data, dict):
-                raise NetcupAPIError(f"Unexpected response shape: {type(data).__name__}")
-            if data.get("status") != "success":
-                error_msg = data.get("longmessage", data.get("statuscode", "Unknown error"))
-                raise NetcupAPIError(f"API error: {error_msg}")
-            return data
-        except requests.RequestException as e:
+            with get_breaker(self.cache_namespace).guard(self.timeout) as timeout:
+                response = get_http_client(self.api_url).post(self.api_url, json=payload, timeout=timeout)
+                return parse_ccp_response(response)
+        except httpx.HTTPError as e:
             logger.error(f"Request failed: {e}")
             raise NetcupAPIError(f"Request failed: {e}")
     
-    def login(self) -> str:
-        """Login to the Netcup API and get a session ID"""
+    def _login_request(self) -> str:
+        """Open a new CCP session and return its id."""
         param = {
             "customernumber": self.customer_id,
             "apikey": self.api_key,
@@ -105,85 +381,166 @@ class NetcupClient:
         
         response = self._make_request("login", param)
         try:
-            self.session_id = response["responsedata"]["apisessionid"]
+            session_id = response["responsedata"]["apisessionid"]
         except KeyError as e:
             raise NetcupAPIError(f"Missing key in login response: {e}")
+        if not session_id or not isinstance(session_id, str):
+            raise NetcupAPIError("Login response contained no session id")
         logger.info("Successfully logged in to Netcup API")
+        return session_id
+    
+    def _logout_request(self, session_id: str):
+        param = {
+            "customernumber": self.customer_id,
+            "apikey": self.api_key,
+            "apisessionid": session_id
+        }
+        self._make_request("logout", param)
+        logger.info("Successfully logged out from Netcup API")
+    
+    def login(self) -> str:
+        """Login to the Netcup API and get a session ID"""
+        self.session_id = self._login_request()
         return self.session_id
     
     def logout(self):
         """Logout from the Netcup API"""
         if not self.session_id:
             return
-            
-        param = {
+        
+        session_id, self.session_id = self.session_id, None
+        if self.pooled:
+            _session_pool.invalidate(self.session_key, session_id)
+        self._logout_request(session_id)
+    
+    def _session(self) -> str:
+        """Session id for the next call (pooled, or this client's own)."""
+        if self.pooled:
+            self.session_id = _session_pool.acquire(self)
+        elif not self.session_id:
+            self.login()
+        if not self.session_id:
+            raise NetcupAPIError("Login returned no session id")
+        return self.session_id
+    
+    def _session_param(self, session_id: str, param: Dict[str, Any]) -> Dict[str, Any]:
+        return {
             "customernumber": self.customer_id,
             "apikey": self.api_key,
-            "apisessionid": self.session_id
+            "apisessionid": session_id,
+            **param
         }
-        
+    
+    def _session_request(self, action: str, param: Dict[str, Any]) -> Dict[str, Any]:
+        """Make an authenticated request, re-logging in once if the session is rejected."""
+        session_id = self._session()
         try:
-            self._make_request("logout", param)
-            logger.info("Successfully logged out from Netcup API")
-        finally:
+            return self._make_request(action, self._session_param(session_id, param))
+        except NetcupAPIError as e:
+            if not is_session_error(e):
+                raise
+            logger.info(f"Netcup session rejected ({e}), logging in again")
+            if self.pooled:
+                _session_pool.invalidate(self.session_key, session_id)
             self.session_id = None
+        
+        session_id = self._session()
+        return self._make_request(action, self._session_param(session_id, param))
     
     def info_dns_zone(self, domain: str) -> Dict[str, Any]:
         """Get DNS zone information for a domain"""
-        if not self.session_id:
-            self.login()
-            
-        param = {
-            "customernumber": self.customer_id,
-            "apikey": self.api_key,
-            "apisessionid": self.session_id,
-            "domainname": domain
-        }
-        
-        response = self._make_request("infoDnsZone", param)
+        response = self._session_request("infoDnsZone", {"domainname": domain})
         try:
             return response["responsedata"]
         except KeyError as e:
             raise NetcupAPIError(f"Missing key in infoDnsZone response: {e}")
     
-    def info_dns_records(self, domain: str) -> List[Dict[str, Any]]:
-        """Get all DNS records for a domain"""
-        if not self.session_id:
-            self.login()
-            
-        param = {
-            "customernumber": self.customer_id,
-            "apikey": self.api_key,
-            "apisessionid": self.session_id,
-            "domainname": domain
-        }
-        
-        response = self._make_request("infoDnsRecords", param)
+    @property
+    def cache_namespace(self) -> str:
+        """Zone cache namespace: one per endpoint and set of CCP credentials."""
+        return netcup_namespace(self.api_url, self.customer_id, self.api_key, self.api_password)
+    
+    def _fetch_dns_records(self, domain: str) -> List[Dict[str, Any]]:
+        response = self._session_request("infoDnsRecords", {"domainname": domain})
         try:
-            return response["responsedata"]["dnsrecords"]
+            records = response["responsedata"]["dnsrecords"]
         except KeyError as e:
             raise NetcupAPIError(f"Missing key in infoDnsRecords response: {e}")
+        if self.pooled and isinstance(records, list):
+            observe_zone(self.cache_namespace, domain, records)
+        return records
+    
+    def info_dns_records(self, domain: str, use_cache: bool = True) -> List[Dict[str, Any]]:
+        """Get all DNS records for a domain
+        
+        Pooled clients answer from the zone record cache when possible. Pass
+        ``use_cache=False`` before sending a modified full record set back.
+        """
+        if not (self.pooled and use_cache):
+            return self._fetch_dns_records(domain)
+        return get_zone_cache().get_or_load(
+            zone_key(self.cache_namespace, domain),
+            lambda: self._fetch_dns_records(domain)
+        )
+    
+    def dns_snapshot(self, domain: str) -> ZoneSnapshot:
+        """Indexed record set of a domain for hostname/type and id lookups
+        
+        Pooled clients return the zone cache's shared snapshot, indexed once
+        per fetch. Its records are read-only; read-modify-write paths use
+        ``info_dns_records(domain, use_cache=False)``.
+        """
+        if not self.pooled:
+            return ZoneSnapshot(to_records(self._fetch_dns_records(domain)), domain)
+        return get_zone_cache().get_snapshot(
+            zone_key(self.cache_namespace, domain),
+            lambda: self._fetch_dns_records(domain)
+        )
     
     def update_dns_records(self, domain: str, dns_records: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Update DNS records for a domain"""
-        if not self.session_id:
-            self.login()
-            
         param = {
-            "customernumber": self.customer_id,
-            "apikey": self.api_key,
-            "apisessionid": self.session_id,
             "domainname": domain,
             "dnsrecordset": {
                 "dnsrecords": dns_records
             }
         }
         
-        response = self._make_request("updateDnsRecords", param)
+        key = zone_key(self.cache_namespace, domain)
         try:
-            return response["responsedata"]
+            response = self._session_request("updateDnsRecords", param)
+            result = response["responsedata"]
         except KeyError as e:
+            get_zone_cache().invalidate(key)
             raise NetcupAPIError(f"Missing key in updateDnsRecords response: {e}")
+        except Exception:
+            # The update may or may not have been applied
+            get_zone_cache().invalidate(key)
+            raise
+        
+        # The CCP returns the zone's complete record set after the update
+        records = result.get("dnsrecords") if isinstance(result, dict) else None
+        if self.pooled and isinstance(records, list):
+            get_zone_cache().put(key, records)
+        else:
+            get_zone_cache().invalidate(key)
+        if self.pooled:
+            if isinstance(records, list):
+                observe_zone(self.cache_namespace, domain, records)
+            else:
+                observe_changes(self.cache_namespace, domain, dns_records)
+        return result
+    
+    def submit_dns_records(self, domain: str, dns_records: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Update a few DNS records, batched with concurrent updates to the zone
+        
+        Pooled clients queue the records in the per-zone mutation batcher,
+        which sends mutations arriving within a short window as one
+        updateDnsRecords call. Others call update_dns_records directly.
+        """
+        if not self.pooled:
+            return self.update_dns_records(domain, dns_records)
+        return get_mutation_batcher().submit(self, domain, dns_records)
     
     def __enter__(self):
         """Context manager entry"""
@@ -193,3 +550,229 @@ class NetcupClient:
     def __exit__(self, exc_type, exc_val, exc_tb):
         """Context manager exit"""
         self.logout()
+
+
+class AsyncNetcupClient:
+    """asyncio variant of NetcupClient for the shared loop in async_runtime
+    
+    Coroutines must run on that loop (``run_async(client.dns_snapshot(d))``
+    from a Flask thread). Calls hold the per-account semaphore and share the
+    loop's per-origin connection pool. Pooled clients use the same CCP
+    sessions, zone record cache, record index and mutation batcher as pooled
+    NetcupClients.
+    """
+    
+    def __init__(self, customer_id: str, api_key: str, api_password: str, 
+                 api_url: str = "https://ccp.netcup.net/run/webservice/servers/endpoint.php?JSON",
+                 timeout: int = 30, pooled: bool = False):
+        self.customer_id = customer_id
+        self.api_key = api_key
+        self.api_password = api_password
+        self.api_url = api_url
+        self.timeout = timeout
+        self.pooled = pooled
+        self.session_id: Optional[str] = None
+    
+    @property
+    def session_key(self) -> SessionKey:
+        return (self.api_url, str(self.customer_id), str(self.api_key), credential_digest(self.api_password))
+    
+    @property
+    def cache_namespace(self) -> str:
+        """Same namespace as a NetcupClient with these credentials."""
+        return netcup_namespace(self.api_url, self.customer_id, self.api_key, self.api_password)
+    
+    def _session_param(self, session_id: str, param: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "customernumber": self.customer_id,
+            "apikey": self.api_key,
+            "apisessionid": session_id,
+            **param
+        }
+    
+    def _blocking_client(self) -> NetcupClient:
+        """NetcupClient with the same credentials (shutdown logout of pooled sessions)."""
+        return NetcupClient(self.customer_id, self.api_key, self.api_password,
+                            api_url=self.api_url, timeout=self.timeout, pooled=self.pooled)
+    
+    async def _make_request(self, action: str, param: Dict[str, Any]) -> Dict[str, Any]:
+        """Make a request to the Netcup API"""
+        runtime = get_async_runtime()
+        payload = {
+            "action": action,
+            "param": param
+        }
+        
+        try:
+            async with runtime.semaphore(self.cache_namespace):
+                with get_breaker(self.cache_namespace).guard(self.timeout) as timeout:
+                    response = await runtime.http_client(self.api_url).post(
+                        self.api_url, json=payload, timeout=timeout
+                    )
+                    return parse_ccp_response(response)
+        except httpx.HTTPError as e:
+            logger.error(f"Request failed: {e}")
+            raise NetcupAPIError(f"Request failed: {e}")
+    
+    async def _login_request(self) -> str:
+        """Open a new CCP session and return its id."""
+        param = {
+            "customernumber": self.customer_id,
+            "apikey": self.api_key,
+            "apipassword": self.api_password
+        }
+        
+        response = await self._make_request("login", param)
+        try:
+            session_id = response["responsedata"]["apisessionid"]
+        except KeyError as e:
+            raise NetcupAPIError(f"Missing key in login response: {e}")
+        if not session_id or not isinstance(session_id, str):
+            raise NetcupAPIError("Login response contained no session id")
+        logger.info("Successfully logged in to Netcup API")
+        return session_id
+    
+    async def login(self) -> str:
+        """Login to the Netcup API and get a session ID"""
+        self.session_id = await self._login_request()
+        return self.session_id
+    
+    async def logout(self):
+        """Logout from the Netcup API"""
+        if not self.session_id:
+            return
+        
+        session_id, self.session_id = self.session_id, None
+        if self.pooled:
+            _session_pool.invalidate(self.session_key, session_id)
+        await self._make_request("logout", {
+            "customernumber": self.customer_id,
+            "apikey": self.api_key,
+            "apisessionid": session_id
+        })
+        logger.info("Successfully logged out from Netcup API")
+    
+    async def _session(self) -> str:
+        """Session id for the next call (pooled, or this client's own)."""
+        if not self.pooled:
+            if not self.session_id:
+                await self.login()
+        else:
+            key = self.session_key
+            session_id = _session_pool.peek(key)
+            if session_id is None:
+                # One login per key on the loop; the pool's thread lock would block it
+                async with get_async_runtime().lock(('netcup-login', key)):
+                    session_id = _session_pool.peek(key)
+                    if session_id is None:
+                        session_id = await self._login_request()
+                        _session_pool.store(key, session_id, self._blocking_client())
+            self.session_id = session_id
+        if not self.session_id:
+            raise NetcupAPIError("Login returned no session id")
+        return self.session_id
+    
+    async def _session_request(self, action: str, param: Dict[str, Any]) -> Dict[str, Any]:
+        """Make an authenticated request, re-logging in once if the session is rejected."""
+        session_id = await self._session()
+        try:
+            return await self._make_request(action, self._session_param(session_id, param))
+        except NetcupAPIError as e:
+            if not is_session_error(e):
+                raise
+            logger.info(f"Netcup session rejected ({e}), logging in again")
+            if self.pooled:
+                _session_pool.invalidate(self.session_key, session_id)
+            self.session_id = None
+        
+        session_id = await self._session()
+        return await self._make_request(action, self._session_param(session_id, param))
+    
+    async def info_dns_zone(self, domain: str) -> Dict[str, Any]:
+        """Get DNS zone information for a domain"""
+        response = await self._session_request("infoDnsZone", {"domainname": domain})
+        try:
+            zone: Dict[str, Any] = response["responsedata"]
+            return zone
+        except KeyError as e:
+            raise NetcupAPIError(f"Missing key in infoDnsZone response: {e}")
+    
+    async def _fetch_dns_records(self, domain: str) -> List[Dict[str, Any]]:
+        response = await self._session_request("infoDnsRecords", {"domainname": domain})
+        try:
+            records: List[Dict[str, Any]] = response["responsedata"]["dnsrecords"]
+        except KeyError as e:
+            raise NetcupAPIError(f"Missing key in infoDnsRecords response: {e}")
+        if self.pooled and isinstance(records, list):
+            # Record index and change journal write to the database
+            await run_blocking(observe_zone, self.cache_namespace, domain, records)
+        return records
+    
+    async def info_dns_records(self, domain: str, use_cache: bool = True) -> List[Dict[str, Any]]:
+        """Get all DNS records for a domain
+        
+        Pooled clients answer from the zone record cache when possible, and
+        concurrent misses for one zone share a single upstream read. Pass
+        ``use_cache=False`` before sending a modified full record set back.
+        """
+        if not (self.pooled and use_cache):
+            return await self._fetch_dns_records(domain)
+        return await get_zone_cache().get_or_load_async(
+            zone_key(self.cache_namespace, domain),
+            lambda: self._fetch_dns_records(domain)
+        )
+    
+    async def dns_snapshot(self, domain: str) -> ZoneSnapshot:
+        """Indexed record set of a domain (see NetcupClient.dns_snapshot)"""
+        if not self.pooled:
+            return ZoneSnapshot(to_records(await self._fetch_dns_records(domain)), domain)
+        return await get_zone_cache().get_snapshot_async(
+            zone_key(self.cache_namespace, domain),
+            lambda: self._fetch_dns_records(domain)
+        )
+    
+    async def update_dns_records(self, domain: str, dns_records: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Update DNS records for a domain"""
+        param = {
+            "domainname": domain,
+            "dnsrecordset": {
+                "dnsrecords": dns_records
+            }
+        }
+        
+        key = zone_key(self.cache_namespace, domain)
+        try:
+            response = await self._session_request("updateDnsRecords", param)
+            result: Dict[str, Any] = response["responsedata"]
+        except KeyError as e:
+            get_zone_cache().invalidate(key)
+            raise NetcupAPIError(f"Missing key in updateDnsRecords response: {e}")
+        except Exception:
+            # The update may or may not have been applied
+            get_zone_cache().invalidate(key)
+            raise
+        
+        # The CCP returns the zone's complete record set after the update
+        records = result.get("dnsrecords") if isinstance(result, dict) else None
+        if self.pooled and isinstance(records, list):
+            get_zone_cache().put(key, records)
+        else:
+            get_zone_cache().invalidate(key)
+        if self.pooled:
+            if isinstance(records, list):
+                await run_blocking(observe_zone, self.cache_namespace, domain, records)
+            else:
+                await run_blocking(observe_changes, self.cache_namespace, domain, dns_records)
+        return result
+    
+    async def submit_dns_records(self, domain: str, dns_records: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Update a few DNS records, batched with concurrent updates to the zone
+        
+        Pooled clients join the per-zone mutation batcher, waiting for their
+        batch in the loop's thread pool; the combined update itself runs on
+        the loop again. Others call update_dns_records directly.
+        """
+        if not self.pooled:
+            return await self.update_dns_records(domain, dns_records)
+        result: Dict[str, Any] = await run_blocking(get_mutation_batcher().submit, self, domain, dns_records)
+        return result
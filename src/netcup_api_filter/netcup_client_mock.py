@@ -7,6 +7,9 @@ from typing import Dict, List, Optional, Any
 from datetime import datetime
 import os
 
+from .dns_record import to_records
+from .zone_snapshot import ZoneSnapshot
+
 logger = logging.getLogger(__name__)
 
 
@@ -243,7 +246,7 @@ class MockNetcupClient:
             "dnssecstatus": False
         }
     
-    def info_dns_records(self, domain: str) -> List[Dict[str, Any]]:
+    def info_dns_records(self, domain: str, use_cache: bool = True) -> List[Dict[str, Any]]:
         """Simulate getting DNS records"""
         if not self.session_id:
             self.login()
@@ -257,6 +260,10 @@ class MockNetcupClient:
             logger.info(f"🎭 First record: {records[0]['hostname']} -> {records[0]['destination']}")
         return records
     
+    def dns_snapshot(self, domain: str) -> ZoneSnapshot:
+        """Indexed copy of the mock records"""
+        return ZoneSnapshot(to_records(self.info_dns_records(domain)), domain)
+    
     def update_dns_records(self, domain: str, dns_records: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Simulate updating DNS records"""
         if not self.session_id:
@@ -311,6 +318,10 @@ class MockNetcupClient:
             "statuscode": 2000
         }
     
+    def submit_dns_records(self, domain: str, dns_records: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Simulate a batched update (applied immediately)"""
+        return self.update_dns_records(domain, dns_records)
+    
     def __enter__(self):
         """Context manager entry"""
         self.login()
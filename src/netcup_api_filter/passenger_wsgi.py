@@ -678,6 +678,23 @@ try:
     
     logger.info("Netcup API Filter started successfully")
     
+    # Drain write-behind buffers (audit log, usage counters) when Passenger
+    # stops this process. A normal exit already runs them via atexit; SIGTERM
+    # would otherwise terminate without running atexit handlers.
+    import signal
+    from netcup_api_filter.lifecycle import run_shutdown_hooks
+    
+    if signal.getsignal(signal.SIGTERM) in (signal.SIG_DFL, None):
+        def _on_sigterm(signum, frame):
+            run_shutdown_hooks()
+            sys.exit(0)
+        
+        try:
+            signal.signal(signal.SIGTERM, _on_sigterm)
+        except ValueError:
+            # Not in the main thread; atexit still covers normal shutdown
+            pass
+    
     # WSGI application
     application = app
 
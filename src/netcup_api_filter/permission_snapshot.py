@@ -0,0 +1,225 @@
+"""Compiled, immutable permission snapshots for (token, realm) pairs.
+
+``check_permission`` used to re-parse the JSON text columns of APIToken and
+AccountRealm (operations, record types, IP ranges) and rebuild ``ipaddress``
+objects on every call. For ``validate_dns_records_update`` that happens once
+per record in the request body.
+
+A ``PermissionSnapshot`` is compiled once per (token, realm) version and then
+answers every check with set lookups:
+- operations / record_types: frozensets (token-level, falling back to realm)
+- ip_allowlist: compiled ``IPAllowlist`` (see ip_allowlist.py)
+- realm domain and FQDN pre-lowered for scope checks
+
+The version is the content of the permission columns themselves, so an edit
+made by another worker yields a different key and is picked up immediately.
+``update_token``, ``update_realm_permissions`` and realm approval also drop
+the stale entries explicitly to keep the cache small.
+
+Configuration:
+- PERMISSION_SNAPSHOT_CACHE_SIZE: Maximum number of snapshots (default 1024)
+"""
+from __future__ import annotations
+
+import ipaddress
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict
+
+from .ip_allowlist import IPAllowlist
+
+logger = logging.getLogger(__name__)
+
+# Cache configuration
+SNAPSHOT_CACHE_MAX_SIZE = int(os.environ.get("PERMISSION_SNAPSHOT_CACHE_SIZE", "1024"))
+
+@lru_cache(maxsize=SNAPSHOT_CACHE_MAX_SIZE or 1)
+def compile_ip_ranges(raw: str | None) -> IPAllowlist:
+    """Compile a token's ``allowed_ip_ranges`` JSON into an IPAllowlist.
+
+    Single addresses become /32 (/128) networks. Malformed entries are skipped
+    with a warning, matching the historical per-request behaviour.
+    """
+    if not raw:
+        return IPAllowlist()
+    try:
+        entries = json.loads(raw)
+    except (json.JSONDecodeError, TypeError):
+        return IPAllowlist()
+
+    networks = []
+    for allowed in entries or ():
+        try:
+            networks.append(ipaddress.ip_network(allowed, strict=False))
+        except (ValueError, TypeError):
+            logger.warning(f"Invalid IP range in whitelist: {allowed}")
+    return IPAllowlist(networks)
+
+
+def ip_in_allowlist(allowlist: IPAllowlist, client_ip: str) -> bool:
+    """Return True if ``client_ip`` falls into ``allowlist``."""
+    try:
+        ip_obj = ipaddress.ip_address(client_ip)
+    except ValueError:
+        logger.warning(f"Invalid client IP format: {client_ip}")
+        return False
+    return allowlist.contains_address(ip_obj)
+
+
+@dataclass(frozen=True)
+class PermissionSnapshot:
+    """Immutable effective permissions of one token within its realm."""
+
+    token_id: int | None
+    realm_id: int | None
+    operations: frozenset[str]
+    record_types: frozenset[str]
+    ip_allowlist: IPAllowlist
+    ip_restricted: bool
+    realm_type: str
+    domain: str  # lowered zone
+    fqdn: str  # lowered realm FQDN
+
+    def allows_ip(self, client_ip: str) -> bool:
+        """IP whitelist check (no restriction configured → allowed)."""
+        if not self.ip_restricted:
+            return True
+        return ip_in_allowlist(self.ip_allowlist, client_ip)
+
+    def matches_domain(self, domain: str) -> bool:
+        """Same semantics as ``AccountRealm.matches_domain``."""
+        return domain.lower() == self.domain
+
+    def matches_hostname(self, hostname: str) -> bool:
+        """Same semantics as ``AccountRealm.matches_hostname``."""
+        hostname_lower = hostname.lower()
+        fqdn = self.fqdn
+        if self.realm_type == 'host':
+            return hostname_lower == fqdn
+        if self.realm_type == 'subdomain':
+            return hostname_lower == fqdn or hostname_lower.endswith('.' + fqdn)
+        if self.realm_type == 'subdomain_only':
+            return hostname_lower.endswith('.' + fqdn) and hostname_lower != fqdn
+        logger.warning(f"Unknown realm_type: {self.realm_type}")
+        return False
+
+
+def _snapshot_key(token: Any, realm: Any) -> tuple:
+    """Version key: identity plus every column the snapshot is derived from."""
+    return (
+        token.id, token.allowed_operations, token.allowed_record_types, token.allowed_ip_ranges,
+        realm.id, realm.realm_type, realm.domain, realm.realm_value,
+        realm.allowed_operations, realm.allowed_record_types,
+    )
+
+
+def compile_snapshot(token: Any) -> PermissionSnapshot:
+    """Build a snapshot from an APIToken and its realm (no caching)."""
+    realm = token.realm
+    raw_ranges = token.allowed_ip_ranges
+    return PermissionSnapshot(
+        token_id=token.id,
+        realm_id=realm.id,
+        operations=frozenset(token.get_effective_operations()),
+        record_types=frozenset(token.get_effective_record_types()),
+        ip_allowlist=compile_ip_ranges(raw_ranges),
+        ip_restricted=bool(token.get_allowed_ip_ranges()),
+        realm_type=realm.realm_type,
+        domain=(realm.domain or '').lower(),
+        fqdn=realm.get_fqdn().lower(),
+    )
+
+
+class PermissionSnapshotCache:
+    """Thread-safe LRU of compiled snapshots keyed by (token, realm) version."""
+
+    def __init__(self, max_size: int = SNAPSHOT_CACHE_MAX_SIZE):
+        self.max_size = max_size
+        self._cache: OrderedDict[tuple, PermissionSnapshot] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, token: Any) -> PermissionSnapshot:
+        """Return the snapshot for ``token``, compiling it on a miss."""
+        if self.max_size <= 0:
+            return compile_snapshot(token)
+
+        key = _snapshot_key(token, token.realm)
+        with self._lock:
+            snapshot = self._cache.get(key)
+            if snapshot is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return snapshot
+            self.misses += 1
+
+        snapshot = compile_snapshot(token)
+        with self._lock:
+            # Drop older versions of the same token before storing the new one
+            for stale in [k for k in self._cache if k[0] == token.id]:
+                del self._cache[stale]
+            while len(self._cache) >= self.max_size:
+                self._cache.popitem(last=False)
+            self._cache[key] = snapshot
+        return snapshot
+
+    def invalidate(self, token_id: int | None = None, realm_id: int | None = None) -> int:
+        """Drop snapshots for a token and/or realm. Returns the number removed."""
+        with self._lock:
+            stale = [
+                k for k, snap in self._cache.items()
+                if (token_id is not None and snap.token_id == token_id)
+                or (realm_id is not None and snap.realm_id == realm_id)
+            ]
+            for key in stale:
+                del self._cache[key]
+            return len(stale)
+
+    def clear(self):
+        """Clear all cached snapshots."""
+        with self._lock:
+            self._cache.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+# Global cache instance
+_cache = PermissionSnapshotCache()
+
+
+def get_permission_snapshot(token: Any) -> PermissionSnapshot:
+    """Get the (memoized) compiled permissions for an APIToken."""
+    return _cache.get(token)
+
+
+def invalidate_token_snapshot(token_id: int):
+    """Forget compiled permissions for a token (update/revoke/regenerate)."""
+    _cache.invalidate(token_id=token_id)
+
+
+def invalidate_realm_snapshots(realm_id: int):
+    """Forget compiled permissions for every token of a realm."""
+    _cache.invalidate(realm_id=realm_id)
+
+
+def clear_cache():
+    """Clear the permission snapshot cache."""
+    _cache.clear()
+    compile_ip_ranges.cache_clear()
+    logger.info("Permission snapshot cache cleared")
+
+
+def get_cache_stats() -> Dict[str, Any]:
+    """Get cache statistics."""
+    return {
+        "size": len(_cache._cache),
+        "max_size": _cache.max_size,
+        "hits": _cache.hits,
+        "misses": _cache.misses,
+    }
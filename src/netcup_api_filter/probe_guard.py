@@ -0,0 +1,374 @@
+"""Negative cache and per-IP probe shedding for token authentication.
+
+Credential-stuffing traffic presents well-formed tokens with random aliases
+(``alias_not_found``) or random prefixes for a known alias
+(``token_prefix_not_found``). Each attempt used to cost an indexed lookup plus
+a synchronous audit insert. This module bounds that cost:
+
+- Unknown aliases and (alias, prefix) pairs are remembered in a bounded
+  negative cache.
+- Every such failure is counted in a per-source-IP sliding window. Once an IP
+  reaches AUTH_PROBE_THRESHOLD failures inside AUTH_PROBE_WINDOW_SECONDS it
+  is considered probing:
+  - repeat probes that hit the negative cache are rejected before the
+    database is queried
+  - its failures are no longer logged one row per attempt; they are summed
+    per (IP, error code) and written as one aggregated ActivityLog row per
+    window (``request_data.aggregated`` holds the attempt count); the audit
+    writer's flush loop writes expired summaries even after probing stops
+- IPs below the threshold are handled exactly as before (database lookup,
+  one audit row per attempt), so a legitimate client never sees a cached
+  rejection.
+
+Correctness: inserting an Account or APIToken drops the matching negative
+entries in this process (SQLAlchemy ``after_insert`` events cover every
+creation path: registration, admin, seeding, token create/regenerate). Other
+workers rely on the short negative TTL, and only consult the cache for IPs
+that are already probing.
+
+Configuration:
+- AUTH_PROBE_THRESHOLD: Failures per window before an IP is shed (default 20, 0 disables)
+- AUTH_PROBE_WINDOW_SECONDS: Sliding window length (default 60)
+- AUTH_NEGATIVE_CACHE_SECONDS: TTL of a negative entry (default 60)
+- AUTH_NEGATIVE_CACHE_SIZE: Maximum negative entries (default 4096)
+- AUTH_PROBE_TRACKED_IPS: Maximum tracked source IPs (default 10000)
+"""
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from sqlalchemy import event
+
+from .audit_writer import register_flush_hook, start_flusher, write_activity
+from .lifecycle import register_shutdown_hook
+from .models import Account, ActivityLog, APIToken
+
+logger = logging.getLogger(__name__)
+
+# Guard configuration
+PROBE_THRESHOLD = int(os.environ.get("AUTH_PROBE_THRESHOLD", "20"))
+PROBE_WINDOW_SECONDS = float(os.environ.get("AUTH_PROBE_WINDOW_SECONDS", "60"))
+NEGATIVE_CACHE_SECONDS = float(os.environ.get("AUTH_NEGATIVE_CACHE_SECONDS", "60"))
+NEGATIVE_CACHE_MAX_SIZE = int(os.environ.get("AUTH_NEGATIVE_CACHE_SIZE", "4096"))
+MAX_TRACKED_IPS = int(os.environ.get("AUTH_PROBE_TRACKED_IPS", "10000"))
+
+# Error codes that are negative-cached and counted as probes
+PROBE_ERROR_CODES = ('alias_not_found', 'token_prefix_not_found')
+
+_MAX_SAMPLE_ALIASES = 50
+
+
+class ProbeGuard:
+    """Thread-safe negative cache, per-IP sliding window and probe aggregator."""
+
+    def __init__(
+        self,
+        threshold: int = PROBE_THRESHOLD,
+        window_seconds: float = PROBE_WINDOW_SECONDS,
+        negative_ttl: float = NEGATIVE_CACHE_SECONDS,
+        negative_max_size: int = NEGATIVE_CACHE_MAX_SIZE,
+        max_tracked_ips: int = MAX_TRACKED_IPS,
+    ):
+        self.threshold = threshold
+        self.window = window_seconds
+        self.negative_ttl = negative_ttl
+        self.negative_max_size = negative_max_size
+        self.max_tracked_ips = max_tracked_ips
+        # ('alias', alias) | ('prefix', alias, prefix) -> (error_code, stored_at)
+        self._negative: OrderedDict[tuple[str, ...], tuple[str, float]] = OrderedDict()
+        # source ip -> failure timestamps inside the window
+        self._windows: OrderedDict[str, deque[float]] = OrderedDict()
+        # (source ip, error_code) -> aggregate being summed
+        self._aggregates: dict[tuple[str, str], dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self.shed = 0
+        self.aggregated = 0
+        self.summaries_written = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold > 0
+
+    # -------------------------------------------------------------------------
+    # Negative cache
+    # -------------------------------------------------------------------------
+
+    @staticmethod
+    def _keys(alias: str, prefix: str) -> tuple[tuple[str, ...], tuple[str, ...]]:
+        return ('alias', alias), ('prefix', alias, prefix)
+
+    def _negative_lookup(self, alias: str, prefix: str, now: float) -> Optional[str]:
+        for key in self._keys(alias, prefix):
+            entry = self._negative.get(key)
+            if entry is None:
+                continue
+            error_code, stored_at = entry
+            if now - stored_at > self.negative_ttl:
+                del self._negative[key]
+                continue
+            return error_code
+        return None
+
+    def invalidate_alias(self, alias: str | None):
+        """Forget negative entries for ``alias`` (account created)."""
+        if not alias:
+            return
+        with self._lock:
+            for key in [k for k in self._negative if k[1] == alias]:
+                del self._negative[key]
+
+    def invalidate_prefix(self, prefix: str | None):
+        """Forget negative (alias, prefix) entries for ``prefix`` (token created)."""
+        if not prefix:
+            return
+        with self._lock:
+            for key in [k for k in self._negative if k[0] == 'prefix' and k[2] == prefix]:
+                del self._negative[key]
+
+    # -------------------------------------------------------------------------
+    # Per-IP sliding window
+    # -------------------------------------------------------------------------
+
+    def _window_count(self, client_ip: str, now: float) -> int:
+        hits = self._windows.get(client_ip)
+        if hits is None:
+            return 0
+        while hits and now - hits[0] > self.window:
+            hits.popleft()
+        if not hits:
+            del self._windows[client_ip]
+            return 0
+        return len(hits)
+
+    def failures(self, client_ip: str | None) -> int:
+        """Probe failures from ``client_ip`` in the current window."""
+        if not client_ip:
+            return 0
+        with self._lock:
+            return self._window_count(client_ip, time.monotonic())
+
+    def is_probing(self, client_ip: str | None) -> bool:
+        """True if ``client_ip`` reached the failure threshold in the current window."""
+        return self.enabled and self.failures(client_ip) >= self.threshold
+
+    def check(self, client_ip: str | None, alias: str, prefix: str) -> Optional[str]:
+        """Return the cached error code if this probe can be rejected without a lookup.
+
+        Only IPs that are already probing are answered from the cache.
+        """
+        if not self.enabled or not client_ip:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            if self._window_count(client_ip, now) < self.threshold:
+                return None
+            error_code = self._negative_lookup(alias, prefix, now)
+            if error_code is None:
+                return None
+            hits = self._windows[client_ip]
+            hits.append(now)
+            if len(hits) > self.threshold + 1:
+                hits.popleft()
+            self.shed += 1
+            return error_code
+
+    def record_failure(self, client_ip: str | None, alias: str, prefix: str, error_code: str):
+        """Remember a database-confirmed probe failure."""
+        if not self.enabled:
+            return
+        now = time.monotonic()
+        key = self._keys(alias, prefix)[0 if error_code == 'alias_not_found' else 1]
+        with self._lock:
+            self._negative[key] = (error_code, now)
+            self._negative.move_to_end(key)
+            while len(self._negative) > self.negative_max_size:
+                self._negative.popitem(last=False)
+
+            if client_ip:
+                hits = self._windows.get(client_ip)
+                if hits is None:
+                    hits = self._windows[client_ip] = deque()
+                else:
+                    self._windows.move_to_end(client_ip)
+                hits.append(now)
+                # Keep memory bounded: only the last `threshold` + 1 hits matter
+                while len(hits) > self.threshold + 1:
+                    hits.popleft()
+                while len(self._windows) > self.max_tracked_ips:
+                    self._windows.popitem(last=False)
+
+    # -------------------------------------------------------------------------
+    # Aggregated audit rows
+    # -------------------------------------------------------------------------
+
+    def aggregate(
+        self,
+        client_ip: str,
+        error_code: str,
+        alias: str | None = None,
+        account_id: int | None = None,
+        user_agent: str | None = None,
+    ):
+        """Count a probe from a shed IP instead of logging it individually."""
+        now = datetime.utcnow()
+        with self._lock:
+            agg = self._aggregates.get((client_ip, error_code))
+            if agg is None:
+                agg = self._aggregates[(client_ip, error_code)] = {
+                    'count': 0,
+                    'first_seen': now,
+                    'last_seen': now,
+                    'aliases': set(),
+                    'account_ids': set(),
+                    'user_agent': user_agent,
+                }
+            agg['count'] += 1
+            agg['last_seen'] = now
+            if alias and len(agg['aliases']) < _MAX_SAMPLE_ALIASES:
+                agg['aliases'].add(alias)
+            if account_id is not None:
+                agg['account_ids'].add(account_id)
+            self.aggregated += 1
+        self.flush(expired_only=True)
+
+    def flush(self, expired_only: bool = False) -> int:
+        """Write aggregated probe rows. Returns the number of rows written.
+
+        With ``expired_only`` only aggregates whose window has elapsed are
+        written; otherwise everything pending is written (shutdown, tests).
+        """
+        now = datetime.utcnow()
+        with self._lock:
+            due = [
+                key for key, agg in self._aggregates.items()
+                if not expired_only or (now - agg['first_seen']).total_seconds() >= self.window
+            ]
+            batch = [(key, self._aggregates.pop(key)) for key in due]
+
+        written = 0
+        for (client_ip, error_code), agg in batch:
+            try:
+                write_activity(_summary_entry(client_ip, error_code, agg), defer=True)
+                written += 1
+            except Exception as e:
+                logger.error(f"Failed to write probe summary for {client_ip}: {e}")
+        self.summaries_written += written
+        return written
+
+    def pending_aggregates(self) -> int:
+        with self._lock:
+            return len(self._aggregates)
+
+    def clear(self):
+        with self._lock:
+            self._negative.clear()
+            self._windows.clear()
+            self._aggregates.clear()
+
+
+def _summary_entry(client_ip: str, error_code: str, agg: dict[str, Any]) -> ActivityLog:
+    """Build the aggregated ActivityLog row for one (IP, error code) window."""
+    from .token_auth import ERROR_SEVERITY
+
+    account_ids = agg['account_ids']
+    entry = ActivityLog(
+        account_id=next(iter(account_ids)) if len(account_ids) == 1 else None,
+        action='api_auth',
+        source_ip=client_ip,
+        user_agent=agg['user_agent'],
+        status='denied',
+        error_code=error_code,
+        status_reason=f"{agg['count']} probes aggregated",
+        severity=ERROR_SEVERITY.get(error_code, 'medium'),
+        is_attack=1,
+        created_at=agg['last_seen'],
+    )
+    entry.set_request_data({
+        'aggregated': agg['count'],
+        'first_seen': agg['first_seen'].isoformat(),
+        'last_seen': agg['last_seen'].isoformat(),
+        'distinct_aliases': len(agg['aliases']),
+    })
+    return entry
+
+
+# Global guard instance
+_guard = ProbeGuard()
+register_shutdown_hook("auth_probe_summaries", _guard.flush)
+register_flush_hook(lambda: _guard.flush(expired_only=True))
+
+
+@event.listens_for(Account, 'after_insert')
+def _account_inserted(mapper, connection, target):
+    _guard.invalidate_alias(target.user_alias)
+
+
+@event.listens_for(APIToken, 'after_insert')
+def _token_inserted(mapper, connection, target):
+    _guard.invalidate_prefix(target.token_prefix)
+
+
+def check_probe(client_ip: str | None, alias: str, prefix: str) -> Optional[str]:
+    """Cached error code for a repeat probe from a shed IP, else None."""
+    return _guard.check(client_ip, alias, prefix)
+
+
+def record_probe_failure(client_ip: str | None, alias: str, prefix: str, error_code: str):
+    """Negative-cache a failed lookup and count it against the source IP."""
+    _guard.record_failure(client_ip, alias, prefix, error_code)
+
+
+def aggregate_probe(client_ip: str | None, error_code: str | None, alias: str | None = None,
+                    account_id: int | None = None, user_agent: str | None = None) -> bool:
+    """Fold a probe failure into the per-IP summary if the IP is being shed.
+
+    The failures up to and including the one that reaches the threshold are
+    logged individually; only those beyond it are aggregated.
+
+    Returns True if the failure was aggregated (caller must not log it again).
+    """
+    if (
+        not _guard.enabled
+        or not client_ip
+        or error_code is None
+        or error_code not in PROBE_ERROR_CODES
+        or _guard.failures(client_ip) <= _guard.threshold
+    ):
+        return False
+    _guard.aggregate(client_ip, error_code, alias, account_id, user_agent)
+    start_flusher()
+    return True
+
+
+def flush_probe_summaries() -> int:
+    """Write all pending aggregated probe rows now."""
+    return _guard.flush()
+
+
+def clear_cache():
+    """Clear negative entries, IP windows and pending aggregates."""
+    _guard.clear()
+
+
+def get_guard_stats() -> Dict[str, Any]:
+    """Get probe guard statistics."""
+    with _guard._lock:
+        negative = len(_guard._negative)
+        tracked = len(_guard._windows)
+    return {
+        "enabled": _guard.enabled,
+        "threshold": _guard.threshold,
+        "window_seconds": _guard.window,
+        "negative_entries": negative,
+        "tracked_ips": tracked,
+        "shed": _guard.shed,
+        "aggregated": _guard.aggregated,
+        "pending_summaries": _guard.pending_aggregates(),
+        "summaries_written": _guard.summaries_written,
+    }
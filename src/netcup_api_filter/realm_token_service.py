@@ -28,6 +28,8 @@ from .models import (
     generate_token,
     hash_token,
 )
+from .permission_snapshot import invalidate_realm_snapshots, invalidate_token_snapshot
+from .token_cache import invalidate_token
 
 logger = logging.getLogger(__name__)
 
@@ -287,6 +289,7 @@ def approve_realm(realm_id: int, approved_by: Account) -> RealmResult:
     realm.approved_at = datetime.utcnow()
     
     db.session.commit()
+    invalidate_realm_snapshots(realm.id)
     
     logger.info(f"Realm approved: {realm.realm_type}:{realm.realm_value} by {approved_by.username}")
     
@@ -310,6 +313,7 @@ def reject_realm(realm_id: int, rejected_by: Account, reason: str) -> RealmResul
     realm.rejection_reason = reason
     
     db.session.commit()
+    invalidate_realm_snapshots(realm.id)
     
     logger.info(f"Realm rejected: {realm.realm_type}:{realm.realm_value} by {rejected_by.username}")
     
@@ -349,6 +353,7 @@ def update_realm_permissions(
     realm.set_allowed_operations(operations)
     
     db.session.commit()
+    invalidate_realm_snapshots(realm.id)
     
     logger.info(f"Realm permissions updated: {realm.realm_type}:{realm.realm_value} by {updated_by.username}")
     
@@ -370,9 +375,11 @@ def delete_realm(realm_id: int, deleted_by: Account) -> RealmResult:
         return RealmResult(success=False, error="Permission denied")
     
     realm_info = f"{realm.realm_type}:{realm.realm_value}"
+    realm_pk = realm.id
     
     db.session.delete(realm)
     db.session.commit()
+    invalidate_realm_snapshots(realm_pk)
     
     logger.info(f"Realm deleted: {realm_info} by {deleted_by.username}")
     
@@ -517,6 +524,8 @@ def revoke_token(
     api_token.revoked_reason = reason
     
     db.session.commit()
+    invalidate_token(api_token.id)
+    invalidate_token_snapshot(api_token.id)
     
     logger.info(f"Token revoked: {api_token.token_name} by {revoked_by.username}")
     
@@ -574,6 +583,8 @@ def regenerate_token(
         return result
     
     db.session.commit()
+    invalidate_token(old_token.id)
+    invalidate_token_snapshot(old_token.id)
     
     logger.info(f"Token regenerated: {old_token.token_name} -> {new_name} by {regenerated_by.username}")
     
@@ -635,6 +646,8 @@ def update_token(
         api_token.expires_at = expires_at
     
     db.session.commit()
+    invalidate_token(api_token.id)
+    invalidate_token_snapshot(api_token.id)
     
     logger.info(f"Token updated: {api_token.token_name} by {updated_by.username}")
     
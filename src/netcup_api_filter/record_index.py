@@ -0,0 +1,243 @@
+"""Persistent last-known-destination index for DDNS updates.
+
+Most DDNS check-ins report an address that has not changed. Answering them
+used to require the full zone from the backend just to compare one record.
+This module keeps a database table (models.DnsRecordIndex) of
+
+    (backend namespace, zone, hostname, type) -> (destination, record id, observed_at)
+
+for A and AAAA records:
+
+- Every upstream zone read through the filter replaces the zone's rows
+  (new records inserted, changed ones updated, vanished ones removed) and
+  marks them observed now.
+- Every successful write updates the rows it touched; when the backend
+  returns the resulting record set, that set is applied like a read.
+- ``is_current`` tells the DDNS handler whether the submitted address is the
+  indexed one and was observed within DDNS_INDEX_VERIFY_SECONDS. Only then
+  is "nochg" answered without contacting the backend. A miss, a different
+  address or an old observation falls back to a full read.
+
+The table is shared by all workers and survives restarts. Changes made
+outside the filter are picked up by the next full read, at the latest once
+the verify interval has passed.
+
+Index maintenance is best effort: failures are logged and never fail the
+DNS operation that triggered them.
+
+Configuration:
+- DDNS_INDEX_VERIFY_SECONDS: Maximum age of an observation used for "nochg"
+  (default 300, 0 disables the fast path and index maintenance)
+"""
+from __future__ import annotations
+
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional
+
+from flask import Flask
+from sqlalchemy import and_, delete, insert, select, update
+
+from .models import DnsRecordIndex, db
+
+logger = logging.getLogger(__name__)
+
+# Index configuration
+VERIFY_SECONDS = float(os.environ.get("DDNS_INDEX_VERIFY_SECONDS", "300"))
+
+# Record types the DDNS handlers manage
+INDEXED_TYPES = ('A', 'AAAA')
+
+
+class IndexEntry(NamedTuple):
+    destination: str
+    record_id: Optional[str]
+    observed_at: datetime
+
+
+def _zone(zone: str) -> str:
+    return zone.rstrip('.').lower()
+
+
+def _host(hostname: Any) -> str:
+    return str(hostname or '@').lower()
+
+
+def _indexed(records: Iterable[Dict[str, Any]]) -> Dict[tuple, tuple]:
+    """(hostname, type) -> (destination, record id); first record wins, like the handlers."""
+    rows: Dict[tuple, tuple] = {}
+    for rec in records:
+        rtype = str(rec.get('type', '')).upper()
+        if rtype not in INDEXED_TYPES or rec.get('deleterecord'):
+            continue
+        key = (_host(rec.get('hostname')), rtype)
+        if key not in rows:
+            record_id = rec.get('id')
+            rows[key] = (str(rec.get('destination', '')), str(record_id) if record_id else None)
+    return rows
+
+
+class RecordIndex:
+    """Maintains and queries the dns_record_index table."""
+
+    def __init__(self, verify_seconds: float = VERIFY_SECONDS):
+        self.verify_seconds = verify_seconds
+        self._app: Optional[Flask] = None
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._app is not None and self.verify_seconds > 0
+
+    def bind(self, app: Flask):
+        """Use ``app``'s database engine (also from threads without a request)."""
+        self._app = app
+
+    def _app_context(self):
+        if self._app is None:
+            raise RuntimeError("record index is not bound; call init_record_index(app) first")
+        return self._app.app_context()
+
+    def lookup(self, namespace: str, zone: str, hostname: str, record_type: str) -> Optional[IndexEntry]:
+        """Indexed entry for one record, or None."""
+        if not self.enabled:
+            return None
+        t = DnsRecordIndex.__table__
+        with self._app_context():
+            with db.engine.connect() as conn:
+                row = conn.execute(
+                    select(t.c.destination, t.c.record_id, t.c.observed_at).where(and_(
+                        t.c.namespace == namespace,
+                        t.c.zone == _zone(zone),
+                        t.c.hostname == _host(hostname),
+                        t.c.record_type == record_type.upper(),
+                    ))
+                ).first()
+        return IndexEntry(*row) if row else None
+
+    def is_current(self, namespace: str, zone: str, hostname: str, record_type: str,
+                   destination: str) -> bool:
+        """True if ``destination`` is indexed and was observed within the verify interval."""
+        try:
+            entry = self.lookup(namespace, zone, hostname, record_type)
+        except Exception as e:
+            logger.warning(f"Record index lookup failed: {e}")
+            return False
+        current = (
+            entry is not None
+            and entry.destination == destination
+            and datetime.utcnow() - entry.observed_at < timedelta(seconds=self.verify_seconds)
+        )
+        if current:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return current
+
+    def observe_zone(self, namespace: str, zone: str, records: List[Dict[str, Any]]):
+        """Apply a complete record set read from (or returned by) the backend."""
+        if not self.enabled:
+            return
+        try:
+            self._apply(namespace, _zone(zone), _indexed(records), authoritative=True)
+        except Exception as e:
+            logger.warning(f"Record index update for {zone} failed: {e}")
+
+    def observe_changes(self, namespace: str, zone: str, records: List[Dict[str, Any]]):
+        """Apply records written successfully (a partial record set)."""
+        if not self.enabled:
+            return
+        changed = _indexed(r for r in records if r.get('id'))
+        # Creates (no id yet) drop their row; the next read restores it. Rows
+        # of deleted or renamed records are found by record id.
+        forget = {
+            (_host(r.get('hostname')), str(r.get('type', '')).upper())
+            for r in records if not r.get('id')
+        }
+        forget_ids = {str(r['id']) for r in records if r.get('id')}
+        try:
+            self._apply(namespace, _zone(zone), changed, authoritative=False,
+                        forget=forget, forget_ids=forget_ids)
+        except Exception as e:
+            logger.warning(f"Record index update for {zone} failed: {e}")
+
+    def forget_zone(self, namespace: str, zone: str):
+        """Drop every indexed record of a zone."""
+        if not self.enabled:
+            return
+        t = DnsRecordIndex.__table__
+        with self._app_context():
+            with db.engine.begin() as conn:
+                conn.execute(delete(t).where(and_(t.c.namespace == namespace, t.c.zone == _zone(zone))))
+
+    def _apply(self, namespace: str, zone: str, rows: Dict[tuple, tuple],
+               authoritative: bool, forget: Optional[set] = None, forget_ids: Optional[set] = None):
+        t = DnsRecordIndex.__table__
+        now = datetime.utcnow()
+        in_zone = and_(t.c.namespace == namespace, t.c.zone == zone)
+        with self._app_context():
+            with db.engine.begin() as conn:
+                existing = {
+                    (r.hostname, r.record_type): r
+                    for r in conn.execute(
+                        select(t.c.id, t.c.hostname, t.c.record_type, t.c.destination, t.c.record_id)
+                        .where(in_zone)
+                    )
+                }
+
+                unchanged, stale = [], []
+                for key, row in existing.items():
+                    if key in rows:
+                        destination, record_id = rows[key]
+                        if row.destination == destination and row.record_id == record_id:
+                            unchanged.append(row.id)
+                        else:
+                            conn.execute(update(t).where(t.c.id == row.id).values(
+                                destination=destination, record_id=record_id, observed_at=now
+                            ))
+                    elif (authoritative
+                          or (forget and key in forget)
+                          or (forget_ids and row.record_id in forget_ids)):
+                        stale.append(row.id)
+
+                if unchanged:
+                    conn.execute(update(t).where(t.c.id.in_(unchanged)).values(observed_at=now))
+                if stale:
+                    conn.execute(delete(t).where(t.c.id.in_(stale)))
+                new = [
+                    {'namespace': namespace, 'zone': zone, 'hostname': host, 'record_type': rtype,
+                     'destination': destination, 'record_id': record_id, 'observed_at': now}
+                    for (host, rtype), (destination, record_id) in rows.items()
+                    if (host, rtype) not in existing
+                ]
+                if new:
+                    conn.execute(insert(t), new)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "verify_seconds": self.verify_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+# Global index instance
+_index = RecordIndex()
+
+
+def init_record_index(app):
+    """Bind the record index to the app's database."""
+    _index.bind(app)
+
+
+def get_record_index() -> RecordIndex:
+    """Return the process-wide record index."""
+    return _index
+
+
+def get_record_index_stats() -> Dict[str, Any]:
+    """Get fast-path hit/miss statistics."""
+    return _index.stats()
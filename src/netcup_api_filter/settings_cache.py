@@ -0,0 +1,179 @@
+"""In-process cache of the settings table for get_setting().
+
+``get_setting('netcup_config')`` ran a Settings query and a JSON decode on
+every DNS request, and the SMTP (notification_service._get_smtp_config),
+GeoIP (geoip_service._get_config) and rate-limit lookups did the same. This
+module loads all settings rows once per worker and serves get_setting() from
+memory:
+
+- Every ORM write to Settings (set_setting, Settings.set/delete, seeding)
+  bumps the single settings_version row (models.SettingsVersion) in the same
+  transaction.
+- A worker compares its loaded version against that row at most every
+  SETTINGS_CACHE_CHECK_SECONDS and reloads all rows when it changed. Changes
+  made in another worker (the admin UI) apply within that delay; changes
+  committed by this worker apply immediately.
+- Rows are reloaded regardless after SETTINGS_CACHE_MAX_AGE_SECONDS, which
+  bounds the delay for writes that bypass the ORM (raw SQL, sqlite3 shell).
+- Callers receive copies of dict and list values.
+
+``Settings.get`` (the 2FA failure counters) still reads the database
+directly: those counters are read-modify-write across workers.
+
+Configuration:
+- SETTINGS_CACHE_CHECK_SECONDS: Interval between version checks (default 2, 0 disables the cache)
+- SETTINGS_CACHE_MAX_AGE_SECONDS: Unconditional reload interval (default 300)
+"""
+from __future__ import annotations
+
+import copy
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from sqlalchemy import event, insert, select, update
+from sqlalchemy.orm import Session, object_session
+
+from .models import Settings, SettingsVersion, db
+
+logger = logging.getLogger(__name__)
+
+# Cache configuration
+CHECK_SECONDS = float(os.environ.get("SETTINGS_CACHE_CHECK_SECONDS", "2"))
+MAX_AGE_SECONDS = float(os.environ.get("SETTINGS_CACHE_MAX_AGE_SECONDS", "300"))
+
+
+def _decode(raw: Optional[str]) -> Any:
+    # Same rules as Settings.get_value
+    try:
+        return json.loads(raw) if raw else None
+    except (json.JSONDecodeError, TypeError):
+        return None
+
+
+class SettingsCache:
+    """Thread-safe snapshot of all settings, revalidated against settings_version."""
+
+    def __init__(self, check_seconds: float = CHECK_SECONDS, max_age_seconds: float = MAX_AGE_SECONDS):
+        self.check_seconds = check_seconds
+        self.max_age_seconds = max_age_seconds
+        self._values: Dict[str, Any] = {}
+        self._version: Optional[int] = None
+        # Engine the snapshot was read from (one per app / database)
+        self._engine = None
+        self._loaded_at = 0.0
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.checks = 0
+        self.reloads = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.check_seconds > 0
+
+    def get(self, key: str) -> Any:
+        """Decoded value of setting ``key``, or None (needs an app context)."""
+        if not self.enabled:
+            return Settings.get(key)
+        value = self._snapshot(db.engine).get(key)
+        return copy.deepcopy(value) if isinstance(value, (dict, list)) else value
+
+    def _fresh(self, engine, now: float) -> bool:
+        return (
+            self._engine is engine
+            and self._version is not None
+            and now - self._checked_at < self.check_seconds
+            and now - self._loaded_at < self.max_age_seconds
+        )
+
+    def _snapshot(self, engine) -> Dict[str, Any]:
+        now = time.monotonic()
+        if self._fresh(engine, now):
+            self.hits += 1
+            return self._values
+
+        with self._lock:
+            now = time.monotonic()
+            if self._fresh(engine, now):
+                self.hits += 1
+                return self._values
+
+            v, t = SettingsVersion.__table__, Settings.__table__
+            with engine.connect() as conn:
+                version = conn.execute(select(v.c.version).where(v.c.id == 1)).scalar() or 0
+                self.checks += 1
+                if (self._engine is engine and version == self._version
+                        and now - self._loaded_at < self.max_age_seconds):
+                    self._checked_at = now
+                    return self._values
+                # Read after the version: a concurrent write at worst causes one extra reload
+                values = {key: _decode(raw) for key, raw in conn.execute(select(t.c.key, t.c.value))}
+
+            self._values = values
+            self._version = version
+            self._engine = engine
+            self._loaded_at = self._checked_at = now
+            self.reloads += 1
+            return values
+
+    def invalidate(self):
+        """Reload on the next read (after a write by this worker)."""
+        self._version = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "version": self._version,
+            "keys": len(self._values),
+            "hits": self.hits,
+            "checks": self.checks,
+            "reloads": self.reloads,
+        }
+
+
+# Global cache instance
+_cache = SettingsCache()
+
+
+def get_settings_cache() -> SettingsCache:
+    """Return the process-wide settings cache."""
+    return _cache
+
+
+def get_settings_cache_stats() -> Dict[str, Any]:
+    """Get settings cache statistics."""
+    return _cache.stats()
+
+
+# ---------------------------------------------------------------------------
+# Version maintenance
+# ---------------------------------------------------------------------------
+
+def _bump_version(mapper, connection, target):
+    """Increment settings_version within the transaction writing ``target``."""
+    v = SettingsVersion.__table__
+    result = connection.execute(update(v).where(v.c.id == 1).values(version=v.c.version + 1))
+    if result.rowcount == 0:
+        connection.execute(insert(v).values(id=1, version=1))
+    session = object_session(target)
+    if session is not None:
+        session.info['settings_changed'] = True
+
+
+def _after_commit(session):
+    if session.info.pop('settings_changed', False):
+        _cache.invalidate()
+
+
+def _after_rollback(session):
+    session.info.pop('settings_changed', None)
+
+
+for _name in ('after_insert', 'after_update', 'after_delete'):
+    event.listen(Settings, _name, _bump_version)
+event.listen(Session, 'after_commit', _after_commit)
+event.listen(Session, 'after_rollback', _after_rollback)
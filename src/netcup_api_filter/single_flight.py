@@ -0,0 +1,117 @@
+"""Single-flight deduplication of concurrent upstream reads.
+
+After an ISP reconnect wave many DDNS clients for hosts in one zone arrive at
+the same moment. Without coordination every worker thread that misses the zone
+cache fetches the same zone from the backend. ``coalesce(key, fn)`` runs ``fn``
+once per key at a time: the first caller (leader) issues the upstream request,
+callers arriving while it is in flight wait for it and receive the same result,
+or the same exception.
+
+Keys are (backend namespace, zone) tuples (see zone_cache.zone_key), so only
+identical reads against the same backend account are merged. Results are
+shared, not copied; callers that hand records out must copy them.
+
+Used by the zone record cache (NetcupClient.info_dns_records) and by
+DNSBackend.list_records implementations that do not read through it.
+
+Deduplication is per worker process; workers do not coordinate.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from typing import Any, Callable, Dict, Hashable, TypeVar, cast
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error', 'waiters')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into one execution."""
+
+    def __init__(self):
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        self.issued = 0
+        self.coalesced = 0
+
+    def do(self, key: Hashable, fn: Callable[[], T]) -> T:
+        """Run ``fn`` for ``key`` unless an identical call is already in flight."""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.coalesced += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self.issued += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return cast(T, call.result)
+
+        try:
+            result = call.result = fn()
+            return result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+            if call.waiters:
+                logger.debug(f"Single-flight {key!r}: shared with {call.waiters} waiters")
+
+    def reset(self):
+        """Forget in-flight calls and statistics (forked child, tests)."""
+        with self._lock:
+            self._calls = {}
+            self.issued = 0
+            self.coalesced = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "in_flight": len(self._calls),
+                "issued": self.issued,
+                "coalesced": self.coalesced,
+            }
+
+
+# Global instance
+_flight = SingleFlight()
+if hasattr(os, "register_at_fork"):
+    # A call in flight in the parent never completes in the child
+    os.register_at_fork(after_in_child=_flight.reset)
+
+
+def coalesce(key: Hashable, fn: Callable[[], T]) -> T:
+    """Run ``fn`` once for all concurrent callers with the same ``key``."""
+    return _flight.do(key, fn)
+
+
+def get_single_flight_stats() -> Dict[str, Any]:
+    """Get issued vs. coalesced upstream call counts."""
+    return _flight.stats()
+
+
+def reset_single_flight():
+    """Reset in-flight state and statistics."""
+    _flight.reset()
@@ -25,11 +25,9 @@ from __future__ import annotations
 
 import logging
 import os
-import threading
 from dataclasses import dataclass
 
-import httpx
-
+from .http_transport import get_http_client
 from .utils import parse_bool, sha256_hex
 
 logger = logging.getLogger(__name__)
@@ -40,10 +38,6 @@ logger = logging.getLogger(__name__)
 # unless DEPLOYMENT_TARGET is local.
 LINK_CALLBACK_PLACEHOLDER = "local-test-telegram-callback-secret-change-me"
 
-# A single pooled HTTP client, created lazily, so each Telegram send reuses the
-# TCP/TLS connection instead of paying a fresh handshake per message.
-_client_lock = threading.Lock()
-_http_client: httpx.Client | None = None
 
 
 def _truthy(value: str | None) -> bool:
@@ -138,16 +132,6 @@ __all__ = [
 ]
 
 
-def _get_http_client(timeout_seconds: float) -> httpx.Client:
-    """Return the shared httpx client, creating it on first use (thread-safe)."""
-    global _http_client
-    if _http_client is None:
-        with _client_lock:
-            if _http_client is None:
-                _http_client = httpx.Client(timeout=timeout_seconds)
-    return _http_client
-
-
 def send_telegram_message(*, chat_id: str, text: str) -> bool:
     """Send a Telegram message.
 
@@ -169,7 +153,8 @@ def send_telegram_message(*, chat_id: str, text: str) -> bool:
     url = f"{cfg.api_base_url}/bot{cfg.bot_token}/sendMessage"
 
     try:
-        client = _get_http_client(cfg.timeout_seconds)
+        # Shared keep-alive pool: each send reuses the TCP/TLS connection
+        client = get_http_client(url)
         resp = client.post(
             url,
             json={
@@ -4,7 +4,7 @@ Token authentication service for the Account → Realms → Tokens model.
 Handles:
 - Token parsing (extract user_alias and random part)
 - Token lookup (find by user_alias + prefix)
-- Token verification (bcrypt hash check)
+- Token verification (keyed hash check, legacy bcrypt upgraded on use)
 - Permission checking (account → realm → token chain)
 - IP whitelist enforcement
 - Usage tracking and activity logging
@@ -37,22 +37,40 @@ Error Codes (for security analytics):
 """
 from __future__ import annotations
 
-import ipaddress
 import logging
 from datetime import datetime
 from functools import wraps
-from typing import Any, NamedTuple, Optional
+from typing import Any, Mapping, NamedTuple, Optional, Sequence, cast
 
 from flask import g, request
+from sqlalchemy import and_, select
+from sqlalchemy.orm import QueryableAttribute, joinedload
+from sqlalchemy.orm.attributes import set_committed_value
 
 from .models import (
     Account,
     AccountRealm,
     ActivityLog,
     APIToken,
+    BackendService,
+    DomainRootGrant,
+    ManagedDomainRoot,
     db,
+    hash_token,
     parse_token,
+    token_hash_needs_rehash,
 )
+from .permission_snapshot import (
+    PermissionSnapshot,
+    compile_ip_ranges,
+    get_permission_snapshot,
+    ip_in_allowlist,
+)
+from .audit_writer import write_activity
+from .probe_guard import aggregate_probe, check_probe, record_probe_failure
+from .token_cache import verify_token_cached
+from .usage_buffer import record_token_rehash, record_token_usage
+from .zone_snapshot import ZoneSnapshot
 
 logger = logging.getLogger(__name__)
 
@@ -104,6 +122,8 @@ class AuthResult(NamedTuple):
     # Additional context for logging (NOT returned to API caller)
     user_alias_attempted: Optional[str] = None  # Even on failure, for attribution
     token_prefix_attempted: Optional[str] = None  # For identifying which token was attacked
+    # Account's grant on the realm's domain root (platform-managed realms only)
+    grant: Optional[DomainRootGrant] = None
 
 
 class PermissionResult(NamedTuple):
@@ -133,18 +153,22 @@ def extract_bearer_token(authorization_header: str | None) -> str | None:
     return token.strip()
 
 
-def authenticate_token(token: str) -> AuthResult:
+def authenticate_token(token: str, client_ip: str | None = None) -> AuthResult:
     """
     Authenticate a Bearer token with granular error tracking.
     
     Steps:
-    1. Parse token to extract user_alias and random part
-    2. Find account by user_alias (NOT username)
-    3. Find token by prefix within account's tokens
-    4. Verify full token against bcrypt hash
-    5. Check token is active and not expired
-    6. Check account is active
-    7. Check realm is approved
+    1. Parse token to extract user_alias and random part; repeat probes of
+       unknown aliases/prefixes from a probing client_ip are rejected here
+       (see probe_guard)
+    2. Find account by user_alias (NOT username) and token by prefix within
+       the account's realms (single statement, see _load_auth_rows)
+    3. Verify full token against its stored hash (skipped on a verified-token
+       cache hit, see token_cache); legacy bcrypt hashes are upgraded to the
+       current scheme after a successful authentication
+    4. Check token is active and not expired
+    5. Check account is active
+    6. Check realm is approved
     
     Returns:
         AuthResult with token, realm, account if successful.
@@ -167,10 +191,26 @@ def authenticate_token(token: str) -> AuthResult:
     
     logger.debug(f"Token lookup: alias={user_alias[:4]}..., prefix={token_prefix}")
     
-    # Find account by user_alias (NOT username for security)
-    account = Account.query.filter_by(user_alias=user_alias).first()
+    # Shed repeat probes from a client already over the probe threshold
+    cached_error = check_probe(client_ip, user_alias, token_prefix)
+    if cached_error:
+        logger.debug(f"Probe shed from {client_ip}: {cached_error}")
+        return AuthResult(
+            success=False,
+            error="Invalid token",
+            error_code=cached_error,
+            severity=ERROR_SEVERITY[cached_error],
+            should_notify_user=False,
+            user_alias_attempted=user_alias,
+            token_prefix_attempted=token_prefix
+        )
+    
+    # Find account by user_alias (NOT username for security), together with
+    # the token matching the prefix, its realm and the realm's backend data
+    account, api_token, grant = _load_auth_rows(user_alias, token_prefix)
     if not account:
         logger.debug(f"User alias not found: {user_alias[:4]}...")
+        record_probe_failure(client_ip, user_alias, token_prefix, 'alias_not_found')
         return AuthResult(
             success=False,
             error="Invalid token",
@@ -193,20 +233,10 @@ def authenticate_token(token: str) -> AuthResult:
             user_alias_attempted=user_alias
         )
     
-    # Find tokens matching prefix across all account's realms
-    api_token = (
-        APIToken.query
-        .join(AccountRealm)
-        .filter(
-            AccountRealm.account_id == account.id,
-            APIToken.token_prefix == token_prefix
-        )
-        .first()
-    )
-    
     if not api_token:
         # Token prefix not found - someone may be probing this account's tokens
         logger.warning(f"Token prefix not found for account {account.username}: {token_prefix}")
+        record_probe_failure(client_ip, user_alias, token_prefix, 'token_prefix_not_found')
         return AuthResult(
             success=False,
             error="Invalid token",
@@ -219,7 +249,7 @@ def authenticate_token(token: str) -> AuthResult:
         )
     
     # Verify full token against hash - CRITICAL if this fails
-    if not api_token.verify(token):
+    if not verify_token_cached(api_token, token):
         logger.warning(
             f"Token hash mismatch for {account.username}, "
             f"token={api_token.token_name} - POSSIBLE BRUTE FORCE"
@@ -236,6 +266,9 @@ def authenticate_token(token: str) -> AuthResult:
             token_prefix_attempted=token_prefix
         )
     
+    # realm_id is NOT NULL; the realm was loaded with the token
+    realm = cast(AccountRealm, api_token.realm)
+    
     # Check token is active (revoked check)
     if not api_token.is_active:
         logger.warning(f"Revoked token still in use: {api_token.token_name}")
@@ -247,7 +280,7 @@ def authenticate_token(token: str) -> AuthResult:
             should_notify_user='token_revoked' in NOTIFY_USER_ERRORS,
             account=account,
             token=api_token,
-            realm=api_token.realm
+            realm=realm
         )
     
     # Check token expiration
@@ -261,11 +294,10 @@ def authenticate_token(token: str) -> AuthResult:
             should_notify_user=False,  # Expected behavior
             account=account,
             token=api_token,
-            realm=api_token.realm
+            realm=realm
         )
     
-    # Get realm and check approval status
-    realm = api_token.realm
+    # Check realm approval status
     if realm.status != 'approved':
         logger.warning(f"Realm not approved: {realm.realm_type}:{realm.realm_value}")
         return AuthResult(
@@ -279,14 +311,98 @@ def authenticate_token(token: str) -> AuthResult:
             realm=realm
         )
     
+    # Upgrade legacy (bcrypt) or old-pepper hashes now that we hold the token
+    if token_hash_needs_rehash(api_token.token_hash):
+        _rehash_token(api_token, token)
+    
     # SUCCESS
     logger.info(f"Token authenticated: {account.username}/{api_token.token_name}")
     return AuthResult(
         success=True,
         token=api_token,
         realm=realm,
-        account=account
+        account=account,
+        grant=grant
+    )
+
+
+def _rehash_token(api_token: APIToken, token: str):
+    """Queue ``token``'s hash under the current scheme for write-back.
+    
+    Written by the usage buffer's next flush rather than committed here, so
+    authentication never commits the caller's session. The new hash is
+    deterministic, so concurrent upgrades from several workers write the
+    same value.
+    """
+    new_hash = hash_token(token)
+    record_token_rehash(api_token.id, api_token.token_hash, new_hash)
+    # Loaded state only: the session must not flush the hash a second time
+    set_committed_value(api_token, 'token_hash', new_hash)
+    logger.info(f"Queued token hash upgrade: {api_token.token_name}")
+
+
+def _relationship(attr: Any) -> QueryableAttribute[Any]:
+    """``attr`` typed for loader options (the models use untyped db.relationship())."""
+    return cast(QueryableAttribute[Any], attr)
+
+
+def _load_auth_rows(
+    user_alias: str,
+    token_prefix: str
+) -> tuple[Account | None, APIToken | None, DomainRootGrant | None]:
+    """
+    Load everything authentication and permission checks need in ONE statement.
+
+    Returns (account, token, grant). The account row is returned whenever the
+    alias exists; token is None if no token with that prefix exists in any of
+    the account's realms. The token's realm, the realm's domain root / BYOD
+    backend (with provider) and the account's grant on that domain root are
+    loaded in the same round-trip, so ``api_token.realm``, ``realm.account``
+    and ``get_backend_for_realm(realm)`` are served from the identity map.
+
+    The token is outer-joined on its (indexed) prefix, restricted to realms
+    owned by the account, so the result is a single row however many realms
+    the account has.
+    """
+    account_realm_ids = (
+        select(AccountRealm.id)
+        .where(AccountRealm.account_id == Account.id)
+        .correlate(Account)
+        .scalar_subquery()
     )
+    stmt = (
+        select(Account, APIToken, AccountRealm, DomainRootGrant)
+        .select_from(Account)
+        .outerjoin(
+            APIToken,
+            and_(
+                APIToken.token_prefix == token_prefix,
+                APIToken.realm_id.in_(account_realm_ids),
+            )
+        )
+        .outerjoin(AccountRealm, AccountRealm.id == APIToken.realm_id)
+        .outerjoin(
+            DomainRootGrant,
+            and_(
+                DomainRootGrant.domain_root_id == AccountRealm.domain_root_id,
+                DomainRootGrant.account_id == Account.id,
+            )
+        )
+        .options(
+            joinedload(_relationship(AccountRealm.domain_root))
+            .joinedload(_relationship(ManagedDomainRoot.backend_service))
+            .joinedload(_relationship(BackendService.provider)),
+            joinedload(_relationship(AccountRealm.user_backend))
+            .joinedload(_relationship(BackendService.provider)),
+        )
+        .where(Account.user_alias == user_alias)
+        .limit(1)
+    )
+    row = db.session.execute(stmt).first()
+    if row is None:
+        return None, None, None
+    account, api_token, _realm, grant = row
+    return account, api_token, grant
 
 
 def check_ip_allowed(token: APIToken, client_ip: str) -> bool:
@@ -296,33 +412,15 @@ def check_ip_allowed(token: APIToken, client_ip: str) -> bool:
     Returns True if:
     - No IP restrictions configured (empty list), OR
     - Client IP matches one of the allowed ranges/addresses
+    
+    The whitelist is compiled into an IPAllowlist once per distinct
+    ``allowed_ip_ranges`` value (see permission_snapshot.compile_ip_ranges),
+    so the lookup cost does not grow with the number of ranges.
     """
-    allowed_ranges = token.get_allowed_ip_ranges()
-    if not allowed_ranges:
+    if not token.get_allowed_ip_ranges():
         return True  # No restrictions
     
-    try:
-        ip_obj = ipaddress.ip_address(client_ip)
-    except ValueError:
-        logger.warning(f"Invalid client IP format: {client_ip}")
-        return False
-    
-    for allowed in allowed_ranges:
-        try:
-            if '/' in allowed:
-                # CIDR notation
-                network = ipaddress.ip_network(allowed, strict=False)
-                if ip_obj in network:
-                    return True
-            else:
-                # Single IP
-                if ip_obj == ipaddress.ip_address(allowed):
-                    return True
-        except ValueError:
-            logger.warning(f"Invalid IP range in whitelist: {allowed}")
-            continue
-    
-    return False
+    return ip_in_allowlist(compile_ip_ranges(token.allowed_ip_ranges), client_ip)
 
 
 def _resolve_fqdn(domain: str, record_name: str | None) -> str:
@@ -374,8 +472,27 @@ def check_permission(
     assert token is not None, "token should be set when auth.success is True"
     assert realm is not None, "realm should be set when auth.success is True"
 
+    # Compiled once per (token, realm) version; all checks below are set
+    # lookups / string compares on pre-parsed data.
+    perms = get_permission_snapshot(token)
+    return _evaluate_permission(
+        token, realm, perms, operation, domain, record_type, record_name, client_ip
+    )
+
+
+def _evaluate_permission(
+    token: APIToken,
+    realm: AccountRealm,
+    perms: PermissionSnapshot,
+    operation: str,
+    domain: str,
+    record_type: str | None,
+    record_name: str | None,
+    client_ip: str | None
+) -> PermissionResult:
+    """Steps 4-8 of check_permission against an already compiled snapshot."""
     # Check IP whitelist
-    if client_ip and not check_ip_allowed(token, client_ip):
+    if client_ip and not perms.allows_ip(client_ip):
         logger.warning(f"IP not whitelisted: {client_ip} for token {token.token_name}")
         return PermissionResult(
             granted=False,
@@ -384,7 +501,7 @@ def check_permission(
         )
 
     # Check domain (zone) matches realm
-    if not realm.matches_domain(domain):
+    if not perms.matches_domain(domain):
         logger.warning(f"Domain {domain} not in realm {realm.realm_type}:{realm.realm_value}")
         return PermissionResult(
             granted=False,
@@ -399,10 +516,10 @@ def check_permission(
     # pass record_name=None and remain bounded by record-type filtering.
     if record_name is not None:
         fqdn = _resolve_fqdn(domain, record_name)
-        if not realm.matches_hostname(fqdn):
+        if not perms.matches_hostname(fqdn):
             logger.warning(
                 f"Hostname {fqdn} outside realm scope "
-                f"{realm.realm_type}:{realm.get_fqdn()}"
+                f"{realm.realm_type}:{perms.fqdn}"
             )
             return PermissionResult(
                 granted=False,
@@ -411,9 +528,8 @@ def check_permission(
             )
 
     # Check operation allowed
-    allowed_ops = token.get_effective_operations()
-    if operation not in allowed_ops:
-        logger.warning(f"Operation {operation} not allowed (allowed: {allowed_ops})")
+    if operation not in perms.operations:
+        logger.warning(f"Operation {operation} not allowed (allowed: {sorted(perms.operations)})")
         return PermissionResult(
             granted=False,
             reason=f"Operation '{operation}' not permitted",
@@ -422,9 +538,8 @@ def check_permission(
     
     # Check record type allowed (if specified)
     if record_type:
-        allowed_types = token.get_effective_record_types()
-        if record_type not in allowed_types:
-            logger.warning(f"Record type {record_type} not allowed (allowed: {allowed_types})")
+        if record_type not in perms.record_types:
+            logger.warning(f"Record type {record_type} not allowed (allowed: {sorted(perms.record_types)})")
             return PermissionResult(
                 granted=False,
                 reason=f"Record type '{record_type}' not permitted",
@@ -456,6 +571,11 @@ def log_activity(
     
     Called after every API operation (success or failure).
     Includes error_code and severity for security analytics.
+    
+    Batched rows are written on the audit writer's own connection, so this
+    no longer commits the request session; callers commit their own changes.
+    Rows written synchronously (AUDIT_LOG_MODE=sync, attack events, queue
+    overflow, writer not bound) still go through the session and commit it.
     """
     # Determine severity
     if severity is None:
@@ -491,13 +611,13 @@ def log_activity(
     if response_summary:
         log_entry.set_response_summary(response_summary)
     
-    db.session.add(log_entry)
+    # Attack events are committed before returning; the rest is batched
+    # (see audit_writer)
+    write_activity(log_entry)
     
-    # Update token usage if authenticated
+    # Update token usage if authenticated (write-behind, see usage_buffer)
     if auth.success and auth.token:
-        auth.token.record_usage(actual_source_ip)
-    
-    db.session.commit()
+        record_token_usage(auth.token.id, actual_source_ip)
     
     # Trigger notification if needed
     if auth.should_notify_user and auth.account:
@@ -559,8 +679,7 @@ def require_auth(f):
                 status_reason='Missing Authorization header',
                 severity=ERROR_SEVERITY['missing_token'],
             )
-            db.session.add(log_entry)
-            db.session.commit()
+            write_activity(log_entry)
             
             return jsonify({
                 'error': 'unauthorized',
@@ -568,19 +687,28 @@ def require_auth(f):
             }), 401
         
         # Authenticate
-        auth = authenticate_token(token)
+        auth = authenticate_token(token, client_ip=request.remote_addr)
         
         if not auth.success:
-            # Log failed auth attempt with full context
-            log_activity(
-                auth=auth,
-                action='api_auth',
-                status='denied',
-                error_code=auth.error_code,
-                status_reason=auth.error,
-                severity=auth.severity,
-                source_ip=request.remote_addr
+            # Probes from a shed client are summed into one row per window;
+            # everything else is logged with full context
+            aggregated = aggregate_probe(
+                request.remote_addr,
+                auth.error_code,
+                alias=auth.user_alias_attempted,
+                account_id=auth.account.id if auth.account else None,
+                user_agent=request.headers.get('User-Agent'),
             )
+            if not aggregated:
+                log_activity(
+                    auth=auth,
+                    action='api_auth',
+                    status='denied',
+                    error_code=auth.error_code,
+                    status_reason=auth.error,
+                    severity=auth.severity,
+                    source_ip=request.remote_addr
+                )
             
             # SECURITY: Return generic error to API caller
             # Detailed info is in the logs for admin
@@ -597,7 +725,11 @@ def require_auth(f):
     return decorated_function
 
 
-def filter_dns_records(auth: AuthResult, domain: str, records: list[dict[str, Any]]) -> list[dict[str, Any]]:
+def filter_dns_records(
+    auth: AuthResult,
+    domain: str,
+    records: Sequence[Mapping[str, Any]] | ZoneSnapshot
+) -> list[Mapping[str, Any]]:
     """
     Filter DNS records based on token permissions.
     
@@ -607,7 +739,7 @@ def filter_dns_records(auth: AuthResult, domain: str, records: list[dict[str, An
         return []
     
     token = auth.token  # Now guaranteed non-None
-    allowed_types = token.get_effective_record_types()
+    allowed_types = get_permission_snapshot(token).record_types
     
     filtered = [
         record for record in records
@@ -618,6 +750,74 @@ def filter_dns_records(auth: AuthResult, domain: str, records: list[dict[str, An
     return filtered
 
 
+def filter_dns_records_in_scope(
+    auth: AuthResult,
+    domain: str,
+    records: Sequence[Mapping[str, Any]] | ZoneSnapshot
+) -> list[Mapping[str, Any]]:
+    """
+    Filter DNS records to the token's record types and realm hostnames.
+    
+    Stricter than filter_dns_records: records outside the realm's hostname
+    scope (e.g. other hosts than a host realm's) are dropped as well. A
+    ZoneSnapshot is filtered through its index: a host realm looks up its
+    hostname, other realms check each distinct hostname once.
+    """
+    if not auth.success or auth.token is None:
+        return []
+    
+    perms = get_permission_snapshot(auth.token)
+    if isinstance(records, ZoneSnapshot):
+        if perms.realm_type == 'host':
+            zone = domain.lower().rstrip('.')
+            relative = perms.fqdn[:-len(zone) - 1] if perms.fqdn.endswith('.' + zone) else None
+            candidates = ['', '@', perms.fqdn, relative or '']
+        else:
+            candidates = list(records.hostnames())
+        hostnames = [h for h in candidates if perms.matches_hostname(_resolve_fqdn(domain, h))]
+        return records.select(hostnames, perms.record_types)
+    return [
+        record for record in filter_dns_records(auth, domain, records)
+        if perms.matches_hostname(_resolve_fqdn(domain, record.get('hostname')))
+    ]
+
+
+def check_dns_operations(
+    auth: AuthResult,
+    domain: str,
+    operations: list[tuple[str, str | None, str | None]],
+    client_ip: str | None
+) -> list[PermissionResult]:
+    """
+    Check several (operation, record_type, record_name) tuples at once.
+    
+    The token's permission snapshot is compiled once for the whole list.
+    Returns one PermissionResult per tuple, in order.
+    """
+    if not auth.success:
+        denied = PermissionResult(granted=False, reason=auth.error, error_code=auth.error_code)
+        return [denied] * len(operations)
+    
+    token = auth.token
+    realm = auth.realm
+    assert token is not None and realm is not None
+    perms = get_permission_snapshot(token)
+    
+    return [
+        _evaluate_permission(token, realm, perms, operation, domain, record_type, record_name, client_ip)
+        for operation, record_type, record_name in operations
+    ]
+
+
+def record_operation(record: dict[str, Any]) -> str:
+    """Operation an updateDnsRecords entry performs: delete, update or create."""
+    if record.get('deleterecord', False):
+        return 'delete'
+    if record.get('id'):
+        return 'update'
+    return 'create'
+
+
 def validate_dns_records_update(
     auth: AuthResult,
     domain: str,
@@ -635,30 +835,13 @@ def validate_dns_records_update(
     if not auth.success:
         return False, auth.error, auth.error_code
     
-    for record in records:
-        record_name = record.get('hostname', '')
-        record_type = record.get('type', '')
-        delete_record = record.get('deleterecord', False)
-        record_id = record.get('id')
-        
-        # Determine operation
-        if delete_record:
-            operation = 'delete'
-        elif record_id:
-            operation = 'update'
-        else:
-            operation = 'create'
-        
-        # Check permission
-        perm = check_permission(
-            auth=auth,
-            operation=operation,
-            domain=domain,
-            record_type=record_type,
-            record_name=record_name,
-            client_ip=client_ip
-        )
-        
+    operations = [
+        (record_operation(record), record.get('type', ''), record.get('hostname', ''))
+        for record in records
+    ]
+    results = check_dns_operations(auth, domain, operations, client_ip)
+    
+    for (operation, record_type, record_name), perm in zip(operations, results):
         if not perm.granted:
             return False, f"No permission to {operation} record {record_name} ({record_type}): {perm.reason}", perm.error_code
     
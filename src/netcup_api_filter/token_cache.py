@@ -0,0 +1,163 @@
+"""In-process cache of recently verified API tokens.
+
+bcrypt verification of legacy token hashes dominates the cost of
+``authenticate_token`` (tens of milliseconds per request by design). DDNS
+clients re-present the same token every few minutes, so re-running bcrypt for a
+token that was verified seconds ago buys no security. This cache remembers
+successful verifications for a short TTL so repeat requests skip straight to
+the cheap status checks. Tokens hashed with the current HMAC scheme (see
+models.hash_token) verify in microseconds; for them the cache is a minor win.
+
+Security properties:
+- Keys are HMAC-SHA256 digests of the presented token under a per-process
+  random key. The plaintext token is never stored, and the digests are useless
+  outside this process.
+- Entries are bound to the token row id AND its stored hash. Regenerating a
+  token (new hash) or reusing a row id after deletion never yields a hit.
+- Only the hash check is cached. Active, expiry, account and realm approval
+  checks still run against the database on every request.
+- Revocation, regeneration and permission edits call ``invalidate_token`` so
+  this worker drops the entry immediately; other workers rely on the DB checks
+  above plus the short TTL.
+
+Configuration:
+- TOKEN_VERIFY_CACHE_SECONDS: TTL of a verified entry (default 60, 0 disables)
+- TOKEN_VERIFY_CACHE_SIZE: Maximum number of entries (default 1024)
+"""
+from __future__ import annotations
+
+import hashlib
+import hmac
+import logging
+import os
+import secrets
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict
+
+logger = logging.getLogger(__name__)
+
+# Cache configuration
+VERIFY_CACHE_SECONDS = int(os.environ.get("TOKEN_VERIFY_CACHE_SECONDS", "60"))
+VERIFY_CACHE_MAX_SIZE = int(os.environ.get("TOKEN_VERIFY_CACHE_SIZE", "1024"))
+
+
+class VerifiedTokenCache:
+    """Thread-safe TTL cache mapping token digests to verified token rows."""
+
+    def __init__(self, max_size: int = VERIFY_CACHE_MAX_SIZE, ttl_seconds: int = VERIFY_CACHE_SECONDS):
+        self.max_size = max_size
+        self.ttl = timedelta(seconds=ttl_seconds)
+        self._key = secrets.token_bytes(32)
+        # digest -> (token_id, token_hash, cached_at); oldest first
+        self._cache: OrderedDict[str, tuple[int, str, datetime]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0 and self.ttl > timedelta(0)
+
+    def _digest(self, token: str) -> str:
+        return hmac.new(self._key, token.encode(), hashlib.sha256).hexdigest()
+
+    def is_verified(self, token: str, token_id: int, token_hash: str) -> bool:
+        """Return True if ``token`` was recently verified against this row/hash."""
+        if not self.enabled:
+            return False
+        digest = self._digest(token)
+        with self._lock:
+            entry = self._cache.get(digest)
+            if entry is None:
+                self.misses += 1
+                return False
+
+            cached_id, cached_hash, cached_at = entry
+            if datetime.utcnow() - cached_at > self.ttl:
+                del self._cache[digest]
+                self.misses += 1
+                return False
+
+            if cached_id != token_id or not hmac.compare_digest(cached_hash, token_hash or ""):
+                del self._cache[digest]
+                self.misses += 1
+                return False
+
+            self.hits += 1
+            return True
+
+    def remember(self, token: str, token_id: int, token_hash: str):
+        """Record a successful verification."""
+        if not self.enabled:
+            return
+        digest = self._digest(token)
+        with self._lock:
+            self._cache.pop(digest, None)
+            while len(self._cache) >= self.max_size:
+                self._cache.popitem(last=False)
+            self._cache[digest] = (token_id, token_hash or "", datetime.utcnow())
+
+    def invalidate(self, token_id: int) -> int:
+        """Drop every entry for ``token_id``. Returns the number removed."""
+        with self._lock:
+            stale = [d for d, (tid, _, _) in self._cache.items() if tid == token_id]
+            for digest in stale:
+                del self._cache[digest]
+            return len(stale)
+
+    def clear(self):
+        """Clear all cached entries."""
+        with self._lock:
+            self._cache.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+# Global cache instance
+_cache = VerifiedTokenCache()
+
+
+def verify_token_cached(api_token: Any, token: str) -> bool:
+    """Verify ``token`` against ``api_token``, consulting the cache first.
+
+    Args:
+        api_token: APIToken row found by prefix lookup
+        token: Full plaintext token presented by the client
+
+    Returns:
+        True if the token matches the stored hash
+    """
+    if _cache.is_verified(token, api_token.id, api_token.token_hash):
+        return True
+
+    if not api_token.verify(token):
+        return False
+
+    _cache.remember(token, api_token.id, api_token.token_hash)
+    return True
+
+
+def invalidate_token(token_id: int):
+    """Forget cached verifications for a token (revoke/regenerate/update)."""
+    removed = _cache.invalidate(token_id)
+    if removed:
+        logger.debug(f"Invalidated {removed} verified-token cache entries for token {token_id}")
+
+
+def clear_cache():
+    """Clear the verified-token cache."""
+    _cache.clear()
+    logger.info("Verified-token cache cleared")
+
+
+def get_cache_stats() -> Dict[str, Any]:
+    """Get cache statistics."""
+    return {
+        "size": len(_cache._cache),
+        "max_size": _cache.max_size,
+        "ttl_seconds": VERIFY_CACHE_SECONDS,
+        "hits": _cache.hits,
+        "misses": _cache.misses,
+    }
@@ -0,0 +1,250 @@
+"""Write-behind buffer for APIToken usage counters.
+
+Recording ``last_used_at`` / ``last_used_ip`` / ``use_count`` on every
+authenticated request turned every API read into a write that waits on the
+SQLite write lock. Instead, usage is aggregated in memory per token and
+written back in batches:
+
+- one UPDATE per token per flush, applied as an increment
+  (``use_count = use_count + n``) so concurrent gunicorn workers never lose
+  each other's counts
+- ``last_used_at`` / ``last_used_ip`` only move forward in time, so an older
+  flush from another worker cannot overwrite a newer value
+- flushes run on a background thread every TOKEN_USAGE_FLUSH_SECONDS, or
+  sooner once TOKEN_USAGE_FLUSH_THRESHOLD uses are pending
+- the buffer is drained on worker shutdown (see lifecycle.py)
+- after a failed flush the batch is merged back, up to
+  TOKEN_USAGE_MAX_PENDING tokens; usage of further tokens is dropped
+- token hash upgrades found during authentication ride along with the next
+  flush, so authentication never commits the request's session
+
+Displayed usage may therefore lag by up to one flush interval.
+
+Configuration:
+- TOKEN_USAGE_FLUSH_SECONDS: Background flush interval (default 10)
+- TOKEN_USAGE_FLUSH_THRESHOLD: Pending uses that trigger an early flush (default 500)
+- TOKEN_USAGE_MAX_PENDING: Tokens kept pending while flushes fail (default 10000)
+"""
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from sqlalchemy import case, event, func, or_, update
+
+from .lifecycle import register_shutdown_hook
+from .models import APIToken, db
+
+logger = logging.getLogger(__name__)
+
+# Flush configuration
+FLUSH_INTERVAL_SECONDS = float(os.environ.get("TOKEN_USAGE_FLUSH_SECONDS", "10"))
+FLUSH_THRESHOLD = int(os.environ.get("TOKEN_USAGE_FLUSH_THRESHOLD", "500"))
+MAX_PENDING_TOKENS = int(os.environ.get("TOKEN_USAGE_MAX_PENDING", "10000"))
+
+
+class TokenUsageBuffer:
+    """Thread-safe per-token usage aggregator with background write-back."""
+
+    def __init__(self, interval: float = FLUSH_INTERVAL_SECONDS, threshold: int = FLUSH_THRESHOLD,
+                 max_pending: int = MAX_PENDING_TOKENS):
+        self.interval = interval
+        self.threshold = threshold
+        self.max_pending = max_pending
+        # token_id -> [count, last_used_at, last_used_ip]
+        self._pending: dict[int, list[Any]] = {}
+        self._pending_uses = 0
+        # token_id -> (old_hash, new_hash)
+        self._rehash: dict[int, tuple[str, str]] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._app = None
+        self._thread: Optional[threading.Thread] = None
+        self._thread_pid: Optional[int] = None
+        self.flushes = 0
+        self.rows_updated = 0
+        self.dropped = 0
+
+    def bind(self, app):
+        """Use ``app``'s database engine for flushes (until it is disposed)."""
+        self._app = app
+        with app.app_context():
+            engine = db.engine
+        event.listen(engine, 'engine_disposed', lambda _engine: self.unbind(app))
+
+    def unbind(self, app=None):
+        """Stop flushing to ``app`` (any app if None)."""
+        if app is None or self._app is app:
+            self._app = None
+
+    def clear(self):
+        """Discard pending usage without writing it."""
+        with self._lock:
+            self._pending = {}
+            self._pending_uses = 0
+            self._rehash = {}
+
+    def record(self, token_id: int, ip_address: str | None, when: datetime | None = None):
+        """Record one use of a token (no database access)."""
+        when = when or datetime.utcnow()
+        with self._lock:
+            entry = self._pending.get(token_id)
+            if entry is None:
+                self._pending[token_id] = [1, when, ip_address]
+            else:
+                entry[0] += 1
+                if when >= entry[1]:
+                    entry[1] = when
+                    entry[2] = ip_address
+            self._pending_uses += 1
+            over_threshold = self._pending_uses >= self.threshold
+
+        self._ensure_thread()
+        if over_threshold:
+            self._wakeup.set()
+
+    def record_rehash(self, token_id: int, old_hash: str, new_hash: str):
+        """Queue a token hash upgrade for the next write-back.
+
+        Applied only while the stored hash is still ``old_hash``, so a token
+        regenerated in the meantime keeps its new hash.
+        """
+        with self._lock:
+            self._rehash[token_id] = (old_hash, new_hash)
+        self._ensure_thread()
+
+    def pending(self) -> int:
+        """Number of tokens with unflushed usage or hash upgrades."""
+        with self._lock:
+            return len(self._pending.keys() | self._rehash.keys())
+
+    def flush(self) -> int:
+        """Write pending usage to the database. Returns the number of tokens updated."""
+        if self._app is None:
+            return 0
+
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+                rehash, self._rehash = self._rehash, {}
+                self._pending_uses = 0
+            if not batch and not rehash:
+                return 0
+
+            table = APIToken.__table__
+            try:
+                with self._app.app_context():
+                    with db.engine.begin() as conn:
+                        for token_id, (count, used_at, used_ip) in batch.items():
+                            newer = or_(table.c.last_used_at.is_(None), table.c.last_used_at < used_at)
+                            conn.execute(
+                                update(table)
+                                .where(table.c.id == token_id)
+                                .values(
+                                    use_count=func.coalesce(table.c.use_count, 0) + count,
+                                    last_used_at=case((newer, used_at), else_=table.c.last_used_at),
+                                    last_used_ip=case((newer, used_ip), else_=table.c.last_used_ip),
+                                )
+                            )
+                        for token_id, (old_hash, new_hash) in rehash.items():
+                            conn.execute(
+                                update(table)
+                                .where(table.c.id == token_id, table.c.token_hash == old_hash)
+                                .values(token_hash=new_hash)
+                            )
+            except Exception as e:
+                logger.warning(f"Token usage flush failed, will retry: {e}")
+                self._requeue(batch, rehash)
+                return 0
+
+            updated = len(batch.keys() | rehash.keys())
+            self.flushes += 1
+            self.rows_updated += updated
+            logger.debug(f"Flushed usage for {updated} tokens")
+            return updated
+
+    def _requeue(self, batch: dict[int, list[Any]], rehash: dict[int, tuple[str, str]]):
+        dropped = 0
+        with self._lock:
+            # Hash upgrades are redone on the token's next use if dropped
+            for token_id, change in rehash.items():
+                self._rehash.setdefault(token_id, change)
+            for token_id, (count, used_at, used_ip) in batch.items():
+                entry = self._pending.get(token_id)
+                if entry is None:
+                    if len(self._pending) >= self.max_pending:
+                        dropped += 1
+                        continue
+                    self._pending[token_id] = [count, used_at, used_ip]
+                else:
+                    entry[0] += count
+                    if used_at > entry[1]:
+                        entry[1], entry[2] = used_at, used_ip
+                self._pending_uses += count
+            self.dropped += dropped
+        if dropped:
+            logger.warning(f"Token usage buffer full, dropped usage of {dropped} tokens")
+
+    def _ensure_thread(self):
+        """Start the flusher lazily, and again after a fork (preload_app)."""
+        pid = os.getpid()
+        if self._thread is not None and self._thread_pid == pid and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread_pid == pid and self._thread.is_alive():
+                return
+            self._thread_pid = pid
+            self._thread = threading.Thread(target=self._run, name="token-usage-flusher", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            self.flush()
+
+
+# Global buffer instance
+_buffer = TokenUsageBuffer()
+register_shutdown_hook("token_usage", _buffer.flush)
+
+
+def init_usage_buffer(app):
+    """Bind the usage buffer to the application's database."""
+    _buffer.bind(app)
+
+
+def record_token_usage(token_id: int, ip_address: str | None):
+    """Queue a token use for the next write-back."""
+    _buffer.record(token_id, ip_address)
+
+
+def record_token_rehash(token_id: int, old_hash: str, new_hash: str):
+    """Queue a token hash upgrade for the next write-back."""
+    _buffer.record_rehash(token_id, old_hash, new_hash)
+
+
+def clear_usage_buffer():
+    """Discard pending usage (tests)."""
+    _buffer.clear()
+
+
+def flush_usage() -> int:
+    """Flush pending usage now (tests, admin views, shutdown)."""
+    return _buffer.flush()
+
+
+def get_buffer_stats() -> Dict[str, Any]:
+    """Get buffer statistics."""
+    return {
+        "pending_tokens": _buffer.pending(),
+        "flushes": _buffer.flushes,
+        "rows_updated": _buffer.rows_updated,
+        "dropped": _buffer.dropped,
+        "interval_seconds": _buffer.interval,
+        "threshold": _buffer.threshold,
+    }
@@ -0,0 +1,322 @@
+"""Read-through cache of DNS zone record sets.
+
+DDNS clients check in every few minutes and each check used to fetch the full
+zone from the backend (``infoDnsRecords`` for Netcup). Many routers behind one
+zone turn that into a stream of identical upstream calls. This cache keeps the
+last fetched record set per (backend namespace, zone) for a short TTL:
+
+- Reads (record listing, DDNS lookups, the account DNS view) are served from
+  memory while the entry is fresh.
+- Every mutation that goes through the filter replaces the entry with the
+  record set the backend returned, or drops it when the backend did not return
+  one (or the mutation failed and the zone state is unknown).
+- Optional stale-while-revalidate: for ZONE_CACHE_STALE_SECONDS after expiry
+  the stale record set is returned immediately and one background refresh
+  runs per zone.
+- Concurrent misses for one zone issue a single upstream fetch.
+- The asyncio clients (async_runtime) use the same entries through
+  ``get_snapshot_async`` / ``get_or_load_async``.
+- Entries are ZoneSnapshots of DNSRecords, converted and indexed once per
+  fetch. ``get_snapshot`` hands out the shared snapshot (read-only);
+  ``get``/``get_or_load`` return dict copies, so mutating a returned record
+  never changes the cache.
+
+Read-modify-write paths that send a whole record set back to the backend must
+bypass the cache (``use_cache=False`` on NetcupClient.info_dns_records).
+Changes made outside the filter (Netcup CCP web UI, other workers) become
+visible after at most the TTL.
+
+Configuration:
+- ZONE_CACHE_SECONDS: TTL of a cached record set (default 60, 0 disables)
+- ZONE_CACHE_SIZE: Maximum number of cached zones (default 256)
+- ZONE_CACHE_STALE_SECONDS: Stale-while-revalidate window (default 0, off)
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from .async_runtime import coalesce_async
+from .dns_record import to_records
+from .single_flight import coalesce
+from .zone_snapshot import ZoneSnapshot
+
+logger = logging.getLogger(__name__)
+
+# Cache configuration
+ZONE_CACHE_SECONDS = float(os.environ.get("ZONE_CACHE_SECONDS", "60"))
+ZONE_CACHE_MAX_SIZE = int(os.environ.get("ZONE_CACHE_SIZE", "256"))
+ZONE_CACHE_STALE_SECONDS = float(os.environ.get("ZONE_CACHE_STALE_SECONDS", "0"))
+
+# (backend namespace, lower-cased zone)
+ZoneKey = Tuple[str, str]
+Records = List[Dict[str, Any]]
+
+
+def zone_key(namespace: str, zone: str) -> ZoneKey:
+    """Cache key for ``zone`` on the backend account identified by ``namespace``."""
+    return (namespace, zone.rstrip('.').lower())
+
+
+def credential_digest(*secrets: Any) -> str:
+    """Short SHA-256 digest of credentials for namespaces (see DNSBackend.cache_namespace).
+
+    Namespaces include it so that cached and coalesced results are only
+    shared between callers holding the same credentials.
+    """
+    return hashlib.sha256('\0'.join(str(s) for s in secrets).encode()).hexdigest()[:16]
+
+
+def _snapshot(key: ZoneKey, records: Records) -> ZoneSnapshot:
+    # DNSRecords are never modified, so the snapshot shares no state with
+    # the caller's dicts
+    return ZoneSnapshot(to_records(records), key[1])
+
+
+class ZoneRecordCache:
+    """Thread-safe, size-bounded TTL cache of zone record sets."""
+
+    def __init__(
+        self,
+        ttl_seconds: float = ZONE_CACHE_SECONDS,
+        max_size: int = ZONE_CACHE_MAX_SIZE,
+        stale_seconds: float = ZONE_CACHE_STALE_SECONDS,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self.stale_seconds = stale_seconds
+        # key -> (snapshot, fetched_at); least recently used first
+        self._cache: OrderedDict[ZoneKey, tuple[ZoneSnapshot, float]] = OrderedDict()
+        self._refreshing: set[ZoneKey] = set()
+        self._refresh_tasks: set[asyncio.Task] = set()
+        # Per-key write generation, bumped by every put/invalidate; a fetch
+        # started before a write to its zone does not overwrite it
+        self._generations: Dict[ZoneKey, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0 and self.ttl_seconds > 0
+
+    def get(self, key: ZoneKey, allow_stale: bool = False) -> Optional[Records]:
+        """Cached record set for ``key`` (a copy), or None."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None:
+                return None
+            snapshot, fetched_at = entry
+            age = time.monotonic() - fetched_at
+            if age > self.ttl_seconds + (self.stale_seconds if allow_stale else 0):
+                return None
+            self._cache.move_to_end(key)
+            return snapshot.copy_records()
+
+    def get_or_load(self, key: ZoneKey, loader: Callable[[], Records]) -> Records:
+        """Return the record set for ``key`` (a copy), calling ``loader`` on a miss.
+
+        Concurrent misses for the same key share one ``loader`` call (see
+        single_flight). Loader exceptions propagate and nothing is cached.
+        """
+        return self.get_snapshot(key, loader).copy_records()
+
+    def get_snapshot(self, key: ZoneKey, loader: Callable[[], Records]) -> ZoneSnapshot:
+        """``get_or_load`` returning the shared, indexed snapshot (read-only)."""
+        if not self.enabled:
+            return coalesce(key, lambda: _snapshot(key, loader()))
+
+        cached, refresh = self._lookup(key)
+        if cached is not None:
+            if refresh:
+                threading.Thread(
+                    target=self._refresh, args=(key, loader),
+                    name="zone-cache-refresh", daemon=True,
+                ).start()
+            return cached
+
+        return coalesce(key, lambda: self._load(key, loader))
+
+    async def get_or_load_async(self, key: ZoneKey, loader: Callable[[], Awaitable[Records]]) -> Records:
+        """``get_or_load`` for coroutines on the async_runtime loop."""
+        return (await self.get_snapshot_async(key, loader)).copy_records()
+
+    async def get_snapshot_async(self, key: ZoneKey, loader: Callable[[], Awaitable[Records]]) -> ZoneSnapshot:
+        """``get_snapshot`` for coroutines on the async_runtime loop.
+
+        Concurrent misses await one ``loader()`` (see coalesce_async); a stale
+        entry is refreshed by a task on the loop.
+        """
+        if self.enabled:
+            cached, refresh = self._lookup(key)
+            if cached is not None:
+                if refresh:
+                    task = asyncio.get_running_loop().create_task(self._refresh_async(key, loader))
+                    self._refresh_tasks.add(task)
+                    task.add_done_callback(self._refresh_tasks.discard)
+                return cached
+
+        return await coalesce_async(key, lambda: self._load_async(key, loader))
+
+    def _lookup(self, key: ZoneKey) -> Tuple[Optional[ZoneSnapshot], bool]:
+        """Servable snapshot for ``key`` (fresh or within the stale window), and
+        whether the caller should start the one background refresh."""
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None:
+                snapshot, fetched_at = entry
+                age = time.monotonic() - fetched_at
+                if age <= self.ttl_seconds:
+                    self._cache.move_to_end(key)
+                    self.hits += 1
+                    return snapshot, False
+                if age <= self.ttl_seconds + self.stale_seconds:
+                    self._cache.move_to_end(key)
+                    self.stale_hits += 1
+                    refresh = key not in self._refreshing
+                    self._refreshing.add(key)
+                    return snapshot, refresh
+            self.misses += 1
+            return None, False
+
+    def _generation(self, key: ZoneKey) -> int:
+        # Registered before the fetch so invalidate_zone() also bumps it
+        with self._lock:
+            return self._generations.setdefault(key, 0)
+
+    def _bump(self, key: ZoneKey):
+        self._generations[key] = self._generations.get(key, 0) + 1
+
+    def _load(self, key: ZoneKey, loader: Callable[[], Records]) -> ZoneSnapshot:
+        generation = self._generation(key)
+        snapshot = _snapshot(key, loader())
+        self._store_fetched(key, snapshot, generation)
+        return snapshot
+
+    def _store_fetched(self, key: ZoneKey, snapshot: ZoneSnapshot, generation: int):
+        # A mutation that completed while the fetch was in flight is newer
+        # than what the fetch saw; keep the mutation's state instead
+        with self._lock:
+            if self._generations.get(key, 0) != generation:
+                return
+        self._put(key, snapshot)
+
+    async def _load_async(self, key: ZoneKey, loader: Callable[[], Awaitable[Records]]) -> ZoneSnapshot:
+        generation = self._generation(key)
+        snapshot = _snapshot(key, await loader())
+        self._store_fetched(key, snapshot, generation)
+        return snapshot
+
+    async def _refresh_async(self, key: ZoneKey, loader: Callable[[], Awaitable[Records]]):
+        try:
+            await self._load_async(key, loader)
+        except Exception as e:
+            logger.warning(f"Background refresh of zone {key[1]} failed: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def _refresh(self, key: ZoneKey, loader: Callable[[], Records]):
+        try:
+            generation = self._generation(key)
+            self._store_fetched(key, _snapshot(key, loader()), generation)
+        except Exception as e:
+            logger.warning(f"Background refresh of zone {key[1]} failed: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def put(self, key: ZoneKey, records: Records):
+        """Store the current record set for ``key`` (e.g. returned by a mutation)."""
+        if self.enabled:
+            self._put(key, _snapshot(key, records))
+
+    def _put(self, key: ZoneKey, snapshot: ZoneSnapshot):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._cache.pop(key, None)
+            while len(self._cache) >= self.max_size:
+                self._cache.popitem(last=False)
+            self._cache[key] = (snapshot, time.monotonic())
+            self._bump(key)
+
+    def invalidate(self, key: ZoneKey) -> bool:
+        """Drop the entry for ``key``. Returns True if one was cached."""
+        with self._lock:
+            self._bump(key)
+            removed = self._cache.pop(key, None) is not None
+            if removed:
+                self.invalidations += 1
+            return removed
+
+    def invalidate_zone(self, zone: str) -> int:
+        """Drop ``zone`` for every backend namespace. Returns the number removed."""
+        zone = zone.rstrip('.').lower()
+        with self._lock:
+            for key in [k for k in self._generations if k[1] == zone]:
+                self._bump(key)
+            stale = [k for k in self._cache if k[1] == zone]
+            for key in stale:
+                del self._cache[key]
+            self.invalidations += len(stale)
+            return len(stale)
+
+    def clear(self):
+        """Clear all cached entries and statistics."""
+        with self._lock:
+            self._cache.clear()
+            self.hits = 0
+            self.stale_hits = 0
+            self.misses = 0
+            self.invalidations = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "zones": len(self._cache),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "stale_seconds": self.stale_seconds,
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+            }
+
+
+# Global cache instance
+_cache = ZoneRecordCache()
+
+
+def get_zone_cache() -> ZoneRecordCache:
+    """Return the process-wide zone record cache."""
+    return _cache
+
+
+def invalidate_zone(zone: str) -> int:
+    """Forget cached record sets for ``zone`` (all backends)."""
+    removed = _cache.invalidate_zone(zone)
+    if removed:
+        logger.debug(f"Invalidated {removed} zone cache entries for {zone}")
+    return removed
+
+
+def clear_cache():
+    """Clear the zone record cache."""
+    _cache.clear()
+
+
+def get_zone_cache_stats() -> Dict[str, Any]:
+    """Get zone cache statistics."""
+    return _cache.stats()
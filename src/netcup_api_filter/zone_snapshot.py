@@ -0,0 +1,93 @@
+"""Indexed, read-only view of one zone's record set.
+
+Lookups of a hostname/type pair used to scan the whole record list
+(``DNSBackend.filter_records_by_hostname``, the DDNS handlers, the realm
+filters), several times per request on zones with thousands of records. A
+ZoneSnapshot is built in one pass when a record set is fetched and then
+answers those lookups from dictionaries:
+
+- by (hostname, type): hostnames compare case-insensitively and without a
+  trailing dot, types upper-cased
+- by hostname alone, for lookups of every type
+- by record id
+
+The zone cache stores snapshots of DNSRecords (see dns_record), so a cached
+zone is converted and indexed once per fetch and shared by every request
+that reads it. Snapshots of plain dicts work the same; either way the
+records are shared: copy them (``copy_records``) before changing them.
+"""
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+from .dns_record import record_dict
+
+Record = Mapping[str, Any]
+
+
+def host_key(hostname: Any) -> str:
+    """Index key of a hostname: lower-cased, without trailing dot."""
+    return str(hostname or '').lower().rstrip('.')
+
+
+class ZoneSnapshot:
+    """Record list of a zone plus its hostname/type and id indexes."""
+
+    __slots__ = ('zone', 'records', '_by_host', '_by_name', '_by_id', '_position')
+
+    def __init__(self, records: Sequence[Record], zone: str = ''):
+        self.zone = zone
+        self.records = records
+        self._by_host: Dict[str, List[Record]] = {}
+        self._by_name: Dict[Tuple[str, str], List[Record]] = {}
+        self._by_id: Dict[str, Record] = {}
+        self._position: Dict[int, int] = {}
+        for position, rec in enumerate(records):
+            host = host_key(rec.get('hostname'))
+            self._by_host.setdefault(host, []).append(rec)
+            self._by_name.setdefault((host, str(rec.get('type', '')).upper()), []).append(rec)
+            record_id = rec.get('id')
+            if record_id not in (None, ''):
+                self._by_id.setdefault(str(record_id), rec)
+            self._position[id(rec)] = position
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __iter__(self) -> Iterator[Record]:
+        return iter(self.records)
+
+    def lookup(self, hostname: str, record_type: Optional[str] = None) -> List[Record]:
+        """Records of ``hostname`` (of ``record_type`` if given), in zone order."""
+        if record_type is None:
+            return list(self._by_host.get(host_key(hostname), ()))
+        return list(self._by_name.get((host_key(hostname), record_type.upper()), ()))
+
+    def first(self, hostname: str, record_type: str) -> Optional[Record]:
+        """First record of ``hostname`` and ``record_type``, or None."""
+        found = self._by_name.get((host_key(hostname), record_type.upper()))
+        return found[0] if found else None
+
+    def get(self, record_id: Any) -> Optional[Record]:
+        """Record with ``record_id``, or None."""
+        return self._by_id.get(str(record_id))
+
+    def hostnames(self) -> Iterable[str]:
+        """Distinct hostname keys (see host_key)."""
+        return self._by_host.keys()
+
+    def select(self, hostnames: Iterable[str], record_types: Optional[Iterable[str]] = None) -> List[Record]:
+        """Records of any of ``hostnames`` (and ``record_types``), in zone order."""
+        types = None if record_types is None else {t.upper() for t in record_types}
+        found = [
+            rec
+            for host in {host_key(h) for h in hostnames}
+            for rec in self._by_host.get(host, ())
+            if types is None or str(rec.get('type', '')).upper() in types
+        ]
+        found.sort(key=lambda rec: self._position[id(rec)])
+        return found
+
+    def copy_records(self) -> List[Dict[str, Any]]:
+        """Dict copies of the records, safe to modify."""
+        return [record_dict(r) for r in self.records]
@@ -20,12 +20,34 @@ except ImportError:
     pass
 
 from netcup_api_filter.app import create_app
+from netcup_api_filter.audit_writer import clear_audit_log
+from netcup_api_filter.circuit_breaker import reset_breakers
 from netcup_api_filter.database import db as _db
 from netcup_api_filter.models import (
     Account, AccountRealm, APIToken,
     generate_token, generate_user_alias, hash_token,
     TOKEN_PREFIX, USER_ALIAS_LENGTH,
 )
+from netcup_api_filter.usage_buffer import clear_usage_buffer
+
+
+@pytest.fixture(autouse=True)
+def _reset_circuit_breakers():
+    # Breakers are process-wide; upstream failures injected by one test must
+    # not open the circuit for the next
+    reset_breakers()
+    yield
+
+
+@pytest.fixture(autouse=True)
+def _reset_write_buffers():
+    # The usage buffer and audit writer are process-wide; rows queued by one
+    # test must not be flushed into the next test's database
+    clear_usage_buffer()
+    clear_audit_log()
+    yield
+    clear_usage_buffer()
+    clear_audit_log()
 
 
 @pytest.fixture
@@ -44,6 +66,8 @@ def app(monkeypatch, tmp_path):
         yield application
         _db.session.remove()
         _db.drop_all()
+        # Unbinds the usage buffer and audit writer from this app
+        _db.engine.dispose()
 
 
 @pytest.fixture
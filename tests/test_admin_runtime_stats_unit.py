@@ -0,0 +1,46 @@
+"""Unit tests for the admin runtime stats (system info page and /admin/api/runtime-stats)."""
+from __future__ import annotations
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import pytest
+
+from netcup_api_filter.api.admin import SESSION_KEY_ADMIN_ID
+
+
+@pytest.fixture
+def admin_client(client, make_account):
+    admin = make_account("statsadmin", is_admin=1)
+    with client.session_transaction() as sess:
+        sess[SESSION_KEY_ADMIN_ID] = admin.id
+    return client
+
+
+def test_runtime_stats_require_admin(client):
+    resp = client.get("/admin/api/runtime-stats")
+    assert resp.status_code == 302
+
+
+def test_runtime_stats_cover_every_component(admin_client):
+    resp = admin_client.get("/admin/api/runtime-stats")
+    assert resp.status_code == 200
+    stats = resp.get_json()
+    assert set(stats) == {
+        "token_cache", "permission_cache", "settings_cache", "backend_cache",
+        "zone_cache", "single_flight", "mutation_batcher", "record_index",
+        "change_journal", "http_transport", "async_runtime", "usage_buffer", "audit_writer",
+        "probe_guard", "circuit_breakers",
+    }
+    assert stats["zone_cache"]["max_size"] > 0
+    assert "coalesced" in stats["single_flight"]
+
+
+def test_system_info_shows_runtime_stats(admin_client):
+    resp = admin_client.get("/admin/system")
+    assert resp.status_code == 200
+    body = resp.get_data(as_text=True)
+    assert "Worker Caches &amp; Queues" in body
+    assert "Single Flight" in body
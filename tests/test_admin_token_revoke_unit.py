@@ -0,0 +1,37 @@
+"""Unit tests for the admin token revoke view and its audit row."""
+from __future__ import annotations
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import pytest
+
+from netcup_api_filter.api.admin import SESSION_KEY_ADMIN_ID
+from netcup_api_filter.models import ActivityLog, APIToken
+
+
+@pytest.fixture
+def admin_client(app, client, make_account):
+    app.config["WTF_CSRF_ENABLED"] = False
+    admin = make_account("revokeadmin", is_admin=1)
+    with client.session_transaction() as sess:
+        sess[SESSION_KEY_ADMIN_ID] = admin.id
+    return client
+
+
+def test_token_revoke_commits_token_and_audit_row(db, admin_client, make_account, make_realm, make_token):
+    account = make_account("revoke_token_owner")
+    tok, _ = make_token(make_realm(account))
+
+    resp = admin_client.post(f"/admin/tokens/{tok.id}/revoke", data={"reason": "leaked"})
+    assert resp.status_code == 302
+
+    db.session.expire_all()
+    assert db.session.get(APIToken, tok.id).revoked_at is not None
+    log = ActivityLog.query.filter_by(action="token_revoked").one()
+    assert log.token_id == tok.id
+    assert log.account_id == account.id
+    assert "revokeadmin" in log.status_reason
+
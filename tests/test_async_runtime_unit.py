@@ -0,0 +1,338 @@
+"""Unit tests for async_runtime.py and the asyncio Netcup/PowerDNS clients."""
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import httpx
+import pytest
+
+from netcup_api_filter import async_runtime, zone_cache
+from netcup_api_filter.api import ddns_protocols, dns_api
+from netcup_api_filter.async_runtime import AsyncRuntime
+from netcup_api_filter.audit_writer import flush_audit_log
+from netcup_api_filter.backends.base import DNSBackend
+from netcup_api_filter.backends.powerdns import AsyncPowerDNSBackend
+from netcup_api_filter.netcup_client import (
+    AsyncNetcupClient, NetcupAPIError, NetcupClient, get_session_pool,
+)
+
+
+@pytest.fixture
+def runtime():
+    rt = AsyncRuntime(concurrency=2)
+    yield rt
+    rt.shutdown()
+
+
+def _mock_http(monkeypatch, handler):
+    """Route the shared runtime's upstream requests to ``handler``."""
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(async_runtime.get_async_runtime(), "http_client", lambda url: client)
+    return client
+
+
+# =============================================================================
+# AsyncRuntime
+# =============================================================================
+
+def test_run_returns_result_and_raises(runtime):
+    async def _ok():
+        return threading.current_thread().name
+
+    async def _fail():
+        raise ValueError("boom")
+
+    assert runtime.run(_ok()) == "async-upstream"
+    with pytest.raises(ValueError):
+        runtime.run(_fail())
+
+
+def test_submit_fans_out_on_one_thread(runtime):
+    async def _sleep(i):
+        await asyncio.sleep(0.05)
+        return i
+
+    futures = [runtime.submit(_sleep(i)) for i in range(20)]
+    assert [f.result(5) for f in futures] == list(range(20))
+
+
+def test_semaphore_limits_in_flight_calls_per_service(runtime):
+    active = {"now": 0, "max": 0}
+
+    async def _call(service):
+        async with runtime.semaphore(service):
+            active["now"] += 1
+            active["max"] = max(active["max"], active["now"])
+            await asyncio.sleep(0.02)
+            active["now"] -= 1
+
+    async def _all():
+        await asyncio.gather(*(_call("pdns:a") for _ in range(8)))
+
+    runtime.run(_all())
+    assert active["max"] == 2
+    assert runtime.stats()["services"] == 1
+
+
+def test_coalesce_shares_one_call(runtime):
+    calls = []
+
+    async def _fetch():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return ["record"]
+
+    async def _all():
+        return await asyncio.gather(*(runtime.coalesce("zone", _fetch) for _ in range(5)))
+
+    assert runtime.run(_all()) == [["record"]] * 5
+    assert len(calls) == 1
+    assert runtime.stats()["coalesced"] == 4
+
+
+def test_coalesce_propagates_errors_to_all(runtime):
+    async def _fetch():
+        await asyncio.sleep(0.02)
+        raise NetcupAPIError("upstream down")
+
+    async def _all():
+        return await asyncio.gather(*(runtime.coalesce("zone", _fetch) for _ in range(3)),
+                                    return_exceptions=True)
+
+    assert all(isinstance(r, NetcupAPIError) for r in runtime.run(_all()))
+
+
+def test_run_from_loop_thread_is_rejected(runtime):
+    async def _nested():
+        inner = asyncio.sleep(0)
+        runtime.run(inner)
+
+    with pytest.raises(RuntimeError):
+        runtime.run(_nested())
+
+
+def test_shutdown_stops_thread_and_restarts_on_use(runtime):
+    runtime.run(asyncio.sleep(0))
+    thread = runtime._thread
+    runtime.shutdown()
+    assert not thread.is_alive()
+    assert runtime.stats()["running"] is False
+
+    runtime.run(asyncio.sleep(0))
+    assert runtime._thread.is_alive()
+
+
+# =============================================================================
+# AsyncNetcupClient
+# =============================================================================
+
+@pytest.fixture
+def ccp(app, monkeypatch):
+    """In-memory CCP endpoint; returns the list of actions it received."""
+    get_session_pool().reset()
+    zone_cache.clear_cache()
+    actions = []
+    records = [{"id": "1", "hostname": "home", "type": "A", "destination": "192.0.2.1"}]
+
+    async def _handler(request):
+        body = json.loads(request.content)
+        actions.append(body["action"])
+        if body["action"] == "login":
+            data = {"apisessionid": "sid-1"}
+        elif body["action"] == "infoDnsRecords":
+            await asyncio.sleep(0.02)
+            data = {"dnsrecords": [dict(r) for r in records]}
+        elif body["action"] == "updateDnsRecords":
+            records[:] = body["param"]["dnsrecordset"]["dnsrecords"]
+            data = {"dnsrecords": [dict(r) for r in records]}
+        else:
+            data = {}
+        return httpx.Response(200, json={"status": "success", "responsedata": data})
+
+    _mock_http(monkeypatch, _handler)
+    yield actions
+    get_session_pool().reset()
+    zone_cache.clear_cache()
+
+
+def _client():
+    return AsyncNetcupClient("123", "key", "pass", api_url="http://mock-api/", pooled=True)
+
+
+def test_concurrent_reads_share_login_and_fetch(ccp):
+    async def _all():
+        return await asyncio.gather(*(_client().info_dns_records("example.com") for _ in range(5)))
+
+    results = async_runtime.run_async(_all())
+    assert all(r[0]["destination"] == "192.0.2.1" for r in results)
+    assert ccp == ["login", "infoDnsRecords"]
+    assert get_session_pool().stats()["sessions"] == 1
+
+    # Served from the zone cache
+    async_runtime.run_async(_client().info_dns_records("example.com"))
+    assert ccp == ["login", "infoDnsRecords"]
+
+
+def test_update_refreshes_cache(ccp):
+    client = _client()
+    new = [{"id": "1", "hostname": "home", "type": "A", "destination": "198.51.100.1"}]
+    async_runtime.run_async(client.update_dns_records("example.com", new))
+    records = async_runtime.run_async(client.info_dns_records("example.com"))
+
+    assert records == new
+    assert ccp == ["login", "updateDnsRecords"]
+
+
+def test_rejected_session_logs_in_again(app, monkeypatch):
+    get_session_pool().reset()
+    sessions = iter(["stale", "fresh"])
+    seen = []
+
+    def _handler(request):
+        body = json.loads(request.content)
+        if body["action"] == "login":
+            return httpx.Response(200, json={"status": "success",
+                                             "responsedata": {"apisessionid": next(sessions)}})
+        seen.append(body["param"]["apisessionid"])
+        if body["param"]["apisessionid"] == "stale":
+            return httpx.Response(200, json={"status": "error", "statuscode": 4001,
+                                             "longmessage": "The session id is not in a valid format."})
+        return httpx.Response(200, json={"status": "success", "responsedata": {"name": "example.com"}})
+
+    _mock_http(monkeypatch, _handler)
+    assert async_runtime.run_async(_client().info_dns_zone("example.com")) == {"name": "example.com"}
+    assert seen == ["stale", "fresh"]
+    get_session_pool().reset()
+
+
+def test_transport_error_becomes_api_error(monkeypatch):
+    def _handler(request):
+        raise httpx.ConnectError("connection refused")
+
+    _mock_http(monkeypatch, _handler)
+    client = AsyncNetcupClient("123", "key", "pass", api_url="http://mock-api/")
+    with pytest.raises(NetcupAPIError, match="Request failed"):
+        async_runtime.run_async(client.login())
+
+
+def test_login_without_session_id_is_rejected(monkeypatch):
+    get_session_pool().reset()
+
+    def _handler(request):
+        return httpx.Response(200, json={"status": "success", "responsedata": {"apisessionid": ""}})
+
+    _mock_http(monkeypatch, _handler)
+    with pytest.raises(NetcupAPIError, match="no session id"):
+        async_runtime.run_async(_client().info_dns_zone("example.com"))
+    assert get_session_pool().stats()["sessions"] == 0
+
+
+def test_run_upstream_passes_plain_values_through():
+    assert async_runtime.run_upstream([1, 2]) == [1, 2]
+
+    async def _value():
+        return "done"
+
+    assert async_runtime.run_upstream(_value()) == "done"
+
+
+# =============================================================================
+# Handler wiring (ASYNC_UPSTREAM_IO)
+# =============================================================================
+
+NETCUP_CONFIG = {"customer_id": "123", "api_key": "key", "api_password": "pass",
+                 "api_url": "http://mock-api/"}
+
+
+@pytest.fixture
+def upstream_io(monkeypatch):
+    monkeypatch.setattr(async_runtime, "UPSTREAM_IO", True)
+    monkeypatch.setattr(dns_api, "get_setting", lambda key: NETCUP_CONFIG)
+    monkeypatch.setattr(ddns_protocols, "get_setting", lambda key: NETCUP_CONFIG)
+
+
+@pytest.mark.parametrize("module", [dns_api, ddns_protocols])
+def test_handlers_pick_client_by_flag(app, monkeypatch, module):
+    monkeypatch.setattr(module, "get_setting", lambda key: NETCUP_CONFIG)
+    assert type(module.get_netcup_client()) is NetcupClient
+    monkeypatch.setattr(async_runtime, "UPSTREAM_IO", True)
+    assert type(module.get_netcup_client()) is AsyncNetcupClient
+
+
+def test_ddns_unchanged_address_only_reads(ccp, upstream_io):
+    assert ddns_protocols.update_dns_record("example.com", "home", "192.0.2.1", "A") == (True, None, False)
+    assert ccp == ["login", "infoDnsRecords"]
+
+
+def test_ddns_changed_address_is_written(ccp, upstream_io):
+    assert ddns_protocols.update_dns_record("example.com", "home", "198.51.100.7", "A") == (True, None, True)
+    assert ccp == ["login", "infoDnsRecords", "updateDnsRecords"]
+    snapshot = async_runtime.run_async(_client().dns_snapshot("example.com"))
+    assert snapshot.first("home", "A")["destination"] == "198.51.100.7"
+
+
+def test_dns_api_reads_through_async_client(client, ccp, upstream_io, make_account, make_realm, make_token):
+    _tok, plain = make_token(make_realm(make_account("async_reader"), realm_value="home"))
+    resp = client.get("/api/dns/example.com/records", headers={"Authorization": f"Bearer {plain}"})
+    flush_audit_log()
+    assert resp.status_code == 200
+    assert [r["destination"] for r in resp.get_json()["records"]] == ["192.0.2.1"]
+    assert ccp == ["login", "infoDnsRecords"]
+
+
+# =============================================================================
+# AsyncPowerDNSBackend
+# =============================================================================
+
+def test_powerdns_list_and_write(monkeypatch):
+    requests = []
+    zone = {"rrsets": [
+        {"name": "home.example.com.", "type": "A", "ttl": 60,
+         "records": [{"content": "192.0.2.1", "disabled": False}]},
+    ]}
+
+    async def _handler(request):
+        requests.append((request.method, request.url.path, request.headers["X-API-Key"]))
+        if request.method == "GET":
+            await asyncio.sleep(0.02)
+            return httpx.Response(200, json=zone)
+        return httpx.Response(204)
+
+    _mock_http(monkeypatch, _handler)
+    backend = AsyncPowerDNSBackend({"api_url": "http://pdns:8081/", "api_key": "secret"})
+
+    async def _all():
+        return await asyncio.gather(*(backend.list_records("example.com") for _ in range(4)))
+
+    listings = async_runtime.run_async(_all())
+    assert all(r == [{"id": "home.example.com.:A", "hostname": "home.example.com", "type": "A",
+                      "destination": "192.0.2.1", "priority": None, "ttl": 60}] for r in listings)
+    assert requests == [("GET", "/api/v1/servers/localhost/zones/example.com.", "secret")]
+
+    created = async_runtime.run_async(backend.create_record(
+        "example.com", {"hostname": "nas", "type": "A", "destination": "192.0.2.4"}))
+    assert created["id"] == "nas.example.com.:A"
+    assert async_runtime.run_async(backend.delete_record("example.com", "nas.example.com.:A")) is True
+    assert [r[0] for r in requests[1:]] == ["PATCH", "PATCH"]
+
+
+def test_powerdns_snapshot_and_rrset_are_coroutines(monkeypatch):
+    zone = {"rrsets": [
+        {"name": "home.example.com.", "type": "A", "ttl": 60,
+         "records": [{"content": "192.0.2.1", "disabled": False}]},
+    ]}
+    _mock_http(monkeypatch, lambda request: httpx.Response(200, json=zone))
+    backend = AsyncPowerDNSBackend({"api_url": "http://pdns:8081/", "api_key": "secret"})
+
+    # Standalone: none of the blocking DNSBackend helpers are inherited
+    assert not isinstance(backend, DNSBackend)
+    snapshot = async_runtime.run_async(backend.snapshot("example.com"))
+    assert snapshot.first("home.example.com", "A")["destination"] == "192.0.2.1"
+    rrset = async_runtime.run_async(backend.get_rrset("example.com", "home.example.com", "A"))
+    assert [r["destination"] for r in rrset] == ["192.0.2.1"]
@@ -0,0 +1,138 @@
+"""Unit tests for audit_writer.py — batched ActivityLog writes."""
+from __future__ import annotations
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import pytest
+from sqlalchemy import event
+
+from netcup_api_filter import audit_writer, lifecycle
+from netcup_api_filter.audit_writer import AuditLogWriter
+from netcup_api_filter.models import ActivityLog
+from netcup_api_filter.token_auth import authenticate_token, log_activity
+
+
+def _entry(action="api_call", is_attack=0, **kw) -> ActivityLog:
+    return ActivityLog(action=action, source_ip="192.0.2.1", status="success",
+                       is_attack=is_attack, **kw)
+
+
+def _count(db) -> int:
+    return ActivityLog.query.count()
+
+
+@pytest.fixture
+def writer(app):
+    w = AuditLogWriter(mode="batched", overflow="sync", max_queue=100, batch_size=50, interval=3600)
+    w.bind(app)
+    return w
+
+
+def test_batched_rows_written_on_flush_with_one_insert(app, db, writer):
+    inserts: list[bool] = []
+
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("INSERT INTO ACTIVITY_LOG"):
+            inserts.append(executemany)
+
+    for i in range(10):
+        writer.write(_entry(record_name=f"host{i}"))
+    assert _count(db) == 0
+    assert writer.pending() == 10
+
+    event.listen(db.engine, "before_cursor_execute", _before)
+    try:
+        assert writer.flush() == 10
+    finally:
+        event.remove(db.engine, "before_cursor_execute", _before)
+
+    assert _count(db) == 10
+    assert len(inserts) == 1
+    assert ActivityLog.query.filter_by(record_name="host3").one().created_at is not None
+
+
+def test_attack_rows_are_written_synchronously(app, db, writer):
+    writer.write(_entry(action="api_auth", is_attack=1, error_code="token_hash_mismatch"))
+    assert writer.pending() == 0
+    assert _count(db) == 1
+
+
+def test_sync_mode_writes_everything_immediately(app, db):
+    w = AuditLogWriter(mode="sync", max_queue=10, interval=3600)
+    w.bind(app)
+    w.write(_entry())
+    assert _count(db) == 1
+
+
+def test_full_queue_falls_back_to_sync_write(app, db):
+    w = AuditLogWriter(mode="batched", overflow="sync", max_queue=2, batch_size=50, interval=3600)
+    w.bind(app)
+    for _ in range(3):
+        w.write(_entry())
+    assert w.pending() == 2
+    assert _count(db) == 1
+    assert w.overflowed == 1
+
+    w.flush()
+    assert _count(db) == 3
+
+
+def test_full_queue_drop_policy_counts_drops(app, db):
+    w = AuditLogWriter(mode="batched", overflow="drop", max_queue=2, batch_size=50, interval=3600)
+    w.bind(app)
+    for _ in range(5):
+        w.write(_entry())
+    assert w.dropped == 3
+    w.flush()
+    assert _count(db) == 2
+
+
+def test_log_activity_uses_writer(app, db, make_account, make_realm, make_token):
+    _tok, plain = make_token(make_realm(make_account("audit_log_activity")))
+    audit_writer.flush_audit_log()
+    before = _count(db)
+    auth = authenticate_token(plain)
+
+    with app.test_request_context("/api/dns/example.com/records"):
+        log_activity(auth, action="dns_list", operation="read", domain="example.com",
+                     source_ip="192.0.2.50")
+    assert _count(db) == before
+
+    audit_writer.flush_audit_log()
+    row = ActivityLog.query.filter_by(action="dns_list").one()
+    assert row.source_ip == "192.0.2.50"
+    assert row.account_id is not None
+
+
+def test_missing_token_request_is_logged(client, db):
+    audit_writer.flush_audit_log()
+    response = client.get("/api/dns/example.com/records")
+    assert response.status_code == 401
+
+    audit_writer.flush_audit_log()
+    assert ActivityLog.query.filter_by(error_code="missing_token").count() == 1
+
+
+def test_shutdown_hooks_drain_queue(app, db):
+    audit_writer.flush_audit_log()
+    before = _count(db)
+    audit_writer.write_activity(_entry(action="shutdown_drain"))
+    assert audit_writer.get_writer_stats()["pending"] == 1
+
+    lifecycle.reset_after_fork()
+    lifecycle.run_shutdown_hooks()
+    lifecycle.reset_after_fork()
+    assert _count(db) == before + 1
+
+
+def test_disposing_engine_unbinds_writer(app, db, writer):
+    writer.write(_entry(action="after_dispose"))
+    db.engine.dispose()
+    assert writer.flush() == 0
+    assert writer.pending() == 1
+
+    writer.clear()
+    assert writer.pending() == 0
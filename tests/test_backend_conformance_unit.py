@@ -0,0 +1,512 @@
+"""Conformance suite for DNSBackend.apply_batch().
+
+Every backend runs against a local mock of its upstream API. A new backend
+joins by adding a factory to BACKENDS: ``factory(monkeypatch) -> (backend,
+server)``, where the server seeds ZONE with SEED, counts requests and can
+reject writes. Backends that set ``native`` must apply a batch with a single
+upstream write. The Netcup single-record methods, which share apply_batch()'s
+record lookup, are checked at the end.
+"""
+from __future__ import annotations
+
+import itertools
+import json
+import os
+import sys
+import threading
+from typing import Any, Dict, List, Set, Tuple
+from unittest.mock import MagicMock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import httpx
+import pytest
+
+from netcup_api_filter import async_runtime, netcup_client, single_flight, zone_cache
+from netcup_api_filter.async_runtime import run_async
+from netcup_api_filter.backends.base import BackendError, DNSBackend
+from netcup_api_filter.backends.netcup import NetcupBackend
+from netcup_api_filter.backends.powerdns import AsyncPowerDNSBackend, PowerDNSBackend
+from netcup_api_filter.circuit_breaker import reset_breakers
+
+ZONE = "example.com"
+
+# (hostname, type, destination)
+SEED = [
+    ("vpn", "A", "192.0.2.1"),
+    ("vpn", "AAAA", "2001:db8::1"),
+    ("www", "A", "192.0.2.2"),
+    ("@", "TXT", "v=spf1 -all"),
+]
+
+
+def _relative(hostname: str) -> str:
+    """Zone-relative hostname of a listed record."""
+    name = hostname.rstrip(".").lower()
+    if name in ("", "@", ZONE):
+        return "@"
+    return name[: -len(ZONE) - 1] if name.endswith("." + ZONE) else name
+
+
+# =============================================================================
+# Mock upstreams
+# =============================================================================
+
+class FakeCCP:
+    """Netcup CCP endpoint: sessions, infoDnsRecords and updateDnsRecords."""
+
+    def __init__(self):
+        self.records = [
+            {"id": str(1000 + n), "hostname": h, "type": t, "destination": d,
+             "priority": "", "deleterecord": False, "state": "yes"}
+            for n, (h, t, d) in enumerate(SEED)
+        ]
+        self.next_id = 2000
+        self.calls: List[str] = []
+        self.reject_writes = False
+        self._lock = threading.Lock()
+
+    def __call__(self, url, json=None, timeout=None):
+        action, param = json["action"], json["param"]
+        with self._lock:
+            self.calls.append(action)
+            if action == "login":
+                return _ccp_response({"status": "success", "responsedata": {"apisessionid": "sid"}})
+            if action == "logout":
+                return _ccp_response({"status": "success", "responsedata": ""})
+            if action == "infoDnsRecords":
+                return _ccp_response({"status": "success", "responsedata": {"dnsrecords": self.records}})
+            if action == "updateDnsRecords":
+                if self.reject_writes:
+                    return _ccp_response({"status": "error", "statuscode": 5028,
+                                          "longmessage": "Invalid destination"})
+                self._update(param["dnsrecordset"]["dnsrecords"])
+                return _ccp_response({"status": "success", "responsedata": {"dnsrecords": self.records}})
+            raise AssertionError(f"unexpected action {action}")
+
+    def _update(self, entries):
+        for entry in entries:
+            by_id = {r["id"]: r for r in self.records}
+            if entry.get("deleterecord"):
+                self.records = [r for r in self.records if r["id"] != str(entry.get("id"))]
+            elif entry.get("id") and str(entry["id"]) in by_id:
+                by_id[str(entry["id"])].update(
+                    {k: v for k, v in entry.items() if k in ("hostname", "type", "destination", "priority")}
+                )
+            elif not entry.get("id"):
+                self.next_id += 1
+                self.records.append(dict(entry, id=str(self.next_id), deleterecord=False, state="yes"))
+
+    @property
+    def writes(self) -> int:
+        return self.calls.count("updateDnsRecords")
+
+    @property
+    def requests(self) -> int:
+        return sum(1 for c in self.calls if c not in ("login", "logout"))
+
+    def state(self) -> Set[Tuple[str, str, str]]:
+        return {(_relative(r["hostname"]), r["type"], r["destination"]) for r in self.records}
+
+
+def _ccp_response(body):
+    resp = MagicMock(spec=httpx.Response)
+    resp.status_code = 200
+    resp.raise_for_status = MagicMock()
+    resp.json = MagicMock(return_value=json.loads(json.dumps(body)))
+    return resp
+
+
+class FakePowerDNS:
+    """PowerDNS zone endpoint: GET (whole zone, ignoring rrset filters) and PATCH."""
+
+    def __init__(self):
+        self.rrsets: Dict[Tuple[str, str], List[str]] = {}
+        for hostname, rtype, destination in SEED:
+            name = f"{ZONE}." if hostname == "@" else f"{hostname}.{ZONE}."
+            self.rrsets.setdefault((name, rtype), []).append(destination)
+        self.calls: List[str] = []
+        self.reject_writes = False
+        self._lock = threading.Lock()
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        with self._lock:
+            self.calls.append(request.method)
+            if request.method == "GET":
+                return httpx.Response(200, json={"rrsets": [
+                    {"name": name, "type": rtype, "ttl": 60,
+                     "records": [{"content": c, "disabled": False} for c in contents]}
+                    for (name, rtype), contents in self.rrsets.items()
+                ]})
+            if self.reject_writes:
+                return httpx.Response(422, json={"error": "Record content malformed"})
+            rrsets = json.loads(request.content)["rrsets"]
+            keys = [(r["name"].lower(), r["type"]) for r in rrsets]
+            if len(set(keys)) != len(keys):
+                return httpx.Response(422, json={"error": "Duplicate RRset"})
+            for rrset, key in zip(rrsets, keys):
+                if rrset["changetype"] == "DELETE":
+                    self.rrsets.pop(key, None)
+                else:
+                    self.rrsets[key] = [r["content"] for r in rrset["records"]]
+            return httpx.Response(204)
+
+    @property
+    def writes(self) -> int:
+        return self.calls.count("PATCH")
+
+    @property
+    def requests(self) -> int:
+        return len(self.calls)
+
+    def state(self) -> Set[Tuple[str, str, str]]:
+        return {(_relative(name), rtype, c) for (name, rtype), contents in self.rrsets.items() for c in contents}
+
+
+class MemoryBackend(DNSBackend):
+    """Per-record backend on an in-memory zone; uses the generic apply_batch()."""
+
+    def __init__(self):
+        super().__init__({})
+        self.records = [
+            {"id": str(n + 1), "hostname": h, "type": t, "destination": d}
+            for n, (h, t, d) in enumerate(SEED)
+        ]
+        self.calls: List[str] = []
+        self.reject_writes = False
+        self._next_id = 100
+
+    # The backend is its own "server"
+    @property
+    def writes(self) -> int:
+        return sum(1 for c in self.calls if c != "list")
+
+    @property
+    def requests(self) -> int:
+        return len(self.calls)
+
+    def state(self) -> Set[Tuple[str, str, str]]:
+        return {(r["hostname"], r["type"], r["destination"]) for r in self.records}
+
+    def _write(self, call):
+        self.calls.append(call)
+        if self.reject_writes:
+            raise BackendError("write rejected")
+
+    def test_connection(self):
+        return True, "ok"
+
+    def list_zones(self):
+        return [ZONE]
+
+    def validate_zone_access(self, zone):
+        return True, ""
+
+    def list_records(self, zone):
+        self.calls.append("list")
+        return [self.normalize_record(dict(r)) for r in self.records]
+
+    def create_record(self, zone, record):
+        self._write("create")
+        self._next_id += 1
+        self.records.append({"id": str(self._next_id), "hostname": record["hostname"],
+                             "type": record["type"], "destination": record["destination"]})
+        return self.normalize_record(dict(self.records[-1]))
+
+    def update_record(self, zone, record_id, record):
+        self._write("update")
+        for rec in self.records:
+            if rec["id"] == record_id:
+                rec.update({k: record[k] for k in ("hostname", "type", "destination")})
+                return self.normalize_record(dict(rec))
+        raise BackendError(f"Record {record_id} not found")
+
+    def delete_record(self, zone, record_id):
+        self._write("delete")
+        if not any(r["id"] == record_id for r in self.records):
+            raise BackendError(f"Record {record_id} not found")
+        self.records = [r for r in self.records if r["id"] != record_id]
+        return True
+
+    def get_zone_info(self, zone):
+        return {}
+
+
+class _SyncAdapter:
+    """Runs an asyncio backend's coroutines on the shared loop."""
+
+    def __init__(self, backend):
+        self._backend = backend
+
+    def __getattr__(self, name):
+        attr = getattr(self._backend, name)
+        if not callable(attr):
+            return attr
+        return lambda *args, **kwargs: run_async(attr(*args, **kwargs))
+
+
+# =============================================================================
+# Backends under test
+# =============================================================================
+
+def _memory(monkeypatch):
+    backend = MemoryBackend()
+    return backend, backend
+
+
+# Each backend instance gets its own mock upstream, routed by API URL
+_servers: Dict[str, Any] = {}
+_serial = itertools.count()
+
+
+def _ccp_http(url):
+    http = MagicMock()
+    http.post = MagicMock(side_effect=_servers[url])
+    return http
+
+
+def _netcup(monkeypatch):
+    monkeypatch.setattr(zone_cache.get_zone_cache(), "ttl_seconds", 0)
+    monkeypatch.setattr(netcup_client, "get_http_client", _ccp_http)
+    # Own session pool: keeps the process-wide pool's counters untouched
+    monkeypatch.setattr(netcup_client, "_session_pool", netcup_client.NetcupSessionPool())
+    url = f"http://ccp-{next(_serial)}.test/"
+    server = _servers[url] = FakeCCP()
+    backend = NetcupBackend({"customer_id": "123", "api_key": "key", "api_password": "pass", "api_url": url})
+    return backend, server
+
+
+def _powerdns(monkeypatch):
+    server = FakePowerDNS()
+    backend = PowerDNSBackend({"api_url": "http://pdns.test:8081", "api_key": "k"})
+    backend._client = httpx.Client(base_url=backend.api_url, transport=httpx.MockTransport(server))
+    backend._client_pid = os.getpid()
+    return backend, server
+
+
+def _async_powerdns(monkeypatch):
+    monkeypatch.setattr(async_runtime.get_async_runtime(), "http_client",
+                        lambda url: httpx.AsyncClient(transport=httpx.MockTransport(_servers[url])))
+    url = f"http://pdns-{next(_serial)}.test:8081"
+    server = _servers[url] = FakePowerDNS()
+    backend = AsyncPowerDNSBackend({"api_url": url, "api_key": "k"})
+    return _SyncAdapter(backend), server
+
+
+# (id, factory, native)
+BACKENDS = [
+    ("generic", _memory, False),
+    ("netcup", _netcup, True),
+    ("powerdns", _powerdns, True),
+    ("powerdns-async", _async_powerdns, True),
+]
+
+
+@pytest.fixture(params=BACKENDS, ids=[b[0] for b in BACKENDS])
+def backend_case(request, monkeypatch):
+    reset_breakers()
+    single_flight.reset_single_flight()
+    _, factory, native = request.param
+    backend, server = factory(monkeypatch)
+    yield backend, server, native, lambda: factory(monkeypatch)
+    reset_breakers()
+    _servers.clear()
+
+
+def _ids(backend) -> Dict[Tuple[str, str], str]:
+    """(relative hostname, type) -> record id of the seeded zone."""
+    return {(_relative(r["hostname"]), r["type"]): r["id"] for r in backend.list_records(ZONE)}
+
+
+def _mixed_ops(backend) -> List[Dict[str, Any]]:
+    ids = _ids(backend)
+    return [
+        {"op": "update", "id": ids[("vpn", "A")], "hostname": "vpn", "type": "A",
+         "destination": "198.51.100.1"},
+        {"op": "delete", "id": ids[("www", "A")]},
+        {"op": "create", "hostname": "api", "type": "A", "destination": "192.0.2.10"},
+        {"op": "create", "hostname": "api", "type": "AAAA", "destination": "2001:db8::10"},
+    ]
+
+
+# =============================================================================
+# Contract
+# =============================================================================
+
+def test_results_follow_ops(backend_case):
+    backend, server, _, _ = backend_case
+    ops = _mixed_ops(backend)
+
+    results = backend.apply_batch(ZONE, ops)
+
+    assert [(r["index"], r["op"], r["status"]) for r in results] == [
+        (0, "update", "updated"), (1, "delete", "deleted"), (2, "create", "created"), (3, "create", "created"),
+    ]
+    assert results[1]["record_id"] == str(ops[1]["id"])
+    for result, op in zip(results[2:], ops[2:]):
+        record = result["record"]
+        assert (_relative(record["hostname"]), record["type"], record["destination"]) == \
+            (op["hostname"], op["type"], op["destination"])
+    assert server.state() == {
+        ("vpn", "A", "198.51.100.1"), ("vpn", "AAAA", "2001:db8::1"), ("@", "TXT", "v=spf1 -all"),
+        ("api", "A", "192.0.2.10"), ("api", "AAAA", "2001:db8::10"),
+    }
+
+
+def test_batch_matches_ops_applied_one_by_one(backend_case):
+    backend, server, _, factory = backend_case
+    reference, reference_server = factory()
+    ops = _mixed_ops(backend) + [
+        {"op": "update", "id": _ids(backend)[("vpn", "AAAA")], "hostname": "vpn", "type": "AAAA",
+         "destination": "2001:db8::2"},
+        {"op": "create", "hostname": "api", "type": "A", "destination": "192.0.2.11"},
+    ]
+
+    results = backend.apply_batch(ZONE, ops)
+    expected = [DNSBackend.apply_batch(reference, ZONE, [op])[0]["status"] for op in ops]
+
+    assert [r["status"] for r in results] == expected
+    assert server.state() == reference_server.state()
+
+
+def test_invalid_ops_fail_alone(backend_case):
+    backend, server, _, _ = backend_case
+    results = backend.apply_batch(ZONE, [
+        {"op": "create", "hostname": "api", "type": "A"},
+        {"op": "rename", "id": "1"},
+        {"op": "create", "hostname": "api", "type": 1, "destination": "192.0.2.11"},
+        {"op": "create", "hostname": "api", "type": "A", "destination": "192.0.2.10"},
+    ])
+
+    assert [r["status"] for r in results] == ["failed", "failed", "failed", "created"]
+    assert all(r["error"] for r in results[:3])
+    assert ("api", "A", "192.0.2.10") in server.state()
+
+
+def test_rejected_write_fails_every_op(backend_case):
+    backend, server, _, _ = backend_case
+    ops = _mixed_ops(backend)
+    before = server.state()
+    server.reject_writes = True
+
+    results = backend.apply_batch(ZONE, ops)
+
+    assert [r["status"] for r in results] == ["failed"] * len(ops)
+    assert all(r["error"] for r in results)
+    assert server.state() == before
+
+
+def test_empty_batch_writes_nothing(backend_case):
+    backend, server, _, _ = backend_case
+    assert backend.apply_batch(ZONE, []) == []
+    assert server.writes == 0
+
+
+def test_invalid_rrset_changes_write_nothing(backend_case):
+    backend, server, _, _ = backend_case
+    before = server.state()
+    for change in ({"hostname": "vpn", "changetype": "DELETE"},
+                   {"hostname": "vpn", "type": None, "changetype": "DELETE"},
+                   {"hostname": "vpn", "type": "A", "changetype": "ADD"}):
+        with pytest.raises(BackendError):
+            backend.apply_changes(ZONE, [
+                {"hostname": "www", "type": "A", "changetype": "DELETE"},
+                change,
+            ])
+    assert server.writes == 0
+    assert server.state() == before
+
+
+# =============================================================================
+# Request counts
+# =============================================================================
+
+BATCH_SIZE = 200
+
+
+def test_native_batch_is_one_write(backend_case):
+    backend, server, native, _ = backend_case
+    if not native:
+        pytest.skip("generic fallback writes per record")
+    ops = [{"op": "create", "hostname": f"host{n}", "type": "A", "destination": f"10.0.{n // 250}.{n % 250}"}
+           for n in range(BATCH_SIZE)]
+
+    results = backend.apply_batch(ZONE, ops)
+
+    assert all(r["status"] == "created" for r in results)
+    assert server.writes == 1
+    assert server.requests <= 2  # at most one read to resolve record IDs
+    assert len(server.state()) == len(SEED) + BATCH_SIZE
+
+
+def test_batch_requests_do_not_grow_with_size(backend_case):
+    backend, server, native, factory = backend_case
+    if not native:
+        pytest.skip("generic fallback writes per record")
+    backend.apply_batch(ZONE, [{"op": "create", "hostname": "a", "type": "A", "destination": "10.0.0.1"}])
+    small = server.requests
+
+    other, other_server = factory()
+    other.apply_batch(ZONE, [{"op": "create", "hostname": f"h{n}", "type": "A", "destination": "10.0.0.1"}
+                             for n in range(50)])
+    assert other_server.requests == small
+
+
+# =============================================================================
+# Netcup single-record writes (share record lookup with apply_batch)
+# =============================================================================
+
+@pytest.fixture
+def netcup_case(monkeypatch):
+    reset_breakers()
+    single_flight.reset_single_flight()
+    yield _netcup(monkeypatch)
+    reset_breakers()
+    _servers.clear()
+
+
+def test_netcup_delete_flags_only_the_records_hostname_and_type(netcup_case):
+    backend, server = netcup_case
+    record_id = _ids(backend)[("vpn", "A")]
+    sent = []
+    update = backend.client.update_dns_records
+    backend.client.update_dns_records = lambda zone, records: sent.append(records) or update(zone, records)
+
+    assert backend.delete_record(ZONE, record_id) is True
+
+    # The CCP deletes what an entry flagged deleterecord names
+    assert len(sent) == 1 and len(sent[0]) == 1
+    entry = sent[0][0]
+    assert (entry["id"], entry["hostname"], entry["type"], entry["deleterecord"]) == (record_id, "vpn", "A", True)
+    assert server.state() == {r for r in SEED if r[:2] != ("vpn", "A")}
+
+
+def test_netcup_delete_of_unknown_id_fails(netcup_case):
+    backend, server = netcup_case
+    with pytest.raises(BackendError, match="not found"):
+        backend.delete_record(ZONE, "9999")
+    assert server.writes == 0
+
+
+def test_netcup_update_without_id_matches_hostname_and_type(netcup_case):
+    backend, server = netcup_case
+    record_id = _ids(backend)[("vpn", "AAAA")]
+
+    backend.update_record(ZONE, "", {"hostname": "vpn", "type": "AAAA", "destination": "2001:db8::99"})
+
+    assert ("vpn", "AAAA", "2001:db8::99") in server.state()
+    assert ("vpn", "AAAA", "2001:db8::1") not in server.state()
+    # The matched record keeps its id; nothing else changed
+    assert _ids(backend)[("vpn", "AAAA")] == record_id
+    assert len(server.state()) == len(SEED)
+
+
+def test_netcup_update_prefers_the_id_over_hostname_and_type(netcup_case):
+    backend, server = netcup_case
+    www = _ids(backend)[("www", "A")]
+
+    # Same hostname/type as the vpn A record, but the id names www
+    backend.update_record(ZONE, www, {"hostname": "vpn", "type": "A", "destination": "198.51.100.7"})
+
+    assert server.state() == {("vpn", "A", "192.0.2.1"), ("vpn", "AAAA", "2001:db8::1"),
+                              ("@", "TXT", "v=spf1 -all"), ("vpn", "A", "198.51.100.7")}
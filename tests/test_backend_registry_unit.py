@@ -0,0 +1,100 @@
+"""Unit tests for backends/registry.py — cached backend instances per service."""
+from __future__ import annotations
+
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import pytest
+
+from netcup_api_filter.backends import registry
+from netcup_api_filter.backends.base import BackendError
+from netcup_api_filter.backends.registry import (
+    evict_backend,
+    get_backend_for_realm,
+    instantiate_backend,
+)
+from netcup_api_filter.models import BackendProvider, BackendService, OwnerTypeEnum
+
+
+@pytest.fixture
+def service(db):
+    registry.clear_backend_cache()
+    owner_type = OwnerTypeEnum.query.filter_by(owner_code=OwnerTypeEnum.USER).first()
+    if owner_type is None:
+        owner_type = OwnerTypeEnum(owner_code=OwnerTypeEnum.USER, display_name="User")
+        db.session.add(owner_type)
+    provider = BackendProvider.query.filter_by(provider_code="powerdns").first()
+    if provider is None:
+        provider = BackendProvider(provider_code="powerdns", display_name="PowerDNS", config_schema="{}")
+        db.session.add(provider)
+    db.session.flush()
+    svc = BackendService(
+        provider_id=provider.id,
+        service_name="pdns-test",
+        display_name="PowerDNS test",
+        owner_type_id=owner_type.id,
+        config=json.dumps({"api_url": "http://pdns:8081", "api_key": "secret"}),
+        is_active=True,
+    )
+    db.session.add(svc)
+    db.session.commit()
+    yield svc
+    registry.clear_backend_cache()
+
+
+def test_backend_is_reused_with_its_http_client(service):
+    backend = instantiate_backend(service)
+    client = backend.client
+    again = instantiate_backend(service)
+    assert again is backend
+    assert again.client is client
+    assert registry.get_backend_cache_stats()["hits"] == 1
+
+
+def test_config_edit_builds_new_backend(service, db):
+    backend = instantiate_backend(service)
+    service.config = json.dumps({"api_url": "http://pdns2:8081", "api_key": "secret"})
+    db.session.commit()
+
+    rebuilt = instantiate_backend(service)
+    assert rebuilt is not backend
+    assert rebuilt.api_url == "http://pdns2:8081"
+
+
+def test_provider_change_builds_new_backend(service, db):
+    backend = instantiate_backend(service)
+    service.provider.description = "edited"
+    db.session.commit()
+    assert instantiate_backend(service) is not backend
+
+
+def test_evict_drops_cached_backend(service):
+    backend = instantiate_backend(service)
+    evict_backend(service.id)
+    assert instantiate_backend(service) is not backend
+
+
+def test_invalid_config_is_not_cached(service, db):
+    service.config = "{not json"
+    db.session.commit()
+    with pytest.raises(BackendError):
+        instantiate_backend(service)
+    assert registry.get_backend_cache_stats()["entries"] == 0
+
+
+def test_realm_resolution_checks_state_before_cache(service, db, make_account, make_realm):
+    account = make_account("byod_user")
+    service.owner_id = account.id
+    db.session.commit()
+    realm = make_realm(account, user_backend_id=service.id)
+
+    backend = get_backend_for_realm(realm)
+    assert get_backend_for_realm(realm) is backend
+
+    service.is_active = False
+    db.session.commit()
+    with pytest.raises(BackendError, match="disabled"):
+        get_backend_for_realm(realm)
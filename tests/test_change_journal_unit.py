@@ -0,0 +1,181 @@
+"""Unit tests for change_journal.py and GET /api/dns/<domain>/changes."""
+from __future__ import annotations
+
+import os
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import pytest
+
+from netcup_api_filter import change_journal, zone_cache
+from netcup_api_filter.api import dns_api
+from netcup_api_filter.audit_writer import flush_audit_log
+from netcup_api_filter.models import DnsChange
+from netcup_api_filter.netcup_client import NetcupClient
+
+NS = "netcup:test:1"
+
+
+def _zone():
+    return [
+        {"id": "1", "hostname": "vpn", "type": "A", "destination": "192.0.2.1", "priority": "0"},
+        {"id": "2", "hostname": "vpn", "type": "AAAA", "destination": "2001:db8::1", "priority": "0"},
+        {"id": "3", "hostname": "@", "type": "MX", "destination": "mail.example.com", "priority": "10"},
+    ]
+
+
+@pytest.fixture
+def journal(app, db):
+    return change_journal.get_change_journal()
+
+
+def _summary(changeset):
+    return [(c["change"], c["record"]["id"], c["record"]["destination"]) for c in changeset.changes]
+
+
+# =============================================================================
+# ChangeJournal
+# =============================================================================
+
+def test_first_read_journals_records_as_created(journal):
+    journal.observe_zone(NS, "example.com", _zone())
+    changes = journal.changes_since(NS, "example.com", 0)
+    assert changes.reset is True
+    assert [c["record"]["id"] for c in changes.changes] == ["1", "2", "3"]
+    assert changes.changes[2]["record"] == {"id": "3", "hostname": "@", "type": "MX",
+                                            "destination": "mail.example.com", "priority": "10"}
+    assert DnsChange.query.count() == 3
+
+
+def test_changes_since_cursor(journal):
+    journal.observe_zone(NS, "example.com", _zone())
+    cursor = journal.changes_since(NS, "example.com", 0).cursor
+
+    zone = _zone()
+    zone[0]["destination"] = "198.51.100.1"
+    del zone[1]
+    zone.append({"id": "4", "hostname": "nas", "type": "A", "destination": "192.0.2.4"})
+    journal.observe_zone(NS, "example.com", zone)
+
+    changes = journal.changes_since(NS, "example.com", cursor)
+    assert changes.reset is False
+    assert changes.cursor == cursor + 3
+    assert _summary(changes) == [
+        ("updated", "1", "198.51.100.1"),
+        ("deleted", "2", "2001:db8::1"),
+        ("created", "4", "192.0.2.4"),
+    ]
+    # Unchanged zone: nothing new
+    journal.observe_zone(NS, "example.com", zone)
+    assert journal.changes_since(NS, "example.com", changes.cursor).changes == []
+
+
+def test_changes_collapse_per_record(journal):
+    journal.observe_zone(NS, "example.com", _zone())
+    cursor = journal.changes_since(NS, "example.com", 0).cursor
+
+    zone = _zone()
+    for destination in ("198.51.100.1", "198.51.100.2"):
+        zone[0]["destination"] = destination
+        journal.observe_zone(NS, "example.com", zone)
+    journal.observe_zone(NS, "example.com", zone + [{"id": "9", "hostname": "tmp", "type": "A",
+                                                     "destination": "192.0.2.9"}])
+    journal.observe_zone(NS, "example.com", zone)
+
+    assert _summary(journal.changes_since(NS, "example.com", cursor)) == [
+        ("updated", "1", "198.51.100.2"),
+    ]
+
+
+def test_partial_writes_journal_updates_and_deletes(journal):
+    journal.observe_zone(NS, "example.com", _zone())
+    cursor = journal.changes_since(NS, "example.com", 0).cursor
+
+    journal.observe_changes(NS, "example.com", [
+        {"id": "1", "hostname": "vpn", "type": "A", "destination": "198.51.100.1", "priority": "0"},
+        {"id": "2", "deleterecord": True},
+        {"id": "3", "destination": "mx.example.com"},
+        {"hostname": "new", "type": "A", "destination": "192.0.2.5"},
+    ])
+    assert _summary(journal.changes_since(NS, "example.com", cursor)) == [
+        ("updated", "1", "198.51.100.1"),
+        ("deleted", "2", "2001:db8::1"),
+    ]
+
+
+def test_pruned_cursor_gets_reset(journal, db):
+    journal.observe_zone(NS, "example.com", _zone())
+    cursor = journal.changes_since(NS, "example.com", 0).cursor
+    zone = _zone()
+    zone[0]["destination"] = "198.51.100.1"
+    journal.observe_zone(NS, "example.com", zone)
+
+    DnsChange.query.filter(DnsChange.id <= cursor + 1).update(
+        {"changed_at": datetime.utcnow() - timedelta(days=365)})
+    db.session.commit()
+    journal._pruned_at = 0.0
+    zone[0]["destination"] = "198.51.100.2"
+    journal.observe_zone(NS, "example.com", zone)
+
+    changes = journal.changes_since(NS, "example.com", cursor)
+    assert changes.reset is True
+    assert changes.changes[0]["record"]["destination"] == "198.51.100.2"
+
+
+# =============================================================================
+# Endpoint
+# =============================================================================
+
+@pytest.fixture
+def upstream(app, db, monkeypatch):
+    zone_cache.clear_cache()
+    client = NetcupClient("123", "key", "pass", api_url="http://mock-api/", pooled=True)
+    state = {"zone": _zone() + [{"id": "5", "hostname": "www", "type": "A", "destination": "192.0.2.80"}]}
+    state["client"] = client
+    monkeypatch.setattr(client, "_session_request", lambda action, param: {
+        "responsedata": {"dnsrecords": [dict(r) for r in state["zone"]]}})
+    monkeypatch.setattr(dns_api, "get_netcup_client", lambda: client)
+    yield state
+    flush_audit_log()
+    zone_cache.clear_cache()
+
+
+@pytest.fixture
+def bearer(make_account, make_realm, make_token):
+    _tok, plain = make_token(make_realm(make_account("changes_user")))
+    return {"Authorization": f"Bearer {plain}"}
+
+
+def test_feed_returns_realm_scoped_changes(client, upstream, bearer):
+    body = client.get("/api/dns/example.com/changes", headers=bearer).get_json()
+    assert body["reset"] is True
+    # Host realm vpn.example.com with A/AAAA: no MX, no www
+    assert [c["record"]["id"] for c in body["changes"]] == ["1", "2"]
+
+    upstream["zone"][0]["destination"] = "198.51.100.1"
+    upstream["zone"][3]["destination"] = "198.51.100.80"
+    zone_cache.clear_cache()
+
+    response = client.get(f"/api/dns/example.com/changes?since={body['cursor']}", headers=bearer)
+    assert response.status_code == 200
+    delta = response.get_json()
+    assert delta["reset"] is False
+    assert delta["cursor"] > body["cursor"]
+    assert [(c["change"], c["record"]["id"]) for c in delta["changes"]] == [("updated", "1")]
+
+
+def test_cached_zone_reads_are_not_journaled(client, upstream, bearer):
+    body = client.get("/api/dns/example.com/changes", headers=bearer).get_json()
+
+    # A write journaled after the zone was cached must not be undone by the cached copy
+    written = dict(upstream["zone"][0], destination="198.51.100.9")
+    change_journal.get_change_journal().observe_changes(upstream["client"].cache_namespace, "example.com", [written])
+
+    delta = client.get(f"/api/dns/example.com/changes?since={body['cursor']}", headers=bearer).get_json()
+    assert [(c["change"], c["record"]["destination"]) for c in delta["changes"]] == [("updated", "198.51.100.9")]
+
+
+def test_feed_rejects_bad_cursor(client, upstream, bearer):
+    assert client.get("/api/dns/example.com/changes?since=abc", headers=bearer).status_code == 400
@@ -0,0 +1,168 @@
+"""Unit tests for circuit_breaker.py — fail-fast and adaptive timeouts per backend."""
+from __future__ import annotations
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import httpx
+import pytest
+
+from netcup_api_filter import zone_cache
+from netcup_api_filter.api import ddns_protocols, dns_api
+from netcup_api_filter.circuit_breaker import (
+    BackendUnavailable,
+    CircuitBreaker,
+    get_breaker,
+)
+from netcup_api_filter.netcup_client import NetcupAPIError, NetcupClient
+
+
+def _call(breaker, error=None):
+    with breaker.guard(30):
+        if error is not None:
+            raise error
+
+
+def _fail(breaker, n):
+    for _ in range(n):
+        with pytest.raises(httpx.ConnectError):
+            _call(breaker, httpx.ConnectError("connection refused"))
+
+
+# =============================================================================
+# CircuitBreaker
+# =============================================================================
+
+def test_opens_at_failure_rate_and_fails_fast():
+    breaker = CircuitBreaker("svc", failure_rate=0.5, min_calls=4, open_seconds=30)
+    _call(breaker)
+    _call(breaker)
+    _fail(breaker, 1)
+    assert breaker.state == "closed"
+    _fail(breaker, 1)
+    assert breaker.state == "open"
+
+    ran = []
+    with pytest.raises(BackendUnavailable) as exc:
+        with breaker.guard(30):
+            ran.append(1)
+    assert not ran
+    assert 1 <= exc.value.retry_after <= 30
+    assert breaker.stats()["rejected"] == 1
+
+
+def test_api_rejections_do_not_count():
+    breaker = CircuitBreaker("svc", failure_rate=0.5, min_calls=2)
+    for _ in range(5):
+        with pytest.raises(NetcupAPIError):
+            _call(breaker, NetcupAPIError("API error: Invalid domain", 5029))
+    response = httpx.Response(404, request=httpx.Request("GET", "http://pdns/"))
+    with pytest.raises(httpx.HTTPStatusError):
+        _call(breaker, httpx.HTTPStatusError("not found", request=response.request, response=response))
+    assert breaker.state == "closed"
+
+
+def test_server_errors_count():
+    breaker = CircuitBreaker("svc", failure_rate=0.5, min_calls=2)
+    response = httpx.Response(503, request=httpx.Request("GET", "http://pdns/"))
+    for _ in range(2):
+        with pytest.raises(httpx.HTTPStatusError):
+            _call(breaker, httpx.HTTPStatusError("unavailable", request=response.request, response=response))
+    assert breaker.state == "open"
+
+
+def test_slow_calls_count_as_failures():
+    breaker = CircuitBreaker("svc", failure_rate=0.5, min_calls=2, slow_call_seconds=10)
+    for _ in range(2):
+        breaker._record(12.0, False, False)
+    assert breaker.state == "open"
+
+
+def test_half_open_probe_closes_or_reopens(monkeypatch):
+    breaker = CircuitBreaker("svc", failure_rate=0.5, min_calls=2, open_seconds=0.01)
+    _fail(breaker, 2)
+    assert breaker.state == "open"
+
+    monkeypatch.setattr(breaker, "open_seconds", 0)
+    _fail(breaker, 1)
+    assert breaker.state == "open"
+    assert breaker.trips == 2
+
+    with breaker.guard(30):
+        # Only the probe gets through while half-open
+        assert breaker.state == "half_open"
+        with pytest.raises(BackendUnavailable):
+            _call(breaker)
+    assert breaker.state == "closed"
+
+
+def test_timeout_adapts_to_p99():
+    breaker = CircuitBreaker("svc", min_calls=10, timeout_factor=3, min_timeout=2)
+    assert breaker.timeout(30) == 30
+    for _ in range(50):
+        breaker._record(0.5, False, False)
+    breaker._record(1.5, False, False)
+    assert breaker.timeout(30) == pytest.approx(4.5)
+    assert breaker.timeout(3) == 3
+
+    for _ in range(100):
+        breaker._record(0.1, False, False)
+    assert breaker.timeout(30) == 2
+
+
+def test_disabled_breaker_never_opens():
+    breaker = CircuitBreaker("svc", failure_rate=0, min_calls=1)
+    _fail(breaker, 5)
+    assert breaker.state == "closed"
+
+
+# =============================================================================
+# Endpoints
+# =============================================================================
+
+@pytest.fixture
+def open_circuit(app, monkeypatch):
+    zone_cache.clear_cache()
+    client = NetcupClient("123", "key", "pass", api_url="http://mock-api/", pooled=True)
+    monkeypatch.setattr(dns_api, "get_netcup_client", lambda: client)
+    monkeypatch.setattr(ddns_protocols, "get_netcup_client", lambda: client)
+    breaker = get_breaker(client.cache_namespace)
+    _fail(breaker, breaker.min_calls)
+    assert breaker.state == "open"
+    yield client
+    zone_cache.clear_cache()
+
+
+@pytest.fixture
+def bearer(make_account, make_realm, make_token):
+    _tok, plain = make_token(make_realm(make_account("breaker_user")))
+    return {"Authorization": f"Bearer {plain}"}
+
+
+def test_json_api_answers_503_with_retry_after(client, open_circuit, bearer):
+    response = client.get("/api/dns/example.com/records", headers=bearer)
+    assert response.status_code == 503
+    assert response.get_json()["error"] == "backend_unavailable"
+    assert int(response.headers["Retry-After"]) >= 1
+
+
+def test_ddns_answers_911(client, open_circuit, bearer):
+    response = client.get("/api/ddns/dyndns2/update?hostname=vpn.example.com&myip=192.0.2.1",
+                          headers=bearer)
+    assert response.status_code == 503
+    assert response.get_data(as_text=True) == "911"
+    assert "Retry-After" in response.headers
+
+
+def test_health_reports_open_circuits(client, open_circuit):
+    body = client.get("/health").get_json()
+    assert body["status"] == "degraded"
+    assert body["circuits"]["open"] == 1
+
+
+def test_health_ok_without_open_circuits(client):
+    assert client.get("/health").get_json() == {
+        "status": "ok", "circuits": {"closed": 0, "open": 0, "half_open": 0},
+    }
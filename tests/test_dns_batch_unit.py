@@ -0,0 +1,209 @@
+"""Unit tests for POST /api/dns/<domain>/records:batch."""
+from __future__ import annotations
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import pytest
+
+from netcup_api_filter.api import dns_api
+from netcup_api_filter.audit_writer import flush_audit_log
+from netcup_api_filter.models import ActivityLog
+from netcup_api_filter.netcup_client import NetcupAPIError
+from netcup_api_filter.zone_snapshot import ZoneSnapshot
+
+URL = "/api/dns/example.com/records:batch"
+
+
+class _FakeNetcup:
+    """Applies updateDnsRecords entries to an in-memory zone."""
+
+    def __init__(self, error=None):
+        self.zone = [
+            {"id": "10", "hostname": "vpn", "type": "A", "destination": "192.0.2.1"},
+            {"id": "11", "hostname": "vpn", "type": "AAAA", "destination": "2001:db8::1"},
+        ]
+        self.calls = []
+        self.error = error
+
+    def dns_snapshot(self, domain):
+        return ZoneSnapshot([dict(r) for r in self.zone], domain)
+
+    def submit_dns_records(self, domain, records):
+        self.calls.append((domain, records))
+        if self.error:
+            raise self.error
+        for rec in records:
+            if rec.get("deleterecord"):
+                self.zone = [r for r in self.zone if r["id"] != str(rec["id"])]
+            elif rec.get("id"):
+                for r in self.zone:
+                    if r["id"] == str(rec["id"]):
+                        r.update({k: v for k, v in rec.items() if k != "id"})
+            else:
+                self.zone.append(dict(rec, id=str(100 + len(self.zone))))
+        return {"dnsrecords": [dict(r) for r in self.zone]}
+
+
+@pytest.fixture
+def netcup(app, db, monkeypatch):
+    fake = _FakeNetcup()
+    monkeypatch.setattr(dns_api, "get_netcup_client", lambda: fake)
+    yield fake
+    # Write queued audit rows while this test's database still exists
+    flush_audit_log()
+
+
+@pytest.fixture
+def bearer(make_account, make_realm, make_token):
+    realm = make_realm(make_account("batch_user"), operations=("read", "create", "update", "delete"))
+    _tok, plain = make_token(realm)
+    return {"Authorization": f"Bearer {plain}"}
+
+
+def _batch_logs():
+    flush_audit_log()
+    return ActivityLog.query.filter_by(operation="batch").all()
+
+
+# =============================================================================
+# Success
+# =============================================================================
+
+def test_batch_is_one_upstream_call_with_per_item_results(client, netcup, bearer):
+    response = client.post(URL, headers=bearer, json={"operations": [
+        {"op": "update", "id": 10, "hostname": "vpn", "type": "a", "destination": "198.51.100.1"},
+        {"op": "delete", "id": "11"},
+        {"op": "create", "hostname": "vpn", "type": "AAAA", "destination": "2001:db8::2"},
+    ]})
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body["summary"] == {"create": 1, "update": 1, "delete": 1}
+    assert [r["status"] for r in body["results"]] == ["updated", "deleted", "created"]
+    assert body["results"][0]["record"]["type"] == "A"
+    assert body["results"][1]["record_id"] == 11
+    assert body["results"][2]["record"]["id"] == "101"
+
+    assert len(netcup.calls) == 1
+    assert netcup.calls[0][1] == [
+        {"id": 10, "hostname": "vpn", "type": "A", "destination": "198.51.100.1"},
+        {"id": 11, "hostname": "vpn", "type": "AAAA", "destination": "2001:db8::1", "deleterecord": True},
+        {"hostname": "vpn", "type": "AAAA", "destination": "2001:db8::2"},
+    ]
+
+
+def test_batch_writes_one_audit_entry(client, netcup, bearer):
+    client.post(URL, headers=bearer, json={"operations": [
+        {"op": "update", "id": 10, "hostname": "vpn", "type": "A", "destination": "198.51.100.1"},
+        {"op": "update", "id": 11, "hostname": "vpn", "type": "AAAA", "destination": "2001:db8::9"},
+    ]})
+
+    logs = _batch_logs()
+    assert len(logs) == 1
+    assert logs[0].status == "success"
+    assert logs[0].get_response_summary() == {"status": "applied", "update": 2}
+
+
+# =============================================================================
+# Rejections
+# =============================================================================
+
+def test_invalid_operations_are_reported_per_item(client, netcup, bearer):
+    response = client.post(URL, headers=bearer, json={"operations": [
+        {"op": "create", "hostname": "vpn", "type": "A", "destination": "192.0.2.5"},
+        {"op": "update", "hostname": "vpn", "type": "A", "destination": "192.0.2.5"},
+        {"op": "rename"},
+        {"op": "delete", "id": 10},
+        {"op": "delete", "id": 10},
+    ]})
+
+    assert response.status_code == 400
+    assert [e["index"] for e in response.get_json()["errors"]] == [1, 2, 4]
+    assert netcup.calls == []
+
+
+def test_operations_without_a_type_string_are_rejected(client, netcup, bearer):
+    response = client.post(URL, headers=bearer, json={"operations": [
+        {"op": "create", "hostname": "vpn", "destination": "192.0.2.5"},
+        {"op": "update", "id": 10, "hostname": "vpn", "type": None, "destination": "192.0.2.5"},
+        {"op": "create", "hostname": "vpn", "type": ["A"], "destination": "192.0.2.5"},
+    ]})
+
+    assert response.status_code == 400
+    errors = response.get_json()["errors"]
+    assert [e["index"] for e in errors] == [0, 1, 2]
+    assert errors[2]["message"] == "Field 'type' must be a string"
+    assert netcup.calls == []
+
+
+def test_batch_size_is_limited(client, netcup, bearer, monkeypatch):
+    monkeypatch.setattr(dns_api, "BATCH_MAX_OPERATIONS", 2)
+    ops = [{"op": "delete", "id": i} for i in range(3)]
+    assert client.post(URL, headers=bearer, json={"operations": ops}).status_code == 400
+    assert client.post(URL, headers=bearer, json={}).status_code == 400
+
+
+def test_denied_operation_rejects_whole_batch(client, netcup, bearer):
+    response = client.post(URL, headers=bearer, json={"operations": [
+        {"op": "update", "id": 10, "hostname": "vpn", "type": "A", "destination": "198.51.100.1"},
+        {"op": "create", "hostname": "www", "type": "A", "destination": "192.0.2.7"},
+        {"op": "create", "hostname": "vpn", "type": "TXT", "destination": "hello"},
+    ]})
+
+    assert response.status_code == 403
+    results = response.get_json()["results"]
+    assert [r["status"] for r in results] == ["not_applied", "denied", "denied"]
+    assert [r.get("error_code") for r in results] == [None, "hostname_denied", "record_type_denied"]
+    assert netcup.calls == []
+
+    logs = _batch_logs()
+    assert len(logs) == 1
+    assert logs[0].status == "denied"
+    assert logs[0].error_code == "hostname_denied"
+
+
+def test_updates_and_deletes_are_checked_against_the_zone_record(client, netcup, bearer):
+    netcup.zone.append({"id": "12", "hostname": "www", "type": "A", "destination": "192.0.2.9"})
+
+    # Caller-supplied hostname/type must not stand in for the real record
+    for op in ({"op": "update", "id": 12, "hostname": "vpn", "type": "A", "destination": "198.51.100.1"},
+               {"op": "delete", "id": 12},
+               {"op": "update", "id": 10, "hostname": "www", "type": "A", "destination": "198.51.100.1"}):
+        response = client.post(URL, headers=bearer, json={"operations": [op]})
+        assert response.status_code == 403
+        assert response.get_json()["results"][0]["error_code"] == "hostname_denied"
+    assert netcup.calls == []
+
+
+def test_unknown_record_ids_are_rejected(client, netcup, bearer):
+    response = client.post(URL, headers=bearer, json={"operations": [
+        {"op": "delete", "id": 10},
+        {"op": "delete", "id": 99},
+    ]})
+
+    assert response.status_code == 404
+    assert [e["index"] for e in response.get_json()["errors"]] == [1]
+    assert netcup.calls == []
+
+
+def test_upstream_rejection_fails_every_item(client, netcup, bearer):
+    netcup.error = NetcupAPIError("API error: Invalid destination", 5028)
+    response = client.post(URL, headers=bearer, json={"operations": [
+        {"op": "update", "id": 10, "hostname": "vpn", "type": "A", "destination": "bad"},
+        {"op": "delete", "id": 11},
+    ]})
+
+    assert response.status_code == 502
+    assert [r["status"] for r in response.get_json()["results"]] == ["failed", "failed"]
+    assert _batch_logs()[0].status == "error"
+
+
+def test_upstream_request_failure_reports_unknown_outcome(client, netcup, bearer):
+    netcup.error = NetcupAPIError("Request failed: connection reset")
+    response = client.post(URL, headers=bearer, json={"operations": [{"op": "delete", "id": 11}]})
+
+    assert response.status_code == 502
+    assert response.get_json()["results"][0]["status"] == "unknown"
@@ -0,0 +1,80 @@
+"""Unit tests for ETag / If-None-Match on GET /api/dns/<domain>/records."""
+from __future__ import annotations
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import pytest
+
+from netcup_api_filter import zone_cache
+from netcup_api_filter.api import dns_api
+from netcup_api_filter.audit_writer import flush_audit_log
+from netcup_api_filter.netcup_client import NetcupClient
+
+URL = "/api/dns/example.com/records"
+
+
+@pytest.fixture
+def upstream(app, db, monkeypatch):
+    """Pooled client whose infoDnsRecords calls are counted."""
+    zone_cache.clear_cache()
+    client = NetcupClient("123", "key", "pass", api_url="http://mock-api/", pooled=True)
+    state = {"fetches": 0, "records": [
+        {"id": "1", "hostname": "vpn", "type": "A", "destination": "192.0.2.1"},
+        {"id": "2", "hostname": "vpn", "type": "TXT", "destination": "secret"},
+    ]}
+
+    def _fetch(domain):
+        state["fetches"] += 1
+        return [dict(r) for r in state["records"]]
+
+    monkeypatch.setattr(client, "_fetch_dns_records", _fetch)
+    monkeypatch.setattr(dns_api, "get_netcup_client", lambda: client)
+    yield state
+    flush_audit_log()
+    zone_cache.clear_cache()
+
+
+@pytest.fixture
+def bearer(make_account, make_realm, make_token):
+    _tok, plain = make_token(make_realm(make_account("etag_user")))
+    return {"Authorization": f"Bearer {plain}"}
+
+
+def test_matching_etag_answers_304_from_warm_cache(client, upstream, bearer):
+    first = client.get(URL, headers=bearer)
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+
+    second = client.get(URL, headers={**bearer, "If-None-Match": etag})
+    assert second.status_code == 304
+    assert second.data == b""
+    assert second.headers["ETag"] == etag
+    assert upstream["fetches"] == 1
+
+
+def test_weak_and_star_validators_match(client, upstream, bearer):
+    etag = client.get(URL, headers=bearer).headers["ETag"]
+    assert client.get(URL, headers={**bearer, "If-None-Match": f"W/{etag}"}).status_code == 304
+    assert client.get(URL, headers={**bearer, "If-None-Match": "*"}).status_code == 304
+
+
+def test_changed_records_get_new_etag(client, upstream, bearer):
+    etag = client.get(URL, headers=bearer).headers["ETag"]
+    upstream["records"][0]["destination"] = "198.51.100.1"
+    zone_cache.clear_cache()
+
+    response = client.get(URL, headers={**bearer, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert response.get_json()["records"][0]["destination"] == "198.51.100.1"
+
+
+def test_etag_covers_only_visible_records(client, upstream, bearer):
+    etag = client.get(URL, headers=bearer).headers["ETag"]
+    # The token may not see TXT records, so changing one keeps the listing
+    upstream["records"][1]["destination"] = "rotated"
+    zone_cache.clear_cache()
+    assert client.get(URL, headers={**bearer, "If-None-Match": etag}).status_code == 304
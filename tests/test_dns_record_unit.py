@@ -0,0 +1,112 @@
+"""Unit tests for dns_record.py — compact, read-only DNS records."""
+from __future__ import annotations
+
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import pytest
+
+from netcup_api_filter import zone_cache
+from netcup_api_filter.backends.netcup import NetcupBackend
+from netcup_api_filter.backends.powerdns import PowerDNSBackend
+from netcup_api_filter.dns_record import DNSRecord, record_dict, record_dicts, to_records
+from netcup_api_filter.zone_cache import ZoneRecordCache, zone_key
+
+CCP_RECORD = {
+    "id": "42", "hostname": "vpn", "type": "A", "priority": "0",
+    "destination": "192.0.2.1", "deleterecord": False, "state": "yes",
+}
+
+
+@pytest.fixture(autouse=True)
+def _fresh_cache():
+    zone_cache.clear_cache()
+    yield
+    zone_cache.clear_cache()
+
+
+# =============================================================================
+# DNSRecord
+# =============================================================================
+
+def test_round_trips_dicts():
+    rec = DNSRecord.from_dict(CCP_RECORD)
+    assert rec.to_dict() == CCP_RECORD
+    assert list(rec) == list(CCP_RECORD)
+
+    partial = DNSRecord.from_dict({"hostname": "@", "type": "MX", "comment": "backup"})
+    assert partial.to_dict() == {"hostname": "@", "type": "MX", "comment": "backup"}
+    assert "ttl" not in partial and "comment" in partial
+    assert len(partial) == 3
+
+
+def test_behaves_like_a_read_only_dict():
+    rec = DNSRecord.from_dict(CCP_RECORD)
+
+    assert rec["hostname"] == "vpn"
+    assert rec.get("ttl") is None and rec.get("ttl", 300) == 300
+    with pytest.raises(KeyError):
+        rec["ttl"]
+    assert dict(rec) == CCP_RECORD
+    assert rec == CCP_RECORD and rec == DNSRecord(**CCP_RECORD)
+    assert rec != dict(CCP_RECORD, destination="192.0.2.2")
+    assert DNSRecord(ttl=None) != DNSRecord() and DNSRecord(ttl=None).get("ttl", 300) is None
+    with pytest.raises(AttributeError):
+        rec.other = 1
+    with pytest.raises(TypeError):
+        rec["destination"] = "192.0.2.2"
+
+
+def test_replace_and_copies_leave_record_unchanged():
+    rec = DNSRecord.from_dict(CCP_RECORD)
+
+    changed = rec.replace(destination="192.0.2.9", ttl=60)
+    assert changed["destination"] == "192.0.2.9" and changed["ttl"] == 60
+    copy = record_dict(rec)
+    copy["destination"] = "changed"
+    assert rec["destination"] == "192.0.2.1"
+
+    assert DNSRecord.from_dict(rec) is rec
+    assert to_records([rec])[0] is rec
+
+
+def test_json_encoding():
+    records = to_records([CCP_RECORD, {"hostname": "www", "type": "AAAA"}])
+    dicts = record_dicts(records + [{"hostname": "mail", "type": "MX"}])
+    assert all(type(d) is dict for d in dicts)
+    assert json.loads(json.dumps({"records": dicts})) == {"records": [
+        CCP_RECORD, {"hostname": "www", "type": "AAAA"}, {"hostname": "mail", "type": "MX"},
+    ]}
+    with pytest.raises(TypeError):
+        json.dumps(records)
+
+
+# =============================================================================
+# Zone cache and backends
+# =============================================================================
+
+def test_cache_shares_records_and_hands_out_dicts():
+    cache = ZoneRecordCache(ttl_seconds=60, max_size=10)
+    key = zone_key("netcup:test:1", "example.com")
+
+    snapshot = cache.get_snapshot(key, lambda: [dict(CCP_RECORD)])
+    assert isinstance(snapshot.records[0], DNSRecord)
+    assert cache.get_snapshot(key, lambda: []).records[0] is snapshot.records[0]
+
+    records = cache.get_or_load(key, lambda: [])
+    assert type(records[0]) is dict and records == [CCP_RECORD]
+
+
+def test_backends_normalize_to_records():
+    netcup = NetcupBackend.__new__(NetcupBackend).normalize_record(CCP_RECORD)
+    assert isinstance(netcup, DNSRecord)
+    assert netcup.to_dict() == {"id": "42", "hostname": "vpn", "type": "A", "destination": "192.0.2.1",
+                                "priority": "0", "ttl": 300, "state": "yes"}
+
+    pdns = PowerDNSBackend({"api_url": "http://pdns.test:8081", "api_key": "k"}).normalize_record(
+        {"name": "vpn.example.com.", "type": "A", "content": "192.0.2.1", "ttl": 60})
+    assert isinstance(pdns, DNSRecord)
+    assert pdns["hostname"] == "vpn.example.com" and pdns["destination"] == "192.0.2.1"
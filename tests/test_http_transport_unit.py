@@ -0,0 +1,82 @@
+"""Unit tests for http_transport.py — shared per-origin connection pools."""
+from __future__ import annotations
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import httpx
+import pytest
+
+from netcup_api_filter import http_transport
+from netcup_api_filter.http_transport import TransportRegistry
+
+
+@pytest.fixture
+def registry():
+    reg = TransportRegistry(max_connections=4, max_keepalive=2, keepalive_seconds=5, http2=False)
+    yield reg
+    reg.close_all()
+
+
+def test_same_origin_shares_client_and_transport(registry):
+    a = registry.client("https://ccp.netcup.net/run/webservice/servers/endpoint.php?JSON")
+    b = registry.client("https://ccp.netcup.net/other")
+    assert a is b
+    assert registry.transport("https://ccp.netcup.net/") is registry.transport("https://ccp.netcup.net:443/x")
+
+
+def test_origins_get_separate_pools(registry):
+    assert registry.client("https://api.telegram.org/") is not registry.client("https://geolite.info/")
+    assert registry.transport("http://pdns:8081/") is not registry.transport("https://pdns:8081/")
+    assert len(registry.stats()["origins"]) == 4
+
+
+def test_limits_applied(registry):
+    stats = registry.stats()
+    assert stats["max_connections"] == 4
+    assert stats["max_keepalive"] == 2
+    assert stats["http2"] is False
+
+
+def test_fork_drops_inherited_pools(registry, monkeypatch):
+    parent = registry.client("https://ccp.netcup.net/")
+    monkeypatch.setattr(http_transport.os, "getpid", lambda: -1)
+    child = registry.client("https://ccp.netcup.net/")
+    assert child is not parent
+    assert registry.stats()["origins"] == ["https://ccp.netcup.net"]
+
+
+def test_close_all_resets_pools(registry):
+    first = registry.client("https://ccp.netcup.net/")
+    registry.close_all()
+    assert registry.stats()["origins"] == []
+    assert registry.client("https://ccp.netcup.net/") is not first
+
+
+def test_created_client_close_keeps_shared_pool(monkeypatch):
+    calls = []
+
+    def _handler(request: httpx.Request) -> httpx.Response:
+        calls.append((str(request.url), request.headers.get("X-API-Key")))
+        return httpx.Response(200, json={"ok": True})
+
+    registry = TransportRegistry(http2=False)
+    shared = registry.transport("http://pdns.test:8081/")
+    shared.handle_request = _handler
+    monkeypatch.setattr(http_transport, "_registry", registry)
+
+    client = http_transport.create_http_client("http://pdns.test:8081/api/v1", headers={"X-API-Key": "k"})
+    assert client.get("/servers").json() == {"ok": True}
+    client.close()
+
+    # A second client reuses the same, still-open pool
+    again = http_transport.create_http_client("http://pdns.test:8081/api/v1")
+    assert again.get("/zones").status_code == 200
+    assert calls == [
+        ("http://pdns.test:8081/api/v1/servers", "k"),
+        ("http://pdns.test:8081/api/v1/zones", None),
+    ]
+    assert registry.transport("http://pdns.test:8081/") is shared
+    registry.close_all()
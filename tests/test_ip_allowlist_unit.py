@@ -0,0 +1,94 @@
+"""Unit and property tests for ip_allowlist.IPAllowlist.
+
+The compiled matcher must give exactly the same answers as the historical
+linear ``ip_obj in ip_network(...)`` loop, for IPv4 and IPv6.
+"""
+from __future__ import annotations
+
+import ipaddress
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import pytest
+from hypothesis import given
+from hypothesis import strategies as st
+
+from netcup_api_filter.ip_allowlist import IPAllowlist
+
+
+def _allowlist(*ranges: str) -> IPAllowlist:
+    return IPAllowlist(ipaddress.ip_network(r, strict=False) for r in ranges)
+
+
+def _linear(ranges: list[str], client_ip: str) -> bool:
+    ip_obj = ipaddress.ip_address(client_ip)
+    return any(ip_obj in ipaddress.ip_network(r, strict=False) for r in ranges)
+
+
+# =============================================================================
+# Hand-written cases
+# =============================================================================
+
+
+@pytest.mark.parametrize("ranges,client_ip,expected", [
+    ([], "192.0.2.1", False),
+    (["192.0.2.0/24"], "192.0.2.0", True),
+    (["192.0.2.0/24"], "192.0.2.255", True),
+    (["192.0.2.0/24"], "192.0.3.0", False),
+    (["192.0.2.0/24"], "192.0.1.255", False),
+    # Overlapping and adjacent ranges are merged correctly.
+    (["10.0.0.0/8", "10.1.0.0/16"], "10.200.0.1", True),
+    (["10.0.0.0/25", "10.0.0.128/25"], "10.0.0.200", True),
+    (["0.0.0.0/0"], "255.255.255.255", True),
+    (["2001:db8::/32"], "2001:db8:ffff::1", True),
+    (["2001:db8::/32"], "2001:db9::1", False),
+    (["::/0"], "::1", True),
+    # Families never cross-match.
+    (["0.0.0.0/0"], "::ffff:192.0.2.1", False),
+    (["::/0"], "192.0.2.1", False),
+])
+def test_allowlist_contains(ranges, client_ip, expected):
+    assert (client_ip in _allowlist(*ranges)) is expected
+
+
+def test_allowlist_invalid_address_never_matches():
+    assert "not-an-ip" not in _allowlist("0.0.0.0/0", "::/0")
+
+
+def test_allowlist_accepts_parsed_addresses():
+    allowlist = _allowlist("198.51.100.0/24")
+    assert ipaddress.ip_address("198.51.100.7") in allowlist
+
+
+def test_allowlist_keeps_original_networks():
+    allowlist = _allowlist("10.0.0.0/8", "10.1.0.0/16")
+    assert len(allowlist) == 2
+    assert [str(n) for n in allowlist.networks] == ["10.0.0.0/8", "10.1.0.0/16"]
+
+
+# =============================================================================
+# Property: identical to the linear scan
+# =============================================================================
+
+_v4_ranges = st.builds(
+    lambda addr, plen: f"{ipaddress.IPv4Address(addr)}/{plen}",
+    st.integers(0, 2**32 - 1), st.integers(0, 32),
+)
+_v6_ranges = st.builds(
+    lambda addr, plen: f"{ipaddress.IPv6Address(addr)}/{plen}",
+    st.integers(0, 2**128 - 1), st.integers(0, 128),
+)
+_v4_addrs = st.integers(0, 2**32 - 1).map(lambda a: str(ipaddress.IPv4Address(a)))
+_v6_addrs = st.integers(0, 2**128 - 1).map(lambda a: str(ipaddress.IPv6Address(a)))
+
+
+@given(st.lists(_v4_ranges, max_size=40), _v4_addrs)
+def test_allowlist_matches_linear_scan_v4(ranges, client_ip):
+    assert (client_ip in _allowlist(*ranges)) is _linear(ranges, client_ip)
+
+
+@given(st.lists(_v6_ranges, max_size=40), _v6_addrs)
+def test_allowlist_matches_linear_scan_v6(ranges, client_ip):
+    assert (client_ip in _allowlist(*ranges)) is _linear(ranges, client_ip)
@@ -0,0 +1,152 @@
+"""Unit tests for mutation_batcher.py — per-zone batching of record updates."""
+from __future__ import annotations
+
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from netcup_api_filter.mutation_batcher import MutationBatcher
+from netcup_api_filter.netcup_client import NetcupAPIError, NetcupClient
+
+
+class FakeClient:
+    """Records update_dns_records calls; rejects records with destination 'bad'."""
+
+    cache_namespace = "netcup:test:1"
+
+    def __init__(self, transport_error=False):
+        self.calls: list[list[dict]] = []
+        self.transport_error = transport_error
+        self._lock = threading.Lock()
+
+    def update_dns_records(self, domain, dns_records):
+        with self._lock:
+            self.calls.append(list(dns_records))
+        if self.transport_error:
+            raise NetcupAPIError("Request failed: connection reset")
+        if any(r.get("destination") == "bad" for r in dns_records):
+            raise NetcupAPIError("API error: Invalid destination", 4013)
+        return {"dnsrecords": [dict(r) for r in dns_records]}
+
+
+def _rec(host, ip, record_id=None):
+    rec = {"hostname": host, "type": "A", "destination": ip}
+    if record_id:
+        rec["id"] = record_id
+    return rec
+
+
+def _submit_all(batcher, client, submissions, domain="example.com"):
+    barrier = threading.Barrier(len(submissions))
+    results: dict[int, object] = {}
+
+    def _work(i, records):
+        barrier.wait()
+        try:
+            results[i] = batcher.submit(client, domain, records)
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=_work, args=(i, recs)) for i, recs in enumerate(submissions)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return [results[i] for i in range(len(submissions))]
+
+
+def test_concurrent_mutations_share_one_update():
+    batcher = MutationBatcher(window_ms=200)
+    client = FakeClient()
+    results = _submit_all(batcher, client, [[_rec(f"host{i}", f"192.0.2.{i}", str(i))] for i in range(6)])
+
+    assert len(client.calls) == 1
+    assert len(client.calls[0]) == 6
+    assert all(r == results[0] for r in results)
+    assert batcher.stats()["submitted"] == 6
+    assert batcher.stats()["upstream_calls"] == 1
+
+
+def test_zones_are_batched_separately():
+    batcher = MutationBatcher(window_ms=100)
+    client = FakeClient()
+    barrier = threading.Barrier(2)
+
+    def _work(domain):
+        barrier.wait()
+        batcher.submit(client, domain, [_rec("home", "192.0.2.1", "1")])
+
+    threads = [threading.Thread(target=_work, args=(d,)) for d in ("a.test", "b.test")]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(client.calls) == 2
+
+
+def test_conflicting_mutations_keep_order():
+    batcher = MutationBatcher(window_ms=200)
+    client = FakeClient()
+    first = threading.Thread(target=batcher.submit, args=(client, "example.com", [_rec("home", "192.0.2.1", "7")]))
+    first.start()
+    # Wait until the first submission has opened the batch
+    for _ in range(500):
+        if batcher.stats()["open_batches"]:
+            break
+        threading.Event().wait(0.002)
+    batcher.submit(client, "example.com", [_rec("home", "192.0.2.2", "7")])
+    first.join()
+
+    assert [c[0]["destination"] for c in client.calls] == ["192.0.2.1", "192.0.2.2"]
+
+
+def test_rejected_batch_reports_error_to_its_caller_only():
+    batcher = MutationBatcher(window_ms=200)
+    client = FakeClient()
+    results = _submit_all(batcher, client, [
+        [_rec("one", "192.0.2.1", "1")],
+        [_rec("two", "bad", "2")],
+        [_rec("three", "192.0.2.3", "3")],
+    ])
+
+    errors = [r for r in results if isinstance(r, Exception)]
+    assert len(errors) == 1
+    assert isinstance(results[1], NetcupAPIError)
+    assert results[0]["dnsrecords"] == [_rec("one", "192.0.2.1", "1")]
+    # One combined attempt, then one call per submission
+    assert len(client.calls) == 4
+    assert batcher.stats()["split_batches"] == 1
+
+
+def test_transport_errors_are_not_retried():
+    batcher = MutationBatcher(window_ms=200)
+    client = FakeClient(transport_error=True)
+    results = _submit_all(batcher, client, [[_rec(f"h{i}", "192.0.2.1", str(i))] for i in range(3)])
+
+    assert all(isinstance(r, NetcupAPIError) for r in results)
+    assert len(client.calls) == 1
+
+
+def test_full_batch_is_sent_without_waiting_for_window():
+    batcher = MutationBatcher(window_ms=60_000, max_records=3)
+    client = FakeClient()
+    _submit_all(batcher, client, [[_rec(f"h{i}", "192.0.2.1", str(i))] for i in range(3)])
+    assert len(client.calls) == 1
+
+
+def test_disabled_writes_directly():
+    batcher = MutationBatcher(window_ms=0)
+    client = FakeClient()
+    batcher.submit(client, "example.com", [_rec("home", "192.0.2.1", "1")])
+    batcher.submit(client, "example.com", [_rec("home", "192.0.2.2", "1")])
+    assert len(client.calls) == 2
+
+
+def test_unpooled_client_bypasses_batcher(monkeypatch):
+    client = NetcupClient("123", "key", "pass", api_url="http://mock-api/")
+    sent = []
+    monkeypatch.setattr(client, "update_dns_records", lambda domain, records: sent.append(records) or {})
+    client.submit_dns_records("example.com", [_rec("home", "192.0.2.1", "1")])
+    assert sent == [[_rec("home", "192.0.2.1", "1")]]
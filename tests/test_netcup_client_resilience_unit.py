@@ -7,8 +7,8 @@ or JSONDecodeError — regardless of what the upstream sends back.
 import json
 from unittest.mock import MagicMock, patch
 
+import httpx
 import pytest
-import requests
 
 from netcup_api_filter.netcup_client import NetcupAPIError, NetcupClient
 
@@ -22,14 +22,21 @@ def _make_client():
     )
 
 
+def _patch_post(**kwargs):
+    """Patch the pooled HTTP client used by NetcupClient; kwargs configure its post()."""
+    http = MagicMock()
+    http.post = MagicMock(**kwargs)
+    return patch("netcup_api_filter.netcup_client.get_http_client", return_value=http)
+
+
 def _mock_response(body, status_code=200):
-    """Build a mock requests.Response with the given body (str or bytes) and status."""
-    resp = MagicMock(spec=requests.Response)
+    """Build a mock httpx.Response with the given body (str or bytes) and status."""
+    resp = MagicMock(spec=httpx.Response)
     resp.status_code = status_code
     resp.raise_for_status = MagicMock()
     if status_code >= 400:
-        resp.raise_for_status.side_effect = requests.HTTPError(
-            response=resp
+        resp.raise_for_status.side_effect = httpx.HTTPStatusError(
+            f"HTTP {status_code}", request=MagicMock(), response=resp
         )
     raw = body.encode() if isinstance(body, str) else body
     resp.json = MagicMock(side_effect=lambda: json.loads(raw))
@@ -43,19 +50,19 @@ def _mock_response(body, status_code=200):
 class TestMakeRequestBadJson:
     def test_invalid_json_raises_netcup_error(self):
         resp = _mock_response("not-json")
-        with patch("requests.post", return_value=resp):
+        with _patch_post(return_value=resp):
             with pytest.raises(NetcupAPIError, match="Invalid JSON"):
                 _make_client()._make_request("login", {})
 
     def test_empty_body_raises_netcup_error(self):
         resp = _mock_response("")
-        with patch("requests.post", return_value=resp):
+        with _patch_post(return_value=resp):
             with pytest.raises(NetcupAPIError, match="Invalid JSON"):
                 _make_client()._make_request("login", {})
 
     def test_html_error_page_raises_netcup_error(self):
         resp = _mock_response("<html><body>Bad Gateway</body></html>")
-        with patch("requests.post", return_value=resp):
+        with _patch_post(return_value=resp):
             with pytest.raises(NetcupAPIError, match="Invalid JSON"):
                 _make_client()._make_request("login", {})
 
@@ -67,25 +74,25 @@ class TestMakeRequestBadJson:
 class TestMakeRequestWrongShape:
     def test_json_array_raises_netcup_error(self):
         resp = _mock_response("[]")
-        with patch("requests.post", return_value=resp):
+        with _patch_post(return_value=resp):
             with pytest.raises(NetcupAPIError, match="Unexpected response shape"):
                 _make_client()._make_request("login", {})
 
     def test_json_null_raises_netcup_error(self):
         resp = _mock_response("null")
-        with patch("requests.post", return_value=resp):
+        with _patch_post(return_value=resp):
             with pytest.raises(NetcupAPIError, match="Unexpected response shape"):
                 _make_client()._make_request("login", {})
 
     def test_json_scalar_raises_netcup_error(self):
         resp = _mock_response("42")
-        with patch("requests.post", return_value=resp):
+        with _patch_post(return_value=resp):
             with pytest.raises(NetcupAPIError, match="Unexpected response shape"):
                 _make_client()._make_request("login", {})
 
     def test_json_string_raises_netcup_error(self):
         resp = _mock_response('"just a string"')
-        with patch("requests.post", return_value=resp):
+        with _patch_post(return_value=resp):
             with pytest.raises(NetcupAPIError, match="Unexpected response shape"):
                 _make_client()._make_request("login", {})
 
@@ -97,17 +104,17 @@ class TestMakeRequestWrongShape:
 class TestMakeRequestHttpErrors:
     def test_http_500_raises_netcup_error(self):
         resp = _mock_response('{"status":"error"}', status_code=500)
-        with patch("requests.post", return_value=resp):
+        with _patch_post(return_value=resp):
             with pytest.raises(NetcupAPIError):
                 _make_client()._make_request("login", {})
 
     def test_timeout_raises_netcup_error(self):
-        with patch("requests.post", side_effect=requests.Timeout("timed out")):
+        with _patch_post(side_effect=httpx.ReadTimeout("timed out")):
             with pytest.raises(NetcupAPIError, match="Request failed"):
                 _make_client()._make_request("login", {})
 
     def test_connection_error_raises_netcup_error(self):
-        with patch("requests.post", side_effect=requests.ConnectionError("refused")):
+        with _patch_post(side_effect=httpx.ConnectError("refused")):
             with pytest.raises(NetcupAPIError, match="Request failed"):
                 _make_client()._make_request("login", {})
 
@@ -120,14 +127,14 @@ class TestMakeRequestApiErrorEnvelope:
     def test_api_error_status_raises_netcup_error(self):
         body = json.dumps({"status": "error", "longmessage": "bad domain", "statuscode": 4013})
         resp = _mock_response(body)
-        with patch("requests.post", return_value=resp):
+        with _patch_post(return_value=resp):
             with pytest.raises(NetcupAPIError, match="bad domain"):
                 _make_client()._make_request("infoDnsRecords", {})
 
     def test_api_error_without_message_raises_netcup_error(self):
         body = json.dumps({"status": "error"})
         resp = _mock_response(body)
-        with patch("requests.post", return_value=resp):
+        with _patch_post(return_value=resp):
             with pytest.raises(NetcupAPIError):
                 _make_client()._make_request("infoDnsRecords", {})
 
@@ -146,39 +153,39 @@ class TestPublicMethodsMissingKeys:
         return _mock_response(body)
 
     def test_login_missing_responsedata_raises(self):
-        with patch("requests.post", return_value=self._bare_success_resp()):
+        with _patch_post(return_value=self._bare_success_resp()):
             with pytest.raises(NetcupAPIError, match="Missing key"):
                 _make_client().login()
 
     def test_login_missing_apisessionid_raises(self):
-        with patch("requests.post", return_value=self._success_resp({})):
+        with _patch_post(return_value=self._success_resp({})):
             with pytest.raises(NetcupAPIError, match="Missing key"):
                 _make_client().login()
 
     def test_info_dns_zone_missing_responsedata_raises(self):
         client = _make_client()
         client.session_id = "fake-session"
-        with patch("requests.post", return_value=self._bare_success_resp()):
+        with _patch_post(return_value=self._bare_success_resp()):
             with pytest.raises(NetcupAPIError, match="Missing key"):
                 client.info_dns_zone("example.com")
 
     def test_info_dns_records_missing_responsedata_raises(self):
         client = _make_client()
         client.session_id = "fake-session"
-        with patch("requests.post", return_value=self._bare_success_resp()):
+        with _patch_post(return_value=self._bare_success_resp()):
             with pytest.raises(NetcupAPIError, match="Missing key"):
                 client.info_dns_records("example.com")
 
     def test_info_dns_records_missing_dnsrecords_raises(self):
         client = _make_client()
         client.session_id = "fake-session"
-        with patch("requests.post", return_value=self._success_resp({})):
+        with _patch_post(return_value=self._success_resp({})):
             with pytest.raises(NetcupAPIError, match="Missing key"):
                 client.info_dns_records("example.com")
 
     def test_update_dns_records_missing_responsedata_raises(self):
         client = _make_client()
         client.session_id = "fake-session"
-        with patch("requests.post", return_value=self._bare_success_resp()):
+        with _patch_post(return_value=self._bare_success_resp()):
             with pytest.raises(NetcupAPIError, match="Missing key"):
                 client.update_dns_records("example.com", [])
@@ -0,0 +1,228 @@
+"""Unit tests for the NetcupClient session pool (netcup_client.NetcupSessionPool).
+
+A fake CCP endpoint replaces the pooled HTTP client's post() and records every action, so the
+tests can count login/logout round-trips.
+"""
+from __future__ import annotations
+
+import json
+import threading
+from unittest.mock import MagicMock, patch
+
+import httpx
+import pytest
+
+from netcup_api_filter import lifecycle, netcup_client, single_flight, zone_cache
+from netcup_api_filter.netcup_client import NetcupAPIError, NetcupClient, NetcupSessionPool
+
+
+class FakeCCP:
+    """Minimal CCP: login/logout/infoDnsRecords with server-side sessions."""
+
+    def __init__(self):
+        self.calls: list[str] = []
+        self.sessions: set[str] = set()
+        self._n = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, url, json=None, timeout=None):
+        action, param = json["action"], json["param"]
+        with self._lock:
+            self.calls.append(action)
+            if action == "login":
+                self._n += 1
+                sid = f"sid-{self._n}"
+                self.sessions.add(sid)
+                return _response({"status": "success", "responsedata": {"apisessionid": sid}})
+            if action == "logout":
+                self.sessions.discard(param["apisessionid"])
+                return _response({"status": "success", "responsedata": ""})
+            if param.get("apisessionid") not in self.sessions:
+                return _response({"status": "error", "statuscode": 4001,
+                                  "longmessage": "The session id is not in a valid format."})
+            return _response({"status": "success", "responsedata": {"dnsrecords": []}})
+
+    def count(self, action: str) -> int:
+        return self.calls.count(action)
+
+
+def _response(body, status_code=200):
+    resp = MagicMock(spec=httpx.Response)
+    resp.status_code = status_code
+    resp.raise_for_status = MagicMock()
+    resp.json = MagicMock(return_value=json.loads(json.dumps(body)))
+    return resp
+
+
+def _patch_post(**kwargs):
+    http = MagicMock()
+    http.post = MagicMock(**kwargs)
+    return patch("netcup_api_filter.netcup_client.get_http_client", return_value=http)
+
+
+@pytest.fixture
+def ccp(monkeypatch):
+    # Every call must reach the fake endpoint
+    monkeypatch.setattr(zone_cache.get_zone_cache(), "ttl_seconds", 0)
+    fake = FakeCCP()
+    netcup_client.get_session_pool().reset()
+    single_flight.reset_single_flight()
+    with _patch_post(side_effect=fake):
+        yield fake
+    netcup_client.get_session_pool().reset()
+
+
+def _client(pooled=True, api_key="key", api_password="pass"):
+    return NetcupClient("123", api_key, api_password, api_url="http://mock-api/", pooled=pooled)
+
+
+# ---------------------------------------------------------------------------
+# Reuse
+# ---------------------------------------------------------------------------
+
+def test_pooled_clients_share_one_login(ccp):
+    for _ in range(5):
+        _client().info_dns_records("example.com")
+    assert ccp.count("login") == 1
+    assert ccp.count("infoDnsRecords") == 5
+    assert netcup_client.get_session_pool().stats()["reuses"] == 4
+
+
+def test_unpooled_client_keeps_its_own_session(ccp):
+    _client(pooled=False).info_dns_records("example.com")
+    _client(pooled=False).info_dns_records("example.com")
+    assert ccp.count("login") == 2
+
+
+def test_sessions_are_keyed_by_credentials(ccp):
+    _client(api_key="a").info_dns_records("example.com")
+    _client(api_key="b").info_dns_records("example.com")
+    _client(api_key="a").info_dns_records("example.com")
+    assert ccp.count("login") == 2
+
+    # Same id and key, different password: never handed the pooled session
+    _client(api_key="a", api_password="wrong").info_dns_records("example.com")
+    assert ccp.count("login") == 3
+
+
+def test_concurrent_first_use_logs_in_once(ccp):
+    barrier = threading.Barrier(8)
+
+    def _work():
+        barrier.wait()
+        _client().info_dns_records("example.com")
+
+    threads = [threading.Thread(target=_work) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert ccp.count("login") == 1
+    # Overlapping reads of the zone may be coalesced (single_flight)
+    coalesced = single_flight.get_single_flight_stats()["coalesced"]
+    assert ccp.count("infoDnsRecords") + coalesced == 8
+
+
+# ---------------------------------------------------------------------------
+# Expiry and re-login
+# ---------------------------------------------------------------------------
+
+def test_session_invalid_relogs_in_once(ccp):
+    client = _client()
+    client.info_dns_records("example.com")
+    ccp.sessions.clear()  # server-side expiry
+
+    client.info_dns_records("example.com")
+    assert ccp.count("login") == 2
+    assert ccp.count("infoDnsRecords") == 3
+
+
+def test_non_session_errors_are_not_retried(ccp):
+    client = _client()
+    client.info_dns_records("example.com")
+    with _patch_post(return_value=_response(
+        {"status": "error", "statuscode": 5029, "longmessage": "Can not get DNS records for zone."}
+    )) as get_client:
+        with pytest.raises(NetcupAPIError, match="DNS records"):
+            client.info_dns_records("example.com")
+    assert get_client.return_value.post.call_count == 1
+
+
+@pytest.mark.parametrize("pooled", [True, False])
+def test_login_without_session_id_is_rejected(ccp, pooled):
+    with _patch_post(return_value=_response({"status": "success", "responsedata": {"apisessionid": ""}})):
+        with pytest.raises(NetcupAPIError, match="no session id"):
+            _client(pooled=pooled).info_dns_records("example.com")
+
+
+def test_idle_session_refreshed_proactively(ccp, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(netcup_client.time, "monotonic", lambda: now[0])
+    pool = netcup_client.get_session_pool()
+    monkeypatch.setattr(pool, "idle_seconds", 600)
+
+    _client().info_dns_records("example.com")
+    now[0] += 601
+    _client().info_dns_records("example.com")
+    assert ccp.count("login") == 2
+    # No request was sent with the stale session
+    assert ccp.count("infoDnsRecords") == 2
+    assert pool.stats()["refreshes"] == 1
+    # The replaced session is logged out
+    assert ccp.count("logout") == 1
+    assert ccp.sessions == {"sid-2"}
+
+
+def test_max_age_rotates_busy_session(ccp, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(netcup_client.time, "monotonic", lambda: now[0])
+    pool = netcup_client.get_session_pool()
+    monkeypatch.setattr(pool, "max_age_seconds", 3600)
+
+    for _ in range(13):
+        _client().info_dns_records("example.com")
+        now[0] += 300
+    assert ccp.count("login") == 2
+
+
+# ---------------------------------------------------------------------------
+# Logout
+# ---------------------------------------------------------------------------
+
+def test_logout_all_on_shutdown(ccp):
+    _client(api_key="a").info_dns_records("example.com")
+    _client(api_key="b").info_dns_records("example.com")
+
+    lifecycle.reset_after_fork()
+    lifecycle.run_shutdown_hooks()
+    lifecycle.reset_after_fork()
+    assert ccp.count("logout") == 2
+    assert ccp.sessions == set()
+    assert netcup_client.get_session_pool().stats()["sessions"] == 0
+
+
+def test_explicit_logout_drops_pooled_session(ccp):
+    client = _client()
+    client.info_dns_records("example.com")
+    client.logout()
+
+    _client().info_dns_records("example.com")
+    assert ccp.count("login") == 2
+
+
+def test_http_error_envelope_keeps_api_message():
+    resp = _response({"status": "error", "statuscode": 4013, "longmessage": "Invalid session"}, 401)
+    resp.raise_for_status.side_effect = httpx.HTTPStatusError("401", request=MagicMock(), response=resp)
+    with _patch_post(return_value=resp):
+        with pytest.raises(NetcupAPIError, match="Invalid session") as exc:
+            _client(pooled=False)._make_request("infoDnsRecords", {})
+    assert exc.value.statuscode == 4013
+    # Only the session statuscode triggers a re-login, not the message text
+    assert not netcup_client.is_session_error(exc.value)
+    assert netcup_client.is_session_error(NetcupAPIError("API error: expired", 4001))
+    assert not netcup_client.is_session_error(NetcupAPIError("Request failed: session closed"))
+
+
+def test_pool_instance_defaults():
+    pool = NetcupSessionPool(idle_seconds=1, max_age_seconds=2)
+    assert pool.stats() == {"sessions": 0, "logins": 0, "reuses": 0, "refreshes": 0, "invalidations": 0}
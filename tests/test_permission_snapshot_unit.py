@@ -0,0 +1,157 @@
+"""Unit tests for permission_snapshot.py — compiled (token, realm) permissions.
+
+Checks that snapshots agree with the model helpers they replace, are memoized
+per (token, realm) version, and are invalidated by the realm_token_service
+mutations.
+"""
+from __future__ import annotations
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import pytest
+
+from netcup_api_filter import permission_snapshot
+from netcup_api_filter.permission_snapshot import (
+    PermissionSnapshot,
+    compile_ip_ranges,
+    get_permission_snapshot,
+)
+from netcup_api_filter.realm_token_service import update_realm_permissions, update_token
+from netcup_api_filter.token_auth import authenticate_token, validate_dns_records_update
+
+
+@pytest.fixture(autouse=True)
+def _fresh_cache():
+    permission_snapshot.clear_cache()
+    yield
+    permission_snapshot.clear_cache()
+
+
+# =============================================================================
+# Compilation
+# =============================================================================
+
+
+def test_snapshot_falls_back_to_realm_scope(app, make_account, make_realm, make_token):
+    account = make_account("snap_fallback")
+    realm = make_realm(account, domain="Example.COM", realm_value="VPN",
+                       record_types=("A",), operations=("read", "update"))
+    tok, _ = make_token(realm)
+
+    snap = get_permission_snapshot(tok)
+    assert isinstance(snap, PermissionSnapshot)
+    assert snap.operations == frozenset({"read", "update"})
+    assert snap.record_types == frozenset({"A"})
+    assert snap.domain == "example.com"
+    assert snap.fqdn == "vpn.example.com"
+    assert snap.ip_restricted is False
+
+
+def test_snapshot_uses_token_scope_when_set(app, make_account, make_realm, make_token):
+    account = make_account("snap_token_scope")
+    realm = make_realm(account, record_types=("A", "AAAA"), operations=("read", "update"))
+    tok, _ = make_token(realm, operations=["read"], record_types=["AAAA"], ip_ranges=["10.0.0.0/8"])
+
+    snap = get_permission_snapshot(tok)
+    assert snap.operations == frozenset({"read"})
+    assert snap.record_types == frozenset({"AAAA"})
+    assert snap.allows_ip("10.1.2.3") is True
+    assert snap.allows_ip("192.0.2.1") is False
+
+
+def test_compile_ip_ranges_skips_bad_entries():
+    allowlist = compile_ip_ranges('["bad!!", "203.0.113.5", "2001:db8::/32"]')
+    assert [str(n) for n in allowlist.networks] == ["203.0.113.5/32", "2001:db8::/32"]
+
+
+@pytest.mark.parametrize("realm_type,realm_value,hostname", [
+    ("host", "vpn", "vpn.example.com"),
+    ("host", "vpn", "a.vpn.example.com"),
+    ("subdomain", "iot", "iot.example.com"),
+    ("subdomain", "iot", "x.IOT.example.com"),
+    ("subdomain", "iot", "xiot.example.com"),
+    ("subdomain_only", "iot", "iot.example.com"),
+    ("subdomain_only", "iot", "a.b.iot.example.com"),
+    ("subdomain", "", "example.com"),
+])
+def test_snapshot_hostname_matches_model(app, make_account, make_realm, make_token,
+                                         realm_type, realm_value, hostname):
+    account = make_account(f"snap_{realm_type}_{realm_value or 'apex'}")
+    realm = make_realm(account, realm_type=realm_type, realm_value=realm_value)
+    tok, _ = make_token(realm)
+
+    snap = get_permission_snapshot(tok)
+    assert snap.matches_hostname(hostname) is realm.matches_hostname(hostname)
+
+
+# =============================================================================
+# Memoization and invalidation
+# =============================================================================
+
+
+def test_snapshot_is_memoized(app, make_account, make_realm, make_token):
+    account = make_account("snap_memo")
+    tok, _ = make_token(make_realm(account))
+
+    assert get_permission_snapshot(tok) is get_permission_snapshot(tok)
+    stats = permission_snapshot.get_cache_stats()
+    assert stats["misses"] == 1
+    assert stats["hits"] == 1
+
+
+def test_direct_column_edit_yields_new_version(app, db, make_account, make_realm, make_token):
+    """An edit made elsewhere (e.g. another worker) changes the version key."""
+    account = make_account("snap_version")
+    tok, _ = make_token(make_realm(account))
+    before = get_permission_snapshot(tok)
+
+    tok.set_allowed_operations(["read"])
+    db.session.commit()
+
+    after = get_permission_snapshot(tok)
+    assert after is not before
+    assert after.operations == frozenset({"read"})
+    assert permission_snapshot.get_cache_stats()["size"] == 1
+
+
+def test_update_token_invalidates(app, make_account, make_realm, make_token):
+    account = make_account("snap_update_token")
+    tok, _ = make_token(make_realm(account))
+    get_permission_snapshot(tok)
+
+    assert update_token(tok.id, account, operations=["read"]).success is True
+    assert permission_snapshot.get_cache_stats()["size"] == 0
+    assert get_permission_snapshot(tok).operations == frozenset({"read"})
+
+
+def test_update_realm_permissions_invalidates(app, make_account, make_realm, make_token):
+    account = make_account("snap_update_realm")
+    realm = make_realm(account)
+    tok, _ = make_token(realm)
+    get_permission_snapshot(tok)
+
+    assert update_realm_permissions(realm.id, ["TXT"], ["read"], account).success is True
+    assert permission_snapshot.get_cache_stats()["size"] == 0
+    assert get_permission_snapshot(tok).record_types == frozenset({"TXT"})
+
+
+def test_validate_update_compiles_once(app, make_account, make_realm, make_token):
+    account = make_account("snap_validate")
+    realm = make_realm(account, realm_type="subdomain", realm_value="iot",
+                       operations=("read", "create", "update"))
+    _tok, plain = make_token(realm)
+    auth = authenticate_token(plain)
+
+    records = [{"hostname": f"dev{i}.iot", "type": "A", "destination": "192.0.2.1"}
+               for i in range(50)]
+    ok, error, code = validate_dns_records_update(auth, "example.com", records, "192.0.2.9")
+    assert (ok, error, code) == (True, None, None)
+    assert permission_snapshot.get_cache_stats()["misses"] == 1
+
+    records.append({"hostname": "other", "type": "A", "destination": "192.0.2.1"})
+    ok, _error, code = validate_dns_records_update(auth, "example.com", records, "192.0.2.9")
+    assert ok is False
+    assert code == "hostname_denied"
@@ -0,0 +1,208 @@
+"""Unit tests for targeted rrset reads and batched PATCH in backends/powerdns.py."""
+from __future__ import annotations
+
+import json
+import os
+import sys
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import httpx
+import pytest
+
+from netcup_api_filter import async_runtime
+from netcup_api_filter.async_runtime import run_async
+from netcup_api_filter.backends.base import BackendError, DNSBackend
+from netcup_api_filter.backends.powerdns import AsyncPowerDNSBackend, PowerDNSBackend
+
+ZONE_DOC = {"rrsets": [
+    {"name": "vpn.example.com.", "type": "A", "ttl": 60,
+     "records": [{"content": "192.0.2.1", "disabled": False}]},
+    {"name": "vpn.example.com.", "type": "AAAA", "ttl": 60,
+     "records": [{"content": "2001:db8::1", "disabled": False}]},
+]}
+
+
+def _backend(handler) -> PowerDNSBackend:
+    backend = PowerDNSBackend({"api_url": "http://pdns.test:8081", "api_key": "k"})
+    backend._client = httpx.Client(base_url=backend.api_url, transport=httpx.MockTransport(handler))
+    backend._client_pid = os.getpid()
+    return backend
+
+
+# =============================================================================
+# PowerDNSBackend
+# =============================================================================
+
+def test_get_rrset_requests_only_that_rrset():
+    seen = []
+
+    def _handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request)
+        return httpx.Response(200, json=ZONE_DOC)
+
+    records = _backend(_handler).get_rrset("example.com", "vpn", "a")
+
+    assert dict(seen[0].url.params) == {"rrset_name": "vpn.example.com.", "rrset_type": "A"}
+    # Servers that ignore the filter return the whole zone
+    assert [(r["type"], r["destination"]) for r in records] == [("A", "192.0.2.1")]
+
+
+def test_get_rrset_accepts_listed_hostnames():
+    seen = []
+
+    def _handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request.url.params["rrset_name"])
+        return httpx.Response(200, json={"rrsets": []})
+
+    backend = _backend(_handler)
+    assert backend.get_rrset("example.com", "vpn.example.com", "A") == []
+    backend.get_rrset("example.com", "@", "MX")
+    assert seen == ["vpn.example.com.", "example.com."]
+
+
+def test_apply_changes_sends_one_patch():
+    seen = []
+
+    def _handler(request: httpx.Request) -> httpx.Response:
+        seen.append((request.method, json.loads(request.content)))
+        return httpx.Response(204)
+
+    _backend(_handler).apply_changes("example.com", [
+        {"hostname": "vpn", "type": "A", "changetype": "REPLACE",
+         "destinations": ["192.0.2.1", "192.0.2.2"], "ttl": 300},
+        {"hostname": "old", "type": "aaaa", "changetype": "delete"},
+    ])
+
+    assert len(seen) == 1
+    method, body = seen[0]
+    assert method == "PATCH"
+    assert body["rrsets"] == [
+        {"name": "vpn.example.com.", "type": "A", "changetype": "REPLACE", "ttl": 300,
+         "records": [{"content": "192.0.2.1", "disabled": False},
+                     {"content": "192.0.2.2", "disabled": False}]},
+        {"name": "old.example.com.", "type": "AAAA", "changetype": "DELETE"},
+    ]
+
+
+def test_apply_changes_validates_before_sending():
+    def _handler(request: httpx.Request) -> httpx.Response:
+        raise AssertionError("no request expected")
+
+    backend = _backend(_handler)
+    with pytest.raises(BackendError, match="changetype"):
+        backend.apply_changes("example.com", [{"hostname": "vpn", "type": "A", "changetype": "ADD"}])
+    with pytest.raises(BackendError, match="type"):
+        backend.apply_changes("example.com", [{"hostname": "vpn", "changetype": "DELETE"}])
+    with pytest.raises(BackendError, match="type"):
+        backend.apply_changes("example.com", [{"hostname": "vpn", "type": 1, "changetype": "DELETE"}])
+    backend.apply_changes("example.com", [])
+
+
+def test_apply_changes_wraps_server_errors():
+    def _handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(422, json={"error": "bad content"})
+
+    with pytest.raises(BackendError, match="Failed to apply changes"):
+        _backend(_handler).apply_changes("example.com", [
+            {"hostname": "vpn", "type": "A", "changetype": "REPLACE", "destinations": ["bad"]},
+        ])
+
+
+def test_async_backend_sends_one_patch(monkeypatch):
+    seen = []
+
+    def _handler(request: httpx.Request) -> httpx.Response:
+        seen.append((request.method, dict(request.url.params)))
+        if request.method == "GET":
+            return httpx.Response(200, json=ZONE_DOC)
+        return httpx.Response(204)
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(_handler))
+    monkeypatch.setattr(async_runtime.get_async_runtime(), "http_client", lambda url: client)
+    backend = AsyncPowerDNSBackend({"api_url": "http://pdns.test:8081", "api_key": "k"})
+
+    records = run_async(backend.get_rrset("example.com", "vpn", "AAAA"))
+    run_async(backend.apply_changes("example.com", [
+        {"hostname": "vpn", "type": "A", "changetype": "DELETE"},
+        {"hostname": "vpn", "type": "AAAA", "changetype": "DELETE"},
+    ]))
+
+    assert [r["destination"] for r in records] == ["2001:db8::1"]
+    assert seen == [("GET", {"rrset_name": "vpn.example.com.", "rrset_type": "AAAA"}), ("PATCH", {})]
+
+
+# =============================================================================
+# DNSBackend fallback
+# =============================================================================
+
+class _RecordBackend(DNSBackend):
+    """Per-record backend keeping one zone in memory."""
+
+    def __init__(self, records: List[Dict[str, Any]]):
+        super().__init__({})
+        self.records = records
+        self.calls = []
+        self._next_id = 100
+
+    def test_connection(self):
+        return True, "ok"
+
+    def list_zones(self):
+        return ["example.com"]
+
+    def validate_zone_access(self, zone):
+        return True, "ok"
+
+    def list_records(self, zone):
+        self.calls.append("list")
+        return [dict(r) for r in self.records]
+
+    def create_record(self, zone, record):
+        self.calls.append("create")
+        self._next_id += 1
+        self.records.append(dict(record, id=str(self._next_id)))
+        return self.records[-1]
+
+    def update_record(self, zone, record_id, record):
+        self.calls.append("update")
+        for rec in self.records:
+            if rec["id"] == record_id:
+                rec.update(record)
+        return record
+
+    def delete_record(self, zone, record_id):
+        self.calls.append("delete")
+        self.records = [r for r in self.records if r["id"] != record_id]
+        return True
+
+    def get_zone_info(self, zone):
+        return {}
+
+
+def test_fallback_replace_reuses_records():
+    backend = _RecordBackend([
+        {"id": "1", "hostname": "vpn", "type": "A", "destination": "192.0.2.1"},
+        {"id": "2", "hostname": "vpn", "type": "A", "destination": "192.0.2.2"},
+        {"id": "3", "hostname": "vpn", "type": "AAAA", "destination": "2001:db8::1"},
+    ])
+
+    backend.apply_changes("example.com", [
+        {"hostname": "vpn", "type": "A", "changetype": "REPLACE",
+         "destinations": ["192.0.2.2", "192.0.2.3", "192.0.2.4"]},
+        {"hostname": "VPN", "type": "aaaa", "changetype": "DELETE"},
+    ])
+
+    assert sorted((r["type"], r["destination"]) for r in backend.records) == [
+        ("A", "192.0.2.2"), ("A", "192.0.2.3"), ("A", "192.0.2.4"),
+    ]
+    assert backend.calls == ["list", "update", "create", "list", "delete"]
+
+
+def test_fallback_get_rrset_filters_listing():
+    backend = _RecordBackend([
+        {"id": "1", "hostname": "vpn", "type": "A", "destination": "192.0.2.1"},
+        {"id": "2", "hostname": "www", "type": "A", "destination": "192.0.2.2"},
+    ])
+    assert [r["id"] for r in backend.get_rrset("example.com", "VPN", "a")] == ["1"]
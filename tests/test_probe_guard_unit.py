@@ -0,0 +1,186 @@
+"""Unit tests for probe_guard.py — negative cache and probe shedding."""
+from __future__ import annotations
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import pytest
+
+from netcup_api_filter import audit_writer, probe_guard
+from netcup_api_filter.database import get_query_count, reset_query_count
+from netcup_api_filter.models import Account, ActivityLog, APIToken, generate_user_alias
+from netcup_api_filter.probe_guard import ProbeGuard
+from netcup_api_filter.token_auth import authenticate_token
+
+ATTACKER = "203.0.113.66"
+
+
+@pytest.fixture(autouse=True)
+def _fresh_guard():
+    probe_guard.clear_cache()
+    yield
+    probe_guard.clear_cache()
+
+
+def _token(alias: str, prefix: str = "AAAAAAAA") -> str:
+    return f"naf_{alias}_{prefix}{'x' * 56}"
+
+
+def _probe(client, alias: str, prefix: str = "AAAAAAAA", ip: str = ATTACKER):
+    return client.get(
+        "/api/dns/example.com/records",
+        headers={"Authorization": f"Bearer {_token(alias, prefix)}"},
+        environ_base={"REMOTE_ADDR": ip},
+    )
+
+
+# =============================================================================
+# ProbeGuard
+# =============================================================================
+
+def test_check_requires_threshold_before_using_cache():
+    guard = ProbeGuard(threshold=3, window_seconds=60)
+    guard.record_failure(ATTACKER, "aliasaliasalias1", "AAAAAAAA", "alias_not_found")
+    assert guard.check(ATTACKER, "aliasaliasalias1", "AAAAAAAA") is None
+
+    guard.record_failure(ATTACKER, "aliasaliasalias2", "AAAAAAAA", "alias_not_found")
+    guard.record_failure(ATTACKER, "aliasaliasalias3", "AAAAAAAA", "alias_not_found")
+    assert guard.check(ATTACKER, "aliasaliasalias1", "AAAAAAAA") == "alias_not_found"
+    # Unknown to the cache: still goes to the database
+    assert guard.check(ATTACKER, "aliasaliasalias9", "AAAAAAAA") is None
+    # Other clients are never answered from the cache
+    assert guard.check("192.0.2.1", "aliasaliasalias1", "AAAAAAAA") is None
+
+
+def test_window_expires(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(probe_guard.time, "monotonic", lambda: now[0])
+    guard = ProbeGuard(threshold=2, window_seconds=10)
+    guard.record_failure(ATTACKER, "a" * 16, "AAAAAAAA", "alias_not_found")
+    guard.record_failure(ATTACKER, "b" * 16, "AAAAAAAA", "alias_not_found")
+    assert guard.is_probing(ATTACKER)
+
+    now[0] += 11
+    assert not guard.is_probing(ATTACKER)
+
+
+def test_negative_entries_expire(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(probe_guard.time, "monotonic", lambda: now[0])
+    guard = ProbeGuard(threshold=1, window_seconds=600, negative_ttl=5)
+    guard.record_failure(ATTACKER, "a" * 16, "AAAAAAAA", "alias_not_found")
+    now[0] += 6
+    assert guard.check(ATTACKER, "a" * 16, "AAAAAAAA") is None
+
+
+def test_invalidation_by_alias_and_prefix():
+    guard = ProbeGuard(threshold=1)
+    guard.record_failure(ATTACKER, "a" * 16, "AAAAAAAA", "alias_not_found")
+    guard.record_failure(ATTACKER, "b" * 16, "BBBBBBBB", "token_prefix_not_found")
+
+    guard.invalidate_alias("a" * 16)
+    assert guard.check(ATTACKER, "a" * 16, "AAAAAAAA") is None
+    guard.invalidate_prefix("BBBBBBBB")
+    assert guard.check(ATTACKER, "b" * 16, "BBBBBBBB") is None
+
+
+def test_bounded_sizes():
+    guard = ProbeGuard(threshold=5, negative_max_size=3, max_tracked_ips=2)
+    for i in range(10):
+        guard.record_failure(f"192.0.2.{i}", f"{i:016d}", "AAAAAAAA", "alias_not_found")
+    assert len(guard._negative) == 3
+    assert len(guard._windows) == 2
+
+
+# =============================================================================
+# Integration with authenticate_token / require_auth
+# =============================================================================
+
+def test_probing_client_skips_database(app, db, monkeypatch):
+    monkeypatch.setattr(probe_guard._guard, "threshold", 3)
+    alias = generate_user_alias()
+    for _ in range(3):
+        assert authenticate_token(_token(alias), client_ip=ATTACKER).error_code == "alias_not_found"
+
+    with app.test_request_context("/"):
+        reset_query_count()
+        result = authenticate_token(_token(alias), client_ip=ATTACKER)
+        assert result.error_code == "alias_not_found"
+        assert get_query_count() == 0
+
+
+def test_token_creation_invalidates_negative_entry(app, db, monkeypatch, make_account, make_realm):
+    monkeypatch.setattr(probe_guard._guard, "threshold", 1)
+    account = make_account("probe_invalidate")
+    realm = make_realm(account)
+    alias = account.user_alias
+    probe_guard.record_probe_failure(ATTACKER, alias, "NEWPREF1", "token_prefix_not_found")
+    probe_guard.record_probe_failure(ATTACKER, alias, "ZZZZZZZZ", "token_prefix_not_found")
+    assert probe_guard.check_probe(ATTACKER, alias, "NEWPREF1") == "token_prefix_not_found"
+
+    db.session.add(APIToken(realm_id=realm.id, token_name="new", token_prefix="NEWPREF1",
+                            token_hash="x", is_active=1))
+    db.session.commit()
+
+    assert probe_guard.check_probe(ATTACKER, alias, "NEWPREF1") is None
+    # Unrelated negative entries survive
+    assert probe_guard.check_probe(ATTACKER, alias, "ZZZZZZZZ") == "token_prefix_not_found"
+
+
+def test_account_creation_invalidates_alias(app, db, monkeypatch):
+    monkeypatch.setattr(probe_guard._guard, "threshold", 1)
+    alias = generate_user_alias()
+    probe_guard.record_probe_failure(ATTACKER, alias, "AAAAAAAA", "alias_not_found")
+    assert probe_guard.check_probe(ATTACKER, alias, "AAAAAAAA") == "alias_not_found"
+
+    db.session.add(Account(username="probe_new_alias", user_alias=alias, email="pna@example.com",
+                           password_hash="x", is_active=1))
+    db.session.commit()
+    assert probe_guard.check_probe(ATTACKER, alias, "AAAAAAAA") is None
+
+
+def test_shed_probes_are_aggregated(app, db, client, monkeypatch):
+    monkeypatch.setattr(probe_guard._guard, "threshold", 3)
+    audit_writer.flush_audit_log()
+    before = ActivityLog.query.filter_by(source_ip=ATTACKER).count()
+
+    for _ in range(10):
+        assert _probe(client, generate_user_alias()).status_code == 401
+    audit_writer.flush_audit_log()
+    # The first three attempts are logged individually
+    assert ActivityLog.query.filter_by(source_ip=ATTACKER).count() == before + 3
+
+    assert probe_guard.flush_probe_summaries() == 1
+    audit_writer.flush_audit_log()
+    summary = ActivityLog.query.filter_by(source_ip=ATTACKER).order_by(ActivityLog.id.desc()).first()
+    assert summary.error_code == "alias_not_found"
+    assert summary.is_attack == 1
+    assert summary.get_request_data()["aggregated"] == 7
+
+
+def test_other_clients_unaffected(app, db, client, monkeypatch):
+    monkeypatch.setattr(probe_guard._guard, "threshold", 2)
+    for _ in range(5):
+        _probe(client, generate_user_alias())
+    audit_writer.flush_audit_log()
+    before = ActivityLog.query.filter_by(source_ip="198.51.100.10").count()
+
+    _probe(client, generate_user_alias(), ip="198.51.100.10")
+    audit_writer.flush_audit_log()
+    assert ActivityLog.query.filter_by(source_ip="198.51.100.10").count() == before + 1
+
+
+def test_audit_flush_loop_writes_expired_summaries(app, db, monkeypatch):
+    probe_guard._guard.aggregate(ATTACKER, "alias_not_found")
+    assert probe_guard._guard.pending_aggregates() == 1
+
+    # Probing stopped; the window elapses without another probe
+    monkeypatch.setattr(probe_guard._guard, "window", 0)
+    audit_writer._writer._run_hooks()
+    audit_writer.flush_audit_log()
+
+    assert probe_guard._guard.pending_aggregates() == 0
+    summary = ActivityLog.query.filter_by(source_ip=ATTACKER, is_attack=1).one()
+    assert summary.get_request_data()["aggregated"] == 1
@@ -0,0 +1,174 @@
+"""Unit tests for record_index.py — DDNS last-known-destination index."""
+from __future__ import annotations
+
+import os
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import pytest
+
+from netcup_api_filter import record_index, zone_cache
+from netcup_api_filter.api import ddns_protocols, dns_api
+from netcup_api_filter.models import DnsRecordIndex
+from netcup_api_filter.netcup_client import NetcupClient
+
+NS = "netcup:test:1"
+ZONE = [
+    {"id": "1", "hostname": "home", "type": "A", "destination": "192.0.2.1"},
+    {"id": "2", "hostname": "home", "type": "AAAA", "destination": "2001:db8::1"},
+    {"id": "3", "hostname": "@", "type": "MX", "destination": "mail.example.com"},
+]
+
+
+@pytest.fixture
+def index(app):
+    zone_cache.clear_cache()
+    yield record_index.get_record_index()
+    zone_cache.clear_cache()
+
+
+def _rows(db):
+    return {(r.hostname, r.record_type): (r.destination, r.record_id)
+            for r in db.session.query(DnsRecordIndex).all()}
+
+
+# =============================================================================
+# RecordIndex
+# =============================================================================
+
+def test_zone_read_indexes_address_records(index, db):
+    index.observe_zone(NS, "Example.com.", ZONE)
+    assert _rows(db) == {
+        ("home", "A"): ("192.0.2.1", "1"),
+        ("home", "AAAA"): ("2001:db8::1", "2"),
+    }
+    entry = index.lookup(NS, "example.com", "HOME", "a")
+    assert entry.destination == "192.0.2.1"
+    assert entry.record_id == "1"
+
+
+def test_zone_read_replaces_changed_and_vanished_rows(index, db):
+    index.observe_zone(NS, "example.com", ZONE)
+    index.observe_zone(NS, "example.com", [
+        {"id": "1", "hostname": "home", "type": "A", "destination": "198.51.100.1"},
+        {"id": "4", "hostname": "nas", "type": "A", "destination": "192.0.2.4"},
+    ])
+    assert _rows(db) == {
+        ("home", "A"): ("198.51.100.1", "1"),
+        ("nas", "A"): ("192.0.2.4", "4"),
+    }
+
+
+def test_namespaces_are_separate(index):
+    index.observe_zone(NS, "example.com", ZONE)
+    assert index.lookup("netcup:other:2", "example.com", "home", "A") is None
+
+
+def test_is_current(index, db, monkeypatch):
+    monkeypatch.setattr(index, "verify_seconds", 300)
+    index.observe_zone(NS, "example.com", ZONE)
+    assert index.is_current(NS, "example.com", "home", "A", "192.0.2.1")
+    assert not index.is_current(NS, "example.com", "home", "A", "192.0.2.99")
+    assert not index.is_current(NS, "example.com", "unknown", "A", "192.0.2.1")
+
+    db.session.query(DnsRecordIndex).update({"observed_at": datetime.utcnow() - timedelta(seconds=301)})
+    db.session.commit()
+    assert not index.is_current(NS, "example.com", "home", "A", "192.0.2.1")
+
+
+def test_partial_write_updates_and_forgets(index, db):
+    index.observe_zone(NS, "example.com", ZONE)
+    index.observe_changes(NS, "example.com", [
+        {"id": "1", "hostname": "home", "type": "A", "destination": "198.51.100.1"},
+        {"id": "2", "deleterecord": True},
+        {"hostname": "new", "type": "A", "destination": "192.0.2.9"},
+    ])
+    assert _rows(db) == {("home", "A"): ("198.51.100.1", "1")}
+
+
+def test_disabled_index_is_inert(index, db, monkeypatch):
+    monkeypatch.setattr(index, "verify_seconds", 0)
+    index.observe_zone(NS, "example.com", ZONE)
+    assert _rows(db) == {}
+    assert not index.is_current(NS, "example.com", "home", "A", "192.0.2.1")
+
+
+# =============================================================================
+# DDNS fast path
+# =============================================================================
+
+class FakeZone:
+    """Stands in for NetcupClient._session_request with one in-memory zone."""
+
+    def __init__(self):
+        self.records = [dict(r) for r in ZONE]
+        self.calls: list[str] = []
+
+    def __call__(self, action, param):
+        self.calls.append(action)
+        if action == "infoDnsRecords":
+            return {"responsedata": {"dnsrecords": [dict(r) for r in self.records]}}
+        for rec in param["dnsrecordset"]["dnsrecords"]:
+            for existing in self.records:
+                if existing["id"] == rec.get("id"):
+                    existing.update(rec)
+        return {"responsedata": {"dnsrecords": [dict(r) for r in self.records]}}
+
+
+@pytest.fixture
+def ccp(index, monkeypatch):
+    fake = FakeZone()
+    client = NetcupClient("123", "key", "pass", api_url="http://mock-api/", pooled=True)
+    monkeypatch.setattr(client, "_session_request", fake)
+    monkeypatch.setattr(ddns_protocols, "get_netcup_client", lambda: client)
+    monkeypatch.setattr(dns_api, "get_netcup_client", lambda: client)
+    return fake
+
+
+def test_unchanged_address_answered_from_index(ccp):
+    assert ddns_protocols.update_dns_record("example.com", "home", "192.0.2.1", "A") == (True, None, False)
+    assert ccp.calls == ["infoDnsRecords"]
+
+    # Zone cache gone (e.g. other worker, restart): the index still answers
+    zone_cache.clear_cache()
+    assert ddns_protocols.update_dns_record("example.com", "home", "192.0.2.1", "A") == (True, None, False)
+    assert ccp.calls == ["infoDnsRecords"]
+
+
+def test_changed_address_goes_upstream_and_reindexes(ccp):
+    assert ddns_protocols.update_dns_record("example.com", "home", "198.51.100.7", "A") == (True, None, True)
+    assert ccp.calls == ["infoDnsRecords", "updateDnsRecords"]
+
+    zone_cache.clear_cache()
+    assert ddns_protocols.update_dns_record("example.com", "home", "198.51.100.7", "A") == (True, None, False)
+    assert ccp.calls == ["infoDnsRecords", "updateDnsRecords"]
+
+
+def test_old_observation_triggers_full_read(ccp, db):
+    ddns_protocols.update_dns_record("example.com", "home", "192.0.2.1", "A")
+    db.session.query(DnsRecordIndex).update({"observed_at": datetime.utcnow() - timedelta(days=1)})
+    db.session.commit()
+    zone_cache.clear_cache()
+
+    assert ddns_protocols.update_dns_record("example.com", "home", "192.0.2.1", "A") == (True, None, False)
+    assert ccp.calls == ["infoDnsRecords", "infoDnsRecords"]
+
+
+def test_rest_ddns_unchanged_address_answered_from_index(ccp, client, make_account, make_realm, make_token):
+    _tok, plain = make_token(make_realm(make_account("index_user"), realm_value="home"))
+    headers = {"Authorization": f"Bearer {plain}"}
+
+    response = client.post("/api/ddns/example.com/home?ip=192.0.2.1", headers=headers)
+    assert response.get_json()["status"] == "unchanged"
+    assert ccp.calls == ["infoDnsRecords"]
+
+    zone_cache.clear_cache()
+    response = client.post("/api/ddns/example.com/home?ip=192.0.2.1", headers=headers)
+    assert response.status_code == 200 and response.get_json()["status"] == "unchanged"
+    assert ccp.calls == ["infoDnsRecords"]
+
+    response = client.post("/api/ddns/example.com/home?ip=198.51.100.7", headers=headers)
+    assert response.get_json()["status"] == "updated"
+    assert ccp.calls == ["infoDnsRecords", "infoDnsRecords", "updateDnsRecords"]
@@ -0,0 +1,103 @@
+"""Unit tests for settings_cache.py — in-process get_setting() cache."""
+from __future__ import annotations
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import pytest
+from sqlalchemy import text
+
+from netcup_api_filter.database import get_setting, set_setting
+from netcup_api_filter.models import Settings, SettingsVersion
+from netcup_api_filter.settings_cache import SettingsCache, get_settings_cache
+
+
+@pytest.fixture
+def other_worker(app):
+    """A second cache, standing in for another gunicorn worker."""
+    return SettingsCache(check_seconds=3600, max_age_seconds=3600)
+
+
+def _elapse(cache, seconds):
+    cache._checked_at -= seconds
+    cache._loaded_at -= seconds
+
+
+def test_reads_are_served_from_memory(app, db):
+    set_setting("netcup_config", {"customer_id": "123"})
+    cache = get_settings_cache()
+    get_setting("netcup_config")
+    reloads = cache.stats()["reloads"]
+
+    for _ in range(10):
+        assert get_setting("netcup_config") == {"customer_id": "123"}
+    assert get_setting("missing") is None
+    assert cache.stats()["reloads"] == reloads
+
+
+def test_own_writes_apply_immediately(app, db):
+    set_setting("api_rate_limit", "60 per minute")
+    assert get_setting("api_rate_limit") == "60 per minute"
+    set_setting("api_rate_limit", "10 per minute")
+    assert get_setting("api_rate_limit") == "10 per minute"
+
+
+def test_other_worker_sees_write_after_check_interval(app, db, other_worker):
+    set_setting("geoip_config", {"account_id": "1"})
+    assert other_worker.get("geoip_config") == {"account_id": "1"}
+
+    set_setting("geoip_config", {"account_id": "2"})
+    assert other_worker.get("geoip_config") == {"account_id": "1"}
+
+    _elapse(other_worker, 3601)
+    assert other_worker.get("geoip_config") == {"account_id": "2"}
+
+
+def test_unchanged_version_check_does_not_reload(app, db, other_worker):
+    set_setting("smtp_config", {"smtp_host": "mail"})
+    other_worker.get("smtp_config")
+    other_worker.check_seconds = 1
+    other_worker._checked_at -= 2
+    other_worker.get("smtp_config")
+    assert other_worker.stats()["reloads"] == 1
+    assert other_worker.stats()["checks"] == 2
+
+
+def test_model_writes_and_deletes_bump_version(app, db):
+    def _version():
+        return db.session.get(SettingsVersion, 1).version
+
+    set_setting("a", 1)
+    before = _version()
+    Settings.set("b", {"count": 1})
+    Settings.delete("b")
+    db.session.expire_all()
+    assert _version() == before + 2
+
+
+def test_raw_sql_write_applies_after_max_age(app, db, other_worker):
+    set_setting("invite_expiry_hours", 48)
+    assert other_worker.get("invite_expiry_hours") == 48
+    db.session.execute(text("UPDATE settings SET value = '24' WHERE key = 'invite_expiry_hours'"))
+    db.session.commit()
+
+    other_worker.check_seconds = 1
+    other_worker._checked_at -= 2
+    assert other_worker.get("invite_expiry_hours") == 48
+    _elapse(other_worker, 3601)
+    assert other_worker.get("invite_expiry_hours") == 24
+
+
+def test_values_are_copies(app, db):
+    set_setting("netcup_config", {"customer_id": "123"})
+    get_setting("netcup_config")["customer_id"] = "mutated"
+    assert get_setting("netcup_config") == {"customer_id": "123"}
+
+
+def test_disabled_cache_reads_database(app, db):
+    cache = SettingsCache(check_seconds=0)
+    set_setting("x", "1")
+    assert cache.get("x") == "1"
+    assert cache.stats()["reloads"] == 0
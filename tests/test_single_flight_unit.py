@@ -0,0 +1,227 @@
+"""Unit tests for single_flight.py — coalescing of concurrent upstream reads."""
+from __future__ import annotations
+
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import httpx
+import pytest
+
+from netcup_api_filter import single_flight, zone_cache
+from netcup_api_filter.backends.powerdns import PowerDNSBackend
+from netcup_api_filter.single_flight import SingleFlight
+from netcup_api_filter.zone_cache import ZoneRecordCache, zone_key
+
+
+@pytest.fixture(autouse=True)
+def _fresh_state():
+    single_flight.reset_single_flight()
+    zone_cache.clear_cache()
+    yield
+    single_flight.reset_single_flight()
+    zone_cache.clear_cache()
+
+
+def _wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "condition not reached"
+        time.sleep(0.005)
+
+
+def _run_concurrently(n, target):
+    results, errors = [], []
+
+    def _work():
+        try:
+            results.append(target())
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=_work) for _ in range(n)]
+    for t in threads:
+        t.start()
+    return threads, results, errors
+
+
+class _BlockingFetch:
+    def __init__(self, result=None, error=None):
+        self.release = threading.Event()
+        self.calls = 0
+        self.result = result
+        self.error = error
+
+    def __call__(self):
+        self.calls += 1
+        self.release.wait(5)
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+# =============================================================================
+# SingleFlight
+# =============================================================================
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    fetch = _BlockingFetch(result=["records"])
+    threads, results, errors = _run_concurrently(8, lambda: flight.do(("ns", "example.com"), fetch))
+
+    _wait_for(lambda: flight.stats()["coalesced"] == 7)
+    fetch.release.set()
+    for t in threads:
+        t.join()
+
+    assert fetch.calls == 1
+    assert results == [["records"]] * 8
+    assert not errors
+    assert flight.stats() == {"in_flight": 0, "issued": 1, "coalesced": 7}
+
+
+def test_errors_are_shared_with_waiters():
+    flight = SingleFlight()
+    fetch = _BlockingFetch(error=RuntimeError("upstream down"))
+    threads, results, errors = _run_concurrently(4, lambda: flight.do("k", fetch))
+
+    _wait_for(lambda: flight.stats()["coalesced"] == 3)
+    fetch.release.set()
+    for t in threads:
+        t.join()
+
+    assert fetch.calls == 1
+    assert len(errors) == 4
+    assert all(str(e) == "upstream down" for e in errors)
+
+
+def test_different_keys_do_not_coalesce():
+    flight = SingleFlight()
+    flight.do(("ns", "a.test"), lambda: 1)
+    flight.do(("ns", "b.test"), lambda: 2)
+    assert flight.stats()["issued"] == 2
+    assert flight.stats()["coalesced"] == 0
+
+
+def test_sequential_calls_run_again():
+    flight = SingleFlight()
+    calls = []
+    for _ in range(3):
+        flight.do("k", lambda: calls.append(1))
+    assert len(calls) == 3
+
+
+# =============================================================================
+# Zone cache and backends
+# =============================================================================
+
+def test_zone_cache_miss_is_coalesced():
+    cache = ZoneRecordCache(ttl_seconds=60)
+    fetch = _BlockingFetch(result=[{"id": "1", "hostname": "home", "type": "A", "destination": "192.0.2.1"}])
+    key = zone_key("netcup:test:1", "example.com")
+    threads, results, errors = _run_concurrently(6, lambda: cache.get_or_load(key, fetch))
+
+    _wait_for(lambda: single_flight.get_single_flight_stats()["coalesced"] == 5)
+    fetch.release.set()
+    for t in threads:
+        t.join()
+
+    assert fetch.calls == 1
+    assert len(results) == 6
+    # Every caller got its own copy
+    assert len({id(r) for r in results}) == 6
+
+
+def test_fetch_overlapping_a_write_does_not_overwrite_it():
+    cache = ZoneRecordCache(ttl_seconds=60)
+    key = zone_key("netcup:test:1", "example.com")
+    old = [{"id": "1", "destination": "192.0.2.1"}]
+    new = [{"id": "1", "destination": "198.51.100.1"}]
+    fetch = _BlockingFetch(result=old)
+    threads, _, _ = _run_concurrently(1, lambda: cache.get_or_load(key, fetch))
+
+    _wait_for(lambda: fetch.calls == 1)
+    cache.put(key, new)  # mutation completes while the read is in flight
+    fetch.release.set()
+    threads[0].join()
+
+    assert cache.get(key) == new
+
+
+def test_write_to_another_zone_does_not_discard_fetch():
+    cache = ZoneRecordCache(ttl_seconds=60)
+    key = zone_key("netcup:test:1", "example.com")
+    records = [{"id": "1", "destination": "192.0.2.1"}]
+    fetch = _BlockingFetch(result=records)
+    threads, _, _ = _run_concurrently(1, lambda: cache.get_or_load(key, fetch))
+
+    _wait_for(lambda: fetch.calls == 1)
+    cache.put(zone_key("netcup:test:1", "other.example"), [])
+    cache.invalidate(zone_key("netcup:test:2", "example.com"))
+    fetch.release.set()
+    threads[0].join()
+
+    assert cache.get(key) == records
+
+
+def test_invalidate_zone_discards_fetch_in_flight():
+    cache = ZoneRecordCache(ttl_seconds=60)
+    key = zone_key("netcup:test:1", "example.com")
+    fetch = _BlockingFetch(result=[{"id": "1", "destination": "192.0.2.1"}])
+    threads, _, _ = _run_concurrently(1, lambda: cache.get_or_load(key, fetch))
+
+    _wait_for(lambda: fetch.calls == 1)
+    cache.invalidate_zone("example.com")
+    fetch.release.set()
+    threads[0].join()
+
+    assert cache.get(key) is None
+
+
+def test_powerdns_namespace_is_scoped_to_api_key():
+    config = {"api_url": "http://pdns.test:8081", "api_key": "k"}
+    same = PowerDNSBackend(dict(config)).cache_namespace
+    assert PowerDNSBackend(dict(config)).cache_namespace == same
+    assert PowerDNSBackend(dict(config, api_key="other")).cache_namespace != same
+
+
+def test_powerdns_list_records_coalesced():
+    requests_seen = []
+    release = threading.Event()
+
+    def _handler(request: httpx.Request) -> httpx.Response:
+        requests_seen.append(request.url.path)
+        release.wait(5)
+        return httpx.Response(200, json={"rrsets": [
+            {"name": "home.example.com.", "type": "A", "ttl": 60,
+             "records": [{"content": "192.0.2.1", "disabled": False}]},
+        ]})
+
+    transport = httpx.MockTransport(_handler)
+    backends = []
+    for _ in range(5):
+        backend = PowerDNSBackend({"api_url": "http://pdns.test:8081", "api_key": "k"})
+        backend._client = httpx.Client(base_url=backend.api_url, transport=transport)
+        backend._client_pid = os.getpid()
+        backends.append(backend)
+
+    pending = iter(backends)
+    lock = threading.Lock()
+
+    def _list():
+        with lock:
+            backend = next(pending)
+        return backend.list_records("example.com")
+
+    threads, results, errors = _run_concurrently(5, _list)
+    _wait_for(lambda: single_flight.get_single_flight_stats()["coalesced"] == 4)
+    release.set()
+    for t in threads:
+        t.join()
+
+    assert not errors
+    assert requests_seen == ["/api/v1/servers/localhost/zones/example.com."]
+    assert all(r[0]["destination"] == "192.0.2.1" for r in results)
@@ -17,11 +17,15 @@ import pytest
 
 from netcup_api_filter import token_auth
 from netcup_api_filter.models import (
+    Account,
     AccountRealm,
     APIToken,
     generate_token,
     generate_user_alias,
     hash_token,
+    hash_token_bcrypt,
+    token_hash_needs_rehash,
+    verify_token_hash,
 )
 from netcup_api_filter.token_auth import (
     AuthResult,
@@ -32,6 +36,7 @@ from netcup_api_filter.token_auth import (
     check_permission,
     extract_bearer_token,
 )
+from netcup_api_filter.usage_buffer import flush_usage
 
 
 # =============================================================================
@@ -259,6 +264,159 @@ def test_auth_token_success(app, make_account, make_realm, make_token):
     assert result.token is stored_token
 
 
+# =============================================================================
+# authenticate_token — single round-trip lookup
+# =============================================================================
+
+
+@pytest.mark.parametrize("extra_realms", [0, 10])
+def test_auth_token_single_query_regardless_of_realm_count(
+    app, db, make_account, make_realm, make_token, extra_realms
+):
+    """Account, token, realm and backend data come back in one statement."""
+    from netcup_api_filter import token_cache
+    from netcup_api_filter.database import get_query_count, reset_query_count
+
+    account = make_account(f"one_query_{extra_realms}")
+    for i in range(extra_realms):
+        make_realm(account, realm_value=f"extra{i}")
+    realm = make_realm(account)
+    _tok, plain = make_token(realm)
+    token_cache.clear_cache()
+    db.session.expire_all()
+
+    reset_query_count()
+    result = authenticate_token(plain)
+    assert result.success is True
+    # Attribute access used by check_permission/log_activity must not lazy-load.
+    assert result.token.realm is result.realm
+    assert result.realm.account is result.account
+    check_permission(result, "read", "example.com", "A", "vpn")
+    assert get_query_count() == 1
+
+
+def test_auth_token_prefix_in_other_account_not_matched(app, make_account, make_realm, make_token):
+    """The prefix join is scoped to the alias' own realms."""
+    owner = make_account("prefix_owner")
+    _tok, plain = make_token(make_realm(owner))
+    other = make_account("prefix_other")
+    make_realm(other)
+
+    random_part = plain.split("_", 2)[2]
+    forged = f"naf_{other.user_alias}_{random_part}"
+    result = authenticate_token(forged)
+    assert result.success is False
+    assert result.error_code == "token_prefix_not_found"
+    assert result.account is other
+
+
+def test_query_count_header_in_testing_mode(client):
+    response = client.get("/health")
+    assert response.headers["X-Query-Count"] == "0"
+
+
+# =============================================================================
+# Token hash scheme — keyed HMAC with transparent bcrypt upgrade
+# =============================================================================
+
+_PLAIN = "naf_" + "a" * 16 + "_" + "b" * 64
+
+
+def test_hash_token_emits_versioned_hmac():
+    stored = hash_token(_PLAIN)
+    assert stored.startswith("hmac-sha256$0$")
+    assert stored == hash_token(_PLAIN)  # deterministic
+    assert verify_token_hash(_PLAIN, stored) is True
+    assert verify_token_hash(_PLAIN[:-1] + "c", stored) is False
+    assert token_hash_needs_rehash(stored) is False
+
+
+def test_legacy_bcrypt_hash_verifies_and_needs_rehash():
+    legacy = hash_token_bcrypt(_PLAIN)
+    assert verify_token_hash(_PLAIN, legacy) is True
+    assert verify_token_hash(_PLAIN[:-1] + "c", legacy) is False
+    assert token_hash_needs_rehash(legacy) is True
+
+
+def test_pepper_change_needs_previous_pepper(monkeypatch):
+    unpeppered = hash_token(_PLAIN)
+    monkeypatch.setenv("TOKEN_HASH_PEPPER", "pepper-one")
+    stored = hash_token(_PLAIN)
+    assert stored != unpeppered
+    assert not stored.startswith("hmac-sha256$0$")
+    assert verify_token_hash(_PLAIN, stored) is True
+
+    monkeypatch.setenv("TOKEN_HASH_PEPPER", "pepper-two")
+    assert verify_token_hash(_PLAIN, stored) is False
+
+    monkeypatch.setenv("TOKEN_HASH_PEPPER_PREVIOUS", "pepper-one")
+    assert verify_token_hash(_PLAIN, stored) is True
+    assert token_hash_needs_rehash(stored) is True
+
+
+def test_unpeppered_hash_rejected_after_pepper_is_set(monkeypatch):
+    stored = hash_token(_PLAIN)
+    monkeypatch.setenv("TOKEN_HASH_PEPPER", "pepper-new")
+    monkeypatch.delenv("TOKEN_HASH_PEPPER_PREVIOUS", raising=False)
+    assert verify_token_hash(_PLAIN, stored) is False
+    assert token_hash_needs_rehash(stored) is True
+
+
+def test_unpeppered_hash_verifies_while_migrating(monkeypatch):
+    stored = hash_token(_PLAIN)
+    monkeypatch.setenv("TOKEN_HASH_PEPPER", "pepper-new")
+    monkeypatch.setenv("TOKEN_HASH_PEPPER_PREVIOUS", "")
+    assert verify_token_hash(_PLAIN, stored) is True
+    assert token_hash_needs_rehash(stored) is True
+
+
+def test_auth_token_upgrades_legacy_hash(app, db, make_account, make_realm, make_token):
+    from netcup_api_filter import token_cache
+
+    tok, plain = make_token(make_realm(make_account("rehash_legacy")))
+    tok.token_hash = hash_token_bcrypt(plain)
+    db.session.commit()
+    token_cache.clear_cache()
+
+    assert authenticate_token(plain).success is True
+    assert flush_usage() == 1
+    db.session.expire_all()
+    upgraded = db.session.get(APIToken, tok.id).token_hash
+    assert upgraded == hash_token(plain)
+
+    # Next authentication uses the new hash without writing again
+    assert authenticate_token(plain).success is True
+    assert db.session.get(APIToken, tok.id).token_hash == upgraded
+
+
+def test_auth_token_rehash_does_not_commit_caller_session(app, db, make_account, make_realm, make_token):
+    account = make_account("rehash_session")
+    tok, plain = make_token(make_realm(account))
+    tok.token_hash = hash_token_bcrypt(plain)
+    db.session.commit()
+
+    account.email = "pending@example.com"
+    assert authenticate_token(plain).success is True
+    assert not db.session.is_modified(tok)
+    db.session.rollback()
+    flush_usage()
+
+    db.session.expire_all()
+    assert db.session.get(Account, account.id).email != "pending@example.com"
+    assert db.session.get(APIToken, tok.id).token_hash == hash_token(plain)
+
+
+def test_auth_token_failed_auth_does_not_rehash(app, db, make_account, make_realm, make_token):
+    tok, plain = make_token(make_realm(make_account("rehash_denied")), is_active=0)
+    legacy = hash_token_bcrypt(plain)
+    tok.token_hash = legacy
+    db.session.commit()
+
+    assert authenticate_token(plain).error_code == "token_revoked"
+    db.session.expire_all()
+    assert db.session.get(APIToken, tok.id).token_hash == legacy
+
+
 # =============================================================================
 # check_ip_allowed — 8 parametrized cases
 # =============================================================================
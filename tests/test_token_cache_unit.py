@@ -0,0 +1,157 @@
+"""Unit tests for token_cache.py — the verified-token cache in front of bcrypt.
+
+Covers the cache itself (TTL, row/hash binding, eviction) and its integration
+with authenticate_token and the realm_token_service mutations that must
+invalidate it.
+"""
+from __future__ import annotations
+
+import os
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import pytest
+
+from netcup_api_filter import token_cache
+from netcup_api_filter.models import APIToken
+from netcup_api_filter.realm_token_service import regenerate_token, revoke_token, update_token
+from netcup_api_filter.token_auth import authenticate_token
+from netcup_api_filter.token_cache import VerifiedTokenCache
+
+
+@pytest.fixture(autouse=True)
+def _fresh_cache():
+    token_cache.clear_cache()
+    yield
+    token_cache.clear_cache()
+
+
+def _count_verify_calls(monkeypatch) -> list[int]:
+    calls: list[int] = []
+    original = APIToken.verify
+
+    def counting_verify(self, token):
+        calls.append(self.id)
+        return original(self, token)
+
+    monkeypatch.setattr(APIToken, "verify", counting_verify)
+    return calls
+
+
+# =============================================================================
+# VerifiedTokenCache — no DB needed
+# =============================================================================
+
+
+def test_cache_hit_requires_same_row_and_hash():
+    cache = VerifiedTokenCache(max_size=10, ttl_seconds=60)
+    cache.remember("naf_tok", 1, "hash-a")
+
+    assert cache.is_verified("naf_tok", 1, "hash-a") is True
+    assert cache.is_verified("naf_other", 1, "hash-a") is False
+    # Hash changed (token regenerated elsewhere) — entry is dropped.
+    assert cache.is_verified("naf_tok", 1, "hash-b") is False
+    assert cache.is_verified("naf_tok", 1, "hash-a") is False
+
+
+def test_cache_entry_expires():
+    cache = VerifiedTokenCache(max_size=10, ttl_seconds=60)
+    cache.remember("naf_tok", 1, "hash")
+    digest = cache._digest("naf_tok")
+    token_id, token_hash, _ = cache._cache[digest]
+    cache._cache[digest] = (token_id, token_hash, datetime.utcnow() - timedelta(seconds=61))
+
+    assert cache.is_verified("naf_tok", 1, "hash") is False
+    assert len(cache._cache) == 0
+
+
+def test_cache_evicts_oldest_at_capacity():
+    cache = VerifiedTokenCache(max_size=2, ttl_seconds=60)
+    cache.remember("naf_a", 1, "h")
+    cache.remember("naf_b", 2, "h")
+    cache.remember("naf_c", 3, "h")
+
+    assert cache.is_verified("naf_a", 1, "h") is False
+    assert cache.is_verified("naf_b", 2, "h") is True
+    assert cache.is_verified("naf_c", 3, "h") is True
+
+
+def test_cache_never_stores_plaintext():
+    cache = VerifiedTokenCache(max_size=10, ttl_seconds=60)
+    cache.remember("naf_secret_value", 1, "h")
+    assert all("naf_secret_value" not in key for key in cache._cache)
+
+
+def test_cache_disabled_with_zero_ttl():
+    cache = VerifiedTokenCache(max_size=10, ttl_seconds=0)
+    cache.remember("naf_tok", 1, "h")
+    assert cache.is_verified("naf_tok", 1, "h") is False
+
+
+# =============================================================================
+# authenticate_token integration
+# =============================================================================
+
+
+def test_second_auth_skips_bcrypt(app, make_account, make_realm, make_token, monkeypatch):
+    calls = _count_verify_calls(monkeypatch)
+    account = make_account("cache_user")
+    realm = make_realm(account)
+    _tok, plain = make_token(realm)
+
+    assert authenticate_token(plain).success is True
+    assert authenticate_token(plain).success is True
+    assert len(calls) == 1
+    assert token_cache.get_cache_stats()["hits"] == 1
+
+
+def test_wrong_token_is_never_cached(app, make_account, make_realm, make_token, monkeypatch):
+    calls = _count_verify_calls(monkeypatch)
+    account = make_account("cache_wrong")
+    realm = make_realm(account)
+    _tok, plain = make_token(realm)
+    wrong = plain[:-4] + "ZZZZ"
+
+    assert authenticate_token(wrong).error_code == "token_hash_mismatch"
+    assert authenticate_token(wrong).error_code == "token_hash_mismatch"
+    assert len(calls) == 2
+
+
+def test_cache_hit_still_checks_expiry_and_realm(app, db, make_account, make_realm, make_token):
+    account = make_account("cache_status")
+    realm = make_realm(account)
+    tok, plain = make_token(realm)
+    assert authenticate_token(plain).success is True
+
+    tok.expires_at = datetime.utcnow() - timedelta(minutes=1)
+    db.session.commit()
+    assert authenticate_token(plain).error_code == "token_expired"
+
+    tok.expires_at = None
+    realm.status = "pending"
+    db.session.commit()
+    assert authenticate_token(plain).error_code == "realm_not_approved"
+
+
+@pytest.mark.parametrize("mutation", ["revoke", "regenerate", "update"])
+def test_token_mutations_invalidate_cache(app, make_account, make_realm, make_token, monkeypatch, mutation):
+    calls = _count_verify_calls(monkeypatch)
+    account = make_account(f"cache_{mutation}")
+    realm = make_realm(account)
+    tok, plain = make_token(realm)
+    assert authenticate_token(plain).success is True
+
+    if mutation == "revoke":
+        assert revoke_token(tok.id, account).success is True
+        assert authenticate_token(plain).error_code == "token_revoked"
+    elif mutation == "regenerate":
+        assert regenerate_token(tok.id, account).success is True
+        assert authenticate_token(plain).error_code == "token_revoked"
+    else:
+        assert update_token(tok.id, account, description="edited").success is True
+        assert authenticate_token(plain).success is True
+
+    # The cached verification was dropped, so bcrypt ran again.
+    assert len(calls) == 2
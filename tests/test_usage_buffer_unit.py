@@ -0,0 +1,177 @@
+"""Unit tests for usage_buffer.py — write-behind APIToken usage counters."""
+from __future__ import annotations
+
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import pytest
+from sqlalchemy import event
+
+from netcup_api_filter import lifecycle, usage_buffer
+from netcup_api_filter.token_auth import authenticate_token, log_activity
+from netcup_api_filter.usage_buffer import TokenUsageBuffer
+
+
+@pytest.fixture
+def buffer(app):
+    buf = TokenUsageBuffer(interval=3600, threshold=10_000)
+    buf.bind(app)
+    return buf
+
+
+def _count_updates(db):
+    statements: list[str] = []
+
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("UPDATE"):
+            statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", _before)
+    return statements, lambda: event.remove(db.engine, "before_cursor_execute", _before)
+
+
+def _reload(db, token):
+    db.session.expire(token)
+    return token
+
+
+def test_record_does_not_touch_database(app, db, buffer, make_account, make_realm, make_token):
+    tok, _ = make_token(make_realm(make_account("usage_nowrite")))
+    statements, stop = _count_updates(db)
+    try:
+        buffer.record(tok.id, "192.0.2.1")
+        buffer.record(tok.id, "192.0.2.2")
+    finally:
+        stop()
+    assert statements == []
+    assert buffer.pending() == 1
+    assert _reload(db, tok).use_count in (0, None)
+
+
+def test_flush_issues_one_update_per_token(app, db, buffer, make_account, make_realm, make_token):
+    realm = make_realm(make_account("usage_flush"))
+    tok_a, _ = make_token(realm, name="a")
+    tok_b, _ = make_token(realm, name="b")
+    for _ in range(5):
+        buffer.record(tok_a.id, "192.0.2.1")
+    buffer.record(tok_b.id, "198.51.100.7")
+
+    statements, stop = _count_updates(db)
+    try:
+        assert buffer.flush() == 2
+    finally:
+        stop()
+    assert len(statements) == 2
+    assert _reload(db, tok_a).use_count == 5
+    assert tok_a.last_used_ip == "192.0.2.1"
+    assert _reload(db, tok_b).use_count == 1
+    assert buffer.pending() == 0
+
+
+def test_flush_increments_counts_from_other_workers(app, db, buffer, make_account, make_realm, make_token):
+    tok, _ = make_token(make_realm(make_account("usage_increment")))
+    tok.use_count = 40  # e.g. written by another worker's flush
+    db.session.commit()
+
+    for _ in range(3):
+        buffer.record(tok.id, "192.0.2.1")
+    buffer.flush()
+    assert _reload(db, tok).use_count == 43
+
+
+def test_flush_never_moves_last_used_backwards(app, db, buffer, make_account, make_realm, make_token):
+    tok, _ = make_token(make_realm(make_account("usage_monotonic")))
+    newer = datetime.utcnow()
+    tok.last_used_at = newer
+    tok.last_used_ip = "203.0.113.9"
+    db.session.commit()
+
+    buffer.record(tok.id, "192.0.2.1", when=newer - timedelta(minutes=5))
+    buffer.flush()
+    _reload(db, tok)
+    assert tok.last_used_ip == "203.0.113.9"
+    assert tok.use_count == 1
+
+
+def test_rehash_skips_regenerated_token(app, db, buffer, make_account, make_realm, make_token):
+    realm = make_realm(make_account("usage_rehash"))
+    tok_a, _ = make_token(realm, name="a")
+    tok_b, _ = make_token(realm, name="b")
+    old_a, old_b = tok_a.token_hash, tok_b.token_hash
+    buffer.record_rehash(tok_a.id, old_a, "upgraded-a")
+    buffer.record_rehash(tok_b.id, old_b, "upgraded-b")
+    tok_b.token_hash = "regenerated-b"  # token regenerated before the flush
+    db.session.commit()
+
+    assert buffer.pending() == 2
+    assert buffer.flush() == 2
+    assert _reload(db, tok_a).token_hash == "upgraded-a"
+    assert _reload(db, tok_b).token_hash == "regenerated-b"
+    assert tok_a.use_count in (0, None)
+
+
+def test_threshold_wakes_background_flusher(app, db, make_account, make_realm, make_token):
+    tok, _ = make_token(make_realm(make_account("usage_threshold")))
+    buf = TokenUsageBuffer(interval=3600, threshold=3)
+    buf.bind(app)
+    for _ in range(3):
+        buf.record(tok.id, "192.0.2.1")
+
+    deadline = time.monotonic() + 5
+    while buf.pending() and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert buf.pending() == 0
+    assert _reload(db, tok).use_count == 3
+
+
+def test_log_activity_buffers_usage(app, db, make_account, make_realm, make_token):
+    tok, plain = make_token(make_realm(make_account("usage_log_activity")))
+    usage_buffer.flush_usage()
+    auth = authenticate_token(plain)
+
+    with app.test_request_context("/api/dns/example.com/records"):
+        log_activity(auth, action="api_call", operation="read", domain="example.com",
+                     source_ip="192.0.2.44")
+    assert _reload(db, tok).use_count in (0, None)
+
+    usage_buffer.flush_usage()
+    assert _reload(db, tok).use_count == 1
+    assert tok.last_used_ip == "192.0.2.44"
+
+
+def test_shutdown_hooks_drain_buffer(app, db, make_account, make_realm, make_token):
+    tok, _ = make_token(make_realm(make_account("usage_shutdown")))
+    usage_buffer.record_token_usage(tok.id, "192.0.2.1")
+
+    lifecycle.reset_after_fork()
+    lifecycle.run_shutdown_hooks()
+    lifecycle.reset_after_fork()
+    assert _reload(db, tok).use_count == 1
+
+
+def test_failed_flush_requeue_is_bounded(app, buffer, monkeypatch):
+    buffer.max_pending = 2
+    for token_id in (1, 2, 3):
+        buffer.record(token_id, "192.0.2.1")
+
+    def _fail(*args, **kwargs):
+        raise RuntimeError("database is locked")
+
+    monkeypatch.setattr(usage_buffer, "update", _fail)
+    assert buffer.flush() == 0
+    assert buffer.pending() == 2
+    assert buffer.dropped == 1
+
+    buffer.clear()
+    assert buffer.pending() == 0
+
+
+def test_disposing_engine_unbinds_buffer(app, db, buffer):
+    buffer.record(1, "192.0.2.1")
+    db.engine.dispose()
+    assert buffer.flush() == 0
+    assert buffer.pending() == 1
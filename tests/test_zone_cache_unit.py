@@ -0,0 +1,246 @@
+"""Unit tests for zone_cache.py — read-through zone record cache."""
+from __future__ import annotations
+
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import pytest
+
+from netcup_api_filter import zone_cache
+from netcup_api_filter.netcup_client import NetcupAPIError, NetcupClient
+from netcup_api_filter.zone_cache import ZoneRecordCache, zone_key
+
+KEY = zone_key("netcup:test:1", "Example.com.")
+RECORDS = [{"id": "1", "hostname": "home", "type": "A", "destination": "192.0.2.1"}]
+
+
+@pytest.fixture(autouse=True)
+def _fresh_cache():
+    zone_cache.clear_cache()
+    yield
+    zone_cache.clear_cache()
+
+
+class _Loader:
+    def __init__(self, records=RECORDS):
+        self.records = records
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return [dict(r) for r in self.records]
+
+
+# =============================================================================
+# ZoneRecordCache
+# =============================================================================
+
+def test_key_normalizes_zone():
+    assert KEY == ("netcup:test:1", "example.com")
+
+
+def test_read_through_hits_within_ttl():
+    cache = ZoneRecordCache(ttl_seconds=60)
+    loader = _Loader()
+    assert cache.get_or_load(KEY, loader) == RECORDS
+    assert cache.get_or_load(KEY, loader) == RECORDS
+    assert loader.calls == 1
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_expired_entry_reloads(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(zone_cache.time, "monotonic", lambda: now[0])
+    cache = ZoneRecordCache(ttl_seconds=10)
+    loader = _Loader()
+    cache.get_or_load(KEY, loader)
+    now[0] += 11
+    cache.get_or_load(KEY, loader)
+    assert loader.calls == 2
+
+
+def test_returned_records_are_copies():
+    cache = ZoneRecordCache(ttl_seconds=60)
+    records = cache.get_or_load(KEY, _Loader())
+    records[0]["destination"] = "198.51.100.1"
+    records.append({"id": "2"})
+    assert cache.get(KEY) == RECORDS
+
+
+def test_loader_errors_are_not_cached():
+    cache = ZoneRecordCache(ttl_seconds=60)
+
+    def _fail():
+        raise NetcupAPIError("upstream down")
+
+    with pytest.raises(NetcupAPIError):
+        cache.get_or_load(KEY, _fail)
+    assert cache.get(KEY) is None
+
+
+def test_size_bound_evicts_least_recently_used():
+    cache = ZoneRecordCache(ttl_seconds=60, max_size=2)
+    for zone in ("a.test", "b.test"):
+        cache.put(zone_key("ns", zone), RECORDS)
+    cache.get(zone_key("ns", "a.test"))
+    cache.put(zone_key("ns", "c.test"), RECORDS)
+    assert cache.get(zone_key("ns", "a.test")) is not None
+    assert cache.get(zone_key("ns", "b.test")) is None
+    assert cache.stats()["zones"] == 2
+
+
+def test_disabled_always_loads():
+    cache = ZoneRecordCache(ttl_seconds=0)
+    loader = _Loader()
+    cache.get_or_load(KEY, loader)
+    cache.get_or_load(KEY, loader)
+    assert loader.calls == 2
+    assert cache.stats()["zones"] == 0
+
+
+def test_invalidate_zone_covers_all_namespaces():
+    cache = ZoneRecordCache(ttl_seconds=60)
+    cache.put(zone_key("ns1", "example.com"), RECORDS)
+    cache.put(zone_key("ns2", "example.com"), RECORDS)
+    cache.put(zone_key("ns1", "other.com"), RECORDS)
+    assert cache.invalidate_zone("EXAMPLE.com") == 2
+    assert cache.get(zone_key("ns1", "other.com")) is not None
+
+
+def test_stale_while_revalidate(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(zone_cache.time, "monotonic", lambda: now[0])
+    cache = ZoneRecordCache(ttl_seconds=10, stale_seconds=30)
+    cache.put(KEY, RECORDS)
+    now[0] += 15
+
+    release = threading.Event()
+    fresh = [{"id": "1", "hostname": "home", "type": "A", "destination": "198.51.100.7"}]
+    loader = _Loader(fresh)
+
+    def _slow_loader():
+        release.wait(5)
+        return loader()
+
+    # Stale data is served at once; a single refresh runs in the background
+    assert cache.get_or_load(KEY, _slow_loader) == RECORDS
+    assert cache.get_or_load(KEY, _slow_loader) == RECORDS
+    release.set()
+    for _ in range(100):
+        if cache.get(KEY) == fresh:
+            break
+        threading.Event().wait(0.01)
+    assert cache.get(KEY) == fresh
+    assert loader.calls == 1
+    assert cache.stats()["stale_hits"] == 2
+
+
+def test_stale_window_is_bounded(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(zone_cache.time, "monotonic", lambda: now[0])
+    cache = ZoneRecordCache(ttl_seconds=10, stale_seconds=30)
+    cache.put(KEY, RECORDS)
+    now[0] += 41
+    loader = _Loader()
+    cache.get_or_load(KEY, loader)
+    assert loader.calls == 1
+
+
+# =============================================================================
+# NetcupClient integration
+# =============================================================================
+
+class FakeZone:
+    """Stands in for NetcupClient._session_request with one in-memory zone."""
+
+    def __init__(self, echo_records=True):
+        self.records = [dict(r) for r in RECORDS]
+        self.echo_records = echo_records
+        self.calls: list[str] = []
+
+    def __call__(self, action, param):
+        self.calls.append(action)
+        if action == "infoDnsRecords":
+            return {"responsedata": {"dnsrecords": [dict(r) for r in self.records]}}
+        if action == "updateDnsRecords":
+            for rec in param["dnsrecordset"]["dnsrecords"]:
+                for existing in self.records:
+                    if existing["id"] == rec.get("id"):
+                        existing.update(rec)
+            if self.echo_records:
+                return {"responsedata": {"dnsrecords": [dict(r) for r in self.records]}}
+            return {"responsedata": {}}
+        raise AssertionError(action)
+
+
+def _client(monkeypatch, fake, pooled=True, api_key="key", api_password="pass"):
+    client = NetcupClient("123", api_key, api_password, api_url="http://mock-api/", pooled=pooled)
+    monkeypatch.setattr(client, "_session_request", fake)
+    return client
+
+
+def test_pooled_client_reads_through_cache(monkeypatch):
+    fake = FakeZone()
+    client = _client(monkeypatch, fake)
+    for _ in range(3):
+        assert client.info_dns_records("example.com") == RECORDS
+    assert fake.calls.count("infoDnsRecords") == 1
+
+
+def test_cache_is_scoped_to_credentials(monkeypatch):
+    victim = FakeZone()
+    _client(monkeypatch, victim).info_dns_records("example.com")
+
+    # Same customer number, made-up key or password: never served the cached zone
+    for api_key, api_password in (("WRONG", "pass"), ("key", "WRONG")):
+        other = FakeZone()
+        _client(monkeypatch, other, api_key=api_key, api_password=api_password).info_dns_records("example.com")
+        assert other.calls == ["infoDnsRecords"]
+    assert victim.calls == ["infoDnsRecords"]
+
+
+def test_unpooled_and_uncached_reads_bypass_cache(monkeypatch):
+    fake = FakeZone()
+    _client(monkeypatch, fake, pooled=False).info_dns_records("example.com")
+    pooled = _client(monkeypatch, fake)
+    pooled.info_dns_records("example.com")
+    pooled.info_dns_records("example.com", use_cache=False)
+    assert fake.calls.count("infoDnsRecords") == 3
+
+
+def test_update_refreshes_cache_in_place(monkeypatch):
+    fake = FakeZone()
+    client = _client(monkeypatch, fake)
+    client.info_dns_records("example.com")
+    client.update_dns_records("example.com", [{"id": "1", "destination": "198.51.100.9"}])
+
+    assert client.info_dns_records("example.com")[0]["destination"] == "198.51.100.9"
+    assert fake.calls.count("infoDnsRecords") == 1
+
+
+def test_update_without_record_set_invalidates(monkeypatch):
+    fake = FakeZone(echo_records=False)
+    client = _client(monkeypatch, fake)
+    client.info_dns_records("example.com")
+    client.update_dns_records("example.com", [{"id": "1", "destination": "198.51.100.9"}])
+
+    assert client.info_dns_records("example.com")[0]["destination"] == "198.51.100.9"
+    assert fake.calls.count("infoDnsRecords") == 2
+
+
+def test_failed_update_invalidates(monkeypatch):
+    fake = FakeZone()
+    client = _client(monkeypatch, fake)
+    client.info_dns_records("example.com")
+
+    def _fail(action, param):
+        raise NetcupAPIError("API error: timeout after write")
+
+    monkeypatch.setattr(client, "_session_request", _fail)
+    with pytest.raises(NetcupAPIError):
+        client.update_dns_records("example.com", [{"id": "1", "destination": "198.51.100.9"}])
+    assert zone_cache.get_zone_cache().get(zone_key(client.cache_namespace, "example.com")) is None
@@ -0,0 +1,140 @@
+"""Unit tests for zone_snapshot.py — indexed zone record sets."""
+from __future__ import annotations
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import pytest
+
+from netcup_api_filter import zone_cache
+from netcup_api_filter.backends.base import DNSBackend
+from netcup_api_filter.netcup_client import NetcupClient
+from netcup_api_filter.token_auth import AuthResult, filter_dns_records_in_scope
+from netcup_api_filter.zone_cache import ZoneRecordCache, zone_key
+from netcup_api_filter.zone_snapshot import ZoneSnapshot
+
+RECORDS = [
+    {"id": "1", "hostname": "vpn", "type": "A", "destination": "192.0.2.1"},
+    {"id": "2", "hostname": "www", "type": "A", "destination": "192.0.2.2"},
+    {"id": "3", "hostname": "VPN", "type": "aaaa", "destination": "2001:db8::1"},
+    {"id": "4", "hostname": "@", "type": "MX", "destination": "mail.example.com"},
+    {"id": "5", "hostname": "vpn", "type": "A", "destination": "192.0.2.3"},
+    {"id": "6", "hostname": "a.vpn", "type": "A", "destination": "192.0.2.4"},
+]
+
+
+@pytest.fixture(autouse=True)
+def _fresh_cache():
+    zone_cache.clear_cache()
+    yield
+    zone_cache.clear_cache()
+
+
+# =============================================================================
+# ZoneSnapshot
+# =============================================================================
+
+def test_lookup_by_hostname_and_type():
+    snapshot = ZoneSnapshot(RECORDS, "example.com")
+
+    assert [r["id"] for r in snapshot.lookup("VPN", "a")] == ["1", "5"]
+    assert [r["id"] for r in snapshot.lookup("vpn.", "AAAA")] == ["3"]
+    assert [r["id"] for r in snapshot.lookup("vpn")] == ["1", "3", "5"]
+    assert snapshot.first("vpn", "A")["id"] == "1"
+    assert snapshot.first("vpn", "TXT") is None
+    assert snapshot.lookup("missing") == []
+
+
+def test_lookup_by_id():
+    snapshot = ZoneSnapshot(RECORDS)
+    assert snapshot.get(4)["type"] == "MX"
+    assert snapshot.get("99") is None
+    assert len(snapshot) == len(RECORDS)
+
+
+def test_select_keeps_zone_order():
+    snapshot = ZoneSnapshot(RECORDS)
+    selected = snapshot.select(["a.vpn", "vpn", "@"], ["A", "MX"])
+    assert [r["id"] for r in selected] == ["1", "4", "5", "6"]
+
+
+def test_lookup_results_do_not_change_index():
+    snapshot = ZoneSnapshot(RECORDS)
+    snapshot.lookup("vpn", "A").clear()
+    assert len(snapshot.lookup("vpn", "A")) == 2
+    copies = snapshot.copy_records()
+    copies[0]["destination"] = "changed"
+    assert snapshot.get("1")["destination"] == "192.0.2.1"
+
+
+# =============================================================================
+# Zone cache and clients
+# =============================================================================
+
+def test_cache_indexes_once_per_fetch():
+    cache = ZoneRecordCache(ttl_seconds=60, max_size=10)
+    key = zone_key("netcup:test:1", "example.com")
+    loads = []
+
+    def _loader():
+        loads.append(1)
+        return [dict(r) for r in RECORDS]
+
+    first = cache.get_snapshot(key, _loader)
+    assert cache.get_snapshot(key, _loader) is first
+    assert cache.get_or_load(key, _loader) == RECORDS
+    assert len(loads) == 1
+
+    cache.put(key, RECORDS[:1])
+    assert cache.get_snapshot(key, _loader).lookup("www") == []
+
+
+def test_netcup_client_snapshot_shares_zone_cache(monkeypatch):
+    client = NetcupClient("123", "key", "pass", api_url="http://mock-api/", pooled=True)
+    fetches = []
+    monkeypatch.setattr(client, "_fetch_dns_records",
+                        lambda domain: fetches.append(domain) or [dict(r) for r in RECORDS])
+
+    snapshot = client.dns_snapshot("example.com")
+    assert client.dns_snapshot("example.com") is snapshot
+    assert client.info_dns_records("example.com") == RECORDS
+    assert fetches == ["example.com"]
+
+
+def test_backend_lookups_use_snapshot():
+    class _Backend(DNSBackend):
+        test_connection = list_zones = validate_zone_access = get_zone_info = None
+        create_record = update_record = delete_record = None
+
+        def list_records(self, zone):
+            return [self.normalize_record(r) for r in RECORDS]
+
+    backend = _Backend({})
+    snapshot = backend.snapshot("example.com")
+    assert [r["id"] for r in backend.filter_records_by_hostname(snapshot, "vpn", "A")] == ["1", "5"]
+    assert [r["id"] for r in backend.get_rrset("example.com", "vpn", "AAAA")] == ["3"]
+
+
+# =============================================================================
+# Realm filter
+# =============================================================================
+
+@pytest.mark.parametrize("realm_type,realm_value", [
+    ("host", "vpn"),
+    ("host", ""),
+    ("subdomain", "vpn"),
+    ("subdomain_only", "vpn"),
+])
+def test_scope_filter_matches_list_path(app, db, make_account, make_realm, make_token,
+                                        realm_type, realm_value):
+    realm = make_realm(make_account("snapshot_user"), realm_type=realm_type, realm_value=realm_value,
+                       record_types=("A", "AAAA", "MX"))
+    token, _plain = make_token(realm)
+    auth = AuthResult(success=True, token=token, realm=realm)
+
+    records = [dict(r, type=r["type"].upper()) for r in RECORDS]
+    expected = filter_dns_records_in_scope(auth, "example.com", records)
+    assert expected
+    assert filter_dns_records_in_scope(auth, "example.com", ZoneSnapshot(records)) == expected
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""Benchmark: DNSRecord vs plain dict records for one cached zone.
+
+Compares, for a zone of N records (default 10,000):
+- memory: the cached record list as CCP dicts vs as DNSRecords
+- listing: what a cached listing costs per request; dicts were copied out of
+  the cache (one dict() per record), DNSRecords are shared
+- json: serializing the listing with json.dumps (DNSRecords converted with
+  record_dicts first, as list_records does)
+- response: what list_records serializes per request. Dicts were copied,
+  encoded once for the ETag and once for the body; DNSRecords are
+  converted, encoded once, and the ETag is hashed from the body
+- convert: one-time DNSRecord.from_dict pass when the zone is fetched
+
+Usage:
+    python tooling/profiling/bench_dns_record.py [--records N] [--repeat R]
+
+Stdlib only; imports the app package from ./src.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import hashlib
+import json
+import sys
+import timeit
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src"))
+
+from netcup_api_filter.dns_record import record_dicts, to_records  # noqa: E402
+
+
+def _zone(count: int) -> list[dict]:
+    # Shape of infoDnsRecords entries
+    return [
+        {
+            "id": str(100000 + i),
+            "hostname": f"host{i}",
+            "type": "A" if i % 3 else "AAAA",
+            "priority": "0",
+            "destination": f"192.0.{i // 256 % 256}.{i % 256}" if i % 3 else f"2001:db8::{i:x}",
+            "deleterecord": False,
+            "state": "yes",
+        }
+        for i in range(count)
+    ]
+
+
+def _allocated(build) -> tuple[int, object]:
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    obj = build()
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return size, obj
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=10_000, help="records per zone (default: 10000)")
+    parser.add_argument("--repeat", type=int, default=20, help="timed runs per measurement (default: 20)")
+    args = parser.parse_args()
+
+    source = _zone(args.records)
+    # Measure the cached copies, not the shared source strings
+    dict_bytes, dicts = _allocated(lambda: [dict(r) for r in source])
+    record_bytes, records = _allocated(lambda: to_records(source))
+
+    def _per_run(stmt) -> float:
+        return min(timeit.repeat(stmt, number=1, repeat=args.repeat)) * 1e3
+
+    # Flask's jsonify outside debug mode
+    def _body(listing) -> bytes:
+        return json.dumps({"domain": "example.com", "records": listing, "total": len(listing)},
+                          sort_keys=True, separators=(",", ":")).encode()
+
+    def _dict_response() -> str:
+        listing = [dict(r) for r in dicts]
+        canonical = json.dumps(["example.com", listing], sort_keys=True, separators=(",", ":"), default=str)
+        _body(listing)
+        return hashlib.sha256(canonical.encode()).hexdigest()
+
+    def _record_response() -> str:
+        return hashlib.sha256(_body(record_dicts(records))).hexdigest()
+
+    convert_ms = _per_run(lambda: to_records(source))
+    list_dict_ms = _per_run(lambda: [dict(r) for r in dicts])
+    list_record_ms = _per_run(lambda: list(records))
+    json_dict_ms = _per_run(lambda: json.dumps(dicts))
+    json_record_ms = _per_run(lambda: json.dumps(record_dicts(records)))
+    response_dict_ms = _per_run(_dict_response)
+    response_record_ms = _per_run(_record_response)
+    assert json.dumps(record_dicts(records)) == json.dumps(dicts)
+
+    print(f"zone of {args.records} records\n")
+    print(f"{'':>10} {'dict':>12} {'DNSRecord':>12} {'ratio':>7}")
+    print(f"{'memory':>10} {dict_bytes / 2**20:>10.2f}MB {record_bytes / 2**20:>10.2f}MB "
+          f"{dict_bytes / record_bytes:>6.2f}x")
+    print(f"{'listing':>10} {list_dict_ms:>10.2f}ms {list_record_ms:>10.2f}ms "
+          f"{list_dict_ms / list_record_ms:>6.1f}x")
+    print(f"{'json':>10} {json_dict_ms:>10.2f}ms {json_record_ms:>10.2f}ms "
+          f"{json_dict_ms / json_record_ms:>6.2f}x")
+    print(f"{'listing+json':>10} {list_dict_ms + json_dict_ms:>8.2f}ms "
+          f"{list_record_ms + json_record_ms:>10.2f}ms "
+          f"{(list_dict_ms + json_dict_ms) / (list_record_ms + json_record_ms):>6.2f}x")
+    print(f"{'response':>10} {response_dict_ms:>10.2f}ms {response_record_ms:>10.2f}ms "
+          f"{response_dict_ms / response_record_ms:>6.2f}x")
+    print(f"\nconvert (once per fetch): {convert_ms:.2f}ms")
+    print(f"per record: {dict_bytes / args.records:.0f} B dict, {record_bytes / args.records:.0f} B DNSRecord")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""Microbenchmark: compiled IPAllowlist vs the historical linear range scan.
+
+Compares, for 1 / 100 / 10,000 configured ranges:
+- linear: the pre-compilation check_ip_allowed loop (ip_network() per entry
+  per request)
+- linear-parsed: linear scan over pre-parsed networks (parse cost removed)
+- allowlist: IPAllowlist lookup (compiled once, bisect per request)
+
+Usage:
+    python tooling/profiling/bench_ip_allowlist.py [--lookups N] [--seed S]
+
+Stdlib only; imports the app package from ./src.
+"""
+
+from __future__ import annotations
+
+import argparse
+import ipaddress
+import random
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src"))
+
+from netcup_api_filter.ip_allowlist import IPAllowlist  # noqa: E402
+
+
+def _random_ranges(rng: random.Random, count: int) -> list[str]:
+    ranges = []
+    for i in range(count):
+        if i % 4 == 3:
+            addr = ipaddress.IPv6Address(rng.getrandbits(128))
+            ranges.append(str(ipaddress.ip_network(f"{addr}/{rng.randint(32, 64)}", strict=False)))
+        else:
+            addr = ipaddress.IPv4Address(rng.getrandbits(32))
+            ranges.append(str(ipaddress.ip_network(f"{addr}/{rng.randint(16, 30)}", strict=False)))
+    return ranges
+
+
+def _linear(ranges: list[str], client_ip: str) -> bool:
+    ip_obj = ipaddress.ip_address(client_ip)
+    for allowed in ranges:
+        try:
+            if "/" in allowed:
+                if ip_obj in ipaddress.ip_network(allowed, strict=False):
+                    return True
+            elif ip_obj == ipaddress.ip_address(allowed):
+                return True
+        except ValueError:
+            continue
+    return False
+
+
+def _linear_parsed(networks: list, client_ip: str) -> bool:
+    ip_obj = ipaddress.ip_address(client_ip)
+    return any(ip_obj in network for network in networks)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lookups", type=int, default=2000, help="lookups per size (default: 2000)")
+    parser.add_argument("--seed", type=int, default=1234)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    # Mostly misses (worst case for the linear scan), like real denied traffic.
+    probes = [str(ipaddress.IPv4Address(rng.getrandbits(32))) for _ in range(args.lookups)]
+
+    print(f"{'ranges':>7} {'linear':>12} {'linear-parsed':>14} {'allowlist':>12} {'build':>10} {'speedup':>8}")
+    for size in (1, 100, 10_000):
+        ranges = _random_ranges(rng, size)
+        networks = [ipaddress.ip_network(r, strict=False) for r in ranges]
+        build_s = timeit.timeit(lambda: IPAllowlist(networks), number=1)
+        allowlist = IPAllowlist(networks)
+
+        # The linear scan is too slow to run every probe at 10k ranges.
+        linear_probes = probes if size < 10_000 else probes[: max(1, len(probes) // 20)]
+        linear_s = timeit.timeit(lambda: [_linear(ranges, p) for p in linear_probes], number=1)
+        parsed_s = timeit.timeit(lambda: [_linear_parsed(networks, p) for p in linear_probes], number=1)
+        fast_s = timeit.timeit(lambda: [p in allowlist for p in probes], number=1)
+
+        linear_us = linear_s / len(linear_probes) * 1e6
+        parsed_us = parsed_s / len(linear_probes) * 1e6
+        fast_us = fast_s / len(probes) * 1e6
+        print(
+            f"{size:>7} {linear_us:>10.2f}us {parsed_us:>12.2f}us {fast_us:>10.2f}us "
+            f"{build_s * 1e3:>8.2f}ms {linear_us / fast_us:>7.0f}x"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""Microbenchmark: token hash verification, legacy bcrypt vs keyed HMAC.
+
+Compares the per-request cost of verify_token_hash() for:
+- bcrypt: legacy stored hashes (SHA256 pre-hash + bcrypt.checkpw)
+- hmac: current "hmac-sha256$<key_id>$<hex>" hashes (with and without pepper)
+
+Usage:
+    python tooling/profiling/bench_token_hash.py [--verifies N]
+
+Imports the app package from ./src.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src"))
+
+from netcup_api_filter.models import (  # noqa: E402
+    generate_token,
+    generate_user_alias,
+    hash_token,
+    hash_token_bcrypt,
+    verify_token_hash,
+)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--verifies", type=int, default=20000, help="HMAC verifications (default: 20000)")
+    parser.add_argument("--bcrypt-verifies", type=int, default=20, help="bcrypt verifications (default: 20)")
+    args = parser.parse_args()
+
+    token = generate_token(generate_user_alias())
+    rows = []
+
+    legacy = hash_token_bcrypt(token)
+    seconds = timeit.timeit(lambda: verify_token_hash(token, legacy), number=args.bcrypt_verifies)
+    rows.append(("bcrypt", seconds / args.bcrypt_verifies))
+
+    os.environ.pop("TOKEN_HASH_PEPPER", None)
+    unkeyed = hash_token(token)
+    seconds = timeit.timeit(lambda: verify_token_hash(token, unkeyed), number=args.verifies)
+    rows.append(("hmac (no pepper)", seconds / args.verifies))
+
+    os.environ["TOKEN_HASH_PEPPER"] = "benchmark-pepper"
+    peppered = hash_token(token)
+    seconds = timeit.timeit(lambda: verify_token_hash(token, peppered), number=args.verifies)
+    rows.append(("hmac (pepper)", seconds / args.verifies))
+
+    baseline = rows[0][1]
+    print(f"{'scheme':<18} {'per verify':>12} {'speedup':>9}")
+    for name, per_call in rows:
+        print(f"{name:<18} {per_call * 1e6:>10.1f}us {baseline / per_call:>8.0f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
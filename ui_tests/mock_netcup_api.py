@@ -183,7 +183,7 @@ def create_mock_api_app() -> Flask:
         if not _validate_session(session_id, customer_id, api_key):
             return jsonify({
                 "status": "error",
-                "statuscode": 4013,
+                "statuscode": 4001,
                 "shortmessage": "Validation Error",
                 "longmessage": "Invalid session"
             }), 401
@@ -222,7 +222,7 @@ def create_mock_api_app() -> Flask:
         if not _validate_session(session_id, customer_id, api_key):
             return jsonify({
                 "status": "error",
-                "statuscode": 4013,
+                "statuscode": 4001,
                 "shortmessage": "Validation Error",
                 "longmessage": "Invalid session"
             }), 401
@@ -303,7 +303,7 @@ def create_mock_api_app() -> Flask:
         if not _validate_session(session_id, customer_id, api_key):
             return jsonify({
                 "status": "error",
-                "statuscode": 4013,
+                "statuscode": 4001,
                 "shortmessage": "Validation Error",
                 "longmessage": "Invalid session"
             }), 401